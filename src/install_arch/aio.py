@@ -0,0 +1,302 @@
+"""Asyncio counterparts of FileSystemOps and PackageManager.
+
+Commands run through ``asyncio.create_subprocess_exec`` so many repos or
+venvs can be driven from one event loop. A semaphore bounds how many
+child processes run at once, and cancelling a call kills its child.
+"""
+
+import asyncio
+import os
+import shutil
+import subprocess
+from pathlib import Path
+from typing import Iterable, List, Optional, Sequence
+
+from .config import DevConfig, get_config
+from .filesystem import FileOpResult, PathLike
+from .gitindex import UnsupportedIndexError, iter_index_files
+from .gitrepo import GitRepository, find_repository
+from .package_manager import PackageManager
+from .venvstamp import clear_stamp
+
+
+def default_concurrency() -> int:
+    """Default cap on concurrently running child processes."""
+    return os.cpu_count() or 4
+
+
+async def run_process(
+    cmd: Sequence[str],
+    cwd: Optional[Path] = None,
+    input: Optional[str] = None,
+    check: bool = True,
+    limit: Optional[asyncio.Semaphore] = None,
+) -> subprocess.CompletedProcess:
+    """Run a command to completion and capture its output as text.
+
+    Mirrors ``subprocess.run(..., capture_output=True, text=True)``:
+    CalledProcessError is raised on a non-zero exit when ``check`` is
+    set. If the awaiting task is cancelled the child is killed and
+    reaped before the cancellation propagates.
+    """
+    if limit is None:
+        return await _run_process(cmd, cwd, input, check)
+    async with limit:
+        return await _run_process(cmd, cwd, input, check)
+
+
+async def _run_process(
+    cmd: Sequence[str],
+    cwd: Optional[Path],
+    input: Optional[str],
+    check: bool,
+) -> subprocess.CompletedProcess:
+    proc = await asyncio.create_subprocess_exec(
+        *cmd,
+        cwd=cwd or Path.cwd(),
+        stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await proc.communicate(
+            input.encode() if input is not None else None
+        )
+    except BaseException:
+        if proc.returncode is None:
+            proc.kill()
+            # Shield the reap so a second cancellation cannot leave a zombie
+            await asyncio.shield(proc.wait())
+        raise
+
+    returncode = proc.returncode
+    assert returncode is not None
+    result = subprocess.CompletedProcess(
+        list(cmd),
+        returncode,
+        stdout.decode(errors="replace"),
+        stderr.decode(errors="replace"),
+    )
+    if check and returncode:
+        raise subprocess.CalledProcessError(
+            returncode, list(cmd), result.stdout, result.stderr
+        )
+    return result
+
+
+class AsyncFileSystemOps:
+    """Git-backed filesystem operations for asyncio callers.
+
+    Each instance works on the repository containing ``cwd`` (default:
+    the current directory), so one loop can drive several repos.
+    Instances can share a ``limit`` semaphore to cap processes globally.
+    """
+
+    def __init__(
+        self,
+        config: Optional[DevConfig] = None,
+        cwd: Optional[PathLike] = None,
+        limit: Optional[asyncio.Semaphore] = None,
+    ):
+        self.config = config or get_config()
+        self.use_git = self.config.use_git_ops
+        self.cwd = Path(cwd) if cwd is not None else None
+        self.limit = limit or asyncio.Semaphore(default_concurrency())
+
+    def _repository(self) -> Optional[GitRepository]:
+        return find_repository(self.cwd)
+
+    async def _run_git_command(
+        self,
+        cmd: List[str],
+        cwd: Optional[Path] = None,
+        input: Optional[str] = None,
+        check: bool = True,
+    ) -> subprocess.CompletedProcess:
+        """Run a git command, optionally feeding ``input`` on stdin."""
+        if not self.use_git:
+            raise RuntimeError("Git operations disabled in configuration")
+
+        try:
+            return await run_process(
+                ["git"] + cmd,
+                cwd=cwd or self.cwd,
+                input=input,
+                check=check,
+                limit=self.limit,
+            )
+        except subprocess.CalledProcessError as e:
+            print(f"Git command failed: git {' '.join(cmd)}")
+            print(f"stdout: {e.stdout}")
+            print(f"stderr: {e.stderr}")
+            raise
+
+    def _resolve(self, path: PathLike) -> Path:
+        path = Path(path)
+        if self.cwd is None or path.is_absolute():
+            return path
+        return self.cwd / path
+
+    async def move_file(self, src: PathLike, dst: PathLike) -> None:
+        """Move a file, using git mv if configured."""
+        if self.use_git and self._repository() is not None:
+            await self._run_git_command(["mv", str(src), str(dst)])
+        else:
+            await asyncio.to_thread(
+                shutil.move, str(self._resolve(src)), str(self._resolve(dst))
+            )
+
+    async def remove_file(self, path: PathLike) -> None:
+        """Remove a file, using git rm if configured."""
+        if self.use_git and self._repository() is not None:
+            await self._run_git_command(["rm", str(path)])
+        else:
+            self._resolve(path).unlink(missing_ok=True)
+
+    async def stage_files(self, files: Iterable[PathLike]) -> List[FileOpResult]:
+        """Stage files for commit.
+
+        Paths are streamed to one ``git add`` on stdin. If the batch
+        fails, files are retried concurrently to attribute the error.
+        """
+        paths = [Path(f) for f in files]
+        if not self.use_git or not paths:
+            return []
+
+        batch_cmd = ["--literal-pathspecs", "add"]
+        try:
+            await self._run_git_command(
+                [*batch_cmd, "--pathspec-from-file=-", "--pathspec-file-nul"],
+                input="".join(f"{p}\0" for p in paths),
+            )
+            return [FileOpResult(p, True) for p in paths]
+        except subprocess.CalledProcessError as e:
+            if len(paths) == 1:
+                error = (e.stderr or "").strip() or "git command failed"
+                return [FileOpResult(paths[0], False, error)]
+
+        async def stage_one(path: Path) -> FileOpResult:
+            proc = await self._run_git_command(
+                [*batch_cmd, "--", str(path)], check=False
+            )
+            if proc.returncode == 0:
+                return FileOpResult(path, True)
+            return FileOpResult(
+                path, False, proc.stderr.strip() or "git command failed"
+            )
+
+        return list(await asyncio.gather(*(stage_one(p) for p in paths)))
+
+    async def get_repo_files(self, pattern: str = "*") -> List[Path]:
+        """Get tracked files matching a git pathspec, like ``git ls-files``."""
+        repo = self._repository()
+        if repo is None:
+            return []
+
+        try:
+            return list(iter_index_files(repo, pattern, cwd=self.cwd))
+        except (UnsupportedIndexError, OSError):
+            pass
+
+        try:
+            result = await self._run_git_command(["ls-files", "-z", "--", pattern])
+        except subprocess.CalledProcessError:
+            return []
+        return [Path(p) for p in result.stdout.split("\0") if p]
+
+    async def commit_changes(self, message: str) -> None:
+        """Commit staged changes."""
+        if not self.use_git:
+            return
+
+        await self._run_git_command(["commit", "-m", message])
+
+
+class AsyncPackageManager:
+    """Package manager operations for asyncio callers.
+
+    Commands are the ones PackageManager runs, executed in ``cwd``
+    (default: the current directory).
+    """
+
+    def __init__(
+        self,
+        config: Optional[DevConfig] = None,
+        cwd: Optional[PathLike] = None,
+        limit: Optional[asyncio.Semaphore] = None,
+    ):
+        self.config = config or get_config()
+        self.tool = self.config.package_manager
+        self.cwd = Path(cwd) if cwd is not None else None
+        self.limit = limit or asyncio.Semaphore(default_concurrency())
+        # Builds the command lines; never runs anything itself
+        self._commands = PackageManager(self.config)
+
+    async def _run_command(
+        self, cmd: List[str], cwd: Optional[Path] = None
+    ) -> subprocess.CompletedProcess:
+        """Run a command and return the result."""
+        try:
+            return await run_process(cmd, cwd=cwd or self.cwd, limit=self.limit)
+        except subprocess.CalledProcessError as e:
+            print(f"Command failed: {' '.join(cmd)}")
+            print(f"stdout: {e.stdout}")
+            print(f"stderr: {e.stderr}")
+            raise
+
+    async def _is_installed(self, tool: str) -> bool:
+        # Usually a cache hit; a changed binary is probed off the loop
+        return await asyncio.to_thread(PackageManager._is_installed, tool)
+
+    async def install_tool(self) -> None:
+        """Install the configured package manager if needed."""
+        if self.tool not in ("uv", "poetry"):
+            # pip and pipenv are usually pre-installed
+            return
+        if await self._is_installed(self.tool):
+            return
+        print(f"Installing {self.tool}...")
+        await self._run_command(self._commands._install_script_command(self.tool))
+        if self.tool == "uv":
+            self._commands._add_uv_to_path()
+
+    async def create_venv(self, path: Optional[Path] = None) -> Path:
+        """Create a virtual environment, keeping one that already exists.
+
+        In template mode the venv is cloned from the template venv, as
+        PackageManager.create_venv does. The clone runs in a worker
+        thread holding one slot of ``limit``; cancelling the call does
+        not stop a template build that has started.
+        """
+        project_dir = self.cwd or Path.cwd()
+        venv_path = path or Path(self.config.venv_path)
+        cmd = self._commands._venv_command(venv_path)
+        if cmd is not None and not self._commands._venv_exists(project_dir / venv_path):
+            if self.config.venv_template:
+                async with self.limit:
+                    await asyncio.to_thread(
+                        self._commands.venv_templates().clone,
+                        project_dir / venv_path,
+                        True,
+                        project_dir,
+                    )
+            else:
+                await self._run_command(cmd)
+        return venv_path
+
+    async def install_dependencies(
+        self, dev: bool = False, force: bool = False
+    ) -> bool:
+        """Install project dependencies unless the venv's stamp is current."""
+        project_dir = self.cwd or Path.cwd()
+        if not force and await asyncio.to_thread(
+            self._commands.dependencies_current, dev, project_dir
+        ):
+            return False
+        wheelhouse = self._commands.wheelhouse(project_dir, dev)
+        clear_stamp(self._commands._venv_dir(project_dir))
+        await self._run_command(
+            self._commands._install_command(dev, wheelhouse, project_dir=project_dir)
+        )
+        await asyncio.to_thread(self._commands._stamp_dependencies, dev, project_dir)
+        return True
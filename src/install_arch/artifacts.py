@@ -0,0 +1,335 @@
+"""Content-addressed store for build and test artifacts.
+
+Artifacts are stored once per BLAKE2b digest under ``objects/``, so
+identical outputs of repeated runs share one copy on disk. Files handed
+out are copies, reflinked where the filesystem supports it, unless the
+caller asks for hardlinks. A JSON index maps logical names to digests
+and records when each object was last used and its mtime; the least
+recently used objects are evicted once the store exceeds its quota.
+
+Objects are read-only, but a hardlinked copy can still be written
+through, by root for one. An object whose size or mtime no longer
+matches the index is hashed again: a corrupted object is a miss on
+lookup, and storing the same content again replaces it.
+"""
+
+import errno
+import fcntl
+import hashlib
+import json
+import os
+import stat
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from . import fastcopy
+
+PathLike = Union[str, Path]
+
+DIGEST_SIZE = 32
+
+INDEX_FORMAT = 2
+
+
+def file_digest(path: PathLike) -> str:
+    """BLAKE2b digest of a file's contents as hex."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(
+            f, lambda: hashlib.blake2b(digest_size=DIGEST_SIZE)
+        ).hexdigest()
+
+
+@dataclass(frozen=True)
+class Artifact:
+    """A named artifact and the stored object holding its contents."""
+
+    name: str
+    digest: str
+    size: int
+    path: Path
+
+
+@dataclass(frozen=True)
+class StoreStats:
+    """Size and effectiveness of an artifact store."""
+
+    names: int
+    objects: int
+    bytes: int
+    quota: Optional[int]
+    hits: int
+    misses: int
+    # Bytes not written because the content was already stored
+    deduplicated_bytes: int
+    evicted_bytes: int
+
+
+def _materialize(src: Path, dst: Path, link: bool) -> None:
+    """Replace ``dst`` with a copy of ``src``, or a hardlink if ``link``.
+
+    Links fall back to copies across devices.
+    """
+    tmp = dst.with_name(f".{dst.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    if link:
+        try:
+            os.link(src, tmp)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK):
+                raise
+            link = False
+    if not link:
+        fastcopy.copy_file(src, tmp)
+        # Unlike the object, a copy is the caller's to modify
+        os.chmod(tmp, stat.S_IMODE(os.stat(tmp).st_mode) | stat.S_IWUSR)
+    os.replace(tmp, dst)
+
+
+class ArtifactStore:
+    """Deduplicating artifact store rooted at one directory.
+
+    Safe to share between threads and processes: index updates are made
+    under an exclusive ``flock`` and written with an atomic rename.
+    """
+
+    def __init__(self, root: PathLike, quota: Optional[int] = None):
+        self.root = Path(root)
+        self.objects_dir = self.root / "objects"
+        self.index_path = self.root / "index.json"
+        self.quota = quota
+        self._lock = threading.Lock()
+        # Parsed index and the stat signature it was read at
+        self._cached: Optional[Tuple[Tuple[int, int, int], Dict[str, Any]]] = None
+        self._counters = {"hits": 0, "misses": 0, "deduplicated": 0, "evicted": 0}
+
+    def object_path(self, digest: str) -> Path:
+        """Where the object with a digest is (or would be) stored."""
+        return self.objects_dir / digest[:2] / digest[2:]
+
+    def _read_index(self) -> Dict[str, Any]:
+        """The current index, reparsed only when the file has changed."""
+        try:
+            st = os.stat(self.index_path)
+        except FileNotFoundError:
+            return {"format": INDEX_FORMAT, "names": {}, "objects": {}}
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._lock:
+            if self._cached is not None and self._cached[0] == key:
+                return self._cached[1]
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            index = {}
+        if index.get("format") != INDEX_FORMAT:
+            index = {"format": INDEX_FORMAT, "names": {}, "objects": {}}
+        with self._lock:
+            self._cached = (key, index)
+        return index
+
+    def _write_index(self, index: Dict[str, Any]) -> None:
+        tmp = self.index_path.with_suffix(f".{os.getpid()}.tmp")
+        tmp.write_text(json.dumps(index), encoding="utf-8")
+        os.replace(tmp, self.index_path)
+
+    @contextmanager
+    def _locked_index(self) -> Iterator[Dict[str, Any]]:
+        """Lock the store and yield a private copy of the index to modify.
+
+        The index is written back when the block exits without raising.
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            current = self._read_index()
+            index = {
+                "format": INDEX_FORMAT,
+                "names": dict(current["names"]),
+                "objects": {k: list(v) for k, v in current["objects"].items()},
+            }
+            yield index
+            self._write_index(index)
+
+    def _ingest(self, source: Path, digest: str, replace: bool = False) -> bool:
+        """Store a file's contents as an object; False if already stored.
+
+        With ``replace`` an existing object is replaced by a fresh copy.
+        """
+        obj = self.object_path(digest)
+        if obj.exists() and not replace:
+            return False
+        obj.parent.mkdir(parents=True, exist_ok=True)
+        tmp = obj.with_name(f".{obj.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        # Copy rather than link so later writes to the source cannot
+        # change the stored object; reflinks make this cheap where possible
+        fastcopy.copy_file(source, tmp)
+        os.chmod(tmp, 0o444)
+        os.replace(tmp, obj)
+        return True
+
+    def _intact(self, digest: str, entry: Optional[List[Any]]) -> bool:
+        """Whether the object exists and still holds the digest's content.
+
+        An object with the size and mtime recorded in its index ``entry``
+        is trusted; any other is hashed again.
+        """
+        try:
+            st = self.object_path(digest).stat()
+        except FileNotFoundError:
+            return False
+        if entry is not None and (st.st_size, st.st_mtime_ns) == (entry[0], entry[2]):
+            return True
+        return file_digest(self.object_path(digest)) == digest
+
+    def put(self, name: str, path: PathLike, link: bool = False) -> Artifact:
+        """Store a file under a logical name.
+
+        With ``link`` the file at ``path`` is replaced by a hardlink to the
+        stored object, so every copy of the same content shares one inode;
+        writing through that link corrupts the object. Hashing and copying
+        happen outside the store lock.
+        """
+        source = Path(path)
+        digest = file_digest(source)
+        size = source.stat().st_size
+        entry = self._read_index()["objects"].get(digest)
+        if self._intact(digest, entry):
+            with self._lock:
+                self._counters["deduplicated"] += size
+        else:
+            self._ingest(source, digest, replace=True)
+
+        obj = self.object_path(digest)
+        with self._locked_index() as index:
+            if not obj.exists():
+                # Evicted by another process since it was stored above
+                self._ingest(source, digest)
+            index["names"][name] = digest
+            index["objects"][digest] = [size, time.time(), obj.stat().st_mtime_ns]
+            if self.quota is not None:
+                self._evict(index, self.quota, keep=digest)
+
+        if link:
+            _materialize(obj, source, link=True)
+        return Artifact(name, digest, size, obj)
+
+    def get(self, name: str) -> Optional[Artifact]:
+        """Look up an artifact by name, marking it as recently used.
+
+        A corrupted object is removed and the lookup is a miss.
+        """
+        index = self._read_index()
+        digest = index["names"].get(name)
+        if digest is None or not self._intact(digest, index["objects"].get(digest)):
+            if digest is not None and self.object_path(digest).exists():
+                self._drop_object(digest)
+            with self._lock:
+                self._counters["misses"] += 1
+            return None
+
+        with self._locked_index() as index:
+            entry = index["objects"].get(digest)
+            if entry is not None:
+                entry[1] = time.time()
+        with self._lock:
+            self._counters["hits"] += 1
+        size = entry[0] if entry is not None else 0
+        return Artifact(name, digest, size, self.object_path(digest))
+
+    def checkout(self, name: str, dst: PathLike, link: bool = False) -> Optional[Path]:
+        """Copy a named artifact to ``dst``; None if it is not stored.
+
+        With ``link`` the artifact is hardlinked instead, as in ``put``.
+        """
+        artifact = self.get(name)
+        if artifact is None:
+            return None
+        dst_path = Path(dst)
+        dst_path.parent.mkdir(parents=True, exist_ok=True)
+        _materialize(artifact.path, dst_path, link)
+        return dst_path
+
+    def _drop_object(self, digest: str) -> None:
+        """Forget a corrupted object and every name referring to it."""
+        with self._locked_index() as index:
+            # Stored again by another process since it was checked
+            if self._intact(digest, index["objects"].get(digest)):
+                return
+            index["objects"].pop(digest, None)
+            index["names"] = {
+                name: value for name, value in index["names"].items() if value != digest
+            }
+            self._unlink_object(digest)
+
+    def remove(self, name: str) -> bool:
+        """Forget a name, deleting its object once nothing else refers to it."""
+        with self._locked_index() as index:
+            digest = index["names"].pop(name, None)
+            if digest is None:
+                return False
+            if digest not in index["names"].values():
+                index["objects"].pop(digest, None)
+                self._unlink_object(digest)
+        return True
+
+    def evict(self, quota: Optional[int] = None) -> int:
+        """Evict least recently used objects until the store fits ``quota``.
+
+        Defaults to the store's own quota. Returns the bytes freed.
+        """
+        limit = self.quota if quota is None else quota
+        if limit is None:
+            return 0
+        with self._locked_index() as index:
+            return self._evict(index, limit)
+
+    def _evict(
+        self, index: Dict[str, Any], limit: int, keep: Optional[str] = None
+    ) -> int:
+        objects = index["objects"]
+        total = sum(size for size, _, _ in objects.values())
+        freed = 0
+        for digest, (size, _, _) in sorted(objects.items(), key=lambda kv: kv[1][1]):
+            if total <= limit:
+                break
+            if digest == keep:
+                continue
+            del objects[digest]
+            self._unlink_object(digest)
+            total -= size
+            freed += size
+        if freed:
+            index["names"] = {
+                name: digest
+                for name, digest in index["names"].items()
+                if digest in objects
+            }
+            with self._lock:
+                self._counters["evicted"] += freed
+        return freed
+
+    def _unlink_object(self, digest: str) -> None:
+        # Hardlinked checkouts keep their data; only the store's link goes
+        try:
+            self.object_path(digest).unlink()
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> StoreStats:
+        """Current size of the store and lookup counters for this process."""
+        index = self._read_index()
+        with self._lock:
+            counters = dict(self._counters)
+        return StoreStats(
+            names=len(index["names"]),
+            objects=len(index["objects"]),
+            bytes=sum(size for size, _, _ in index["objects"].values()),
+            quota=self.quota,
+            hits=counters["hits"],
+            misses=counters["misses"],
+            deduplicated_bytes=counters["deduplicated"],
+            evicted_bytes=counters["evicted"],
+        )
@@ -0,0 +1,207 @@
+"""Compiled, cached loading of the package functionality baseline."""
+
+import hashlib
+import json
+import os
+import threading
+import tomllib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from . import __version__
+from .config import cache_dir
+
+BASELINE_PATH = (
+    Path(__file__).parent.parent.parent
+    / ".github"
+    / "guardrails"
+    / "package-baseline.toml"
+)
+PACKAGED_BASELINE_PATH = Path(__file__).parent / "package-baseline.toml"
+
+# Bump when the compiled layout changes so stale cache files are ignored
+CACHE_FORMAT = 1
+
+
+@dataclass(frozen=True)
+class CompiledBaseline:
+    """Pre-validated, query-ready form of the guardrails baseline."""
+
+    raw: Dict[str, Any] = field(default_factory=dict)
+    supported_tools: FrozenSet[str] = frozenset()
+    compliance_checks: Dict[str, bool] = field(default_factory=dict)
+    baseline_requirements: Dict[str, str] = field(default_factory=dict)
+    temp_structure: Dict[str, str] = field(default_factory=dict)
+    # Notes about disagreements between the reconciled baseline copies
+    drift: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_dict(
+        cls, raw: Dict[str, Any], drift: Tuple[str, ...] = ()
+    ) -> "CompiledBaseline":
+        """Compile a parsed baseline document."""
+        return cls(
+            raw=raw,
+            supported_tools=frozenset(raw.get("tool_configuration", {})),
+            compliance_checks={
+                k: bool(v) for k, v in raw.get("compliance_checks", {}).items()
+            },
+            baseline_requirements={
+                k: str(v) for k, v in raw.get("baseline_requirements", {}).items()
+            },
+            temp_structure={
+                k: str(v)
+                for k, v in raw.get("filesystem_rules", {})
+                .get("temp_structure", {})
+                .items()
+            },
+            drift=drift,
+        )
+
+    def to_json(self) -> Dict[str, Any]:
+        """Serialize for the on-disk cache."""
+        return {
+            "raw": self.raw,
+            "supported_tools": sorted(self.supported_tools),
+            "compliance_checks": self.compliance_checks,
+            "baseline_requirements": self.baseline_requirements,
+            "temp_structure": self.temp_structure,
+            "drift": list(self.drift),
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> "CompiledBaseline":
+        """Rebuild from the on-disk cache without re-deriving anything."""
+        return cls(
+            raw=data["raw"],
+            supported_tools=frozenset(data["supported_tools"]),
+            compliance_checks=data["compliance_checks"],
+            baseline_requirements=data["baseline_requirements"],
+            temp_structure=data["temp_structure"],
+            drift=tuple(data["drift"]),
+        )
+
+
+def _merge(base: Dict[str, Any], override: Dict[str, Any]) -> Dict[str, Any]:
+    """Deep-merge two TOML documents, with override taking precedence."""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _reconcile(layers: List[Tuple[Path, Dict[str, Any]]]) -> CompiledBaseline:
+    """Merge baseline copies in priority order and record tool-set drift."""
+    raw: Dict[str, Any] = {}
+    drift: List[str] = []
+    tool_sets = []
+    for path, doc in layers:
+        raw = _merge(raw, doc)
+        if "tool_configuration" in doc:
+            tool_sets.append((path, set(doc["tool_configuration"])))
+
+    for (path_a, tools_a), (path_b, tools_b) in zip(tool_sets, tool_sets[1:]):
+        for tool in sorted(tools_a ^ tools_b):
+            where = path_a if tool in tools_a else path_b
+            drift.append(f"tool '{tool}' only configured in {where}")
+
+    return CompiledBaseline.from_dict(raw, tuple(drift))
+
+
+class BaselineLoader:
+    """Loads compiled baselines through in-memory and on-disk caches.
+
+    The cache key is a BLAKE2b digest of every layer's content plus the
+    package version, so any edit to either baseline copy or an upgrade of
+    the tool produces a fresh compile.
+    """
+
+    def __init__(self, cache_path: Optional[Path] = None):
+        self._cache_path = cache_path
+        self._lock = threading.Lock()
+        self._memory: Dict[str, CompiledBaseline] = {}
+
+    @property
+    def cache_path(self) -> Path:
+        return self._cache_path or cache_dir()
+
+    def _read_layers(self, paths: List[Path]) -> List[Tuple[Path, bytes]]:
+        layers = []
+        for path in paths:
+            try:
+                layers.append((path, path.read_bytes()))
+            except OSError:
+                continue
+        return layers
+
+    @staticmethod
+    def _digest(layers: List[Tuple[Path, bytes]]) -> str:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{__version__}:{CACHE_FORMAT}".encode())
+        for path, content in layers:
+            h.update(path.name.encode() + b"\0")
+            h.update(hashlib.blake2b(content, digest_size=16).digest())
+        return h.hexdigest()
+
+    def load(self, path: Optional[Path] = None) -> CompiledBaseline:
+        """Load a baseline, reconciling both shipped copies by default.
+
+        With no path the packaged copy provides defaults and the .github
+        specification overrides it. An explicit path is loaded on its own.
+        """
+        paths = [PACKAGED_BASELINE_PATH, BASELINE_PATH] if path is None else [path]
+        layers = self._read_layers(paths)
+        if not layers:
+            return CompiledBaseline()
+
+        digest = self._digest(layers)
+        with self._lock:
+            if digest in self._memory:
+                return self._memory[digest]
+
+        cache_file = self.cache_path / f"baseline-{digest}.json"
+        compiled = self._read_cache(cache_file)
+        if compiled is None:
+            compiled = _reconcile(
+                [(p, tomllib.loads(content.decode())) for p, content in layers]
+            )
+            self._write_cache(cache_file, compiled)
+
+        with self._lock:
+            self._memory[digest] = compiled
+        return compiled
+
+    def _read_cache(self, cache_file: Path) -> Optional[CompiledBaseline]:
+        try:
+            with open(cache_file, encoding="utf-8") as f:
+                return CompiledBaseline.from_json(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _write_cache(self, cache_file: Path, compiled: CompiledBaseline) -> None:
+        # The cache is an optimization: never fail a load because of it
+        try:
+            payload = json.dumps(compiled.to_json())
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+            tmp_file.write_text(payload, encoding="utf-8")
+            os.replace(tmp_file, cache_file)
+        except (OSError, TypeError, ValueError):
+            pass
+
+    def clear(self) -> None:
+        """Drop the in-memory cache."""
+        with self._lock:
+            self._memory.clear()
+
+
+_loader = BaselineLoader()
+
+
+def load_baseline(path: Optional[Path] = None) -> CompiledBaseline:
+    """Load a compiled baseline through the process-wide loader."""
+    return _loader.load(path)
@@ -1,243 +1,143 @@
-"""Command-line interface for development environment management."""
+"""Command-line interface for development environment management.
 
-import shutil
-import subprocess
-import sys
+Subcommands live in :mod:`install_arch.commands` and are imported only when
+looked up; component modules are imported, and components built, only when a
+command first asks for them. Cheap commands do not pay for the whole stack.
+Keep module-level imports here limited to click and the standard library.
+"""
+
+import importlib
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
 
 import click
 
-from .config import DevConfig
-from .filesystem import FileSystemOps
-from .guardrails import GuardrailsValidator
-from .package_manager import PackageManager
 
+def _build_config(obj: "LazyContext") -> Any:
+    from .config import get_config
 
-@click.group()
-@click.option(
-    "--config",
-    "config_path",
-    type=click.Path(exists=True),
-    help="Path to dev-config.toml",
-)
-@click.pass_context
-def cli(ctx, config_path):
-    """Install Arch development environment manager."""
-    config = DevConfig(Path(config_path) if config_path else None)
-    fs_ops = FileSystemOps(config)
-    pkg_mgr = PackageManager(config)
+    return get_config(obj.config_path)
 
-    ctx.ensure_object(dict)
-    ctx.obj["config"] = config
-    ctx.obj["fs_ops"] = fs_ops
-    ctx.obj["pkg_mgr"] = pkg_mgr
-    ctx.obj["validator"] = GuardrailsValidator()
 
+def _build_fs_ops(obj: "LazyContext") -> Any:
+    from .filesystem import FileSystemOps
 
-@cli.command()
-@click.pass_context
-def setup(ctx):
-    """Set up the development environment."""
-    config = ctx.obj["config"]
-    fs_ops = ctx.obj["fs_ops"]
-    pkg_mgr = ctx.obj["pkg_mgr"]
+    return FileSystemOps(obj["config"])
 
-    click.echo(f"Setting up development environment with {config.package_manager}...")
 
-    # Install package manager
-    pkg_mgr.install_tool()
+def _build_pkg_mgr(obj: "LazyContext") -> Any:
+    from .package_manager import PackageManager
 
-    # Create virtual environment
-    venv_path = pkg_mgr.create_venv()
-    click.echo(f"Created virtual environment at {venv_path}")
+    return PackageManager(obj["config"])
 
-    # Install dependencies
-    pkg_mgr.install_dependencies(dev=True)
-    click.echo("Installed dependencies")
 
-    # Create secure temp directory structure
-    if config.use_secure_tmp:
-        temp_base = fs_ops.create_secure_temp_dir("dev-setup-")
-        click.echo(f"Created secure temp directory at {temp_base}")
+def _build_validator(obj: "LazyContext") -> Any:
+    from .guardrails import GuardrailsValidator
 
-    click.echo("Development environment setup complete!")
-    click.echo(f"Activate with: {pkg_mgr.activate_venv()}")
+    return GuardrailsValidator(config=obj["config"])
 
 
-@cli.command()
-@click.argument("files", nargs=-1, type=click.Path(exists=True))
-@click.pass_context
-def stage(ctx, files):
-    """Stage files for commit using git."""
-    fs_ops = ctx.obj["fs_ops"]
+class LazyContext(dict):
+    """Context object that builds components on first access."""
 
-    if not files:
-        click.echo("No files specified")
-        return
+    factories: Dict[str, Callable[["LazyContext"], Any]] = {
+        "config": _build_config,
+        "fs_ops": _build_fs_ops,
+        "pkg_mgr": _build_pkg_mgr,
+        "validator": _build_validator,
+    }
 
-    fs_ops.stage_files([Path(f) for f in files])
-    click.echo(f"Staged {len(files)} files")
+    def __init__(self, config_path: Optional[Path] = None):
+        super().__init__()
+        self.config_path = config_path
 
+    def __missing__(self, key: str) -> Any:
+        if key not in self.factories:
+            raise KeyError(key)
+        value = self.factories[key](self)
+        self[key] = value
+        return value
 
-@cli.command()
-@click.argument("message")
-@click.pass_context
-def commit(ctx, message):
-    """Commit staged changes."""
-    fs_ops = ctx.obj["fs_ops"]
 
-    fs_ops.commit_changes(message)
-    click.echo("Changes committed")
-
-
-@cli.command()
-@click.option("--prefix", default="install-arch-", help="Prefix for temp directory")
-@click.pass_context
-def temp_dir(ctx, prefix):
-    """Create a secure temporary directory."""
-    fs_ops = ctx.obj["fs_ops"]
-
-    temp_dir = fs_ops.create_secure_temp_dir(prefix)
-    click.echo(f"Created temporary directory: {temp_dir}")
-
-
-@cli.command()
-@click.option("--suffix", default="", help="File suffix")
-@click.option("--prefix", default="install-arch-", help="File prefix")
-@click.pass_context
-def temp_file(ctx, suffix, prefix):
-    """Create a secure temporary file."""
-    fs_ops = ctx.obj["fs_ops"]
-
-    temp_file = fs_ops.create_temp_file(suffix, prefix)
-    click.echo(f"Created temporary file: {temp_file}")
-
-
-@cli.command()
-@click.pass_context
-def clean_temp(ctx):
-    """Clean up temporary files and directories."""
-    fs_ops = ctx.obj["fs_ops"]
+class LazyGroup(click.Group):
+    """Click group that imports its subcommands on first lookup.
 
-    # This would need to track created temp files/dirs
-    # For now, just clean the base temp directory
+    ``lazy_commands`` maps each command name to ``"module:attribute"``, with
+    the module relative to this package.
+    """
 
-    temp_base = Path(fs_ops.config.tmp_base_dir)
-    if temp_base.exists():
-        shutil.rmtree(temp_base)
-        temp_base.mkdir(parents=True)
-        click.echo("Cleaned temporary files")
-    else:
-        click.echo("No temporary directory to clean")
+    def __init__(
+        self, *args: Any, lazy_commands: Optional[Dict[str, str]] = None, **kwargs: Any
+    ):
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
 
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted({*super().list_commands(ctx), *self.lazy_commands})
 
-@cli.command()
-@click.pass_context
-def check_guardrails(ctx):
-    """Check compliance with package functionality baseline guardrails."""
-    validator = ctx.obj.get("validator", GuardrailsValidator())
-
-    compliance = validator.check_compliance()
-
-    click.echo("Guardrails Compliance Check:")
-    for check, passed in compliance.items():
-        status = "✓" if passed else "✗"
-        click.echo(f"  {status} {check.replace('_', ' ').title()}")
-
-    violations = validator.get_violations()
-    if violations:
-        click.echo("\nViolations found:")
-        for violation in violations:
-            click.echo(f"  - {violation}")
-        sys.exit(1)
-    else:
-        click.echo("\nAll guardrails compliant!")
-        sys.exit(0)
-
-
-@cli.command()
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name not in self.commands and cmd_name in self.lazy_commands:
+            module_name, attribute = self.lazy_commands[cmd_name].split(":")
+            command = getattr(
+                importlib.import_module(module_name, __package__), attribute
+            )
+            if not isinstance(command, click.Command):
+                raise TypeError(f"{module_name}:{attribute} is not a click command")
+            self.add_command(command, cmd_name)
+        return super().get_command(ctx, cmd_name)
+
+
+COMMANDS = {
+    "setup": ".commands.environment:setup",
+    "clone-venv": ".commands.environment:clone_venv",
+    "wheelhouse": ".commands.wheelhouse:wheelhouse",
+    "stage": ".commands.git:stage",
+    "commit": ".commands.git:commit",
+    "temp-dir": ".commands.temp:temp_dir",
+    "temp-file": ".commands.temp:temp_file",
+    "clean-temp": ".commands.temp:clean_temp",
+    "check-guardrails": ".commands.guardrails:check_guardrails",
+    "enforce-guardrails": ".commands.guardrails:enforce_guardrails",
+    "local-ci": ".commands.local_ci:local_ci",
+}
+
+
+@click.group(cls=LazyGroup, lazy_commands=COMMANDS)
+@click.option(
+    "--config",
+    "config_path",
+    type=click.Path(exists=True),
+    help="Path to dev-config.toml",
+)
+@click.option(
+    "--trace",
+    "trace_path",
+    type=click.Path(dir_okay=False),
+    help="Write a Chrome trace of the command (for Perfetto) to this file",
+)
 @click.pass_context
-def enforce_guardrails(ctx):
-    """Enforce guardrails compliance (will exit with error if violations found)."""
-    validator = ctx.obj.get("validator", GuardrailsValidator())
+def cli(ctx, config_path, trace_path):
+    """Install Arch development environment manager."""
+    ctx.obj = LazyContext(Path(config_path) if config_path else None)
+    if trace_path:
+        from . import tracing
+
+        tracing.start(trace_path)
+        # Closed in reverse order: the command's span ends, then the file is written
+        ctx.call_on_close(_write_trace)
+        ctx.with_resource(
+            tracing.span(
+                f"install-arch-dev {ctx.invoked_subcommand}", "cli", whole_process=True
+            )
+        )
 
-    try:
-        validator.enforce_guardrails()
-        click.echo("Guardrails compliance confirmed!")
-    except RuntimeError as e:
-        click.echo(f"Guardrails enforcement failed:\n{e}", err=True)
-        sys.exit(1)
 
+def _write_trace() -> None:
+    from . import tracing
 
-@cli.command()
-@click.pass_context
-def local_ci(ctx):
-    """Run local CI-equivalent checks (guardrails, tests, linting)."""
-
-    click.echo("🚀 Running local CI checks...")
-    click.echo()
-
-    # Colors for output
-    GREEN = "\033[0;32m"
-    RED = "\033[0;31m"
-    NC = "\033[0m"
-
-    def run_check(name, command, cwd=None):
-        """Run a check command and return success status."""
-        click.echo(f"📋 {name}")
-        try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                cwd=cwd,
-                capture_output=True,
-                text=True,
-                timeout=300,  # 5 minute timeout
-            )
-            if result.returncode == 0:
-                click.echo(f"{GREEN}✅ {name} passed{NC}")
-                return True
-            else:
-                click.echo(f"{RED}❌ {name} failed{NC}")
-                click.echo("Output:", err=True)
-                click.echo(result.stdout, err=True)
-                click.echo(result.stderr, err=True)
-                return False
-        except subprocess.TimeoutExpired:
-            click.echo(f"{RED}❌ {name} timed out{NC}", err=True)
-            return False
-        except Exception as e:
-            click.echo(f"{RED}❌ {name} error: {e}{NC}", err=True)
-            return False
-
-    checks = [
-        ("Guardrails Check", "uv run python -m install_arch.cli check-guardrails"),
-        (
-            "Tests with Coverage",
-            "uv run pytest tests/ --cov=src/install_arch --cov-fail-under=80",
-        ),
-        ("Ruff", "uv run ruff check src/ tests/"),
-        ("MyPy", "uv run mypy src/install_arch/"),
-        ("Ruff Format Check", "uv run ruff format --check src/ tests/"),
-    ]
-
-    all_passed = True
-    for name, command in checks:
-        if not run_check(name, command):
-            all_passed = False
-
-    click.echo()
-    if all_passed:
-        click.echo(
-            f"{GREEN}🎉 All local CI checks passed! Ready to commit and push.{NC}"
-        )
-        sys.exit(0)
-    else:
-        click.echo(
-            f"{RED}❌ Some checks failed. Please fix issues before committing.{NC}",
-            err=True,
-        )
-        sys.exit(1)
+    path = tracing.stop()
+    if path is not None:
+        click.echo(f"Wrote trace to {path}", err=True)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,33 @@
+"""Subcommands of the install-arch-dev CLI.
+
+Each module is imported by :class:`install_arch.cli.LazyGroup` only when one
+of its commands is looked up, so running one command does not load the others.
+"""
+
+import click
+
+
+class Duration(click.ParamType):
+    """Click parameter accepting durations like ``500ms``, ``2s`` or ``1h``."""
+
+    name = "duration"
+
+    def convert(self, value, param, ctx):
+        from ..config import parse_duration
+
+        try:
+            return parse_duration(value)
+        except ValueError:
+            self.fail(f"{value!r} is not a valid duration", param, ctx)
+
+
+DURATION = Duration()
+
+
+def format_bytes(size: int) -> str:
+    value = float(size)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024 or unit == "GiB":
+            break
+        value /= 1024
+    return f"{size} B" if unit == "B" else f"{value:.1f} {unit}"
@@ -0,0 +1,118 @@
+"""Commands that set up and clone the development environment."""
+
+import sys
+from pathlib import Path
+
+import click
+
+
+@click.command()
+@click.option("--timings", is_flag=True, help="Show the per-phase timeline")
+@click.option(
+    "--force", is_flag=True, help="Reinstall dependencies even if nothing changed"
+)
+@click.option("--verbose", "-v", is_flag=True, help="Stream command output")
+@click.pass_context
+def setup(ctx, timings, force, verbose):
+    """Set up the development environment.
+
+    Independent steps run concurrently: dependencies are resolved while
+    the virtual environment is created, and the secure temp directory is
+    made alongside both. Dependencies are only installed when the lockfile,
+    pyproject.toml, interpreter or tool changed since the last install.
+    """
+    import time
+
+    from ..package_manager import setup_phases
+    from ..pipeline import run_phases
+
+    config = ctx.obj["config"]
+    fs_ops = ctx.obj["fs_ops"]
+    pkg_mgr = ctx.obj["pkg_mgr"]
+    if verbose:
+        pkg_mgr.on_output = _echo_output
+
+    click.echo(f"Setting up development environment with {config.package_manager}...")
+    started = time.time()
+
+    result = run_phases(
+        setup_phases(
+            pkg_mgr, fs_ops, create_temp=bool(config.use_secure_tmp), force=force
+        )
+    )
+    if not result.ok:
+        for failed in result.failed:
+            if failed.status == "failed":
+                click.echo(f"Setup failed in {failed.name}: {failed.error}", err=True)
+        if timings:
+            _echo_timeline(result, started)
+        sys.exit(1)
+
+    click.echo(f"Created virtual environment at {result.value('create_venv')}")
+    if result.value("install_dependencies") is False:
+        click.echo("Dependencies already up to date")
+    else:
+        click.echo("Installed dependencies")
+    if "temp_dir" in result.phases:
+        click.echo(f"Created secure temp directory at {result.value('temp_dir')}")
+
+    click.echo("Development environment setup complete!")
+    click.echo(f"Activate with: {pkg_mgr.activate_venv()}")
+    if timings:
+        _echo_timeline(result, started)
+
+
+def _echo_output(stream: str, line: str) -> None:
+    click.echo(f"  | {line}", err=stream == "stderr")
+
+
+def _echo_timeline(result, started: float) -> None:
+    """Print when each setup phase ran, and the commands it ran."""
+    from ..runner import METRICS
+
+    click.echo("\nSetup timeline:")
+    width = max(len(name) for name in result.phases)
+    for phase in result.timeline():
+        click.echo(
+            f"  {phase.name:<{width}}  {phase.start:7.3f}s -> {phase.end:7.3f}s"
+            f"  {phase.duration * 1000:9.2f}ms  {phase.status}"
+        )
+    click.echo(f"  total: {result.duration * 1000:.2f}ms")
+
+    records = METRICS.records(since=started)
+    if records:
+        click.echo("\nCommands:")
+    for record in records:
+        click.echo(
+            f"  {record.duration * 1000:9.2f}ms  {record.status:<9}  "
+            f"exit {record.returncode:<4} {' '.join(record.cmd)}"
+        )
+
+
+@click.command()
+@click.argument("dest", type=click.Path(exists=False))
+@click.option("--no-dev", is_flag=True, help="Clone a template without dev deps")
+@click.option(
+    "--hardlink/--copy",
+    default=None,
+    help="Share files with the template instead of copying (reflinking) them",
+)
+@click.pass_context
+def clone_venv(ctx, dest, no_dev, hardlink):
+    """Clone a fully installed venv from the template for this project.
+
+    The template is built on first use and whenever the dependencies
+    change; later clones only copy it, so parallel jobs each get an
+    isolated venv without reinstalling.
+    """
+    import subprocess
+    import time
+
+    pkg_mgr = ctx.obj["pkg_mgr"]
+    start = time.perf_counter()
+    try:
+        venv = pkg_mgr.venv_templates(hardlink).clone(Path(dest), dev=not no_dev)
+    except (OSError, ValueError, RuntimeError, subprocess.CalledProcessError) as e:
+        click.echo(f"Could not clone venv: {e}", err=True)
+        sys.exit(1)
+    click.echo(f"Cloned venv into {venv} in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,37 @@
+"""Commands that stage and commit changes with git."""
+
+import sys
+from pathlib import Path
+
+import click
+
+
+@click.command()
+@click.argument("files", nargs=-1, type=click.Path(exists=True))
+@click.pass_context
+def stage(ctx, files):
+    """Stage files for commit using git."""
+    fs_ops = ctx.obj["fs_ops"]
+
+    if not files:
+        click.echo("No files specified")
+        return
+
+    results = fs_ops.stage_files([Path(f) for f in files])
+    failed = [r for r in results if not r.ok]
+    for r in failed:
+        click.echo(f"Could not stage {r.path}: {r.error}", err=True)
+    click.echo(f"Staged {len(results) - len(failed)} files")
+    if failed:
+        sys.exit(1)
+
+
+@click.command()
+@click.argument("message")
+@click.pass_context
+def commit(ctx, message):
+    """Commit staged changes."""
+    fs_ops = ctx.obj["fs_ops"]
+
+    fs_ops.commit_changes(message)
+    click.echo("Changes committed")
@@ -0,0 +1,118 @@
+"""Commands that check and enforce the guardrails."""
+
+import sys
+from typing import List
+
+import click
+
+from . import DURATION
+
+
+def _echo_guardrails_status(validator, evaluation, timings: bool = False) -> List[str]:
+    """Print compliance status for an evaluation and return its violations."""
+    compliance = validator.check_compliance(evaluation)
+
+    click.echo("Guardrails Compliance Check:")
+    for check, passed in compliance.items():
+        status = "✓" if passed else "✗"
+        click.echo(f"  {status} {check.replace('_', ' ').title()}")
+    for check in evaluation.unknown_checks:
+        click.echo(f"  ? {check.replace('_', ' ').title()} (deadline exceeded)")
+
+    tool = evaluation.probes.get("package_manager_supported")
+    if tool is not None and tool.data:
+        if tool.data["path"]:
+            click.echo(
+                f"\nPackage manager: {tool.data['tool']} at {tool.data['path']}"
+                f" ({tool.data['version'] or 'version unknown'})"
+            )
+        else:
+            click.echo(f"\nPackage manager: {tool.data['tool']} not found")
+
+    if timings:
+        click.echo("\nProbe timings:")
+        for name, duration in evaluation.timings.items():
+            click.echo(f"  {name}: {duration * 1000:.2f}ms")
+        click.echo(f"  total: {evaluation.duration * 1000:.2f}ms")
+
+    violations = validator.get_violations(evaluation)
+    if violations:
+        click.echo("\nViolations found:")
+        for violation in violations:
+            click.echo(f"  - {violation}")
+    else:
+        click.echo("\nAll guardrails compliant!")
+    return violations
+
+
+@click.command()
+@click.option("--timings", is_flag=True, help="Show per-probe timings")
+@click.option("--parallel", is_flag=True, help="Run independent checks concurrently")
+@click.option(
+    "--budget",
+    type=DURATION,
+    help="Overall deadline, e.g. 500ms (implies --parallel)",
+)
+@click.option(
+    "--probe-timeout",
+    type=DURATION,
+    help="Per-check timeout when running concurrently",
+)
+@click.option(
+    "--watch",
+    is_flag=True,
+    help="Keep running and re-check whenever guardrail inputs change",
+)
+@click.pass_context
+def check_guardrails(ctx, timings, parallel, budget, probe_timeout, watch):
+    """Check compliance with package functionality baseline guardrails."""
+    validator = ctx.obj["validator"]
+    evaluate_kwargs = dict(
+        parallel=parallel, budget=budget, probe_timeout=probe_timeout
+    )
+
+    if watch:
+        _watch_guardrails(validator, timings, evaluate_kwargs)
+        return
+
+    evaluation = validator.evaluate(**evaluate_kwargs)
+    violations = _echo_guardrails_status(validator, evaluation, timings)
+    sys.exit(1 if violations else 0)
+
+
+def _watch_guardrails(validator, timings: bool, evaluate_kwargs) -> None:
+    """Print guardrails status now and after every relevant change."""
+    import time
+
+    from ..watch import GuardrailsWatcher
+
+    watcher = GuardrailsWatcher(validator, **evaluate_kwargs)
+    _echo_guardrails_status(validator, watcher.evaluation, timings)
+    click.echo(f"\nWatching for changes ({watcher.backend}); press Ctrl-C to stop")
+
+    def on_update(evaluation, rerun):
+        click.echo(
+            f"\n[{time.strftime('%H:%M:%S')}] re-checked: {', '.join(sorted(rerun))}"
+        )
+        _echo_guardrails_status(validator, evaluation, timings)
+
+    try:
+        watcher.run(on_update)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+@click.command()
+@click.pass_context
+def enforce_guardrails(ctx):
+    """Enforce guardrails compliance (will exit with error if violations found)."""
+    validator = ctx.obj["validator"]
+
+    try:
+        validator.enforce_guardrails()
+        click.echo("Guardrails compliance confirmed!")
+    except RuntimeError as e:
+        click.echo(f"Guardrails enforcement failed:\n{e}", err=True)
+        sys.exit(1)
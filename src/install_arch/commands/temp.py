@@ -0,0 +1,73 @@
+"""Commands that create and clean secure temporary files."""
+
+import sys
+from pathlib import Path
+
+import click
+
+from . import DURATION, format_bytes
+
+
+@click.command()
+@click.option("--prefix", default="install-arch-", help="Prefix for temp directory")
+@click.pass_context
+def temp_dir(ctx, prefix):
+    """Create a secure temporary directory."""
+    fs_ops = ctx.obj["fs_ops"]
+
+    temp_dir = fs_ops.create_secure_temp_dir(prefix)
+    click.echo(f"Created temporary directory: {temp_dir}")
+
+
+@click.command()
+@click.option("--suffix", default="", help="File suffix")
+@click.option("--prefix", default="install-arch-", help="File prefix")
+@click.pass_context
+def temp_file(ctx, suffix, prefix):
+    """Create a secure temporary file."""
+    fs_ops = ctx.obj["fs_ops"]
+
+    temp_file = fs_ops.create_temp_file(suffix, prefix)
+    click.echo(f"Created temporary file: {temp_file}")
+
+
+@click.command()
+@click.option(
+    "--older-than",
+    type=DURATION,
+    default=None,
+    help="Only remove entries at least this old (e.g. 30m, 2h, 7d)",
+)
+@click.option("--prefix", default=None, help="Only remove entries with this prefix")
+@click.option(
+    "--include-active",
+    is_flag=True,
+    help="Also remove entries created by processes that are still running",
+)
+@click.pass_context
+def clean_temp(ctx, older_than, prefix, include_active):
+    """Clean up temporary files and directories created by this tool.
+
+    Only entries recorded when install-arch created them are removed;
+    anything else under the temp base directory is left alone.
+    """
+    fs_ops = ctx.obj["fs_ops"]
+
+    temp_base = Path(fs_ops.config.tmp_base_dir)
+    if not temp_base.exists():
+        click.echo("No temporary directory to clean")
+        return
+
+    result = fs_ops.clean_temp(
+        older_than=older_than, prefix=prefix, include_active=include_active
+    )
+    click.echo(
+        f"Cleaned temporary files: {result.entries} entries, "
+        f"{format_bytes(result.bytes_freed)} freed"
+    )
+    if result.skipped_active:
+        click.echo(f"Skipped {result.skipped_active} entries still in use")
+    for path, error in result.errors:
+        click.echo(f"Failed to remove {path}: {error}", err=True)
+    if result.errors:
+        sys.exit(1)
@@ -0,0 +1,82 @@
+"""Commands that build and check the offline wheelhouse."""
+
+import sys
+from pathlib import Path
+
+import click
+
+from . import format_bytes
+
+
+@click.group()
+def wheelhouse():
+    """Build and check the offline wheelhouse."""
+
+
+@wheelhouse.command("build")
+@click.option("--path", type=click.Path(), help="Wheelhouse directory")
+@click.option("--no-dev", is_flag=True, help="Leave out dev dependencies")
+@click.pass_context
+def wheelhouse_build(ctx, path, no_dev):
+    """Collect every pinned dependency as a wheel, once, for offline installs."""
+    import subprocess
+
+    pkg_mgr = ctx.obj["pkg_mgr"]
+    try:
+        built = pkg_mgr.build_wheelhouse(Path(path) if path else None, dev=not no_dev)
+    except subprocess.CalledProcessError as e:
+        click.echo(f"Wheelhouse build failed: {e}", err=True)
+        sys.exit(1)
+    wheels = built.wheels()
+    size = sum(info.size for info in wheels.values())
+    click.echo(
+        f"Built wheelhouse at {built.root}: {len(wheels)} wheels, {format_bytes(size)}"
+    )
+
+
+@wheelhouse.command("verify")
+@click.option("--path", type=click.Path(), help="Wheelhouse directory")
+@click.pass_context
+def wheelhouse_verify(ctx, path):
+    """Check the wheels against the wheelhouse's content index."""
+    from ..wheelhouse import DEFAULT_WHEELHOUSE, Wheelhouse
+
+    config = ctx.obj["config"]
+    checked = Wheelhouse(path or config.wheelhouse or DEFAULT_WHEELHOUSE)
+    if not checked.exists():
+        click.echo(f"No wheelhouse at {checked.root}", err=True)
+        sys.exit(1)
+    problems = checked.verify()
+    for name in problems:
+        click.echo(f"Missing or modified: {name}", err=True)
+    if problems:
+        sys.exit(1)
+    click.echo(f"Wheelhouse at {checked.root} is intact")
+
+
+@wheelhouse.command("bench")
+@click.option("--path", type=click.Path(), help="Wheelhouse directory")
+@click.pass_context
+def wheelhouse_bench(ctx, path):
+    """Time an install from the package index against one from the wheelhouse."""
+    from ..wheelhouse import DEFAULT_WHEELHOUSE, Wheelhouse
+
+    config = ctx.obj["config"]
+    fs_ops = ctx.obj["fs_ops"]
+    pkg_mgr = ctx.obj["pkg_mgr"]
+    source = Wheelhouse(path or config.wheelhouse or DEFAULT_WHEELHOUSE)
+    if not source.exists():
+        click.echo(f"No wheelhouse at {source.root}", err=True)
+        sys.exit(1)
+    workdir = fs_ops.create_secure_temp_dir("wheelhouse-bench-")
+    try:
+        timings = pkg_mgr.benchmark_wheelhouse(source, workdir)
+    except ValueError as e:
+        click.echo(str(e), err=True)
+        sys.exit(1)
+    finally:
+        fs_ops.cleanup_temp(workdir)
+    for mode, seconds in timings.items():
+        click.echo(f"  {mode:<10}  {seconds:8.2f}s")
+    if timings["wheelhouse"] > 0:
+        click.echo(f"  speedup: {timings['index'] / timings['wheelhouse']:.1f}x")
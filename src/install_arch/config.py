@@ -1,8 +1,70 @@
 """Configuration management for development environment."""
 
+import os
+import threading
 import tomllib
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_CONFIG_PATH = Path(__file__).parent.parent.parent / "dev-config.toml"
+
+
+def cache_dir() -> Path:
+    """Directory for persistent install-arch caches.
+
+    Honours INSTALL_ARCH_CACHE_DIR, then XDG_CACHE_HOME, then ~/.cache.
+    """
+    override = os.environ.get("INSTALL_ARCH_CACHE_DIR")
+    if override:
+        return Path(override)
+    xdg = os.environ.get("XDG_CACHE_HOME")
+    base = Path(xdg) if xdg else Path.home() / ".cache"
+    return base / "install-arch"
+
+
+_SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+def parse_size(value: Any) -> int:
+    """Parse a byte count given as an integer or a string like ``"512M"``.
+
+    Suffixes K, M, G and T are binary multiples; a trailing ``B`` or
+    ``iB`` is accepted and ignored.
+    """
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid size: {value!r}")
+    if isinstance(value, int):
+        return value
+    text = str(value).strip().upper().removesuffix("B").removesuffix("I")
+    number, unit = text, ""
+    if text and text[-1] in _SIZE_UNITS:
+        number, unit = text[:-1], text[-1]
+    try:
+        return int(float(number) * _SIZE_UNITS[unit])
+    except ValueError:
+        raise ValueError(f"Invalid size: {value!r}") from None
+
+
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0, "d": 86400.0}
+
+
+def parse_duration(value: Any) -> float:
+    """Parse seconds given as a number or a string like ``"30m"`` or ``"7d"``."""
+    if isinstance(value, bool):
+        raise ValueError(f"Invalid duration: {value!r}")
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().lower()
+    for unit in sorted(_DURATION_UNITS, key=len, reverse=True):
+        if text.endswith(unit):
+            number, scale = text[: -len(unit)], _DURATION_UNITS[unit]
+            break
+    else:
+        number, scale = text, 1.0
+    try:
+        return float(number) * scale
+    except ValueError:
+        raise ValueError(f"Invalid duration: {value!r}") from None
 
 
 class DevConfig:
@@ -10,7 +72,7 @@ class DevConfig:
 
     def __init__(self, config_path: Optional[Path] = None):
         if config_path is None:
-            config_path = Path(__file__).parent.parent.parent / "dev-config.toml"
+            config_path = DEFAULT_CONFIG_PATH
 
         self.config_path = config_path
         self._config: Dict[str, Any] = {}
@@ -48,6 +110,39 @@ class DevConfig:
         """Get the Python version."""
         return self._config.get("package_manager", {}).get("python_version", "3.11")
 
+    @property
+    def wheelhouse(self) -> Optional[str]:
+        """Directory of wheels to install from offline, or None."""
+        return self._config.get("package_manager", {}).get("wheelhouse") or None
+
+    @property
+    def command_timeout(self) -> Optional[float]:
+        """Seconds before a package manager command is killed, or None."""
+        value = self._config.get("package_manager", {}).get("command_timeout")
+        if value in (None, 0, "", "0"):
+            return None
+        return parse_duration(value)
+
+    @property
+    def venv_template(self) -> Optional[str]:
+        """How venvs are cloned from an installed template, or None.
+
+        ``copy`` clones with reflinks where the filesystem supports them,
+        ``hardlink`` shares files with the template; ``true`` means copy.
+        """
+        value = self._config.get("package_manager", {}).get("venv_template", False)
+        if value in (False, None, ""):
+            return None
+        mode = "copy" if value is True else str(value)
+        if mode not in ("copy", "hardlink"):
+            raise ValueError(f"Invalid venv_template mode: {value!r}")
+        return mode
+
+    @property
+    def venv_template_keep(self) -> int:
+        """How many template venvs are kept before the oldest are evicted."""
+        return int(self._config.get("package_manager", {}).get("venv_template_keep", 4))
+
     @property
     def use_git_ops(self) -> bool:
         """Whether to use git for filesystem operations."""
@@ -64,3 +159,130 @@ class DevConfig:
     def use_secure_tmp(self) -> bool:
         """Whether to use secure temporary directories."""
         return self._config.get("filesystem", {}).get("use_secure_tmp", True)
+
+    @property
+    def git_timeout(self) -> Optional[float]:
+        """Seconds before a git command is killed, or None."""
+        value = self._config.get("filesystem", {}).get("git_timeout")
+        if value in (None, 0, "", "0"):
+            return None
+        return parse_duration(value)
+
+    @property
+    def background_removal(self) -> bool:
+        """Whether directory removal returns before the tree is deleted."""
+        return self._config.get("filesystem", {}).get("background_removal", True)
+
+    @property
+    def temp_pool_enabled(self) -> bool:
+        """Whether secure temp directories come from a pre-created pool."""
+        return self._config.get("filesystem", {}).get("temp_pool", False)
+
+    @property
+    def temp_pool_watermarks(self) -> Tuple[int, int]:
+        """Low and high watermarks for the temp directory pool."""
+        filesystem = self._config.get("filesystem", {})
+        return (
+            int(filesystem.get("temp_pool_low", 4)),
+            int(filesystem.get("temp_pool_high", 16)),
+        )
+
+    @property
+    def artifact_quota(self) -> Optional[int]:
+        """Size limit in bytes for each artifact store, or None for no limit."""
+        value = self._config.get("filesystem", {}).get("artifact_quota", "10G")
+        return None if value in (0, "", "0") else parse_size(value)
+
+    @property
+    def temp_quotas(self) -> Dict[str, Optional[int]]:
+        """Size limit in bytes per temp_structure category (None: no limit)."""
+        quotas = self._config.get("filesystem", {}).get("temp_quotas", {})
+        return {
+            category: None if value in (0, "", "0") else parse_size(value)
+            for category, value in quotas.items()
+        }
+
+    @property
+    def temp_max_age(self) -> Optional[float]:
+        """Age in seconds after which temp category entries are evicted."""
+        value = self._config.get("filesystem", {}).get("temp_max_age")
+        if value in (None, 0, "", "0"):
+            return None
+        return parse_duration(value)
+
+    @property
+    def temp_eviction_interval(self) -> float:
+        """Seconds between background passes of the temp evictor."""
+        value = self._config.get("filesystem", {}).get("temp_eviction_interval", 60)
+        return parse_duration(value)
+
+
+# Stat signature of a config file: (mtime_ns, size), or None when missing
+_StatKey = Optional[Tuple[int, int]]
+
+
+class ConfigRegistry:
+    """Process-wide cache of DevConfig instances keyed by path and stat.
+
+    A cached config is reused for as long as the file's (mtime, size)
+    signature is unchanged, so repeated lookups cost a single stat call
+    instead of a full TOML parse.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._entries: Dict[Path, Tuple[_StatKey, DevConfig]] = {}
+
+    @staticmethod
+    def _stat_key(path: Path) -> _StatKey:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self, config_path: Optional[Path] = None) -> DevConfig:
+        """Return the cached config for a path, reloading it if it changed."""
+        path = Path(config_path) if config_path is not None else DEFAULT_CONFIG_PATH
+        key = self._stat_key(path)
+
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                return entry[1]
+
+        config = DevConfig(path)
+        with self._lock:
+            self._entries[path] = (key, config)
+        return config
+
+    def invalidate(self, config_path: Optional[Path] = None) -> None:
+        """Drop a cached config, or every cached config if no path is given."""
+        with self._lock:
+            if config_path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(Path(config_path), None)
+
+    def reload(self, config_path: Optional[Path] = None) -> DevConfig:
+        """Force a fresh parse of a config file and cache the result."""
+        self.invalidate(config_path or DEFAULT_CONFIG_PATH)
+        return self.get(config_path)
+
+
+_registry = ConfigRegistry()
+
+
+def get_config(config_path: Optional[Path] = None) -> DevConfig:
+    """Get the shared DevConfig for a path from the process-wide registry."""
+    return _registry.get(config_path)
+
+
+def invalidate_config(config_path: Optional[Path] = None) -> None:
+    """Invalidate shared DevConfig instances (all of them if no path given)."""
+    _registry.invalidate(config_path)
+
+
+def reload_config(config_path: Optional[Path] = None) -> DevConfig:
+    """Re-read a config file and replace the shared instance."""
+    return _registry.reload(config_path)
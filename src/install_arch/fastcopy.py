@@ -0,0 +1,296 @@
+"""Zero-copy file and tree copying.
+
+Copies try, in order: a FICLONE reflink (O(1) on btrfs and XFS), then
+``copy_file_range`` (in-kernel, and server-side on NFS), then
+``sendfile``, then a plain userspace copy. A strategy that is rejected
+for a pair of filesystems is not retried for that pair.
+"""
+
+import errno
+import os
+import shutil
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore[assignment]
+
+# _IOW(0x94, 9, int) from <linux/fs.h>
+FICLONE = 0x40049409
+
+STRATEGIES = ("reflink", "copy_file_range", "sendfile", "userspace")
+
+# Errors meaning "this mechanism does not work between these files",
+# as opposed to a real I/O failure
+_UNSUPPORTED = {
+    errno.EOPNOTSUPP,
+    errno.ENOTTY,
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.EBADF,
+    errno.ETXTBSY,
+}
+
+_CHUNK = 1 << 30
+
+PathLike = Union[str, Path]
+
+
+@dataclass(frozen=True)
+class CopyResult:
+    """How a file was copied and how fast."""
+
+    strategy: str
+    bytes: int
+    seconds: float
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.seconds if self.seconds else float("inf")
+
+
+@dataclass
+class TreeCopyResult:
+    """Totals for a tree copy."""
+
+    files: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    # Number of files copied with each strategy
+    strategies: Dict[str, int] = field(default_factory=dict)
+    errors: List[Tuple[Path, str]] = field(default_factory=list)
+
+    @property
+    def bytes_per_second(self) -> float:
+        return self.bytes / self.seconds if self.seconds else float("inf")
+
+
+class _StrategyCache:
+    """Remembers strategies rejected per (source dev, destination dev)."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rejected: Dict[Tuple[int, int], Set[str]] = {}
+
+    def usable(self, devs: Tuple[int, int], strategy: str) -> bool:
+        with self._lock:
+            return strategy not in self._rejected.get(devs, ())
+
+    def reject(self, devs: Tuple[int, int], strategy: str) -> None:
+        with self._lock:
+            self._rejected.setdefault(devs, set()).add(strategy)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._rejected.clear()
+
+
+_strategies = _StrategyCache()
+
+
+def _reflink(src_fd: int, dst_fd: int, size: int) -> None:
+    if fcntl is None:
+        raise OSError(errno.ENOSYS, "reflinks unavailable")
+    fcntl.ioctl(dst_fd, FICLONE, src_fd)
+
+
+def _copy_file_range(src_fd: int, dst_fd: int, size: int) -> None:
+    copied = 0
+    while copied < size:
+        n = os.copy_file_range(src_fd, dst_fd, min(_CHUNK, size - copied))
+        if n == 0:
+            break
+        copied += n
+
+
+def _sendfile(src_fd: int, dst_fd: int, size: int) -> None:
+    copied = 0
+    while copied < size:
+        n = os.sendfile(dst_fd, src_fd, copied, min(_CHUNK, size - copied))
+        if n == 0:
+            break
+        copied += n
+
+
+def _userspace(src_fd: int, dst_fd: int, size: int) -> None:
+    with open(src_fd, "rb", closefd=False) as fsrc:
+        with open(dst_fd, "wb", closefd=False) as fdst:
+            shutil.copyfileobj(fsrc, fdst, 1 << 20)
+
+
+_IMPLEMENTATIONS = {
+    "reflink": _reflink,
+    "copy_file_range": _copy_file_range,
+    "sendfile": _sendfile,
+    "userspace": _userspace,
+}
+
+
+def _available(strategy: str) -> bool:
+    if strategy == "copy_file_range":
+        return hasattr(os, "copy_file_range")
+    if strategy == "sendfile":
+        return hasattr(os, "sendfile")
+    return True
+
+
+def copy_file(
+    src: PathLike, dst: PathLike, strategies: Tuple[str, ...] = STRATEGIES
+) -> CopyResult:
+    """Copy a file's data and metadata like ``shutil.copy2``.
+
+    ``dst`` may be a directory. Raises ``shutil.SameFileError`` if ``dst``
+    is ``src``. The fastest strategy the filesystems support is used; a
+    strategy that fails part way is abandoned and the copy restarts with
+    the next one.
+    """
+    src_path = Path(src)
+    dst_path = Path(dst)
+    if dst_path.is_dir():
+        dst_path = dst_path / src_path.name
+
+    start = time.perf_counter()
+    with open(src_path, "rb") as fsrc:
+        st = os.fstat(fsrc.fileno())
+        if stat.S_ISDIR(st.st_mode):
+            raise IsADirectoryError(errno.EISDIR, "Is a directory", str(src_path))
+        try:
+            dst_st = os.stat(dst_path)
+        except FileNotFoundError:
+            pass
+        else:
+            # Opening the destination for writing would truncate the source
+            if (dst_st.st_dev, dst_st.st_ino) == (st.st_dev, st.st_ino):
+                raise shutil.SameFileError(
+                    f"{str(src_path)!r} and {str(dst_path)!r} are the same file"
+                )
+        if st.st_size == 0:
+            # procfs and sysfs files report size 0 yet have content; only
+            # reading until EOF sees it, and an empty file costs nothing
+            strategies = ("userspace",)
+        with open(dst_path, "wb") as fdst:
+            devs = (st.st_dev, os.fstat(fdst.fileno()).st_dev)
+            used = None
+            for strategy in strategies:
+                if not _available(strategy) or not _strategies.usable(devs, strategy):
+                    continue
+                try:
+                    _IMPLEMENTATIONS[strategy](fsrc.fileno(), fdst.fileno(), st.st_size)
+                except OSError as e:
+                    if e.errno not in _UNSUPPORTED or strategy == "userspace":
+                        raise
+                    _strategies.reject(devs, strategy)
+                    # Discard anything a partial attempt wrote
+                    os.ftruncate(fdst.fileno(), 0)
+                    os.lseek(fdst.fileno(), 0, os.SEEK_SET)
+                    os.lseek(fsrc.fileno(), 0, os.SEEK_SET)
+                    continue
+                used = strategy
+                break
+            if used is None:
+                _userspace(fsrc.fileno(), fdst.fileno(), st.st_size)
+                used = "userspace"
+            size = os.fstat(fdst.fileno()).st_size
+
+    shutil.copystat(src_path, dst_path)
+    return CopyResult(used, size, time.perf_counter() - start)
+
+
+def _copy_symlink(src: Path, dst: Path) -> None:
+    os.symlink(os.readlink(src), dst)
+    shutil.copystat(src, dst, follow_symlinks=False)
+
+
+def _hardlink(src: Path, dst: Path) -> Optional[CopyResult]:
+    """Link ``dst`` to ``src``, or None if they cannot share an inode."""
+    start = time.perf_counter()
+    try:
+        os.link(src, dst)
+    except OSError as e:
+        if e.errno in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+            return None
+        raise
+    return CopyResult("hardlink", dst.stat().st_size, time.perf_counter() - start)
+
+
+def copy_tree(
+    src: PathLike,
+    dst: PathLike,
+    workers: Optional[int] = None,
+    dirs_exist_ok: bool = False,
+    hardlink: bool = False,
+) -> TreeCopyResult:
+    """Copy a directory tree, copying files in parallel.
+
+    Symlinks are recreated as symlinks. Directory metadata is applied
+    after their contents are written so modification times survive. With
+    ``hardlink``, files are linked instead of copied where the filesystem
+    allows it, so the copies share their data with the source.
+    """
+    src_root = Path(src)
+    dst_root = Path(dst)
+    start = time.perf_counter()
+    result = TreeCopyResult()
+
+    files: List[Tuple[Path, Path]] = []
+    dirs: List[Tuple[Path, Path]] = []
+    for root, dirnames, filenames in os.walk(src_root):
+        root_path = Path(root)
+        target = dst_root / root_path.relative_to(src_root)
+        target.mkdir(exist_ok=dirs_exist_ok or root_path != src_root)
+        dirs.append((root_path, target))
+        real_dirs = []
+        for name in dirnames:
+            if (root_path / name).is_symlink():
+                _copy_symlink(root_path / name, target / name)
+            else:
+                real_dirs.append(name)
+        # Do not descend into symlinked directories; they were recreated
+        dirnames[:] = real_dirs
+
+        for name in filenames:
+            path = root_path / name
+            if path.is_symlink():
+                _copy_symlink(path, target / name)
+            elif path.is_file():
+                files.append((path, target / name))
+            else:
+                result.errors.append((path, "not a regular file"))
+
+    def copy_one(pair: Tuple[Path, Path]) -> Tuple[Path, Optional[CopyResult], str]:
+        try:
+            if hardlink:
+                linked = _hardlink(*pair)
+                if linked is not None:
+                    return pair[0], linked, ""
+            return pair[0], copy_file(*pair), ""
+        except (OSError, shutil.Error) as e:
+            # shutil.SameFileError is a shutil.Error, not an OSError
+            return pair[0], None, str(e)
+
+    if files:
+        max_workers = workers or min(32, (os.cpu_count() or 1) * 2, len(files))
+        with ThreadPoolExecutor(max_workers=max_workers) as ex:
+            for path, copied, error in ex.map(copy_one, files):
+                if copied is None:
+                    result.errors.append((path, error))
+                    continue
+                result.files += 1
+                result.bytes += copied.bytes
+                result.strategies[copied.strategy] = (
+                    result.strategies.get(copied.strategy, 0) + 1
+                )
+
+    for src_dir, dst_dir in reversed(dirs):
+        shutil.copystat(src_dir, dst_dir)
+
+    result.seconds = time.perf_counter() - start
+    return result
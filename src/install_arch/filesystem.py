@@ -4,44 +4,144 @@ import os
 import shutil
 import subprocess
 import tempfile
+from dataclasses import dataclass
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
-from .config import DevConfig
+from . import fastcopy, tracing
+from .artifacts import ArtifactStore
+from .baseline import load_baseline
+from .config import DevConfig, get_config
+from .fastcopy import CopyResult, TreeCopyResult
+from .gitindex import UnsupportedIndexError, iter_index_files
+from .gitrepo import find_repository
+from .removal import RemovalEngine, RemovalJob
+from .runner import OutputCallback, run_command
+from .templayout import TempLayout
+from .tempmanifest import CleanResult, TempManifest
+from .tmppool import TempDirPool
 
+if TYPE_CHECKING:
+    from .gitsession import IndexSession
 
+PathLike = Union[str, Path]
+
+# Object id git uses to delete an entry through update-index --index-info
+_NULL_OID = "0" * 40
+
+
+@dataclass(frozen=True)
+class FileOpResult:
+    """Outcome of one file in a batch operation."""
+
+    path: Path
+    ok: bool
+    error: Optional[str] = None
+    # Final location for moves
+    destination: Optional[Path] = None
+
+
+def _arg_max() -> int:
+    """Bytes available for command-line arguments, leaving headroom."""
+    try:
+        limit = os.sysconf("SC_ARG_MAX")
+    except (ValueError, OSError):
+        limit = 128 * 1024
+    if limit <= 0:
+        limit = 128 * 1024
+    env_size = sum(len(k) + len(v) + 2 for k, v in os.environ.items())
+    return max(4096, limit - env_size - 4096)
+
+
+def chunk_args(
+    args: Sequence[str], reserved: int = 0, limit: Optional[int] = None
+) -> Iterator[List[str]]:
+    """Split arguments into chunks that fit within ARG_MAX.
+
+    ``reserved`` accounts for the fixed part of the command line. Each
+    argument costs its encoded length, a NUL and an argv pointer.
+    """
+    budget = (limit if limit is not None else _arg_max()) - reserved
+    chunk: List[str] = []
+    size = 0
+    for arg in args:
+        cost = len(os.fsencode(arg)) + 1 + 8
+        if chunk and size + cost > budget:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(arg)
+        size += cost
+    if chunk:
+        yield chunk
+
+
+@tracing.instrument("filesystem")
 class FileSystemOps:
     """Filesystem operations with git integration and secure temp handling."""
 
     def __init__(self, config: Optional[DevConfig] = None):
-        self.config = config or DevConfig()
+        self.config = config or get_config()
         self.use_git = self.config.use_git_ops
         self.tmp_base = Path(self.config.tmp_base_dir)
         self.secure_tmp = self.config.use_secure_tmp
+        # Receives git output line by line, e.g. for a progress display
+        self.on_output: Optional[OutputCallback] = None
+        self._tmp_base_ready = False
+        self._temp_pool: Optional[TempDirPool] = None
+        self._temp_manifest: Optional[TempManifest] = None
+        self._removal_engine: Optional[RemovalEngine] = None
+        self._artifact_stores: Dict[str, ArtifactStore] = {}
+        self._temp_layout: Optional[TempLayout] = None
 
-        # Ensure tmp base directory exists
-        self.tmp_base.mkdir(parents=True, exist_ok=True)
+    def _ensure_tmp_base(self) -> Path:
+        """Create the tmp base directory the first time it is needed."""
+        if not self._tmp_base_ready:
+            self.tmp_base.mkdir(parents=True, exist_ok=True)
+            self._tmp_base_ready = True
+        return self.tmp_base
 
     def _run_git_command(
-        self, cmd: List[str], cwd: Optional[Path] = None
+        self,
+        cmd: List[str],
+        cwd: Optional[Path] = None,
+        input: Optional[str] = None,
+        check: bool = True,
     ) -> subprocess.CompletedProcess:
-        """Run a git command."""
+        """Run a git command, optionally feeding ``input`` on stdin."""
         if not self.use_git:
             raise RuntimeError("Git operations disabled in configuration")
 
+        kwargs: Dict[str, Any] = {} if input is None else {"input": input}
         try:
-            return subprocess.run(
+            return run_command(
                 ["git"] + cmd,
                 cwd=cwd or Path.cwd(),
-                capture_output=True,
-                text=True,
-                check=True,
+                check=check,
+                timeout=self.config.git_timeout,
+                on_line=self.on_output,
+                **kwargs,
             )
         except subprocess.CalledProcessError as e:
             print(f"Git command failed: git {' '.join(cmd)}")
             print(f"stdout: {e.stdout}")
             print(f"stderr: {e.stderr}")
             raise
+        except subprocess.TimeoutExpired as e:
+            print(f"Git command timed out after {e.timeout:g}s: git {' '.join(cmd)}")
+            print("stderr:", e.stderr)
+            raise
 
     def move_file(self, src: Union[str, Path], dst: Union[str, Path]) -> None:
         """Move a file, using git mv if configured."""
@@ -53,9 +153,21 @@ class FileSystemOps:
         else:
             shutil.move(str(src_path), str(dst_path))
 
-    def copy_file(self, src: Union[str, Path], dst: Union[str, Path]) -> None:
-        """Copy a file."""
-        shutil.copy2(str(src), str(dst))
+    def copy_file(self, src: Union[str, Path], dst: Union[str, Path]) -> CopyResult:
+        """Copy a file with its metadata, reflinking where possible.
+
+        Returns the strategy used and the throughput achieved.
+        """
+        return fastcopy.copy_file(src, dst)
+
+    def copy_tree(
+        self,
+        src: Union[str, Path],
+        dst: Union[str, Path],
+        dirs_exist_ok: bool = False,
+    ) -> TreeCopyResult:
+        """Copy a directory tree, copying files in parallel."""
+        return fastcopy.copy_tree(src, dst, dirs_exist_ok=dirs_exist_ok)
 
     def remove_file(self, path: Union[str, Path]) -> None:
         """Remove a file, using git rm if configured."""
@@ -70,71 +182,408 @@ class FileSystemOps:
         """Create a directory."""
         Path(path).mkdir(parents=True, exist_ok=True)
 
-    def remove_directory(self, path: Union[str, Path]) -> None:
-        """Remove a directory recursively."""
-        shutil.rmtree(path, ignore_errors=True)
+    @property
+    def removal_engine(self) -> RemovalEngine:
+        """Engine used to delete directory trees."""
+        if self._removal_engine is None:
+            self._removal_engine = RemovalEngine(
+                background=self.config.background_removal
+            )
+        return self._removal_engine
+
+    def remove_directory(
+        self, path: Union[str, Path], wait: Optional[bool] = None
+    ) -> RemovalJob:
+        """Remove a directory recursively.
+
+        The directory disappears immediately; unless ``wait`` is set (or
+        background removal is disabled) its contents are deleted after
+        this returns. Errors are reported on the returned job.
+        """
+        return self.removal_engine.remove(Path(path), wait=wait)
 
     def _is_git_repo(self) -> bool:
         """Check if current directory is a git repository."""
-        try:
-            self._run_git_command(["rev-parse", "--git-dir"])
-            return True
-        except subprocess.CalledProcessError:
-            return False
+        return find_repository() is not None
+
+    @property
+    def temp_pool(self) -> Optional[TempDirPool]:
+        """Pool backing create_secure_temp_dir, or None if not enabled."""
+        if (
+            self._temp_pool is None
+            and self.secure_tmp
+            and self.config.temp_pool_enabled
+        ):
+            low, high = self.config.temp_pool_watermarks
+            self._temp_pool = TempDirPool(self.tmp_base, low=low, high=high)
+        return self._temp_pool
 
-    def create_secure_temp_dir(self, prefix: str = "install-arch-") -> Path:
-        """Create a secure temporary directory."""
-        if self.secure_tmp:
+    @property
+    def temp_layout(self) -> TempLayout:
+        """Baseline temp categories under tmp_base, kept within quota.
+
+        The background evictor starts with the layout when any category
+        quota or a maximum age is configured.
+        """
+        if self._temp_layout is None:
+            quotas = self.config.temp_quotas
+            max_age = self.config.temp_max_age
+            self._temp_layout = TempLayout(
+                self.tmp_base,
+                load_baseline().temp_structure,
+                quotas=quotas,
+                max_age=max_age,
+                remover=self._evict_temp,
+                active=self._active_temp_paths,
+            )
+            if max_age is not None or any(q is not None for q in quotas.values()):
+                self._temp_layout.start(self.config.temp_eviction_interval)
+        return self._temp_layout
+
+    def _evict_temp(self, path: Path) -> None:
+        self.temp_manifest.forget(path)
+        self.removal_engine.remove(path)
+
+    def _active_temp_paths(self) -> Set[Path]:
+        """Recorded temp entries whose creating process is still running."""
+        return {entry.path for entry in self.temp_manifest.entries() if entry.active}
+
+    def close(self) -> None:
+        """Stop background temp workers and finish pending removals."""
+        if self._temp_layout is not None:
+            self._temp_layout.stop()
+        if self._temp_pool is not None:
+            self._temp_pool.close()
+            self._temp_pool = None
+        if self._removal_engine is not None:
+            self._removal_engine.shutdown()
+            self._removal_engine = None
+
+    @property
+    def temp_manifest(self) -> TempManifest:
+        """Manifest of the temporary entries created under tmp_base."""
+        if self._temp_manifest is None:
+            self._temp_manifest = TempManifest(self.tmp_base)
+        return self._temp_manifest
+
+    def create_secure_temp_dir(
+        self, prefix: str = "install-arch-", category: Optional[str] = None
+    ) -> Path:
+        """Create a secure temporary directory.
+
+        With ``category`` (a baseline temp_structure key such as
+        ``test_data``) the directory is created in that category's area
+        and counts towards its quota.
+        """
+        self._ensure_tmp_base()
+        pool = self.temp_pool
+        if category is not None:
+            temp_dir = self.temp_layout.create_dir(category, prefix)
+        elif pool is not None:
+            temp_dir = pool.acquire(prefix)
+        elif self.secure_tmp:
             # Use mktemp for secure temp directory
             temp_dir = Path(tempfile.mkdtemp(prefix=prefix, dir=self.tmp_base))
             # Set restrictive permissions
             temp_dir.chmod(0o700)
-            return temp_dir
         else:
             temp_dir = self.tmp_base / f"{prefix}{os.urandom(8).hex()}"
             temp_dir.mkdir(parents=True, exist_ok=True)
-            return temp_dir
+        self.temp_manifest.record(temp_dir, "dir", prefix)
+        return temp_dir
 
-    def create_temp_file(self, suffix: str = "", prefix: str = "install-arch-") -> Path:
-        """Create a secure temporary file."""
-        if self.secure_tmp:
+    def create_temp_file(
+        self,
+        suffix: str = "",
+        prefix: str = "install-arch-",
+        category: Optional[str] = None,
+    ) -> Path:
+        """Create a secure temporary file, optionally in a temp category."""
+        self._ensure_tmp_base()
+        if category is not None:
+            temp_file = self.temp_layout.create_file(category, suffix, prefix)
+        elif self.secure_tmp:
             fd, path = tempfile.mkstemp(suffix=suffix, prefix=prefix, dir=self.tmp_base)
             os.close(fd)  # Close the file descriptor
             temp_file = Path(path)
             temp_file.chmod(0o600)  # Restrictive permissions
-            return temp_file
         else:
             temp_file = self.tmp_base / f"{prefix}{os.urandom(8).hex()}{suffix}"
             temp_file.touch()
-            return temp_file
+        self.temp_manifest.record(temp_file, "file", prefix)
+        return temp_file
 
     def cleanup_temp(self, path: Union[str, Path]) -> None:
-        """Clean up temporary files/directories."""
+        """Clean up temporary files/directories.
+
+        Directories checked out from the temp pool are handed back to it
+        and scrubbed in the background.
+        """
         path_obj = Path(path)
+        self.temp_manifest.forget(path_obj)
+        if self._temp_pool is not None and self._temp_pool.release(path_obj):
+            return
         if path_obj.exists():
             if path_obj.is_file():
                 path_obj.unlink(missing_ok=True)
             else:
-                shutil.rmtree(path_obj, ignore_errors=True)
+                self.removal_engine.remove(path_obj)
+
+    def clean_temp(
+        self,
+        older_than: Optional[float] = None,
+        prefix: Optional[str] = None,
+        include_active: bool = False,
+    ) -> CleanResult:
+        """Delete the temporary entries this user created under tmp_base.
+
+        Anything else in the directory, including other users' entries,
+        is left alone. See :meth:`TempManifest.clean` for the filters.
+        """
+        return self.temp_manifest.clean(
+            older_than=older_than, prefix=prefix, include_active=include_active
+        )
+
+    def iter_repo_files(self, pattern: str = "*") -> Iterator[Path]:
+        """Iterate tracked files matching a git pathspec, like ``git ls-files``.
+
+        The index is read directly and cached on its stat data; index
+        layouts the reader does not support fall back to ``git ls-files``.
+        """
+        repo = find_repository()
+        if repo is None:
+            return iter(())
+
+        try:
+            return iter_index_files(repo, pattern)
+        except (UnsupportedIndexError, OSError):
+            pass
+
+        try:
+            result = self._run_git_command(["ls-files", "-z", "--", pattern])
+        except subprocess.CalledProcessError:
+            return iter(())
+        return (Path(p) for p in result.stdout.split("\0") if p)
 
     def get_repo_files(self, pattern: str = "*") -> List[Path]:
         """Get files in the repository matching a pattern."""
-        if not self._is_git_repo():
+        return list(self.iter_repo_files(pattern))
+
+    def stage_files(self, files: Iterable[PathLike]) -> List[FileOpResult]:
+        """Stage files for commit.
+
+        All paths are streamed to a single ``git add`` over NUL-separated
+        stdin, so arbitrarily large change sets never hit ARG_MAX. If the
+        batch fails, files are retried one by one to attribute the error.
+        """
+        paths = [Path(f) for f in files]
+        if not self.use_git or not paths:
             return []
 
+        return self._run_pathspec_batch(["add"], paths)
+
+    def _run_pathspec_batch(
+        self, cmd: List[str], paths: List[Path], cwd: Optional[Path] = None
+    ) -> List[FileOpResult]:
+        """Run a pathspec-from-file capable git command over many paths."""
+        batch_cmd = ["--literal-pathspecs", *cmd]
         try:
-            result = self._run_git_command(["ls-files", pattern])
-            return [Path(line) for line in result.stdout.strip().split("\n") if line]
-        except subprocess.CalledProcessError:
+            self._run_git_command(
+                [*batch_cmd, "--pathspec-from-file=-", "--pathspec-file-nul"],
+                cwd=cwd,
+                input="".join(f"{p}\0" for p in paths),
+            )
+            return [FileOpResult(p, True) for p in paths]
+        except subprocess.CalledProcessError as e:
+            if len(paths) == 1:
+                error = (e.stderr or "").strip() or "git command failed"
+                return [FileOpResult(paths[0], False, error)]
+
+        results = []
+        for path in paths:
+            proc = self._run_git_command(
+                [*batch_cmd, "--", str(path)], cwd=cwd, check=False
+            )
+            if proc.returncode == 0:
+                results.append(FileOpResult(path, True))
+            else:
+                error = proc.stderr.strip() or "git command failed"
+                results.append(FileOpResult(path, False, error))
+        return results
+
+    def _tracked_entries(
+        self, rel_paths: List[str], root: Path
+    ) -> Dict[str, List[Tuple[str, str, str, str]]]:
+        """Map each root-relative path to its index entries.
+
+        Returns {requested path: [(mode, object id, stage, entry path)]};
+        directories map to every entry below them. ``git ls-files`` has no
+        pathspec-from-file option, so arguments are chunked to ARG_MAX.
+        """
+        fixed = ["--literal-pathspecs", "ls-files", "-s", "-z", "--"]
+        entries: Dict[str, List[Tuple[str, str, str, str]]] = {p: [] for p in rel_paths}
+        reserved = sum(len(a) + 9 for a in ["git", *fixed])
+        for chunk in chunk_args(rel_paths, reserved=reserved):
+            result = self._run_git_command([*fixed, *chunk], cwd=root)
+            for record in result.stdout.split("\0"):
+                if not record:
+                    continue
+                info, entry_path = record.split("\t", 1)
+                mode, oid, stage = info.split()
+                # Attribute the entry to the requested path itself or to
+                # whichever requested directory contains it
+                prefix = entry_path
+                while prefix:
+                    if prefix in entries:
+                        entries[prefix].append((mode, oid, stage, entry_path))
+                    prefix = prefix.rpartition("/")[0]
+        return entries
+
+    def move_files(
+        self, moves: Iterable[Tuple[PathLike, PathLike]]
+    ) -> List[FileOpResult]:
+        """Move many files or directories, updating the git index in bulk.
+
+        Behaves like ``git mv`` for tracked paths (including moving into an
+        existing directory), but renames in-process and rewrites the index
+        with one ``git update-index --index-info`` call instead of forking
+        git per file. Untracked paths are moved without touching the index.
+        """
+        pairs = [(Path(src), Path(dst)) for src, dst in moves]
+        if not pairs:
             return []
 
-    def stage_files(self, files: List[Union[str, Path]]) -> None:
-        """Stage files for commit."""
-        if not self.use_git:
-            return
+        repo = find_repository() if self.use_git else None
+        if repo is None or repo.worktree is None:
+            return [self._plain_move(src, dst) for src, dst in pairs]
 
-        file_paths = [str(f) for f in files]
-        self._run_git_command(["add"] + file_paths)
+        root = repo.worktree
+        results: Dict[int, FileOpResult] = {}
+        # index -> (source, final destination, root-relative src and dst)
+        planned: Dict[int, Tuple[Path, Path, Optional[str], Optional[str]]] = {}
+        for i, (src, dst) in enumerate(pairs):
+            if dst.is_dir():
+                dst = dst / src.name
+            if not os.path.lexists(src):
+                results[i] = FileOpResult(src, False, "source does not exist")
+            elif os.path.lexists(dst):
+                results[i] = FileOpResult(src, False, "destination exists")
+            else:
+                planned[i] = (
+                    src,
+                    dst,
+                    _relative_to(src, root),
+                    _relative_to(dst, root),
+                )
+
+        entries = self._tracked_entries(
+            [rel_src for _, _, rel_src, _ in planned.values() if rel_src], root
+        )
+
+        index_info: List[str] = []
+        for i, (src, dst, rel_src, rel_dst) in planned.items():
+            tracked = entries.get(rel_src, []) if rel_src else []
+            if not tracked:
+                results[i] = self._plain_move(src, dst)
+                continue
+            if rel_src is None or rel_dst is None:
+                results[i] = FileOpResult(src, False, "destination outside repository")
+                continue
+            if any(stage != "0" for _, _, stage, _ in tracked):
+                results[i] = FileOpResult(src, False, "has unmerged index entries")
+                continue
+            try:
+                os.rename(src, dst)
+            except OSError as e:
+                results[i] = FileOpResult(src, False, str(e))
+                continue
+            for mode, oid, _, entry_path in tracked:
+                new_path = rel_dst + entry_path[len(rel_src) :]
+                index_info.append(f"0 {_NULL_OID}\t{entry_path}\0")
+                index_info.append(f"{mode} {oid}\t{new_path}\0")
+            results[i] = FileOpResult(src, True, destination=dst)
+
+        if index_info:
+            self._run_git_command(
+                ["update-index", "-z", "--index-info"],
+                cwd=root,
+                input="".join(index_info),
+            )
+            # Entries written through --index-info carry no stat data;
+            # refresh once so plumbing does not see them as modified
+            self._run_git_command(
+                ["update-index", "-q", "--refresh"], cwd=root, check=False
+            )
+
+        return [results[i] for i in range(len(pairs))]
+
+    def _plain_move(self, src: Path, dst: Path) -> FileOpResult:
+        try:
+            final = shutil.move(str(src), str(dst))
+        except (OSError, shutil.Error) as e:
+            return FileOpResult(src, False, str(e))
+        return FileOpResult(src, True, destination=Path(final))
+
+    def remove_files(self, paths: Iterable[PathLike]) -> List[FileOpResult]:
+        """Remove many files, using one ``git rm`` for all tracked paths.
+
+        Untracked files are unlinked directly.
+        """
+        targets = [Path(p) for p in paths]
+        if not targets:
+            return []
+
+        repo = find_repository() if self.use_git else None
+        if repo is None or repo.worktree is None:
+            return [self._plain_remove(p) for p in targets]
+
+        root = repo.worktree
+        rel = {p: _relative_to(p, root) for p in targets}
+        entries = self._tracked_entries([r for r in rel.values() if r], root)
+
+        tracked = [p for p in targets if entries.get(rel[p] or "")]
+        results = {}
+        if tracked:
+            for result in self._run_pathspec_batch(["rm", "-q"], tracked):
+                results[result.path] = result
+        for path in targets:
+            if path not in results:
+                results[path] = self._plain_remove(path)
+        return [results[p] for p in targets]
+
+    def _plain_remove(self, path: Path) -> FileOpResult:
+        try:
+            path.unlink(missing_ok=True)
+        except OSError as e:
+            return FileOpResult(path, False, str(e))
+        return FileOpResult(path, True)
+
+    def artifact_store(self, area: str = "build_artifacts") -> ArtifactStore:
+        """Content-addressed artifact store for a baseline temp area.
+
+        ``area`` is a key of the baseline's ``filesystem_rules.temp_structure``
+        (``build_artifacts``, ``test_data``, ...); the store lives in that
+        category's area under tmp_base and is limited to ``artifact_quota``.
+        """
+        store = self._artifact_stores.get(area)
+        if store is None:
+            # Hidden, so the temp layout's evictor leaves it to the store
+            root = self.temp_layout.category_dir(area) / ".artifacts"
+            store = ArtifactStore(root, quota=self.config.artifact_quota)
+            self._artifact_stores[area] = store
+        return store
+
+    def index_session(self) -> "IndexSession":
+        """Open a session that batches moves, removals and adds.
+
+        Use as a context manager; the git index is updated once when the
+        block exits and left untouched if it raises. Commit the result
+        with :meth:`commit_changes`.
+        """
+        from .gitsession import IndexSession
+
+        repo = find_repository() if self.use_git else None
+        return IndexSession(self, repo)
 
     def commit_changes(self, message: str) -> None:
         """Commit staged changes."""
@@ -142,3 +591,11 @@ class FileSystemOps:
             return
 
         self._run_git_command(["commit", "-m", message])
+
+
+def _relative_to(path: Path, root: Path) -> Optional[str]:
+    """Path relative to a worktree root in index form, or None if outside."""
+    rel = os.path.relpath(os.path.abspath(path), root)
+    if rel == ".." or rel.startswith(".." + os.sep):
+        return None
+    return Path(rel).as_posix()
@@ -0,0 +1,316 @@
+"""Direct, cached reading of the git index.
+
+Parses ``.git/index`` (versions 2-4) through mmap so listing tracked files
+needs neither a ``git ls-files`` process nor a copy of its output. Parsed
+path lists are cached on the index file's stat data; layouts the reader
+does not understand raise :class:`UnsupportedIndexError` so callers can
+fall back to git.
+"""
+
+import mmap
+import os
+import re
+import struct
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .gitrepo import GitRepository
+
+_HEADER = struct.Struct(">4sII")
+# ctime, mtime, dev, ino, mode, uid, gid, size: ten 32-bit fields
+_STAT_SIZE = 40
+_MODE = struct.Struct(">I")
+_FLAGS = struct.Struct(">H")
+_EXTENSION = struct.Struct(">4sI")
+
+_FLAG_EXTENDED = 0x4000
+_NAME_MASK = 0x0FFF
+_SPARSE_DIR_MODE = 0o040000
+
+# Extensions that mean the entry list is incomplete or not plain files
+_UNSUPPORTED_EXTENSIONS = {b"link": "split index", b"sdir": "sparse index"}
+
+
+class UnsupportedIndexError(Exception):
+    """The index uses a layout the direct reader cannot parse."""
+
+
+def _oid_size(repo: GitRepository) -> int:
+    """Object id length in bytes for the repository's hash algorithm."""
+    try:
+        config = (repo.common_dir / "config").read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError):
+        return 20
+    if re.search(r"^\s*objectformat\s*=\s*sha256\s*$", config, re.I | re.M):
+        return 32
+    return 20
+
+
+def _read_varint(data: mmap.mmap, offset: int) -> Tuple[int, int]:
+    """Decode git's offset varint, returning (value, next offset)."""
+    byte = data[offset]
+    offset += 1
+    value = byte & 0x7F
+    while byte & 0x80:
+        byte = data[offset]
+        offset += 1
+        value = ((value + 1) << 7) | (byte & 0x7F)
+    return value, offset
+
+
+def parse_index(path: Path, oid_size: int = 20) -> List[str]:
+    """Return the paths recorded in an index file, in index order.
+
+    Unmerged paths appear once, however many stages they have.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size < _HEADER.size + oid_size:
+            raise UnsupportedIndexError("index file truncated")
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return _parse(data, oid_size)
+
+
+def _parse(data: mmap.mmap, oid_size: int) -> List[str]:
+    signature, version, count = _HEADER.unpack_from(data, 0)
+    if signature != b"DIRC":
+        raise UnsupportedIndexError("not a git index")
+    if version not in (2, 3, 4):
+        raise UnsupportedIndexError(f"index version {version}")
+
+    end = len(data) - oid_size
+    offset = _HEADER.size
+    paths: List[str] = []
+    previous = b""
+    try:
+        for _ in range(count):
+            start = offset
+            (mode,) = _MODE.unpack_from(data, offset + 24)
+            offset += _STAT_SIZE + oid_size
+            (flags,) = _FLAGS.unpack_from(data, offset)
+            offset += _FLAGS.size
+            if flags & _FLAG_EXTENDED:
+                if version < 3:
+                    raise UnsupportedIndexError("extended flags in v2 index")
+                offset += _FLAGS.size
+
+            if version == 4:
+                strip, offset = _read_varint(data, offset)
+                nul = data.find(b"\0", offset, end)
+                if nul < 0 or strip > len(previous):
+                    raise UnsupportedIndexError("corrupt path compression")
+                name = previous[: len(previous) - strip] + data[offset:nul]
+                offset = nul + 1
+            else:
+                length = flags & _NAME_MASK
+                if length < _NAME_MASK:
+                    nul = offset + length
+                else:
+                    nul = data.find(b"\0", offset, end)
+                    if nul < 0:
+                        raise UnsupportedIndexError("unterminated path")
+                name = data[offset:nul]
+                # Entries are NUL-padded to a multiple of eight bytes
+                offset = start + ((nul - start) // 8 + 1) * 8
+
+            if mode & 0o170000 == _SPARSE_DIR_MODE:
+                raise UnsupportedIndexError("sparse directory entry")
+            if name != previous:
+                paths.append(os.fsdecode(name))
+            previous = name
+    except (struct.error, IndexError) as e:
+        raise UnsupportedIndexError(f"index truncated: {e}") from None
+
+    if offset > end:
+        raise UnsupportedIndexError("index truncated")
+    while offset + _EXTENSION.size <= end:
+        ext, ext_size = _EXTENSION.unpack_from(data, offset)
+        if ext in _UNSUPPORTED_EXTENSIONS:
+            raise UnsupportedIndexError(_UNSUPPORTED_EXTENSIONS[ext])
+        offset += _EXTENSION.size + ext_size
+    return paths
+
+
+class IndexCache:
+    """Parsed index contents keyed on the index file's stat data.
+
+    Git replaces the index by renaming a new file over it, so any update
+    changes the inode, mtime or size and invalidates the entry.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._cache: Dict[Path, Tuple[Tuple[int, int, int], Tuple[str, ...]]] = {}
+
+    def paths(self, repo: GitRepository) -> Tuple[str, ...]:
+        """Tracked paths of a repository, relative to its worktree."""
+        index_path = repo.index_path
+        try:
+            st = os.stat(index_path)
+        except FileNotFoundError:
+            # A fresh repository has no index until something is staged
+            return ()
+        key = (st.st_ino, st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            cached = self._cache.get(index_path)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        paths = tuple(parse_index(index_path, _oid_size(repo)))
+        with self._lock:
+            self._cache[index_path] = (key, paths)
+        return paths
+
+    def clear(self) -> None:
+        """Forget every parsed index."""
+        with self._lock:
+            self._cache.clear()
+
+
+_WILDCARDS = re.compile(r"[*?\[\\]")
+_CHAR_CLASSES = {
+    "alnum": r"a-zA-Z0-9",
+    "alpha": r"a-zA-Z",
+    "blank": r" \t",
+    "cntrl": r"\x00-\x1f\x7f",
+    "digit": r"0-9",
+    "graph": r"!-~",
+    "lower": r"a-z",
+    "print": r" -~",
+    "punct": r"!-/:-@\[-`{-~",
+    "space": r" \t\n\r\f\v",
+    "upper": r"A-Z",
+    "xdigit": r"0-9A-Fa-f",
+}
+
+
+def _wildmatch_regex(pattern: str) -> "re.Pattern[str]":
+    """Translate a git wildmatch pattern, without WM_PATHNAME, to a regex.
+
+    As in pathspecs, ``*`` and ``?`` also match ``/``.
+    """
+    out = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c == "*":
+            while i < n and pattern[i] == "*":
+                i += 1
+            out.append(".*")
+        elif c == "?":
+            out.append(".")
+        elif c == "\\" and i < n:
+            out.append(re.escape(pattern[i]))
+            i += 1
+        elif c == "[":
+            j = i
+            negate = j < n and pattern[j] in "!^"
+            if negate:
+                j += 1
+            members = []
+            first = True
+            while j < n and (pattern[j] != "]" or first):
+                first = False
+                if pattern.startswith("[:", j):
+                    close = pattern.find(":]", j + 2)
+                    if close >= 0 and pattern[j + 2 : close] in _CHAR_CLASSES:
+                        members.append(_CHAR_CLASSES[pattern[j + 2 : close]])
+                        j = close + 2
+                        continue
+                if pattern[j] == "\\" and j + 1 < n:
+                    j += 1
+                if j + 2 < n and pattern[j + 1] == "-" and pattern[j + 2] != "]":
+                    members.append(
+                        f"{re.escape(pattern[j])}-{re.escape(pattern[j + 2])}"
+                    )
+                    j += 3
+                else:
+                    members.append(re.escape(pattern[j]))
+                    j += 1
+            if j >= n:
+                # Unterminated bracket: git treats the pattern as not matching
+                return re.compile(r"(?!)")
+            out.append(f"[{'^' if negate else ''}{''.join(members)}]")
+            i = j + 1
+        else:
+            out.append(re.escape(c))
+    return re.compile("".join(out), re.S)
+
+
+def compile_pathspec(pattern: str) -> Callable[[str], bool]:
+    """Build a matcher for one git pathspec, relative to the worktree root.
+
+    Literal pathspecs match the path itself or anything below it; patterns
+    with wildcards must match the whole path.
+    """
+    if pattern in ("", "."):
+        return lambda path: True
+    wildcard = _WILDCARDS.search(pattern)
+    if wildcard is None:
+        literal = pattern.rstrip("/")
+        prefix = literal + "/"
+        return lambda path: path == literal or path.startswith(prefix)
+
+    regex = _wildmatch_regex(pattern)
+    # Cheap prefix test before the regex, as git does with nowildcard_len
+    literal = pattern[: wildcard.start()]
+
+    def match(path: str) -> bool:
+        return path.startswith(literal) and regex.fullmatch(path) is not None
+
+    return match
+
+
+def iter_index_files(
+    repo: GitRepository,
+    pattern: str = "*",
+    cwd: Optional[Path] = None,
+    cache: Optional[IndexCache] = None,
+) -> Iterator[Path]:
+    """Iterate tracked files like ``git ls-files <pattern>`` run in ``cwd``.
+
+    The index is read before this returns, so UnsupportedIndexError is
+    raised eagerly rather than part way through iteration. Paths are
+    relative to ``cwd`` and limited to files below it, as with git.
+    """
+    if repo.worktree is None:
+        raise UnsupportedIndexError("bare repository")
+    if pattern.startswith(":"):
+        raise UnsupportedIndexError("magic pathspec")
+
+    cwd = Path(os.path.abspath(cwd if cwd is not None else os.getcwd()))
+    rel_cwd = os.path.relpath(cwd, repo.worktree)
+    if rel_cwd == ".." or rel_cwd.startswith(".." + os.sep):
+        raise UnsupportedIndexError("cwd outside worktree")
+    prefix = "" if rel_cwd == "." else Path(rel_cwd).as_posix() + "/"
+
+    spec = os.path.normpath(pattern) if pattern not in ("", ".") else ""
+    if spec == ".." or spec.startswith("../"):
+        raise UnsupportedIndexError("pathspec outside cwd")
+    if spec == ".":
+        spec = ""
+    if pattern.endswith("/") and spec:
+        spec += "/"
+
+    paths = (cache or _cache).paths(repo)
+    return _matching(paths, prefix, compile_pathspec(prefix + spec))
+
+
+def _matching(
+    paths: Tuple[str, ...], prefix: str, match: Callable[[str], bool]
+) -> Iterator[Path]:
+    strip = len(prefix)
+    for path in paths:
+        if path.startswith(prefix) and match(path):
+            yield Path(path[strip:])
+
+
+_cache = IndexCache()
+
+
+def clear_index_cache() -> None:
+    """Forget parsed indexes held by the shared cache."""
+    _cache.clear()
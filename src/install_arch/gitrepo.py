@@ -0,0 +1,199 @@
+"""In-process git repository discovery.
+
+Mirrors the lookup done by ``git rev-parse --git-dir`` without spawning a
+process: walk up from a directory looking for ``.git`` (a directory, or a
+``gitdir:`` file as used by worktrees and submodules), honouring GIT_DIR
+and GIT_CEILING_DIRECTORIES.
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Signature used to validate a cached lookup: stat data of every path the
+# lookup depended on
+_Signature = Tuple[Tuple[str, Optional[Tuple[int, int]]], ...]
+
+
+@dataclass(frozen=True)
+class GitRepository:
+    """Location of a git repository."""
+
+    # Per-worktree git directory (HEAD, index)
+    git_dir: Path
+    # Directory shared by all worktrees (objects, refs)
+    common_dir: Path
+    # Top of the working tree, or None for bare repositories
+    worktree: Optional[Path]
+
+    @property
+    def index_path(self) -> Path:
+        """Path of the index file for this worktree."""
+        return self.git_dir / "index"
+
+
+def _stat_key(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns)
+
+
+def _read_gitdir_file(path: Path) -> Optional[Path]:
+    """Resolve a ``gitdir: <path>`` file to the directory it points at."""
+    try:
+        content = path.read_text(encoding="utf-8").strip()
+    except (OSError, UnicodeDecodeError):
+        return None
+    if not content.startswith("gitdir:"):
+        return None
+    target = Path(content[len("gitdir:") :].strip())
+    if not target.is_absolute():
+        target = path.parent / target
+    return Path(os.path.normpath(target))
+
+
+def _common_dir(git_dir: Path) -> Path:
+    """Follow a worktree's ``commondir`` file to the shared git directory."""
+    try:
+        common = (git_dir / "commondir").read_text(encoding="utf-8").strip()
+    except (OSError, UnicodeDecodeError):
+        return git_dir
+    target = Path(common)
+    if not target.is_absolute():
+        target = git_dir / target
+    return Path(os.path.normpath(target))
+
+
+def _is_git_dir(path: Path) -> bool:
+    """Check the minimal layout git requires of a git directory."""
+    if not (path / "HEAD").is_file():
+        return False
+    return (_common_dir(path) / "objects").is_dir()
+
+
+def discover_repository(start: Path) -> Tuple[Optional[GitRepository], List[Path]]:
+    """Walk up from ``start`` to find a repository.
+
+    Returns the repository (or None) and the paths the answer depends on,
+    which callers can stat to tell whether the answer is still valid.
+    """
+    depends: List[Path] = []
+
+    env_git_dir = os.environ.get("GIT_DIR")
+    if env_git_dir:
+        env_dir = Path(env_git_dir)
+        if not env_dir.is_absolute():
+            env_dir = start / env_dir
+        depends.append(env_dir)
+        if not _is_git_dir(env_dir):
+            return None, depends
+        work_tree = os.environ.get("GIT_WORK_TREE")
+        return (
+            GitRepository(
+                git_dir=env_dir,
+                common_dir=_common_dir(env_dir),
+                worktree=Path(work_tree) if work_tree else start,
+            ),
+            depends,
+        )
+
+    ceilings = {
+        Path(p)
+        for p in os.environ.get("GIT_CEILING_DIRECTORIES", "").split(os.pathsep)
+        if p
+    }
+
+    current = start
+    while True:
+        depends.append(current)
+        dot_git = current / ".git"
+        git_dir: Optional[Path] = None
+        if dot_git.is_dir():
+            git_dir = dot_git
+        elif dot_git.is_file():
+            depends.append(dot_git)
+            git_dir = _read_gitdir_file(dot_git)
+
+        if git_dir is not None and _is_git_dir(git_dir):
+            return (
+                GitRepository(
+                    git_dir=git_dir,
+                    common_dir=_common_dir(git_dir),
+                    worktree=current,
+                ),
+                depends,
+            )
+
+        # Inside a git directory itself (or a bare repository)
+        if current.name.endswith(".git") or (current / "objects").is_dir():
+            if _is_git_dir(current):
+                return (
+                    GitRepository(
+                        git_dir=current, common_dir=_common_dir(current), worktree=None
+                    ),
+                    depends,
+                )
+
+        parent = current.parent
+        if parent == current or parent in ceilings:
+            return None, depends
+        current = parent
+
+
+class RepositoryLocator:
+    """Caches repository discovery per starting directory.
+
+    A cached answer is revalidated by stat-ing the directories it walked
+    (creating or removing ``.git`` changes their mtime) and any ``gitdir:``
+    file it followed, so lookups cost a handful of stats instead of a fork.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._cache: Dict[
+            Tuple[Path, Optional[str]],
+            Tuple[_Signature, Optional[GitRepository]],
+        ] = {}
+
+    @staticmethod
+    def _signature(paths: List[Path]) -> _Signature:
+        return tuple((str(p), _stat_key(p)) for p in paths)
+
+    def locate(self, start: Optional[Path] = None) -> Optional[GitRepository]:
+        """Find the repository containing ``start`` (default: the cwd)."""
+        start = Path(os.path.abspath(start if start is not None else os.getcwd()))
+        key = (start, os.environ.get("GIT_DIR"))
+
+        with self._lock:
+            cached = self._cache.get(key)
+        if cached is not None:
+            signature, repo = cached
+            if self._signature([Path(p) for p, _ in signature]) == signature:
+                return repo
+
+        repo, depends = discover_repository(start)
+        with self._lock:
+            self._cache[key] = (self._signature(depends), repo)
+        return repo
+
+    def invalidate(self) -> None:
+        """Forget every cached lookup."""
+        with self._lock:
+            self._cache.clear()
+
+
+_locator = RepositoryLocator()
+
+
+def find_repository(start: Optional[Path] = None) -> Optional[GitRepository]:
+    """Find the repository containing ``start`` using the shared locator."""
+    return _locator.locate(start)
+
+
+def invalidate_repository_cache() -> None:
+    """Forget cached repository lookups."""
+    _locator.invalidate()
@@ -0,0 +1,398 @@
+"""Streaming git sessions for high-volume index operations.
+
+An :class:`IndexSession` keeps git plumbing processes open for the whole
+session instead of forking git for every file: content is hashed through a
+single ``git hash-object --stdin-paths`` and every index change is written
+with one ``git update-index -z --index-info`` when the session ends. Content
+that is only compared, not staged, goes through a second pipe without
+``-w``, so no objects are written for it.
+"""
+
+import os
+import shutil
+import stat
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Set, Tuple
+
+from .filesystem import _NULL_OID, FileOpResult, PathLike, _relative_to
+from .gitrepo import GitRepository
+
+if TYPE_CHECKING:
+    from .filesystem import FileSystemOps
+
+# (mode, object id) of a stage-0 index entry
+_Entry = Tuple[str, str]
+
+
+class GitPipe:
+    """A long-lived git process answering one line per request line."""
+
+    def __init__(self, args: List[str], cwd: Path):
+        self._args = ["git", *args]
+        # Warnings go to a file so a chatty git can never fill a pipe and
+        # deadlock the request loop
+        self._stderr = tempfile.TemporaryFile()
+        self._proc = subprocess.Popen(
+            self._args,
+            cwd=cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self._stderr,
+        )
+
+    def request(self, line: str) -> str:
+        """Send one request line and return the reply line."""
+        assert self._proc.stdin is not None and self._proc.stdout is not None
+        try:
+            self._proc.stdin.write(os.fsencode(line) + b"\n")
+            self._proc.stdin.flush()
+        except BrokenPipeError:
+            raise self._failure() from None
+        reply = self._proc.stdout.readline()
+        if not reply:
+            raise self._failure()
+        return os.fsdecode(reply.rstrip(b"\n"))
+
+    def _failure(self) -> subprocess.CalledProcessError:
+        returncode = self._proc.wait()
+        self._stderr.seek(0)
+        stderr = self._stderr.read().decode(errors="replace")
+        return subprocess.CalledProcessError(returncode, self._args, stderr=stderr)
+
+    def close(self) -> None:
+        """Close stdin and reap the process."""
+        if self._proc.stdin is not None and not self._proc.stdin.closed:
+            try:
+                self._proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        try:
+            self._proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self._proc.kill()
+            self._proc.wait()
+        if self._proc.stdout is not None:
+            self._proc.stdout.close()
+        self._stderr.close()
+
+
+class IndexSession:
+    """Batches moves, removals and adds into one atomic index update.
+
+    Worktree changes are made immediately, so later operations in the
+    session see them, and journalled; removed files are parked in a trash
+    directory until the session ends. On a clean exit every index change
+    is written at once. If the block raises, the journal is replayed
+    backwards and the index is never touched.
+
+    Without a repository (or with git operations disabled) the session
+    still journals worktree changes but has no index to update.
+    """
+
+    def __init__(self, fs_ops: "FileSystemOps", repo: Optional[GitRepository]):
+        self._fs_ops = fs_ops
+        self._repo = repo if repo is not None and repo.worktree is not None else None
+        self._root = self._repo.worktree if self._repo else None
+        self._original: Dict[str, _Entry] = {}
+        self._entries: Dict[str, _Entry] = {}
+        self._unmerged: Set[str] = set()
+        self._index_loaded = False
+        # Paths whose index entry may differ from the original index
+        self._dirty: Set[str] = set()
+        # (source, destination) of every worktree move, in order
+        self._journal: List[Tuple[Path, Path]] = []
+        self._trash: Optional[Path] = None
+        # hash-object pipes that write objects (True) or only compare
+        self._hashers: Dict[bool, GitPipe] = {}
+        self._closed = False
+        self.results: List[FileOpResult] = []
+
+    def __enter__(self) -> "IndexSession":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.apply()
+        else:
+            self.rollback()
+
+    # Index bookkeeping
+
+    def _load_index(self) -> None:
+        if self._index_loaded or self._root is None:
+            return
+        result = self._fs_ops._run_git_command(["ls-files", "-s", "-z"], cwd=self._root)
+        for record in result.stdout.split("\0"):
+            if not record:
+                continue
+            info, path = record.split("\t", 1)
+            mode, oid, stage = info.split()
+            if stage == "0":
+                self._original[path] = (mode, oid)
+            else:
+                self._unmerged.add(path)
+        self._entries = dict(self._original)
+        self._index_loaded = True
+
+    def _tracked_under(self, rel: str, is_dir: bool) -> List[str]:
+        """Index paths for ``rel`` itself or, for directories, below it."""
+        if rel in self._entries or rel in self._unmerged:
+            return [rel]
+        if not is_dir:
+            return []
+        prefix = rel + "/"
+        paths = [p for p in self._entries if p.startswith(prefix)]
+        paths.extend(p for p in self._unmerged if p.startswith(prefix))
+        return paths
+
+    def _hash(self, path: Path, rel: str, write: bool = True) -> str:
+        """Object id of a worktree file, stored as an object if ``write``."""
+        flags = ["-w"] if write else []
+        if path.is_symlink():
+            result = self._fs_ops._run_git_command(
+                ["hash-object", *flags, "--stdin"],
+                cwd=self._root,
+                input=os.readlink(path),
+            )
+            return result.stdout.strip()
+        hasher = self._hashers.get(write)
+        if hasher is None:
+            assert self._root is not None
+            hasher = GitPipe(["hash-object", *flags, "--stdin-paths"], self._root)
+            self._hashers[write] = hasher
+        return hasher.request(rel)
+
+    # Worktree journal
+
+    def _trash_dir(self) -> Path:
+        if self._trash is None:
+            if self._repo is not None:
+                self._trash = Path(
+                    tempfile.mkdtemp(
+                        prefix="install-arch-trash-", dir=self._repo.git_dir
+                    )
+                )
+            else:
+                self._trash = self._fs_ops.create_secure_temp_dir(prefix="trash-")
+        return self._trash
+
+    def _move(self, src: Path, dst: Path) -> None:
+        shutil.move(str(src), str(dst))
+        self._journal.append((src, dst))
+
+    def _prune_empty_parents(self, path: Path) -> None:
+        """Drop directories emptied by a removal, as ``git rm`` does."""
+        if self._root is None:
+            return
+        parent = Path(os.path.abspath(path)).parent
+        while parent != self._root and self._root in parent.parents:
+            try:
+                parent.rmdir()
+            except OSError:
+                return
+            parent = parent.parent
+
+    def _record(self, result: FileOpResult) -> FileOpResult:
+        self.results.append(result)
+        return result
+
+    def _check_open(self) -> None:
+        if self._closed:
+            raise RuntimeError("Index session already closed")
+
+    # Operations
+
+    def move(self, src: PathLike, dst: PathLike) -> FileOpResult:
+        """Move a file or directory like ``git mv``."""
+        self._check_open()
+        self._load_index()
+        src, dst = Path(src), Path(dst)
+        if dst.is_dir():
+            dst = dst / src.name
+        if not os.path.lexists(src):
+            return self._record(FileOpResult(src, False, "source does not exist"))
+        if os.path.lexists(dst):
+            return self._record(FileOpResult(src, False, "destination exists"))
+
+        tracked: List[str] = []
+        rel_src = rel_dst = None
+        if self._root is not None:
+            rel_src = _relative_to(src, self._root)
+            rel_dst = _relative_to(dst, self._root)
+            if rel_src:
+                is_dir = src.is_dir() and not src.is_symlink()
+                tracked = self._tracked_under(rel_src, is_dir)
+        if tracked:
+            if rel_dst is None:
+                return self._record(
+                    FileOpResult(src, False, "destination outside repository")
+                )
+            if any(p in self._unmerged for p in tracked):
+                return self._record(
+                    FileOpResult(src, False, "has unmerged index entries")
+                )
+
+        try:
+            self._move(src, dst)
+        except (OSError, shutil.Error) as e:
+            return self._record(FileOpResult(src, False, str(e)))
+
+        for path in tracked:
+            assert rel_src is not None and rel_dst is not None
+            new_path = rel_dst + path[len(rel_src) :]
+            self._entries[new_path] = self._entries.pop(path)
+            self._dirty.update((path, new_path))
+        return self._record(FileOpResult(src, True, destination=dst))
+
+    def remove(self, path: PathLike, force: bool = False) -> FileOpResult:
+        """Remove a file or directory like ``git rm -r``.
+
+        Tracked files whose content differs from the index are refused
+        unless ``force`` is set, mirroring git's protection of local edits.
+        """
+        self._check_open()
+        self._load_index()
+        path = Path(path)
+        exists = os.path.lexists(path)
+
+        tracked: List[str] = []
+        rel = None
+        if self._root is not None:
+            rel = _relative_to(path, self._root)
+            if rel:
+                is_dir = path.is_dir() and not path.is_symlink()
+                tracked = self._tracked_under(rel, is_dir)
+        if not exists and not tracked:
+            return self._record(FileOpResult(path, False, "does not exist"))
+
+        if exists and tracked and not force:
+            assert self._root is not None
+            for entry in tracked:
+                worktree_path = self._root / entry
+                if entry in self._unmerged or not os.path.lexists(worktree_path):
+                    continue
+                if (
+                    self._hash(worktree_path, entry, write=False)
+                    != self._entries[entry][1]
+                ):
+                    return self._record(
+                        FileOpResult(path, False, f"{entry} has local modifications")
+                    )
+
+        # Like git rm -r, only tracked files leave a tracked directory
+        if self._root is not None and tracked and tracked != [rel]:
+            victims = [self._root / entry for entry in tracked]
+        else:
+            victims = [path]
+        for victim in victims:
+            if not os.path.lexists(victim):
+                continue
+            parked = self._trash_dir() / str(len(self._journal))
+            try:
+                self._move(victim, parked)
+            except (OSError, shutil.Error) as e:
+                return self._record(FileOpResult(path, False, str(e)))
+            self._prune_empty_parents(victim)
+
+        for entry in tracked:
+            self._entries.pop(entry, None)
+            self._dirty.add(entry)
+        return self._record(FileOpResult(path, True))
+
+    def add(self, path: PathLike) -> FileOpResult:
+        """Stage a file's current content like ``git add -f``."""
+        self._check_open()
+        self._load_index()
+        path = Path(path)
+        if self._root is None:
+            return self._record(FileOpResult(path, False, "not in a git repository"))
+        if not os.path.lexists(path):
+            return self._record(FileOpResult(path, False, "does not exist"))
+        if path.is_dir() and not path.is_symlink():
+            return self._record(FileOpResult(path, False, "is a directory"))
+        rel = _relative_to(path, self._root)
+        if not rel:
+            return self._record(FileOpResult(path, False, "outside repository"))
+        if "\n" in rel:
+            return self._record(FileOpResult(path, False, "newline in path"))
+
+        st = os.lstat(path)
+        if stat.S_ISLNK(st.st_mode):
+            mode = "120000"
+        elif st.st_mode & stat.S_IXUSR:
+            mode = "100755"
+        else:
+            mode = "100644"
+        try:
+            oid = self._hash(path, rel)
+        except (OSError, subprocess.CalledProcessError) as e:
+            return self._record(FileOpResult(path, False, str(e)))
+
+        self._entries[rel] = (mode, oid)
+        self._dirty.add(rel)
+        return self._record(FileOpResult(path, True))
+
+    # Completion
+
+    def _index_info(self) -> str:
+        records = []
+        for path in sorted(self._dirty):
+            new = self._entries.get(path)
+            if path in self._unmerged:
+                # Mode 0 drops every stage, resolving the conflict
+                records.append(f"0 {_NULL_OID}\t{path}\0")
+            elif new == self._original.get(path):
+                continue
+            elif new is None:
+                records.append(f"0 {_NULL_OID}\t{path}\0")
+            if new is not None:
+                records.append(f"{new[0]} {new[1]}\t{path}\0")
+        return "".join(records)
+
+    def _close_pipes(self) -> None:
+        for hasher in self._hashers.values():
+            hasher.close()
+        self._hashers.clear()
+
+    def apply(self) -> None:
+        """Write every queued index change in one update and end the session."""
+        self._check_open()
+        self._close_pipes()
+        index_info = self._index_info()
+        if index_info:
+            assert self._root is not None
+            try:
+                self._fs_ops._run_git_command(
+                    ["update-index", "-z", "--index-info"],
+                    cwd=self._root,
+                    input=index_info,
+                )
+            except subprocess.CalledProcessError:
+                self.rollback()
+                raise
+            # Entries written through --index-info carry no stat data
+            self._fs_ops._run_git_command(
+                ["update-index", "-q", "--refresh"], cwd=self._root, check=False
+            )
+        self._closed = True
+        if self._trash is not None:
+            self._fs_ops.cleanup_temp(self._trash)
+
+    def rollback(self) -> None:
+        """Undo the session's worktree changes, leaving the index untouched."""
+        if self._closed:
+            return
+        self._close_pipes()
+        restored = True
+        for src, dst in reversed(self._journal):
+            try:
+                src.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(dst), str(src))
+            except (OSError, shutil.Error):
+                restored = False
+        self._closed = True
+        # Keep the trash if anything could not be put back
+        if restored and self._trash is not None:
+            self._fs_ops.cleanup_temp(self._trash)
@@ -1,36 +1,265 @@
 """Guardrails validation for package functionality baseline compliance."""
 
 import os
-import subprocess
-import tomllib
+import shutil
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .baseline import (
+    BASELINE_PATH,
+    PACKAGED_BASELINE_PATH,
+    CompiledBaseline,
+    load_baseline,
+)
+from .config import DevConfig, get_config, invalidate_config, reload_config
+from .gitrepo import find_repository
+from .tools import get_tool_resolver
+
+
+@dataclass(frozen=True)
+class Probe:
+    """A named guardrail probe and the probes whose results it consumes."""
+
+    name: str
+    method: str
+    deps: Tuple[str, ...] = ()
+    # Default per-probe timeout in seconds for concurrent evaluation
+    timeout: float = 5.0
+    # Watchable inputs (see GuardrailsValidator.input_paths) the result
+    # depends on; a change to any of them makes the probe stale
+    inputs: Tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class ProbeResult:
+    """Outcome of a single probe run.
+
+    ``passed`` is None when the probe did not finish before its deadline.
+    """
+
+    name: str
+    passed: Optional[bool]
+    duration: float
+    # What the probe found out along the way, e.g. where a tool lives
+    data: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def status(self) -> str:
+        """Human readable status: pass, fail or unknown."""
+        if self.passed is None:
+            return "unknown"
+        return "pass" if self.passed else "fail"
+
+
+@dataclass
+class GuardrailsEvaluation:
+    """Result of a single guardrails pass over all required probes."""
+
+    probes: Dict[str, ProbeResult] = field(default_factory=dict)
+    compliance_status: Dict[str, Optional[bool]] = field(default_factory=dict)
+    baseline_status: Dict[str, Optional[bool]] = field(default_factory=dict)
+    duration: float = 0.0
+
+    @property
+    def compliance(self) -> Dict[str, bool]:
+        """Compliance results for checks that completed."""
+        return {k: v for k, v in self.compliance_status.items() if v is not None}
+
+    @property
+    def baseline(self) -> Dict[str, bool]:
+        """Baseline results for checks that completed."""
+        return {k: v for k, v in self.baseline_status.items() if v is not None}
+
+    @property
+    def unknown_checks(self) -> List[str]:
+        """Compliance checks that missed their deadline."""
+        return [k for k, v in self.compliance_status.items() if v is None]
+
+    @property
+    def unknown_baseline(self) -> List[str]:
+        """Baseline requirements whose probes missed their deadline."""
+        return [k for k, v in self.baseline_status.items() if v is None]
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        """Per-probe wall-clock time in seconds."""
+        return {name: result.duration for name, result in self.probes.items()}
+
+
+PROBES: Dict[str, Probe] = {
+    probe.name: probe
+    for probe in (
+        # Resolving the tool may run its --version once per binary change
+        Probe(
+            "package_manager_supported",
+            "_probe_package_manager_supported",
+            timeout=10.0,
+            inputs=("config", "baseline", "tool"),
+        ),
+        Probe("venv_exists", "_probe_venv_exists", inputs=("config", "venv")),
+        Probe(
+            "git_repo_present", "_probe_git_repo_present", timeout=10.0, inputs=("git",)
+        ),
+        Probe(
+            "filesystem_git_preferred",
+            "_probe_filesystem_git_preferred",
+            deps=("git_repo_present",),
+        ),
+        Probe(
+            "tmp_base_permissions",
+            "_probe_tmp_base_permissions",
+            inputs=("config", "tmp_base"),
+        ),
+        # Environment variables cannot change under a running process
+        Probe("devcontainer_active", "_probe_devcontainer_active"),
+    )
+}
+
+
+def probe_closure(names: Iterable[str]) -> Set[str]:
+    """Return the given probes together with everything they depend on."""
+    closure: Set[str] = set()
+    pending = list(names)
+    while pending:
+        name = pending.pop()
+        if name not in closure:
+            closure.add(name)
+            pending.extend(PROBES[name].deps)
+    return closure
+
+
+def stale_probes(changed_inputs: Iterable[str]) -> Set[str]:
+    """Return probes invalidated by changed inputs, including dependents."""
+    changed = set(changed_inputs)
+    if "baseline" in changed:
+        return set(PROBES)
+
+    stale = {name for name, probe in PROBES.items() if changed & set(probe.inputs)}
+    grew = True
+    while grew:
+        dependents = {
+            name
+            for name, probe in PROBES.items()
+            if name not in stale and stale & set(probe.deps)
+        }
+        grew = bool(dependents)
+        stale |= dependents
+    return stale
+
+
+# Compliance result key -> (compliance_checks flag, probe name)
+COMPLIANCE_VIEW: Dict[str, Tuple[str, str]] = {
+    "package_manager_supported": (
+        "check_package_manager",
+        "package_manager_supported",
+    ),
+    "venv_properly_created": ("check_venv_isolation", "venv_exists"),
+    "git_operations_available": ("check_git_operations", "git_repo_present"),
+    "temp_security_compliant": ("check_temp_security", "tmp_base_permissions"),
+    "devcontainer_usage": ("validate_devcontainer_usage", "devcontainer_active"),
+}
+
+# Baseline result key -> (required baseline value, probe name)
+BASELINE_VIEW: Dict[str, Tuple[str, str]] = {
+    "python_package_management": ("configured_tool", "package_manager_supported"),
+    "venv_management": ("tool_managed", "venv_exists"),
+    "filesystem_operations": ("git_preferred", "filesystem_git_preferred"),
+    "temporary_files": ("secure_mktemp", "tmp_base_permissions"),
+    "development_environment": ("devcontainer_isolated", "devcontainer_active"),
+}
 
 
 class GuardrailsValidator:
     """Validates compliance with package functionality baseline guardrails."""
 
-    def __init__(self, guardrails_path: Optional[Path] = None):
+    def __init__(
+        self,
+        guardrails_path: Optional[Path] = None,
+        config: Optional[DevConfig] = None,
+    ):
+        # The default baseline reconciles the .github specification with
+        # the copy shipped inside the package; an explicit path stands alone
+        self._baseline = load_baseline(guardrails_path)
+        self._explicit_baseline = guardrails_path is not None
         if guardrails_path is None:
-            # Load from the comprehensive .github guardrails specification
-            guardrails_path = (
-                Path(__file__).parent.parent.parent
-                / ".github"
-                / "guardrails"
-                / "package-baseline.toml"
-            )
+            guardrails_path = BASELINE_PATH
 
         self.guardrails_path = guardrails_path
-        self._config: Dict[str, Any] = {}
-
-        if guardrails_path.exists():
-            with open(guardrails_path, "rb") as f:
-                self._config = tomllib.load(f)
+        self._dev_config = config
+
+    @property
+    def _config(self) -> Dict[str, Any]:
+        """Raw baseline document."""
+        return self._baseline.raw
+
+    @_config.setter
+    def _config(self, value: Dict[str, Any]) -> None:
+        self._baseline = CompiledBaseline.from_dict(value)
+
+    @property
+    def baseline(self) -> CompiledBaseline:
+        """Compiled baseline the validator checks against."""
+        return self._baseline
+
+    @property
+    def dev_config(self) -> DevConfig:
+        """Development config, shared through the process-wide registry."""
+        return self._dev_config or get_config()
+
+    def reload_baseline(self) -> None:
+        """Reload the baseline after its file changed."""
+        self._baseline = load_baseline(
+            self.guardrails_path if self._explicit_baseline else None
+        )
+
+    def refresh_config(self) -> None:
+        """Re-read the development config after its file changed."""
+        if self._dev_config is None:
+            invalidate_config()
+        else:
+            self._dev_config = reload_config(self._dev_config.config_path)
+
+    def input_paths(self) -> Dict[str, List[Path]]:
+        """Filesystem paths behind each probe input, for change watching."""
+        config = self.dev_config
+        venv_path = Path(config.venv_path)
+        tool = get_tool_resolver().locate(config.package_manager)
+        baseline_paths = [self.guardrails_path]
+        if not self._explicit_baseline:
+            baseline_paths.insert(0, PACKAGED_BASELINE_PATH)
+
+        return {
+            "config": [config.config_path],
+            "baseline": baseline_paths,
+            "venv": [venv_path, venv_path / "bin"],
+            "tmp_base": [Path(config.tmp_base_dir)],
+            "git": self._git_input_paths(),
+            "tool": [Path(tool)] if tool else [],
+        }
+
+    @staticmethod
+    def _git_input_paths() -> List[Path]:
+        """Git and common dirs and the index of the repository, if any.
+
+        Outside a repository, the place ``git init`` would create one.
+        """
+        repo = find_repository()
+        if repo is None:
+            return [Path.cwd() / ".git"]
+        paths = [repo.git_dir, repo.common_dir, repo.index_path]
+        if repo.worktree is not None:
+            # The .git directory, or the gitdir file of a linked worktree
+            paths.append(repo.worktree / ".git")
+        return list(dict.fromkeys(paths))
 
     def validate_package_manager(self, tool: str) -> bool:
         """Validate that the package manager is supported."""
-        supported_tools = self._config.get("tool_configuration", {}).keys()
-        return tool in supported_tools
+        return tool in self._baseline.supported_tools
 
     def validate_venv_creation(self, tool: str, venv_path: Path) -> bool:
         """Validate virtual environment creation."""
@@ -53,22 +282,9 @@ class GuardrailsValidator:
 
     def validate_git_operations(self) -> bool:
         """Validate that git operations are being used appropriately."""
-        try:
-            # Check if we're in a git repository
-            result = subprocess.run(
-                ["git", "rev-parse", "--git-dir"],
-                capture_output=True,
-                text=True,
-                check=True,
-                timeout=10,
-            )
-            return result.returncode == 0
-        except (
-            subprocess.CalledProcessError,
-            FileNotFoundError,
-            subprocess.TimeoutExpired,
-        ):
-            return False
+        # Git must be installed and we must be inside a repository; the
+        # repository lookup is done in-process and cached per directory
+        return shutil.which("git") is not None and find_repository() is not None
 
     def validate_temp_security(self, temp_dir: Path) -> bool:
         """Validate temporary directory security."""
@@ -109,98 +325,255 @@ class GuardrailsValidator:
         # Could be extended to check if operations use git commands
         return self.validate_git_operations()
 
-    def validate_baseline_requirements(self) -> Dict[str, bool]:
-        """Validate baseline requirements from the comprehensive config."""
-        baseline = self._config.get("baseline_requirements", {})
-        results = {}
-
-        # Check python package management
-        if baseline.get("python_package_management") == "configured_tool":
-            from .config import DevConfig
-
-            config = DevConfig()
-            results["python_package_management"] = self.validate_package_manager(
-                config.package_manager
-            )
-
-        # Check venv management
-        if baseline.get("venv_management") == "tool_managed":
-            from .config import DevConfig
+    def _probe_package_manager_supported(
+        self, config: DevConfig, deps: Dict[str, bool]
+    ) -> Tuple[bool, Dict[str, Any]]:
+        # The same cached resolution setup uses to find the tool
+        tool = config.package_manager
+        resolved = get_tool_resolver().resolve(tool)
+        data = {
+            "tool": tool,
+            "path": resolved.path if resolved else None,
+            "version": resolved.version if resolved else None,
+        }
+        return self.validate_package_manager(tool), data
+
+    def _probe_venv_exists(self, config: DevConfig, deps: Dict[str, bool]) -> bool:
+        return self.validate_venv_creation(
+            config.package_manager, Path(config.venv_path)
+        )
+
+    def _probe_git_repo_present(self, config: DevConfig, deps: Dict[str, bool]) -> bool:
+        return self.validate_git_operations()
 
-            config = DevConfig()
-            venv_path = Path(config.venv_path)
-            results["venv_management"] = self.validate_venv_creation(
-                config.package_manager, venv_path
+    def _probe_filesystem_git_preferred(
+        self, config: DevConfig, deps: Dict[str, Optional[bool]]
+    ) -> Optional[bool]:
+        # Git-preferred filesystem rules only need git to be available,
+        # which the git repo probe has already established
+        return deps["git_repo_present"]
+
+    def _probe_tmp_base_permissions(
+        self, config: DevConfig, deps: Dict[str, bool]
+    ) -> bool:
+        temp_base = Path(config.tmp_base_dir)
+        if temp_base.exists():
+            return self.validate_temp_security(temp_base)
+        return True  # Not created yet
+
+    def _probe_devcontainer_active(
+        self, config: DevConfig, deps: Dict[str, bool]
+    ) -> bool:
+        return self.validate_devcontainer_usage()
+
+    def _run_probe(
+        self, name: str, config: DevConfig, results: Dict[str, ProbeResult]
+    ) -> ProbeResult:
+        """Run a probe and its dependencies, each at most once."""
+        if name in results:
+            return results[name]
+
+        probe = PROBES[name]
+        deps = {dep: self._run_probe(dep, config, results).passed for dep in probe.deps}
+
+        start = time.perf_counter()
+        passed, data = self._call_probe(probe, config, deps)
+        results[name] = ProbeResult(name, passed, time.perf_counter() - start, data)
+        return results[name]
+
+    def _call_probe(
+        self, probe: Probe, config: DevConfig, deps: Dict[str, Any]
+    ) -> Tuple[Optional[bool], Dict[str, Any]]:
+        """Run a probe method; methods may return ``(passed, data)``."""
+        outcome = getattr(self, probe.method)(config, deps)
+        if isinstance(outcome, tuple):
+            return outcome
+        return outcome, {}
+
+    def _schedule_probe(
+        self,
+        name: str,
+        config: DevConfig,
+        futures: Dict[str, "Future[ProbeResult]"],
+    ) -> "Future[ProbeResult]":
+        """Start a probe on its own thread once its dependencies are scheduled."""
+        if name in futures:
+            return futures[name]
+
+        probe = PROBES[name]
+        dep_futures = {
+            dep: self._schedule_probe(dep, config, futures) for dep in probe.deps
+        }
+        future: "Future[ProbeResult]" = Future()
+        futures[name] = future
+
+        def worker() -> None:
+            try:
+                deps = {dep: f.result().passed for dep, f in dep_futures.items()}
+                start = time.perf_counter()
+                passed, data = self._call_probe(probe, config, deps)
+                future.set_result(
+                    ProbeResult(name, passed, time.perf_counter() - start, data)
+                )
+            except BaseException as e:
+                future.set_exception(e)
+
+        # Daemon threads: a probe stuck past its deadline must not keep the
+        # interpreter (and therefore a commit hook) alive on exit
+        threading.Thread(target=worker, name=f"guardrail-{name}", daemon=True).start()
+        return future
+
+    def _run_probes_concurrently(
+        self,
+        names: List[str],
+        config: DevConfig,
+        budget: Optional[float],
+        probe_timeout: Optional[float],
+        seed: Dict[str, ProbeResult],
+    ) -> Dict[str, ProbeResult]:
+        """Run probes on worker threads, marking late ones as unknown.
+
+        A probe's timeout runs from when its dependencies finished, so a
+        slow dependency does not eat into its dependents' time. A probe
+        whose dependency missed its deadline is unknown as well.
+        """
+        start = time.perf_counter()
+        futures: Dict[str, "Future[ProbeResult]"] = {}
+        for name, result in seed.items():
+            futures[name] = Future()
+            futures[name].set_result(result)
+        for name in names:
+            self._schedule_probe(name, config, futures)
+
+        # When each probe's result became available
+        finished: Dict[str, float] = {}
+
+        def on_done(name: str) -> Callable[["Future[ProbeResult]"], None]:
+            def record(_: "Future[ProbeResult]") -> None:
+                finished.setdefault(name, time.perf_counter())
+
+            return record
+
+        for name, future in futures.items():
+            future.add_done_callback(on_done(name))
+
+        results: Dict[str, ProbeResult] = {}
+        late: Set[str] = set()
+        # Dependencies are scheduled, and so listed, before their dependents
+        for name, future in futures.items():
+            deps = PROBES[name].deps
+            if late & set(deps):
+                late.add(name)
+                results[name] = ProbeResult(name, None, time.perf_counter() - start)
+                continue
+            timeout = (
+                probe_timeout if probe_timeout is not None else PROBES[name].timeout
             )
-
-        # Check filesystem operations
-        if baseline.get("filesystem_operations") == "git_preferred":
-            results["filesystem_operations"] = self.validate_filesystem_operations()
-
-        # Check temporary files
-        if baseline.get("temporary_files") == "secure_mktemp":
-            from .config import DevConfig
-
-            config = DevConfig()
-            temp_base = Path(config.tmp_base_dir)
-            if temp_base.exists():
-                results["temporary_files"] = self.validate_temp_security(temp_base)
-            else:
-                results["temporary_files"] = True
-
-        # Check development environment
-        if baseline.get("development_environment") == "devcontainer_isolated":
-            results["development_environment"] = self.validate_devcontainer_usage()
+            # Callbacks can lag the result by a moment; now is no earlier
+            now = time.perf_counter()
+            deadline = max([start, *(finished.get(dep, now) for dep in deps)])
+            deadline += timeout
+            if budget is not None:
+                deadline = min(deadline, start + budget)
+
+            try:
+                results[name] = future.result(
+                    timeout=max(0.0, deadline - time.perf_counter())
+                )
+            except FutureTimeoutError:
+                late.add(name)
+                results[name] = ProbeResult(name, None, time.perf_counter() - start)
 
         return results
 
-    def check_compliance(self) -> Dict[str, bool]:
-        """Run all compliance checks based on the comprehensive baseline."""
-        from .config import DevConfig
-
-        config = DevConfig()
-
-        results = {}
-
-        compliance_checks = self._config.get("compliance_checks", {})
-
-        # Check package manager if enabled
-        if compliance_checks.get("check_package_manager", True):
-            results["package_manager_supported"] = self.validate_package_manager(
-                config.package_manager
-            )
-
-        # Check venv if enabled
-        if compliance_checks.get("check_venv_isolation", True):
-            venv_path = Path(config.venv_path)
-            results["venv_properly_created"] = self.validate_venv_creation(
-                config.package_manager, venv_path
+    def evaluate(
+        self,
+        parallel: bool = False,
+        budget: Optional[float] = None,
+        probe_timeout: Optional[float] = None,
+        previous: Optional[GuardrailsEvaluation] = None,
+        stale: Iterable[str] = (),
+    ) -> GuardrailsEvaluation:
+        """Run every probe needed by the enabled checks in a single pass.
+
+        Both the compliance view and the baseline view are derived from the
+        same probe results, so shared inputs such as the git repository or
+        the temp base directory are only inspected once.
+
+        With ``parallel`` (implied by ``budget``) independent probes run
+        concurrently. Each probe gets its own timeout (``probe_timeout`` or
+        the probe default) and the whole run is capped at ``budget``
+        seconds; probes that miss their deadline are reported as unknown.
+
+        With ``previous``, results are reused for every probe except the
+        ``stale`` ones (see stale_probes), so only invalidated probes rerun.
+        """
+        config = self.dev_config
+        compliance_checks = self._baseline.compliance_checks
+        baseline = self._baseline.baseline_requirements
+
+        compliance_probes = {
+            key: probe
+            for key, (flag, probe) in COMPLIANCE_VIEW.items()
+            if compliance_checks.get(flag, True)
+        }
+        baseline_probes = {
+            key: probe
+            for key, (requirement, probe) in BASELINE_VIEW.items()
+            if baseline.get(key) == requirement
+        }
+
+        start = time.perf_counter()
+        names = list(
+            dict.fromkeys([*compliance_probes.values(), *baseline_probes.values()])
+        )
+        needed = probe_closure(names)
+        stale = set(stale)
+        seed = {
+            name: result
+            for name, result in (previous.probes if previous else {}).items()
+            if name in needed and name not in stale and result.passed is not None
+        }
+
+        results: Dict[str, ProbeResult] = dict(seed)
+        if parallel or budget is not None:
+            results = self._run_probes_concurrently(
+                names, config, budget, probe_timeout, seed
             )
+        else:
+            for probe_name in names:
+                self._run_probe(probe_name, config, results)
+
+        return GuardrailsEvaluation(
+            probes=results,
+            compliance_status={
+                key: results[name].passed for key, name in compliance_probes.items()
+            },
+            baseline_status={
+                key: results[name].passed for key, name in baseline_probes.items()
+            },
+            duration=time.perf_counter() - start,
+        )
+
+    def validate_baseline_requirements(
+        self, evaluation: Optional[GuardrailsEvaluation] = None
+    ) -> Dict[str, bool]:
+        """Validate baseline requirements from the comprehensive config."""
+        return (evaluation or self.evaluate()).baseline
 
-        # Check git operations if enabled
-        if compliance_checks.get("check_git_operations", True):
-            results["git_operations_available"] = self.validate_git_operations()
-
-        # Check temp security if enabled
-        if compliance_checks.get("check_temp_security", True):
-            temp_base = Path(config.tmp_base_dir)
-            if temp_base.exists():
-                results["temp_security_compliant"] = self.validate_temp_security(
-                    temp_base
-                )
-            else:
-                results["temp_security_compliant"] = True  # Not created yet
-
-        # Check devcontainer usage if enabled
-        if compliance_checks.get("validate_devcontainer_usage", True):
-            results["devcontainer_usage"] = self.validate_devcontainer_usage()
-
-        return results
+    def check_compliance(
+        self, evaluation: Optional[GuardrailsEvaluation] = None
+    ) -> Dict[str, bool]:
+        """Run all compliance checks based on the comprehensive baseline."""
+        return (evaluation or self.evaluate()).compliance
 
-    def get_violations(self) -> List[str]:
+    def get_violations(
+        self, evaluation: Optional[GuardrailsEvaluation] = None
+    ) -> List[str]:
         """Get list of compliance violations."""
-        compliance = self.check_compliance()
-        baseline = self.validate_baseline_requirements()
+        evaluation = evaluation or self.evaluate()
+        compliance = self.check_compliance(evaluation)
+        baseline = self.validate_baseline_requirements(evaluation)
         violations = []
 
         # Standard compliance checks
@@ -235,6 +608,12 @@ class GuardrailsValidator:
         if not baseline.get("development_environment", True):
             violations.append("Development not isolated in devcontainer")
 
+        # A check that could not finish has not shown compliance
+        for key in evaluation.unknown_checks:
+            violations.append(f"Compliance check did not finish: {key}")
+        for key in evaluation.unknown_baseline:
+            violations.append(f"Baseline check did not finish: {key}")
+
         return violations
 
     def enforce_guardrails(self) -> None:
@@ -0,0 +1,240 @@
+"""One pinned install set built from pyproject.toml and uv.lock.
+
+The planner reads ``[project.optional-dependencies]`` and
+``[dependency-groups]`` once, picks the extras and groups an install
+asks for, and pins everything they and the project's own dependencies
+pull in to the versions recorded in ``uv.lock``. The result is a single
+requirements file that every installer consumes in one invocation, so
+the dependency graph is resolved once, against the lock, instead of once
+per group.
+
+Without a lockfile, or with one that no longer matches pyproject.toml,
+the plan still installs everything in one invocation but leaves the
+installer to pick versions. A plan that ignored a stale lock is marked
+``stale`` so the install can say so.
+"""
+
+import hashlib
+import os
+import re
+import tomllib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from .config import cache_dir
+
+LOCKFILE = "uv.lock"
+
+# Extra and dependency group installed along with dev dependencies
+DEV_GROUP = "dev"
+
+_NAME_RE = re.compile(r"\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+
+def normalize_name(name: str) -> str:
+    """PEP 503 normalized form of a distribution name."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def requirement_name(requirement: str) -> Optional[str]:
+    """Normalized distribution name a requirement string refers to."""
+    match = _NAME_RE.match(requirement)
+    return normalize_name(match.group(1)) if match else None
+
+
+@dataclass(frozen=True)
+class InstallPlan:
+    """Requirements to install on top of the project, and their pins.
+
+    ``requirements`` are the selected extras and dependency groups;
+    the project's own dependencies come from installing the project.
+    ``constraints`` pin every package the install can reach and are
+    empty when the plan is not locked. ``stale`` is set when there is a
+    lockfile but it no longer matches pyproject.toml.
+    """
+
+    requirements: Tuple[str, ...]
+    constraints: Tuple[str, ...]
+    extras: Tuple[str, ...]
+    groups: Tuple[str, ...]
+    stale: bool = False
+
+    @property
+    def locked(self) -> bool:
+        return bool(self.constraints)
+
+    def write(self, directory: Optional[Path] = None) -> Path:
+        """Write the plan as a requirements file and return its path.
+
+        Files are named after their content, so plans that did not
+        change are not rewritten.
+        """
+        directory = directory or cache_dir() / "install-plans"
+        body = "".join(f"{line}\n" for line in self.constraints)
+        digest = hashlib.blake2b(
+            "\0".join(self.requirements).encode() + b"\0\0" + body.encode(),
+            digest_size=16,
+        ).hexdigest()
+        lines = list(self.requirements)
+        if self.constraints:
+            constraints_file = directory / f"{digest}-constraints.txt"
+            _write_once(constraints_file, body)
+            lines.append(f"-c {constraints_file}")
+        plan_file = directory / f"{digest}.txt"
+        _write_once(plan_file, "".join(f"{line}\n" for line in lines))
+        return plan_file
+
+
+def _write_once(path: Path, content: str) -> None:
+    if path.exists():
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp_file.write_text(content, encoding="utf-8")
+    os.replace(tmp_file, path)
+
+
+def _load_toml(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    except FileNotFoundError:
+        return {}
+    except tomllib.TOMLDecodeError:
+        # An unreadable lock pins nothing; the installer reports bad TOML
+        if path.name == LOCKFILE:
+            return {}
+        raise
+
+
+def _group_requirements(
+    groups: Dict[str, Any], name: str, seen: Optional[Set[str]] = None
+) -> Iterator[str]:
+    """Requirements of a dependency group, following ``include-group``."""
+    seen = seen if seen is not None else set()
+    if name in seen:
+        raise ValueError(f"Dependency group {name!r} includes itself")
+    seen.add(name)
+    for entry in groups.get(name, []):
+        if isinstance(entry, dict) and "include-group" in entry:
+            yield from _group_requirements(groups, entry["include-group"], seen)
+        elif isinstance(entry, str):
+            yield entry
+    seen.discard(name)
+
+
+class _Lock:
+    """The package graph recorded in a uv.lock."""
+
+    def __init__(self, data: Dict[str, Any], project: str):
+        self.packages: Dict[str, List[Dict[str, Any]]] = {}
+        for package in data.get("package", []):
+            name = normalize_name(package.get("name", ""))
+            self.packages.setdefault(name, []).append(package)
+        self.root = next(
+            (
+                package
+                for package in self.packages.get(project, [])
+                if {"editable", "virtual"} & set(package.get("source", {}))
+            ),
+            None,
+        )
+
+    def matches(self, declared: Set[Optional[str]]) -> bool:
+        """Whether the lock was made from the declared requirement names."""
+        if self.root is None:
+            return False
+        metadata = self.root.get("metadata", {})
+        locked = {
+            requirement_name(entry.get("name", ""))
+            for entry in metadata.get("requires-dist", [])
+        }
+        for entries in metadata.get("requires-dev", {}).values():
+            locked.update(requirement_name(entry.get("name", "")) for entry in entries)
+        return locked == declared
+
+    def _edges(self, package: Dict[str, Any], extras: Tuple[str, ...]) -> List[Any]:
+        edges = list(package.get("dependencies", []))
+        optional = package.get("optional-dependencies", {})
+        for extra in extras:
+            edges.extend(optional.get(extra, []))
+        return edges
+
+    def pins(self, extras: Tuple[str, ...], groups: Tuple[str, ...]) -> List[str]:
+        """Pins for every package reachable from the selected root edges."""
+        assert self.root is not None
+        edges = self._edges(self.root, extras)
+        dev = self.root.get("dev-dependencies", {})
+        for group in groups:
+            edges.extend(dev.get(group, []))
+
+        reached: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        expanded: Set[Tuple[str, str, str]] = set()
+        while edges:
+            edge = edges.pop()
+            name = normalize_name(edge.get("name", ""))
+            for package in self.packages.get(name, []):
+                version = package.get("version", "")
+                if "version" in edge and edge["version"] != version:
+                    continue
+                reached[(name, version)] = package
+                extra = tuple(edge.get("extra", ()))
+                key = (name, version, ",".join(extra))
+                if key not in expanded:
+                    expanded.add(key)
+                    edges.extend(self._edges(package, extra))
+
+        pins = []
+        for (name, version), package in sorted(reached.items()):
+            # The project itself, workspace members and path dependencies
+            if not version or not {"registry", "url", "git"} & set(
+                package.get("source", {})
+            ):
+                continue
+            line = f"{name}=={version}"
+            forks = package.get("resolution-markers")
+            if len(self.packages[name]) > 1 and forks:
+                line += " ; " + " or ".join(f"({marker})" for marker in forks)
+            pins.append(line)
+        return pins
+
+
+def plan_install(project_dir: Path, dev: bool = False) -> InstallPlan:
+    """Plan an install of the project, with its dev extra and group if ``dev``."""
+    pyproject = _load_toml(project_dir / "pyproject.toml")
+    project = pyproject.get("project", {})
+    optional = project.get("optional-dependencies", {})
+    groups_table = pyproject.get("dependency-groups", {})
+
+    extras = (DEV_GROUP,) if dev and DEV_GROUP in optional else ()
+    groups = (DEV_GROUP,) if dev and DEV_GROUP in groups_table else ()
+
+    requirements: List[str] = []
+    for extra in extras:
+        requirements.extend(optional[extra])
+    for group in groups:
+        requirements.extend(_group_requirements(groups_table, group))
+    # Extras and groups often list the same tools; install each once
+    requirements = list(dict.fromkeys(requirements))
+
+    constraints: List[str] = []
+    stale = False
+    lock_data = _load_toml(project_dir / LOCKFILE)
+    if lock_data:
+        lock = _Lock(lock_data, normalize_name(project.get("name", "")))
+        declared: Set[Optional[str]] = {
+            requirement_name(r) for r in project.get("dependencies", [])
+        }
+        for entries in optional.values():
+            declared.update(requirement_name(r) for r in entries)
+        for group in groups_table:
+            declared.update(
+                requirement_name(r) for r in _group_requirements(groups_table, group)
+            )
+        if lock.matches(declared):
+            constraints = lock.pins(extras, groups)
+        else:
+            stale = True
+
+    return InstallPlan(tuple(requirements), tuple(constraints), extras, groups, stale)
@@ -3,32 +3,75 @@
 import os
 import subprocess
 import sys
+import threading
+import time
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-from .config import DevConfig
+from . import tracing
+from .config import DevConfig, get_config
+from .installplan import LOCKFILE, plan_install
+from .pipeline import Phase
+from .runner import OutputCallback, run_command
+from .tools import get_tool_resolver
+from .venvstamp import clear_stamp, fingerprint, stamp_matches, write_stamp
+from .venvtemplate import VenvTemplates
+from .wheelhouse import (
+    DEFAULT_WHEELHOUSE,
+    Wheelhouse,
+    build_requirements,
+    wheel_command,
+)
 
+if TYPE_CHECKING:
+    from .filesystem import FileSystemOps
 
+_INSTALL_SCRIPTS = {
+    "uv": "curl -LsSf https://astral.sh/uv/install.sh | sh",
+    "poetry": "curl -sSL https://install.python-poetry.org | python3 -",
+}
+
+
+@tracing.instrument("package_manager")
 class PackageManager:
     """Unified interface for different Python package managers."""
 
     def __init__(self, config: Optional[DevConfig] = None):
-        self.config = config or DevConfig()
+        self.config = config or get_config()
         self.tool = self.config.package_manager
+        # Receives command output line by line, e.g. for a progress display
+        self.on_output: Optional[OutputCallback] = None
+        self._cancel = threading.Event()
 
     def _run_command(
         self, cmd: List[str], cwd: Optional[Path] = None
     ) -> subprocess.CompletedProcess:
-        """Run a command and return the result."""
+        """Run a command and return the result.
+
+        Output is streamed to ``on_output``; only its tail is kept.
+        """
         try:
-            return subprocess.run(
-                cmd, cwd=cwd or Path.cwd(), capture_output=True, text=True, check=True
+            return run_command(
+                cmd,
+                cwd=cwd or Path.cwd(),
+                timeout=self.config.command_timeout,
+                on_line=self.on_output,
+                capture_stdout=False,
+                cancel=self._cancel,
             )
         except subprocess.CalledProcessError as e:
             print(f"Command failed: {' '.join(cmd)}")
             print(f"stdout: {e.stdout}")
             print(f"stderr: {e.stderr}")
             raise
+        except subprocess.TimeoutExpired as e:
+            print(f"Command timed out after {e.timeout:g}s: {' '.join(cmd)}")
+            print("stderr:", e.stderr)
+            raise
+
+    def cancel(self) -> None:
+        """Kill running commands; commands started afterwards fail at once."""
+        self._cancel.set()
 
     def install_tool(self) -> None:
         """Install the configured package manager if needed."""
@@ -42,78 +85,289 @@ class PackageManager:
                 self._install_poetry()
         # pip and pipenv are usually pre-installed
 
+    @staticmethod
+    def _is_installed(tool: str) -> bool:
+        """Check if a tool runs, using the cached tool resolution."""
+        resolved = get_tool_resolver().resolve(tool)
+        if resolved is None:
+            return False
+        # Found in an installer directory that is not on PATH yet
+        PackageManager._add_to_path(Path(resolved.path).parent)
+        return True
+
     def _is_uv_installed(self) -> bool:
         """Check if uv is installed."""
-        try:
-            self._run_command(["uv", "--version"])
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
+        return self._is_installed("uv")
 
     def _install_uv(self) -> None:
         """Install uv."""
-        install_script = "curl -LsSf https://astral.sh/uv/install.sh | sh"
-        self._run_command(["bash", "-c", install_script])
+        self._run_command(self._install_script_command("uv"))
+        self._add_uv_to_path()
 
-        # Add uv to PATH
-        uv_path = Path.home() / ".cargo" / "bin"
-        if str(uv_path) not in os.environ.get("PATH", ""):
-            os.environ["PATH"] = f"{uv_path}:{os.environ.get('PATH', '')}"
+    @staticmethod
+    def _add_uv_to_path() -> None:
+        PackageManager._add_to_path(Path.home() / ".cargo" / "bin")
+
+    @staticmethod
+    def _add_to_path(directory: Path) -> None:
+        entries = os.environ.get("PATH", "").split(os.pathsep)
+        if str(directory) not in entries:
+            os.environ["PATH"] = os.pathsep.join([str(directory)] + entries)
 
     def _is_poetry_installed(self) -> bool:
         """Check if poetry is installed."""
-        try:
-            self._run_command(["poetry", "--version"])
-            return True
-        except (subprocess.CalledProcessError, FileNotFoundError):
-            return False
+        return self._is_installed("poetry")
 
     def _install_poetry(self) -> None:
         """Install poetry."""
-        install_script = "curl -sSL https://install.python-poetry.org | python3 -"
-        self._run_command(["bash", "-c", install_script])
+        self._run_command(self._install_script_command("poetry"))
+
+    @staticmethod
+    def _install_script_command(tool: str) -> List[str]:
+        """Command running the upstream installer for uv or poetry."""
+        return ["bash", "-c", _INSTALL_SCRIPTS[tool]]
 
     def create_venv(self, path: Optional[Path] = None) -> Path:
-        """Create a virtual environment."""
+        """Create a virtual environment, keeping one that already exists.
+
+        In template mode the venv is cloned, fully installed, from the
+        template venv for the current dependencies.
+        """
         venv_path = path or Path(self.config.venv_path)
+        cmd = self._venv_command(venv_path)
+        if cmd is not None and not self._venv_exists(venv_path):
+            if self.config.venv_template:
+                self.venv_templates().clone(venv_path)
+            else:
+                self._run_command(cmd)
+        return venv_path
+
+    def venv_templates(self, hardlink: Optional[bool] = None) -> VenvTemplates:
+        """Template venvs for this project, cloned as configured."""
+        if hardlink is None:
+            hardlink = self.config.venv_template == "hardlink"
+        return VenvTemplates(
+            self, hardlink=hardlink, keep=self.config.venv_template_keep
+        )
 
+    @staticmethod
+    def _venv_exists(venv_path: Path) -> bool:
+        return (venv_path / "pyvenv.cfg").exists() and (
+            venv_path / "bin" / "python"
+        ).exists()
+
+    def _venv_command(self, venv_path: Path) -> Optional[List[str]]:
+        """Command creating a venv, or None if the tool manages its own."""
         if self.tool == "uv":
-            self._run_command(["uv", "venv", str(venv_path)])
-        elif self.tool == "poetry":
-            # Poetry creates venv automatically
-            pass
-        elif self.tool == "pipenv":
-            # Pipenv creates venv automatically
-            pass
-        else:  # pip
-            self._run_command([sys.executable, "-m", "venv", str(venv_path)])
+            return ["uv", "venv", str(venv_path)]
+        elif self.tool in ("poetry", "pipenv"):
+            # Poetry and pipenv create the venv automatically
+            return None
+        # pip
+        return [sys.executable, "-m", "venv", str(venv_path)]
 
-        return venv_path
+    def install_dependencies(self, dev: bool = False, force: bool = False) -> bool:
+        """Install project dependencies.
+
+        Nothing runs when the venv's stamp shows the same inputs were
+        already installed, unless ``force`` is set. Returns whether the
+        installer ran.
+        """
+        if not force and self.dependencies_current(dev):
+            return False
+        wheelhouse = self.wheelhouse(dev=dev)
+        # An interrupted install must not leave the old stamp behind
+        clear_stamp(self._venv_dir())
+        self._run_command(self._install_command(dev, wheelhouse))
+        self._stamp_dependencies(dev)
+        return True
+
+    def _venv_dir(self, project_dir: Optional[Path] = None) -> Path:
+        return (project_dir or Path.cwd()) / self.config.venv_path
+
+    def _fingerprint(self, dev: bool, project_dir: Optional[Path]) -> Optional[str]:
+        project_dir = project_dir or Path.cwd()
+        return fingerprint(project_dir, self._venv_dir(project_dir), self.tool, dev)
+
+    def dependencies_current(
+        self, dev: bool = False, project_dir: Optional[Path] = None
+    ) -> bool:
+        """Whether the venv's stamp matches the current install inputs."""
+        value = self._fingerprint(dev, project_dir)
+        return value is not None and stamp_matches(self._venv_dir(project_dir), value)
+
+    def _stamp_dependencies(
+        self, dev: bool, project_dir: Optional[Path] = None
+    ) -> None:
+        """Stamp the venv after a successful install, if there is one."""
+        # Computed afterwards: the install may have written the lockfile
+        value = self._fingerprint(dev, project_dir)
+        if value is not None:
+            write_stamp(self._venv_dir(project_dir), value)
+
+    def _install_command(
+        self,
+        dev: bool = False,
+        wheelhouse: Optional[Wheelhouse] = None,
+        venv_path: Optional[Path] = None,
+        project_dir: Optional[Path] = None,
+    ) -> List[str]:
+        """Command installing the project and, optionally, dev dependencies.
 
-    def install_dependencies(self, dev: bool = False) -> None:
-        """Install project dependencies."""
+        uv and pip install the project together with the install plan:
+        the dev extra and dependency group, pinned to uv.lock. A uv.lock
+        that no longer matches pyproject.toml is reported and not used.
+        With a wheelhouse, the pinned wheels are installed with no package
+        index; poetry and pipenv run pip inside the venv they manage.
+        """
+        source: List[str] = []
+        if wheelhouse is not None:
+            source = wheelhouse.find_links_args()
+        elif self.tool in ("uv", "pip"):
+            plan = plan_install(project_dir or Path.cwd(), dev)
+            if plan.stale:
+                print(
+                    f"Warning: {LOCKFILE} is out of date with pyproject.toml; "
+                    "installing without its pins. Run 'uv lock' to update it."
+                )
+            source = ["-r", str(plan.write())]
         if self.tool == "uv":
-            cmd = ["uv", "pip", "install", "-e", "."]
-            if dev:
-                cmd.extend(["--dev"])
-            self._run_command(cmd)
+            cmd = ["uv", "pip", "install", *source, "-e", "."]
+            if venv_path is not None:
+                cmd.extend(["--python", str(venv_path / "bin" / "python")])
+            return cmd
+        elif self.tool in ("poetry", "pipenv") and wheelhouse is not None:
+            pip = [self.tool, "run", "python", "-m", "pip", "install"]
+            return pip + source + ["-e", "."]
         elif self.tool == "poetry":
             cmd = ["poetry", "install"]
             if dev:
                 cmd.append("--with=dev")
-            self._run_command(cmd)
+            return cmd
         elif self.tool == "pipenv":
-            cmd = ["pipenv", "install", "--dev"] if dev else ["pipenv", "install"]
+            return ["pipenv", "install", "--dev"] if dev else ["pipenv", "install"]
+        # pip
+        venv_path = venv_path or Path(self.config.venv_path)
+        pip_path = venv_path / "bin" / "pip"
+        return [str(pip_path), "install", *source, "-e", "."]
+
+    def wheelhouse(
+        self, project_dir: Optional[Path] = None, dev: Optional[bool] = None
+    ) -> Optional[Wheelhouse]:
+        """The configured wheelhouse, or None to install from the index.
+
+        Raises RuntimeError if a wheelhouse is configured but not built,
+        rather than silently reaching for the network, or if it was built
+        with dev dependencies and ``dev`` says otherwise, or the reverse.
+        """
+        if not self.config.wheelhouse:
+            return None
+        wheelhouse = Wheelhouse((project_dir or Path.cwd()) / self.config.wheelhouse)
+        if not wheelhouse.exists():
+            raise RuntimeError(
+                f"Wheelhouse {wheelhouse.root} has not been built; "
+                "run 'install-arch-dev wheelhouse build'"
+            )
+        if dev is not None and wheelhouse.dev != dev:
+            built = "with" if wheelhouse.dev else "without"
+            flag = "" if dev else " --no-dev"
+            raise RuntimeError(
+                f"Wheelhouse {wheelhouse.root} was built {built} dev dependencies; "
+                f"run 'install-arch-dev wheelhouse build{flag}'"
+            )
+        return wheelhouse
+
+    def build_wheelhouse(
+        self, path: Optional[Path] = None, dev: bool = True
+    ) -> Wheelhouse:
+        """Collect the project's pinned dependencies as wheels.
+
+        Requirements are pinned with uv, from uv.lock when it exists and
+        from pyproject.toml otherwise; pip then fetches or builds a wheel
+        for each pin and for the build requirements. A uv.lock that no
+        longer matches pyproject.toml is refused.
+        """
+        project_dir = Path.cwd()
+        wheelhouse = Wheelhouse(
+            path or project_dir / (self.config.wheelhouse or DEFAULT_WHEELHOUSE)
+        )
+        wheelhouse.root.mkdir(parents=True, exist_ok=True)
+        self._run_command(self._pin_command(dev, wheelhouse.requirements_file))
+        self._run_command(
+            wheel_command(
+                wheelhouse.root, ["-r", str(wheelhouse.requirements_file)], deps=False
+            )
+        )
+        build_requires = build_requirements(project_dir)
+        if build_requires:
+            self._run_command(wheel_command(wheelhouse.root, build_requires, deps=True))
+        wheelhouse.write_index(dev)
+        return wheelhouse
+
+    def _pin_command(self, dev: bool, output: Path) -> List[str]:
+        if (Path.cwd() / LOCKFILE).exists():
+            # --frozen would export the stale pins without a word
+            if plan_install(Path.cwd(), dev).stale:
+                raise RuntimeError(
+                    f"{LOCKFILE} is out of date with pyproject.toml; "
+                    "run 'uv lock' before building the wheelhouse"
+                )
+            cmd = ["uv", "export", "--frozen", "--no-hashes", "--no-emit-project"]
+            cmd += ["--format", "requirements-txt"]
+            if not dev:
+                cmd.append("--no-dev")
+            return cmd + ["--output-file", str(output)]
+        return self._compile_command(dev, str(output))
+
+    def benchmark_wheelhouse(
+        self, wheelhouse: Wheelhouse, workdir: Path, dev: Optional[bool] = None
+    ) -> Dict[str, float]:
+        """Seconds to install into fresh venvs from the index and the wheelhouse.
+
+        Installer caches are bypassed so the index run pays for downloads.
+        Only uv and pip can install into an arbitrary venv. ``dev``
+        defaults to whatever the wheelhouse was built with.
+        """
+        dev = wheelhouse.dev if dev is None else dev
+        if self.tool not in ("uv", "pip"):
+            raise ValueError(f"Cannot benchmark installs with {self.tool}")
+        no_cache = "--no-cache" if self.tool == "uv" else "--no-cache-dir"
+        timings = {}
+        for mode, source in (("index", None), ("wheelhouse", wheelhouse)):
+            venv_path = workdir / f"venv-{mode}"
+            venv_cmd = self._venv_command(venv_path)
+            if venv_cmd is not None:
+                self._run_command(venv_cmd)
+            cmd = self._install_command(dev, source, venv_path) + [no_cache]
+            start = time.perf_counter()
             self._run_command(cmd)
-        else:  # pip
-            venv_path = Path(self.config.venv_path)
-            pip_path = venv_path / "bin" / "pip"
-            cmd = [str(pip_path), "install", "-e", "."]
-            if dev:
-                # Install dev dependencies from pyproject.toml
-                pass  # Would need to parse pyproject.toml
+            timings[mode] = time.perf_counter() - start
+        return timings
+
+    def resolve_dependencies(self, dev: bool = False) -> None:
+        """Resolve project dependencies without installing them.
+
+        This warms the tool's cache so a later install has less to fetch;
+        tools that resolve from their own lockfile during install skip it,
+        and so do installs from a wheelhouse.
+        """
+        cmd = self._resolve_command(dev)
+        if cmd is not None:
             self._run_command(cmd)
 
+    def _resolve_command(self, dev: bool = False) -> Optional[List[str]]:
+        if self.tool != "uv" or self.config.wheelhouse:
+            return None
+        # A plan pinned to uv.lock has nothing left to resolve
+        if plan_install(Path.cwd(), dev).locked:
+            return None
+        return self._compile_command(dev, os.devnull)
+
+    def _compile_command(self, dev: bool, output: str) -> List[str]:
+        plan = plan_install(Path.cwd(), dev)
+        cmd = ["uv", "pip", "compile", "pyproject.toml", str(plan.write())]
+        return cmd + ["--quiet", "--output-file", output]
+
     def activate_venv(self) -> str:
         """Get the command to activate the virtual environment."""
         venv_path = Path(self.config.venv_path)
@@ -124,3 +378,47 @@ class PackageManager:
         elif self.tool == "pipenv":
             return "pipenv shell"
         return ""
+
+
+def setup_phases(
+    pkg_mgr: PackageManager,
+    fs_ops: Optional["FileSystemOps"] = None,
+    create_temp: bool = True,
+    force: bool = False,
+) -> List[Phase]:
+    """Phases of a development environment setup, for ``run_phases``.
+
+    Dependency resolution overlaps venv creation and the temp directory
+    is created alongside everything else; only the final install waits
+    for both the venv and the resolution. Unless ``force`` is set, the
+    resolution and install are skipped when the venv's stamp is current.
+    """
+
+    def install_tool(_: Any) -> None:
+        pkg_mgr.install_tool()
+
+    def resolve(_: Any) -> None:
+        if force or not pkg_mgr.dependencies_current(dev=True):
+            pkg_mgr.resolve_dependencies(dev=True)
+
+    def create_venv(_: Any) -> Path:
+        return pkg_mgr.create_venv()
+
+    def install_dependencies(_: Any) -> bool:
+        return pkg_mgr.install_dependencies(dev=True, force=force)
+
+    phases = [
+        Phase("install_tool", install_tool),
+        # Only a cache warm-up: the install resolves again if this fails
+        Phase("resolve", resolve, deps=("install_tool",), optional=True),
+        Phase("create_venv", create_venv, deps=("install_tool",)),
+        Phase(
+            "install_dependencies",
+            install_dependencies,
+            deps=("create_venv", "resolve"),
+        ),
+    ]
+    if fs_ops is not None and create_temp:
+        temp_dir = fs_ops.create_secure_temp_dir
+        phases.append(Phase("temp_dir", lambda _: temp_dir("dev-setup-")))
+    return phases
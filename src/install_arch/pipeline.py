@@ -0,0 +1,154 @@
+"""Dependency-ordered, concurrent execution of setup phases.
+
+Each phase runs on its own thread as soon as the phases it depends on
+have finished, so independent work (installing a tool, creating temp
+directories, resolving dependencies while the venv is created) overlaps.
+Every phase's start and end are recorded for a timeline report.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from . import tracing
+
+
+@dataclass(frozen=True)
+class Phase:
+    """A named unit of setup work and the phases it must wait for.
+
+    ``func`` receives the values returned by its dependencies, keyed by
+    phase name. An optional phase may fail without stopping its dependents.
+    """
+
+    name: str
+    func: Callable[[Dict[str, Any]], Any]
+    deps: Tuple[str, ...] = ()
+    optional: bool = False
+
+
+@dataclass(frozen=True)
+class PhaseResult:
+    """Outcome of one phase; times are seconds since the pipeline started.
+
+    ``status`` is ok, failed, or skipped when a dependency failed.
+    """
+
+    name: str
+    status: str
+    start: float
+    end: float
+    value: Any = None
+    error: Optional[BaseException] = None
+    optional: bool = False
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+
+@dataclass
+class PipelineResult:
+    """Results of every phase in a pipeline run."""
+
+    phases: Dict[str, PhaseResult] = field(default_factory=dict)
+    duration: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        """Whether every required phase succeeded."""
+        return not self.failed
+
+    @property
+    def failed(self) -> List[PhaseResult]:
+        """Required phases that failed or were skipped."""
+        return [r for r in self.phases.values() if r.status != "ok" and not r.optional]
+
+    def value(self, name: str) -> Any:
+        """Return value of a phase, or None if it did not succeed."""
+        result = self.phases.get(name)
+        return result.value if result is not None else None
+
+    def timeline(self) -> List[PhaseResult]:
+        """Phase results in the order they started."""
+        return sorted(self.phases.values(), key=lambda r: (r.start, r.name))
+
+
+def _check_graph(phases: Dict[str, Phase]) -> None:
+    """Reject unknown dependencies and cycles."""
+    for phase in phases.values():
+        for dep in phase.deps:
+            if dep not in phases:
+                raise ValueError(f"Phase {phase.name} depends on unknown {dep}")
+
+    visiting: Set[str] = set()
+    done: Set[str] = set()
+
+    def visit(name: str) -> None:
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle through phase {name}")
+        visiting.add(name)
+        for dep in phases[name].deps:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for name in phases:
+        visit(name)
+
+
+def run_phases(phases: Iterable[Phase]) -> PipelineResult:
+    """Run phases concurrently in dependency order and collect the results."""
+    by_name = {phase.name: phase for phase in phases}
+    _check_graph(by_name)
+    origin = time.perf_counter()
+    futures: Dict[str, "Future[PhaseResult]"] = {}
+
+    def schedule(name: str) -> "Future[PhaseResult]":
+        if name in futures:
+            return futures[name]
+        phase = by_name[name]
+        dep_futures = {dep: schedule(dep) for dep in phase.deps}
+        future: "Future[PhaseResult]" = Future()
+        futures[name] = future
+
+        def worker() -> None:
+            deps = {dep: f.result() for dep, f in dep_futures.items()}
+            start = time.perf_counter() - origin
+            blocked = [d for d in deps.values() if d.status != "ok" and not d.optional]
+            if blocked:
+                future.set_result(
+                    PhaseResult(name, "skipped", start, start, optional=phase.optional)
+                )
+                return
+            try:
+                with tracing.span(name, "phase"):
+                    value = phase.func({dep: r.value for dep, r in deps.items()})
+            except BaseException as e:
+                end = time.perf_counter() - origin
+                future.set_result(
+                    PhaseResult(
+                        name, "failed", start, end, error=e, optional=phase.optional
+                    )
+                )
+                return
+            end = time.perf_counter() - origin
+            future.set_result(
+                PhaseResult(name, "ok", start, end, value, optional=phase.optional)
+            )
+
+        threading.Thread(target=worker, name=f"phase-{name}").start()
+        return future
+
+    for name in by_name:
+        schedule(name)
+
+    result = PipelineResult()
+    for name, future in futures.items():
+        result.phases[name] = future.result()
+    result.duration = time.perf_counter() - origin
+    return result
@@ -0,0 +1,329 @@
+"""Parallel directory tree removal with instant-return background deletion.
+
+A tree is first renamed into a per-user trash directory next to it, which
+is atomic and makes the path disappear at once. Worker threads then delete
+the renamed tree: each directory is scanned through its own file
+descriptor and its files are unlinked relative to it, while its
+subdirectories are handed to other workers. A directory is removed as
+soon as its last child is gone, so no worker ever waits for another.
+The trash directory itself is removed once nothing is left in it, and
+trees left there by interrupted processes are deleted on the next removal
+from the same parent.
+"""
+
+import os
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from .tempmanifest import pid_alive
+
+_DIR_FLAGS = os.O_RDONLY | os.O_DIRECTORY | os.O_NOFOLLOW | os.O_CLOEXEC
+
+
+@dataclass(frozen=True)
+class RemovalStats:
+    """Totals across every removal an engine has finished."""
+
+    jobs: int
+    files: int
+    dirs: int
+    # Sum of wall-clock time from rename to the last rmdir, per job
+    seconds: float
+    pending: int
+
+    @property
+    def entries_per_second(self) -> float:
+        return (self.files + self.dirs) / self.seconds if self.seconds else 0.0
+
+
+class RemovalJob:
+    """Progress and outcome of one tree removal."""
+
+    def __init__(self, path: Path, target: Path, trash: Optional[Path] = None):
+        # Path the caller asked to remove, and where its tree now lives
+        self.path = path
+        self.target = target
+        # Trash directory holding ``target``, if it was moved into one
+        self.trash = trash
+        self.files = 0
+        self.dirs = 0
+        self.errors: List[Tuple[Path, str]] = []
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def seconds(self) -> float:
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return end - self.started
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the tree is gone; False if the timeout expired."""
+        return self._done.wait(timeout)
+
+    def _complete(self) -> None:
+        self.finished = time.perf_counter()
+        self._done.set()
+
+
+class _Node:
+    """A directory being deleted; ``pending`` counts unfinished work."""
+
+    __slots__ = ("path", "parent", "pending")
+
+    def __init__(self, path: Path, parent: Optional["_Node"]):
+        self.path = path
+        self.parent = parent
+        # The scan of this directory itself counts as one unit
+        self.pending = 1
+
+
+def _trash_name(path: Path, seq: int) -> str:
+    return f"{os.getpid()}-{seq}-{path.name}"
+
+
+class RemovalEngine:
+    """Removes directory trees on a pool of worker threads."""
+
+    def __init__(self, workers: Optional[int] = None, background: bool = True):
+        self.workers = workers or min(32, (os.cpu_count() or 1) * 4)
+        # When False every removal blocks until the tree is gone
+        self.background = background
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._seq = 0
+        self._reaped: Set[Path] = set()
+        # Trash directory -> removals still using it
+        self._trash_users: Dict[Path, int] = {}
+        self._pending: Set[RemovalJob] = set()
+        self._totals = {"jobs": 0, "files": 0, "dirs": 0}
+        self._seconds = 0.0
+
+    def _pool(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="removal"
+                )
+            return self._executor
+
+    def _open_trash(self, parent: Path) -> Optional[Path]:
+        """Per-user trash directory in ``parent``, or None if unusable.
+
+        The caller holds a reference to it until ``_release_trash``.
+        """
+        trash = parent / f".install-arch-trash-{os.getuid()}"
+        with self._lock:
+            try:
+                trash.mkdir(mode=0o700, exist_ok=True)
+                st = os.lstat(trash)
+            except OSError:
+                return None
+            if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+                return None
+            self._trash_users[trash] = self._trash_users.get(trash, 0) + 1
+        return trash
+
+    def _release_trash(self, trash: Path) -> None:
+        """Drop a reference, removing the trash directory once it is unused."""
+        with self._lock:
+            users = self._trash_users[trash] - 1
+            if users:
+                self._trash_users[trash] = users
+                return
+            del self._trash_users[trash]
+            # Other processes may still be using it; then it is not empty
+            try:
+                os.rmdir(trash)
+            except OSError:
+                return
+            # A new trash directory here may hold new leftovers
+            self._reaped.discard(trash)
+
+    def remove(self, path: Path, wait: Optional[bool] = None) -> RemovalJob:
+        """Remove a file or directory tree.
+
+        Directories are moved out of the way and deleted in the background
+        unless ``wait`` (default: not ``background``) asks to block.
+        """
+        path = Path(os.path.abspath(path))
+        wait = not self.background if wait is None else wait
+
+        try:
+            st = os.lstat(path)
+        except FileNotFoundError:
+            job = RemovalJob(path, path)
+            job._complete()
+            return job
+
+        if not stat.S_ISDIR(st.st_mode):
+            job = RemovalJob(path, path)
+            try:
+                os.unlink(path)
+                job.files = 1
+            except OSError as e:
+                job.errors.append((path, str(e)))
+            job._complete()
+            self._record(job)
+            return job
+
+        target = path
+        trash = self._open_trash(path.parent)
+        if trash is None:
+            job = self._start(path, target)
+        else:
+            try:
+                with self._lock:
+                    self._seq += 1
+                    seq = self._seq
+                candidate = trash / _trash_name(path, seq)
+                try:
+                    os.rename(path, candidate)
+                    target = candidate
+                except OSError:
+                    # Mount points and the like: delete in place instead
+                    pass
+                self._reap(trash)
+                job = self._start(path, target, trash if target != path else None)
+            finally:
+                self._release_trash(trash)
+
+        if wait:
+            job.wait()
+        return job
+
+    def _start(
+        self, path: Path, target: Path, trash: Optional[Path] = None
+    ) -> RemovalJob:
+        job = RemovalJob(path, target, trash)
+        with self._lock:
+            self._pending.add(job)
+            if trash is not None:
+                self._trash_users[trash] += 1
+        self._pool().submit(self._scan, job, _Node(target, None))
+        return job
+
+    def _reap(self, trash: Path) -> None:
+        """Resume deleting trees left in a trash dir by dead processes."""
+        with self._lock:
+            if trash in self._reaped:
+                return
+            self._reaped.add(trash)
+        try:
+            names = os.listdir(trash)
+        except OSError:
+            return
+        for name in names:
+            pid, _, _ = name.partition("-")
+            if pid.isdigit() and not pid_alive(int(pid)):
+                self._start(trash / name, trash / name, trash)
+
+    def _scan(self, job: RemovalJob, node: _Node) -> None:
+        subdirs: List[str] = []
+        files = 0
+        try:
+            try:
+                fd = os.open(node.path, _DIR_FLAGS)
+            except PermissionError:
+                os.chmod(node.path, 0o700)
+                fd = os.open(node.path, _DIR_FLAGS)
+            try:
+                with os.scandir(fd) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.name)
+                            continue
+                        try:
+                            os.unlink(entry.name, dir_fd=fd)
+                        except PermissionError:
+                            # Read-only directory: make it writable and retry
+                            os.chmod(fd, 0o700)
+                            os.unlink(entry.name, dir_fd=fd)
+                        files += 1
+            finally:
+                os.close(fd)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            with job._lock:
+                job.errors.append((node.path, str(e)))
+
+        with job._lock:
+            job.files += files
+            node.pending += len(subdirs)
+        for name in subdirs:
+            self._pool().submit(self._scan, job, _Node(node.path / name, node))
+        self._finish(job, node)
+
+    def _finish(self, job: RemovalJob, node: Optional[_Node]) -> None:
+        """Mark one unit of a directory done, removing it when it is empty."""
+        while node is not None:
+            with job._lock:
+                node.pending -= 1
+                if node.pending:
+                    return
+            try:
+                os.rmdir(node.path)
+                with job._lock:
+                    job.dirs += 1
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                with job._lock:
+                    job.errors.append((node.path, str(e)))
+            node = node.parent
+
+        if job.trash is not None:
+            self._release_trash(job.trash)
+        job._complete()
+        self._record(job)
+
+    def _record(self, job: RemovalJob) -> None:
+        with self._lock:
+            self._pending.discard(job)
+            self._totals["jobs"] += 1
+            self._totals["files"] += job.files
+            self._totals["dirs"] += job.dirs
+            self._seconds += job.seconds
+
+    def stats(self) -> RemovalStats:
+        """Throughput totals for finished removals."""
+        with self._lock:
+            return RemovalStats(
+                jobs=self._totals["jobs"],
+                files=self._totals["files"],
+                dirs=self._totals["dirs"],
+                seconds=self._seconds,
+                pending=len(self._pending),
+            )
+
+    def wait_all(self, timeout: Optional[float] = None) -> bool:
+        """Block until every started removal has finished."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                pending = list(self._pending)
+            if not pending:
+                return True
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            pending[0].wait(remaining)
+
+    def shutdown(self) -> None:
+        """Finish outstanding removals and stop the worker threads."""
+        self.wait_all()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
@@ -0,0 +1,288 @@
+"""Streaming subprocess runner with bounded output capture.
+
+A command's stdout and stderr are read line by line while it runs and
+handed to an optional callback, such as a progress display. Only the last
+``tail_lines`` lines of each stream are kept for error reports, unless
+the caller needs the whole of stdout (``capture_stdout``). A command can
+time out, or be cancelled through an event; either way its whole process
+group is killed. Every run is recorded in ``METRICS`` with its exit
+status, duration and CPU usage, and as a span when tracing is on.
+"""
+
+import os
+import signal
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import IO, Any, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from . import tracing
+
+TAIL_LINES = 200
+
+# Longest wait between checks of a command with a timeout or cancel event
+POLL_INTERVAL = 0.05
+
+# Called with the stream name ("stdout" or "stderr") and the line
+OutputCallback = Callable[[str, str], None]
+
+
+class CommandCancelled(subprocess.SubprocessError):
+    """A command was killed because its cancel event was set."""
+
+    def __init__(self, cmd: Sequence[str], output: str = "", stderr: str = "") -> None:
+        super().__init__(cmd, output, stderr)
+        self.cmd = cmd
+        self.output = output
+        self.stderr = stderr
+
+    def __str__(self) -> str:
+        return f"Command '{' '.join(self.cmd)}' was cancelled"
+
+
+@dataclass(frozen=True)
+class CommandRecord:
+    """Outcome of one command run.
+
+    ``status`` is ok, failed (non-zero exit), timeout or cancelled.
+    """
+
+    cmd: Tuple[str, ...]
+    returncode: int
+    status: str
+    # Wall-clock start (time.time()) and duration in seconds
+    start: float
+    duration: float
+    lines: int
+    # CPU seconds and peak RSS (KiB) of the command, from wait4
+    user_time: float = 0.0
+    system_time: float = 0.0
+    max_rss_kb: int = 0
+
+
+class RunMetrics:
+    """Recent command runs and per-program totals."""
+
+    def __init__(self, history: int = 256) -> None:
+        self._lock = threading.Lock()
+        self._records: Deque[CommandRecord] = deque(maxlen=history)
+        # program -> [runs, failures, seconds]
+        self._totals: Dict[str, List[float]] = {}
+
+    def record(self, record: CommandRecord) -> None:
+        program = os.path.basename(record.cmd[0]) if record.cmd else ""
+        with self._lock:
+            self._records.append(record)
+            totals = self._totals.setdefault(program, [0, 0, 0.0])
+            totals[0] += 1
+            totals[1] += record.status != "ok"
+            totals[2] += record.duration
+
+    def records(self, since: float = 0.0) -> List[CommandRecord]:
+        """Recorded runs that started at or after ``since`` (time.time())."""
+        with self._lock:
+            return [r for r in self._records if r.start >= since]
+
+    def totals(self) -> Dict[str, Tuple[int, int, float]]:
+        """Runs, failures and total seconds per program."""
+        with self._lock:
+            return {
+                program: (int(runs), int(failures), seconds)
+                for program, (runs, failures, seconds) in self._totals.items()
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+            self._totals.clear()
+
+
+METRICS = RunMetrics()
+
+
+def _pump(
+    stream: IO[str],
+    name: str,
+    tail: Deque[str],
+    full: Optional[List[str]],
+    on_line: Optional[OutputCallback],
+    counter: List[int],
+) -> None:
+    for line in stream:
+        tail.append(line)
+        if full is not None:
+            full.append(line)
+        counter[0] += 1
+        if on_line is not None:
+            try:
+                on_line(name, line.rstrip("\n"))
+            except Exception:
+                # A broken display must not stall the pipe and hang the child
+                on_line = None
+    stream.close()
+
+
+def _feed(stream: IO[str], data: str) -> None:
+    try:
+        stream.write(data)
+        stream.close()
+    except (BrokenPipeError, OSError):
+        pass
+
+
+def _reap(proc: "subprocess.Popen[str]", block: bool) -> Optional[Any]:
+    """Reap the command with wait4, which also reports its resource usage.
+
+    Returns the usage once the command has exited, or None while it is
+    still running (``proc.returncode`` stays None).
+    """
+    try:
+        pid, status, usage = os.wait4(proc.pid, 0 if block else os.WNOHANG)
+    except ChildProcessError:
+        # Reaped by someone else; Popen still knows how to settle it
+        proc.wait()
+        return None
+    if pid == 0:
+        return None
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return usage
+
+
+def _kill(proc: "subprocess.Popen[str]") -> Optional[Any]:
+    try:
+        os.killpg(proc.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        proc.kill()
+    return _reap(proc, block=True)
+
+
+def run_command(
+    cmd: Sequence[str],
+    cwd: Optional[os.PathLike] = None,
+    input: Optional[str] = None,
+    check: bool = True,
+    timeout: Optional[float] = None,
+    on_line: Optional[OutputCallback] = None,
+    capture_stdout: bool = True,
+    tail_lines: int = TAIL_LINES,
+    cancel: Optional[threading.Event] = None,
+) -> subprocess.CompletedProcess:
+    """Run a command, streaming its output, and return the result.
+
+    Behaves like ``subprocess.run(..., capture_output=True, text=True)``
+    except that stderr, and stdout unless ``capture_stdout`` is set, hold
+    only the last ``tail_lines`` lines. Raises ``subprocess.TimeoutExpired``
+    after ``timeout`` seconds, ``CommandCancelled`` when ``cancel`` is set,
+    and ``subprocess.CalledProcessError`` on a non-zero exit if ``check``.
+    """
+    args = list(cmd)
+    program = os.path.basename(args[0]) if args else ""
+    with tracing.span(program, "subprocess", cmd=" ".join(args)) as span_args:
+        started = time.time()
+        start = time.perf_counter()
+        proc = subprocess.Popen(
+            args,
+            cwd=cwd,
+            stdin=subprocess.PIPE if input is not None else subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            errors="replace",
+            # Own process group, so a timeout also kills what the command spawned
+            start_new_session=True,
+        )
+        assert proc.stdout is not None and proc.stderr is not None
+
+        stdout_tail: Deque[str] = deque(maxlen=tail_lines)
+        stderr_tail: Deque[str] = deque(maxlen=tail_lines)
+        stdout_full: Optional[List[str]] = [] if capture_stdout else None
+        stdout_lines, stderr_lines = [0], [0]
+        threads = [
+            threading.Thread(
+                target=_pump,
+                args=(
+                    proc.stdout,
+                    "stdout",
+                    stdout_tail,
+                    stdout_full,
+                    on_line,
+                    stdout_lines,
+                ),
+                daemon=True,
+            ),
+            threading.Thread(
+                target=_pump,
+                args=(proc.stderr, "stderr", stderr_tail, None, on_line, stderr_lines),
+                daemon=True,
+            ),
+        ]
+        if input is not None:
+            assert proc.stdin is not None
+            threads.append(
+                threading.Thread(target=_feed, args=(proc.stdin, input), daemon=True)
+            )
+        for thread in threads:
+            thread.start()
+
+        status = None
+        usage = None
+        try:
+            if timeout is None and cancel is None:
+                usage = _reap(proc, block=True)
+            else:
+                deadline = None if timeout is None else start + timeout
+                delay = 0.0005
+                while True:
+                    usage = _reap(proc, block=False)
+                    if proc.returncode is not None:
+                        break
+                    if cancel is not None and cancel.is_set():
+                        status = "cancelled"
+                        break
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        status = "timeout"
+                        break
+                    time.sleep(delay)
+                    delay = min(delay * 2, POLL_INTERVAL)
+        finally:
+            if proc.returncode is None:
+                usage = _kill(proc)
+            for thread in threads:
+                thread.join()
+
+        duration = time.perf_counter() - start
+        stdout = "".join(stdout_full if stdout_full is not None else stdout_tail)
+        stderr = "".join(stderr_tail)
+        if status is None:
+            status = "ok" if proc.returncode == 0 else "failed"
+        record = CommandRecord(
+            tuple(args),
+            proc.returncode,
+            status,
+            started,
+            duration,
+            stdout_lines[0] + stderr_lines[0],
+            usage.ru_utime if usage is not None else 0.0,
+            usage.ru_stime if usage is not None else 0.0,
+            usage.ru_maxrss if usage is not None else 0,
+        )
+        METRICS.record(record)
+        tracing.add_child_usage(record.user_time, record.system_time)
+        span_args.update(
+            status=status,
+            returncode=proc.returncode,
+            lines=record.lines,
+            max_rss_kb=record.max_rss_kb,
+        )
+
+        if status == "timeout":
+            raise subprocess.TimeoutExpired(
+                args, timeout or 0, output=stdout, stderr=stderr
+            )
+        if status == "cancelled":
+            raise CommandCancelled(args, stdout, stderr)
+        if check and proc.returncode:
+            raise subprocess.CalledProcessError(proc.returncode, args, stdout, stderr)
+        return subprocess.CompletedProcess(args, proc.returncode, stdout, stderr)
@@ -0,0 +1,323 @@
+"""Structured temp layout with per-category quotas and eviction.
+
+The baseline's ``temp_structure`` categories (agents, build, tests, logs)
+are created under the temp base the first time they are used. Each
+category keeps an index of its top-level entries and their sizes, so usage
+is known without walking every tree: an entry is measured again only when
+its own mtime changes, when a caller accounts for it explicitly, or when
+its last measurement is older than the rescan interval.
+
+An evictor deletes the oldest entries of a category until it is back
+under quota, and any entry older than the maximum age. It runs on demand
+or on a background thread. Hidden entries (names starting with a dot,
+such as the usage index itself, artifact stores and removal trash) are
+left to their owners and not counted.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .tempmanifest import disk_usage
+
+USAGE_INDEX = ".install-arch-usage.json"
+
+
+@dataclass(frozen=True)
+class CategoryUsage:
+    """Accounted size of one temp category."""
+
+    category: str
+    path: Path
+    bytes: int
+    entries: int
+    quota: Optional[int]
+
+    @property
+    def over_quota(self) -> bool:
+        return self.quota is not None and self.bytes > self.quota
+
+
+@dataclass
+class EvictionResult:
+    """Outcome of one eviction pass."""
+
+    entries: int = 0
+    bytes_freed: int = 0
+    errors: List[Tuple[Path, str]] = field(default_factory=list)
+
+
+def _remove(path: Path) -> None:
+    if path.is_dir() and not path.is_symlink():
+        shutil.rmtree(path)
+    else:
+        path.unlink()
+
+
+class _Category:
+    """Size index for the top-level entries of one category directory."""
+
+    def __init__(self, name: str, path: Path, quota: Optional[int]):
+        self.name = name
+        self.path = path
+        self.quota = quota
+        # entry name -> [size, mtime_ns, measured at]
+        self.entries: Dict[str, List[Any]] = {}
+        self.loaded = False
+        self.ready = False
+
+
+class TempLayout:
+    """Lazily created temp categories kept within their quotas."""
+
+    def __init__(
+        self,
+        base: Path,
+        structure: Dict[str, str],
+        quotas: Optional[Dict[str, Optional[int]]] = None,
+        max_age: Optional[float] = None,
+        remover: Optional[Callable[[Path], Any]] = None,
+        active: Optional[Callable[[], Set[Path]]] = None,
+        min_age: float = 60.0,
+        rescan_interval: float = 600.0,
+    ):
+        self.base = Path(base)
+        self.max_age = max_age
+        # Entries younger than this are never evicted, so work that has
+        # only just started is not deleted under its creator
+        self.min_age = min_age
+        self.rescan_interval = rescan_interval
+        self._remover = remover or _remove
+        # Paths whose creators are still running; they are never evicted
+        self._active = active or set
+        quotas = quotas or {}
+        self._categories = {
+            name: _Category(name, self.base / rel, quotas.get(name))
+            for name, rel in structure.items()
+        }
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def categories(self) -> List[str]:
+        return list(self._categories)
+
+    def _category(self, category: str) -> _Category:
+        try:
+            return self._categories[category]
+        except KeyError:
+            raise ValueError(f"Unknown temp category: {category}") from None
+
+    def category_dir(self, category: str) -> Path:
+        """Directory for a category, created with 0700 on first use."""
+        cat = self._category(category)
+        if not cat.ready:
+            cat.path.mkdir(mode=0o700, parents=True, exist_ok=True)
+            cat.ready = True
+        return cat.path
+
+    def create_dir(self, category: str, prefix: str = "install-arch-") -> Path:
+        """Create a private directory in a category."""
+        path = Path(tempfile.mkdtemp(prefix=prefix, dir=self.category_dir(category)))
+        self.account(path)
+        return path
+
+    def create_file(
+        self, category: str, suffix: str = "", prefix: str = "install-arch-"
+    ) -> Path:
+        """Create a private file in a category."""
+        fd, name = tempfile.mkstemp(
+            suffix=suffix, prefix=prefix, dir=self.category_dir(category)
+        )
+        os.close(fd)
+        path = Path(name)
+        self.account(path)
+        return path
+
+    def _owner(self, path: Path) -> Optional[_Category]:
+        parent = Path(os.path.abspath(path)).parent
+        for cat in self._categories.values():
+            if Path(os.path.abspath(cat.path)) == parent:
+                return cat
+        return None
+
+    def account(self, path: Path) -> int:
+        """Measure one top-level entry now, after writing into it.
+
+        Returns its size. Wakes the background evictor if the entry pushed
+        its category over quota.
+        """
+        cat = self._owner(path)
+        if cat is None:
+            raise ValueError(f"{path} is not a top-level temp category entry")
+        with self._lock:
+            self._load(cat)
+            size = self._measure(cat, Path(path).name)
+            total = sum(e[0] for e in cat.entries.values())
+            self._save(cat)
+        if cat.quota is not None and total > cat.quota:
+            self._wake.set()
+        return size
+
+    def _measure(self, cat: _Category, name: str) -> int:
+        path = cat.path / name
+        try:
+            st = os.lstat(path)
+        except FileNotFoundError:
+            cat.entries.pop(name, None)
+            return 0
+        size = disk_usage(path)
+        cat.entries[name] = [size, st.st_mtime_ns, time.time()]
+        return size
+
+    def _load(self, cat: _Category) -> None:
+        if cat.loaded:
+            return
+        cat.loaded = True
+        try:
+            with open(cat.path / USAGE_INDEX, encoding="utf-8") as f:
+                data = json.load(f)
+            cat.entries = {
+                name: [int(size), int(mtime), float(measured)]
+                for name, (size, mtime, measured) in data.items()
+            }
+        except (OSError, ValueError, TypeError):
+            cat.entries = {}
+
+    def _save(self, cat: _Category) -> None:
+        # The index is only a cache of measurements; losing it costs a rescan
+        try:
+            tmp = cat.path / f"{USAGE_INDEX}.{os.getpid()}.tmp"
+            tmp.write_text(json.dumps(cat.entries), encoding="utf-8")
+            os.replace(tmp, cat.path / USAGE_INDEX)
+        except OSError:
+            pass
+
+    def _refresh(self, cat: _Category) -> None:
+        """Bring a category's index up to date with one directory listing."""
+        self._load(cat)
+        try:
+            listing = os.scandir(cat.path)
+        except FileNotFoundError:
+            cat.entries = {}
+            return
+        now = time.time()
+        seen = set()
+        with listing:
+            for entry in listing:
+                if entry.name.startswith("."):
+                    continue
+                seen.add(entry.name)
+                known = cat.entries.get(entry.name)
+                try:
+                    mtime = entry.stat(follow_symlinks=False).st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                if (
+                    known is None
+                    or known[1] != mtime
+                    or now - known[2] > self.rescan_interval
+                ):
+                    self._measure(cat, entry.name)
+        for name in set(cat.entries) - seen:
+            del cat.entries[name]
+        self._save(cat)
+
+    def usage(self, category: str) -> CategoryUsage:
+        """Current accounted size of a category."""
+        cat = self._category(category)
+        with self._lock:
+            self._refresh(cat)
+            return CategoryUsage(
+                category=cat.name,
+                path=cat.path,
+                bytes=sum(e[0] for e in cat.entries.values()),
+                entries=len(cat.entries),
+                quota=cat.quota,
+            )
+
+    def enforce(self, category: Optional[str] = None) -> EvictionResult:
+        """Evict entries from one category, or all of them, to fit quotas.
+
+        Entries past the maximum age go first; then the oldest entries
+        are removed until the category is under quota.
+        """
+        result = EvictionResult()
+        names = [category] if category is not None else self.categories
+        active = {Path(os.path.abspath(p)) for p in self._active()}
+        for name in names:
+            cat = self._category(name)
+            if not cat.path.exists():
+                continue
+            with self._lock:
+                self._refresh(cat)
+                self._evict(cat, active, result)
+                self._save(cat)
+        return result
+
+    def _evict(self, cat: _Category, active: Set[Path], result: EvictionResult) -> None:
+        now = time.time()
+        total = sum(e[0] for e in cat.entries.values())
+        # Oldest modification first
+        for name, (size, mtime_ns, _) in sorted(
+            cat.entries.items(), key=lambda kv: kv[1][1]
+        ):
+            age = now - mtime_ns / 1e9
+            expired = self.max_age is not None and age > self.max_age
+            over = cat.quota is not None and total > cat.quota
+            if not expired and not over:
+                # Later entries are newer, and the total only shrinks
+                break
+            path = cat.path / name
+            if age < self.min_age or Path(os.path.abspath(path)) in active:
+                continue
+            try:
+                self._remover(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                result.errors.append((path, str(e)))
+                continue
+            del cat.entries[name]
+            total -= size
+            result.entries += 1
+            result.bytes_freed += size
+
+    def start(self, interval: float = 60.0) -> None:
+        """Run eviction passes on a background thread every ``interval``."""
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(interval,), name="temp-evictor", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(interval)
+            self._wake.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.enforce()
+            except OSError:
+                # Try again on the next pass
+                continue
+
+    def stop(self) -> None:
+        """Stop the background evictor."""
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        thread.join()
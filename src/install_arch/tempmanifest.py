@@ -0,0 +1,292 @@
+"""Append-only manifest of temporary files and directories we created.
+
+Every creation and removal is one JSON line appended with a single
+``O_APPEND`` write. Appends of up to PIPE_BUF bytes never interleave, so
+concurrent processes append under a shared ``flock``. Removals are
+recorded as tombstones; :meth:`TempManifest.compact` drops them under an
+exclusive lock, and appenders that locked the file it replaced retry.
+
+The base directory may be shared with other users, so the manifest is
+opened without following symlinks and refused unless this user owns it,
+and only entries strictly inside the base directory are ever returned.
+"""
+
+import errno
+import fcntl
+import json
+import os
+import select
+import shutil
+import stat
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Dict, List, Optional, Tuple
+
+# Appends up to this size are atomic with respect to each other
+_ATOMIC_APPEND = getattr(select, "PIPE_BUF", 4096)
+
+
+@dataclass(frozen=True)
+class TempEntry:
+    """A temporary file or directory recorded in the manifest."""
+
+    path: Path
+    kind: str
+    prefix: str
+    created: float
+    pid: int
+
+    @property
+    def active(self) -> bool:
+        """Whether the process that created the entry is still running."""
+        return pid_alive(self.pid)
+
+
+@dataclass
+class CleanResult:
+    """Outcome of cleaning owned temporary entries."""
+
+    entries: int = 0
+    bytes_freed: int = 0
+    # Entries left alone because their creating process is still running
+    skipped_active: int = 0
+    errors: List[Tuple[Path, str]] = field(default_factory=list)
+
+
+def pid_alive(pid: int) -> bool:
+    """Whether process ``pid`` is running; this process always counts."""
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def disk_usage(path: Path) -> int:
+    """Apparent size of a file or directory tree, not following symlinks."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return 0
+    if not os.path.isdir(path) or os.path.islink(path):
+        return st.st_size
+    total = st.st_size
+    for root, dirs, files in os.walk(path):
+        for name in dirs + files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+class TempManifest:
+    """Per-user manifest of temporary entries under one base directory."""
+
+    def __init__(self, base: Path):
+        self.base = Path(base)
+        self.path = self.base / f".install-arch-temp-{os.getuid()}.jsonl"
+
+    def _open(self, mode: str, lock: int) -> Optional[IO[bytes]]:
+        """Open and lock the manifest; None if it does not exist.
+
+        Raises PermissionError if the manifest is a symlink or is not a
+        regular file owned by this user.
+        """
+        # O_NONBLOCK: a FIFO planted in place of the manifest must not hang us
+        flags = os.O_NOFOLLOW | os.O_CLOEXEC | os.O_NONBLOCK
+        flags |= os.O_WRONLY | os.O_APPEND | os.O_CREAT if mode == "a" else os.O_RDONLY
+        while True:
+            try:
+                fd = os.open(self.path, flags, 0o600)
+            except FileNotFoundError:
+                return None
+            except OSError as e:
+                if e.errno == errno.ELOOP:
+                    raise PermissionError(
+                        f"Refusing temp manifest {self.path}: it is a symlink"
+                    ) from None
+                raise
+            f = os.fdopen(fd, mode + "b", buffering=0)
+            try:
+                st = os.fstat(fd)
+                if not stat.S_ISREG(st.st_mode) or st.st_uid != os.getuid():
+                    raise PermissionError(
+                        f"Refusing temp manifest {self.path}: not owned by this user"
+                    )
+                fcntl.flock(fd, lock)
+                try:
+                    current = os.lstat(self.path)
+                except FileNotFoundError:
+                    current = None
+            except BaseException:
+                f.close()
+                raise
+            # Compaction replaced the file while we waited for the lock
+            if current is not None and current.st_ino == st.st_ino:
+                return f
+            f.close()
+
+    def _append(self, record: Dict) -> None:
+        line = (json.dumps(record, separators=(",", ":")) + "\n").encode()
+        if len(line) > _ATOMIC_APPEND:
+            # Could interleave with a concurrent append; better unrecorded
+            # (and left in place) than recorded as a torn line
+            return
+        f = self._open("a", fcntl.LOCK_SH)
+        assert f is not None
+        with f:
+            os.write(f.fileno(), line)
+
+    def record(self, path: Path, kind: str, prefix: str) -> None:
+        """Record a newly created file or directory."""
+        self._append(
+            {
+                "op": "create",
+                "path": os.path.abspath(path),
+                "kind": kind,
+                "prefix": prefix,
+                "created": time.time(),
+                "pid": os.getpid(),
+            }
+        )
+
+    def forget(self, path: Path) -> None:
+        """Record that an entry no longer exists."""
+        if self.path.exists():
+            self._append({"op": "remove", "path": os.path.abspath(path)})
+
+    @staticmethod
+    def _replay(data: bytes, entries: Dict[str, TempEntry]) -> None:
+        for line in data.splitlines():
+            try:
+                record = json.loads(line)
+                if record["op"] == "create":
+                    entries[record["path"]] = TempEntry(
+                        path=Path(record["path"]),
+                        kind=record["kind"],
+                        prefix=record["prefix"],
+                        created=float(record["created"]),
+                        pid=int(record["pid"]),
+                    )
+                else:
+                    entries.pop(record["path"], None)
+            except (ValueError, KeyError, TypeError):
+                # A line torn by a crash mid-write
+                continue
+
+    def _inside_base(self, path: Path) -> bool:
+        """Whether ``path`` is strictly inside the base directory.
+
+        The parent is resolved, the entry itself is not: a recorded
+        symlink is removed, never followed.
+        """
+        if path.name in ("", ".", ".."):
+            return False
+        parent = Path(os.path.realpath(path.parent))
+        base = Path(os.path.realpath(self.base))
+        return parent == base or base in parent.parents
+
+    def _read(self) -> Dict[str, TempEntry]:
+        entries: Dict[str, TempEntry] = {}
+        f = self._open("r", fcntl.LOCK_SH)
+        if f is not None:
+            with f:
+                self._replay(f.read(), entries)
+        return entries
+
+    def entries(self) -> List[TempEntry]:
+        """Live entries inside the base directory, oldest first."""
+        return [e for e in self._read().values() if self._inside_base(e.path)]
+
+    def compact(self) -> None:
+        """Rewrite the manifest without tombstones or removed entries.
+
+        The live entries are written to a new file that replaces the
+        manifest while it is locked exclusively, so no append is lost.
+        """
+        f = self._open("r", fcntl.LOCK_EX)
+        if f is None:
+            return
+        with f:
+            entries: Dict[str, TempEntry] = {}
+            self._replay(f.read(), entries)
+            if not entries:
+                os.unlink(self.path)
+                return
+            fd, tmp = tempfile.mkstemp(prefix=f".{self.path.name}.", dir=self.base)
+            try:
+                with os.fdopen(fd, "wb") as out:
+                    for entry in entries.values():
+                        record = {
+                            "op": "create",
+                            "path": str(entry.path),
+                            "kind": entry.kind,
+                            "prefix": entry.prefix,
+                            "created": entry.created,
+                            "pid": entry.pid,
+                        }
+                        out.write(
+                            (json.dumps(record, separators=(",", ":")) + "\n").encode()
+                        )
+                os.replace(tmp, self.path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+
+    def clean(
+        self,
+        older_than: Optional[float] = None,
+        prefix: Optional[str] = None,
+        include_active: bool = False,
+        workers: Optional[int] = None,
+    ) -> CleanResult:
+        """Delete owned entries in parallel and compact the manifest.
+
+        ``older_than`` is an age in seconds. Entries created by processes
+        that are still running are kept unless ``include_active`` is set.
+        """
+        now = time.time()
+        result = CleanResult()
+        victims = []
+        for entry in self.entries():
+            if prefix is not None and not entry.prefix.startswith(prefix):
+                continue
+            if older_than is not None and now - entry.created < older_than:
+                continue
+            if not include_active and entry.active:
+                result.skipped_active += 1
+                continue
+            victims.append(entry)
+
+        def remove(entry: TempEntry) -> Tuple[TempEntry, int, Optional[str]]:
+            size = disk_usage(entry.path)
+            try:
+                if entry.kind == "dir" and not entry.path.is_symlink():
+                    shutil.rmtree(entry.path)
+                else:
+                    entry.path.unlink()
+            except FileNotFoundError:
+                return entry, 0, None
+            except OSError as e:
+                return entry, 0, str(e)
+            return entry, size, None
+
+        if victims:
+            with ThreadPoolExecutor(max_workers=workers or min(32, len(victims))) as ex:
+                for entry, size, error in ex.map(remove, victims):
+                    if error is not None:
+                        result.errors.append((entry.path, error))
+                        continue
+                    result.entries += 1
+                    result.bytes_freed += size
+                    self.forget(entry.path)
+            self.compact()
+        return result
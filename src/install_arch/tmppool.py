@@ -0,0 +1,282 @@
+"""Pool of pre-created secure temporary directories."""
+
+import atexit
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Checkout latencies kept for percentile reporting
+_LATENCY_SAMPLES = 1024
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    """Snapshot of temp directory pool activity."""
+
+    checkouts: int
+    # Checkouts served from the pool vs. created on demand
+    hits: int
+    misses: int
+    returns: int
+    # Returned directories deleted instead of reused
+    discarded: int
+    ready: int
+    latency_mean_ms: float
+    latency_p50_ms: float
+    latency_p99_ms: float
+    latency_max_ms: float
+
+
+def _percentile(samples: List[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _scrub(path: Path) -> bool:
+    """Empty a returned directory and restore its 0700 mode.
+
+    Returns False if the directory cannot be safely reused.
+    """
+    try:
+        st = os.lstat(path)
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid():
+            return False
+        os.chmod(path, 0o700)
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    _rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+    except OSError:
+        return False
+    return True
+
+
+def _force_writable(func, path, exc) -> None:
+    """rmtree error handler for contents made read-only by their user."""
+    parent = os.path.dirname(path)
+    os.chmod(parent, 0o700)
+    if os.path.isdir(path) and not os.path.islink(path):
+        os.chmod(path, 0o700)
+    func(path)
+
+
+def _rmtree(path: str) -> None:
+    # onerror is deprecated from 3.12 in favour of onexc
+    if sys.version_info >= (3, 12):
+        shutil.rmtree(path, onexc=_force_writable)
+    else:
+        shutil.rmtree(path, onerror=_force_writable)
+
+
+class TempDirPool:
+    """Hands out ready-made 0700 directories and recycles returned ones.
+
+    Each prefix has its own free list. When a list drops below the low
+    watermark a background thread refills it to the high watermark;
+    returned directories are scrubbed on that thread and kept while the
+    list is below the high watermark, otherwise deleted.
+    """
+
+    def __init__(self, base: Path, low: int = 4, high: int = 16):
+        if not 0 <= low <= high:
+            raise ValueError("Pool watermarks must satisfy 0 <= low <= high")
+        self.base = Path(os.path.abspath(base))
+        self.low = low
+        self.high = high
+        self._cond = threading.Condition()
+        self._ready: Dict[str, Deque[Path]] = {}
+        self._checked_out: Dict[Path, str] = {}
+        self._returned: Deque[Tuple[str, Path]] = deque()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        self._latencies: Deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self._counts = {
+            "checkouts": 0,
+            "hits": 0,
+            "misses": 0,
+            "returns": 0,
+            "discarded": 0,
+        }
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    def _create(self, prefix: str) -> Path:
+        path = Path(tempfile.mkdtemp(prefix=prefix, dir=self.base))
+        path.chmod(0o700)
+        return path
+
+    def _start(self) -> None:
+        """Start the background worker; called with the lock held."""
+        if self._worker is None:
+            self._worker = threading.Thread(
+                target=self._run, name="temp-dir-pool", daemon=True
+            )
+            self._worker.start()
+            atexit.register(self.close)
+
+    def acquire(self, prefix: str = "install-arch-") -> Path:
+        """Check out an empty 0700 directory."""
+        start = time.perf_counter()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Temp directory pool is closed")
+            self._start()
+            ready = self._ready.setdefault(prefix, deque())
+            path = ready.popleft() if ready else None
+            if len(ready) < self.low:
+                self._cond.notify()
+
+        hit = path is not None
+        if path is None:
+            self.base.mkdir(parents=True, exist_ok=True)
+            path = self._create(prefix)
+
+        elapsed = time.perf_counter() - start
+        with self._cond:
+            self._checked_out[path] = prefix
+            self._counts["checkouts"] += 1
+            self._counts["hits" if hit else "misses"] += 1
+            self._latencies.append(elapsed)
+            self._latency_total += elapsed
+            self._latency_max = max(self._latency_max, elapsed)
+        return path
+
+    def release(self, path: Path) -> bool:
+        """Return a directory for scrubbing and reuse.
+
+        Returns False if the directory was not checked out from this pool.
+        """
+        path = Path(os.path.abspath(path))
+        with self._cond:
+            prefix = self._checked_out.pop(path, None)
+            if prefix is None:
+                return False
+            self._counts["returns"] += 1
+            if self._closed:
+                self._counts["discarded"] += 1
+                discard = True
+            else:
+                self._returned.append((prefix, path))
+                self._cond.notify()
+                discard = False
+        if discard:
+            shutil.rmtree(path, ignore_errors=True)
+        return True
+
+    def owns(self, path: Path) -> bool:
+        """Whether a directory is currently checked out from this pool."""
+        with self._cond:
+            return Path(os.path.abspath(path)) in self._checked_out
+
+    def _pending_work(self) -> bool:
+        if self._returned:
+            return True
+        return any(len(ready) < self.low for ready in self._ready.values())
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._closed and not self._pending_work():
+                    self._cond.wait()
+                if self._closed:
+                    return
+                returned = list(self._returned)
+                self._returned.clear()
+                refill = {
+                    prefix: self.high - len(ready)
+                    for prefix, ready in self._ready.items()
+                    if len(ready) < self.low
+                }
+
+            for prefix, path in returned:
+                self._recycle(prefix, path)
+            refilled = [self._refill(prefix, count) for prefix, count in refill.items()]
+            if not all(refilled):
+                # Back off instead of spinning while the base is unusable
+                with self._cond:
+                    self._cond.wait(timeout=1.0)
+
+    def _recycle(self, prefix: str, path: Path) -> None:
+        reusable = _scrub(path)
+        with self._cond:
+            ready = self._ready.setdefault(prefix, deque())
+            keep = reusable and not self._closed and len(ready) < self.high
+            if keep:
+                ready.append(path)
+            else:
+                self._counts["discarded"] += 1
+        if not keep:
+            shutil.rmtree(path, ignore_errors=True)
+
+    def _refill(self, prefix: str, count: int) -> bool:
+        created: List[Path] = []
+        ok = True
+        try:
+            self.base.mkdir(parents=True, exist_ok=True)
+            for _ in range(count):
+                created.append(self._create(prefix))
+        except OSError:
+            ok = False
+        with self._cond:
+            if self._closed:
+                surplus = created
+            else:
+                ready = self._ready.setdefault(prefix, deque())
+                room = max(0, self.high - len(ready))
+                ready.extend(created[:room])
+                surplus = created[room:]
+        for path in surplus:
+            shutil.rmtree(path, ignore_errors=True)
+        return ok
+
+    def stats(self) -> PoolStats:
+        """Current counters and checkout latency distribution."""
+        with self._cond:
+            samples = list(self._latencies)
+            counts = dict(self._counts)
+            checkouts = counts["checkouts"]
+            mean = self._latency_total / checkouts if checkouts else 0.0
+            ready = sum(len(r) for r in self._ready.values())
+            latency_max = self._latency_max
+        return PoolStats(
+            checkouts=checkouts,
+            hits=counts["hits"],
+            misses=counts["misses"],
+            returns=counts["returns"],
+            discarded=counts["discarded"],
+            ready=ready,
+            latency_mean_ms=mean * 1000,
+            latency_p50_ms=_percentile(samples, 0.5) * 1000,
+            latency_p99_ms=_percentile(samples, 0.99) * 1000,
+            latency_max_ms=latency_max * 1000,
+        )
+
+    def close(self) -> None:
+        """Stop the worker and delete every directory not checked out."""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+            leftover = [p for ready in self._ready.values() for p in ready]
+            leftover.extend(path for _, path in self._returned)
+            self._ready.clear()
+            self._returned.clear()
+            worker = self._worker
+        if worker is not None:
+            worker.join(timeout=5)
+            atexit.unregister(self.close)
+        for path in leftover:
+            shutil.rmtree(path, ignore_errors=True)
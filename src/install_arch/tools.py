@@ -0,0 +1,174 @@
+"""Cached discovery of package manager binaries.
+
+Each tool is resolved to a binary path and its ``--version`` output. The
+result is cached in memory and in ``tools.json`` under the install-arch
+cache directory, keyed on the binary's inode, mtime and size, so the
+version command only runs again when the binary is replaced or updated.
+Besides PATH, the directories the upstream installers use
+(``~/.cargo/bin`` and ``~/.local/bin``) are searched.
+"""
+
+import json
+import os
+import shutil
+import subprocess
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .config import cache_dir
+
+# Bump when the cache layout changes so stale files are ignored
+CACHE_FORMAT = 1
+
+VERSION_TIMEOUT = 10.0
+
+
+def installer_dirs() -> List[Path]:
+    """Directories tool installers put binaries in, outside the usual PATH."""
+    home = Path.home()
+    return [home / ".cargo" / "bin", home / ".local" / "bin"]
+
+
+@dataclass(frozen=True)
+class ResolvedTool:
+    """A tool binary and the stat signature its version was read at."""
+
+    name: str
+    path: str
+    # First line of ``--version`` output, or None if the binary failed it
+    version: Optional[str]
+    ino: int
+    mtime_ns: int
+    size: int
+
+    @property
+    def usable(self) -> bool:
+        return self.version is not None
+
+    @property
+    def signature(self) -> Tuple[str, int, int, int]:
+        return (self.path, self.ino, self.mtime_ns, self.size)
+
+
+class ToolResolver:
+    """Resolves tool names to binaries, re-probing only changed binaries."""
+
+    def __init__(
+        self,
+        cache_file: Optional[Path] = None,
+        search_dirs: Optional[List[Path]] = None,
+    ):
+        self._cache_file = cache_file
+        self.search_dirs = search_dirs
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, ResolvedTool]] = None
+
+    @property
+    def cache_file(self) -> Path:
+        return self._cache_file or cache_dir() / "tools.json"
+
+    def _search_path(self) -> str:
+        dirs = self.search_dirs if self.search_dirs is not None else installer_dirs()
+        parts = [os.environ.get("PATH", "")] + [str(d) for d in dirs]
+        return os.pathsep.join(p for p in parts if p)
+
+    def locate(self, tool: str) -> Optional[str]:
+        """Absolute path of a tool's binary, without running it."""
+        found = shutil.which(tool, path=self._search_path())
+        return os.path.abspath(found) if found else None
+
+    def _load(self) -> Dict[str, ResolvedTool]:
+        if self._entries is None:
+            entries: Dict[str, ResolvedTool] = {}
+            try:
+                with open(self.cache_file, encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("format") == CACHE_FORMAT:
+                    for name, entry in data["tools"].items():
+                        entries[name] = ResolvedTool(**entry)
+            except (OSError, ValueError, KeyError, TypeError):
+                entries = {}
+            self._entries = entries
+        return self._entries
+
+    def _save(self) -> None:
+        # The cache is an optimization: never fail a lookup because of it
+        entries = self._entries or {}
+        try:
+            payload = json.dumps(
+                {
+                    "format": CACHE_FORMAT,
+                    "tools": {name: asdict(e) for name, e in entries.items()},
+                }
+            )
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_suffix(f".{os.getpid()}.tmp")
+            tmp_file.write_text(payload, encoding="utf-8")
+            os.replace(tmp_file, self.cache_file)
+        except (OSError, TypeError, ValueError):
+            pass
+
+    @staticmethod
+    def _probe_version(path: str) -> Optional[str]:
+        try:
+            result = subprocess.run(
+                [path, "--version"],
+                capture_output=True,
+                text=True,
+                timeout=VERSION_TIMEOUT,
+            )
+        except (OSError, subprocess.SubprocessError):
+            return None
+        if result.returncode != 0:
+            return None
+        lines = (result.stdout or result.stderr).strip().splitlines()
+        return lines[0] if lines else ""
+
+    def resolve(self, tool: str) -> Optional[ResolvedTool]:
+        """Resolve a tool, or None if it is missing or does not run."""
+        path = self.locate(tool)
+        if path is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        signature = (path, st.st_ino, st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            cached = self._load().get(tool)
+        if cached is not None and cached.signature == signature:
+            return cached if cached.usable else None
+
+        resolved = ResolvedTool(
+            name=tool,
+            path=path,
+            version=self._probe_version(path),
+            ino=st.st_ino,
+            mtime_ns=st.st_mtime_ns,
+            size=st.st_size,
+        )
+        with self._lock:
+            self._load()[tool] = resolved
+            self._save()
+        return resolved if resolved.usable else None
+
+    def invalidate(self, tool: Optional[str] = None) -> None:
+        """Forget one tool, or every tool, so it is probed again."""
+        with self._lock:
+            entries = self._load()
+            if tool is None:
+                entries.clear()
+            else:
+                entries.pop(tool, None)
+            self._save()
+
+
+_resolver = ToolResolver()
+
+
+def get_tool_resolver() -> ToolResolver:
+    """The process-wide tool resolver."""
+    return _resolver
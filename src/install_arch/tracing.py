@@ -0,0 +1,212 @@
+"""Nested timing spans written as a Chrome trace.
+
+When tracing is on, CLI commands, public ``PackageManager`` and
+``FileSystemOps`` methods, setup phases and every command run through
+the runner record a span. Each span carries its wall time and the CPU
+time of its thread, plus the user and system time of the child
+processes it waited for. The trace is written in the Chrome trace event
+format, which Perfetto (ui.perfetto.dev) and chrome://tracing load.
+
+Tracing is off unless ``start`` is called, e.g. through the CLI's
+``--trace PATH`` option; spans then cost one global lookup.
+"""
+
+import functools
+import json
+import os
+import resource
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar, Union
+
+T = TypeVar("T")
+
+
+class _Span:
+    __slots__ = ("child_user", "child_system")
+
+    def __init__(self) -> None:
+        self.child_user = 0.0
+        self.child_system = 0.0
+
+
+class Tracer:
+    """Collects spans from every thread of the process."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._origin = time.perf_counter_ns()
+        self._lock = threading.Lock()
+        self._events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+        self._local = threading.local()
+
+    def _stack(self) -> List[_Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(
+        self, name: str, cat: str, whole_process: bool = False, **args: Any
+    ) -> Iterator[Dict[str, Any]]:
+        """Record the enclosed block as a span named ``name``.
+
+        CPU time is the thread's, and child usage that of the commands the
+        thread waited for, unless ``whole_process`` is set, e.g. for a span
+        around a command whose work runs on other threads. Yields the
+        span's args, so the block can add to them.
+        """
+        stack = self._stack()
+        current = _Span()
+        stack.append(current)
+        cpu_clock = time.process_time_ns if whole_process else time.thread_time_ns
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        start = time.perf_counter_ns()
+        cpu_start = cpu_clock()
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            cpu = cpu_clock() - cpu_start
+            end = time.perf_counter_ns()
+            stack.pop()
+            if whole_process:
+                usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+                current.child_user = usage.ru_utime - children.ru_utime
+                current.child_system = usage.ru_stime - children.ru_stime
+            # A parent waited for everything its children waited for
+            if stack:
+                stack[-1].child_user += current.child_user
+                stack[-1].child_system += current.child_system
+            args["cpu_ms"] = round(cpu / 1e6, 3)
+            if current.child_user or current.child_system:
+                args["child_user_ms"] = round(current.child_user * 1000, 3)
+                args["child_system_ms"] = round(current.child_system * 1000, 3)
+            self._add(name, cat, start, end, args)
+
+    def add_child_usage(self, user: float, system: float) -> None:
+        """Charge a reaped child's CPU seconds to the innermost open span."""
+        stack = self._stack()
+        if stack:
+            stack[-1].child_user += user
+            stack[-1].child_system += system
+
+    def _add(
+        self, name: str, cat: str, start: int, end: int, args: Dict[str, Any]
+    ) -> None:
+        thread = threading.current_thread()
+        # Native ids, unlike idents, are not reused as soon as a thread exits
+        tid = threading.get_native_id()
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": (start - self._origin) / 1000,
+            "dur": (end - start) / 1000,
+            "pid": os.getpid(),
+            "tid": tid,
+            "args": args,
+        }
+        with self._lock:
+            self._events.append(event)
+            self._threads.setdefault(tid, thread.name)
+
+    def events(self) -> List[Dict[str, Any]]:
+        """Recorded events, with thread names first."""
+        pid = os.getpid()
+        with self._lock:
+            names = [
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": pid,
+                    "tid": tid,
+                    "args": {"name": name},
+                }
+                for tid, name in self._threads.items()
+            ]
+            return names + list(self._events)
+
+    def write(self) -> Path:
+        """Write the trace file and return its path."""
+        payload = json.dumps({"traceEvents": self.events(), "displayTimeUnit": "ms"})
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        tmp_file.write_text(payload, encoding="utf-8")
+        os.replace(tmp_file, self.path)
+        return self.path
+
+
+_tracer: Optional[Tracer] = None
+
+
+def start(path: Union[str, Path]) -> Tracer:
+    """Turn tracing on for the rest of the process."""
+    global _tracer
+    _tracer = Tracer(path)
+    return _tracer
+
+
+def stop() -> Optional[Path]:
+    """Turn tracing off and write what was recorded, if anything."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer.write() if tracer is not None else None
+
+
+def active() -> Optional[Tracer]:
+    return _tracer
+
+
+@contextmanager
+def span(
+    name: str, cat: str, whole_process: bool = False, **args: Any
+) -> Iterator[Dict[str, Any]]:
+    """Record a span if tracing is on; yields its args like ``Tracer.span``."""
+    tracer = _tracer
+    if tracer is None:
+        yield args
+        return
+    with tracer.span(name, cat, whole_process, **args) as span_args:
+        yield span_args
+
+
+def add_child_usage(user: float, system: float) -> None:
+    tracer = _tracer
+    if tracer is not None:
+        tracer.add_child_usage(user, system)
+
+
+def traced(func: Callable[..., T], name: str, cat: str) -> Callable[..., T]:
+    """Wrap ``func`` so each call records a span."""
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> T:
+        tracer = _tracer
+        if tracer is None:
+            return func(*args, **kwargs)
+        with tracer.span(name, cat):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+def instrument(cat: str) -> Callable[[type], type]:
+    """Class decorator tracing every public method of the class."""
+
+    def decorate(cls: type) -> type:
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith("_") or not callable(value):
+                continue
+            if isinstance(value, (staticmethod, classmethod, type)):
+                continue
+            setattr(cls, attr, traced(value, f"{cls.__name__}.{attr}", cat))
+        return cls
+
+    return decorate
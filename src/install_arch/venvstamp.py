@@ -0,0 +1,156 @@
+"""Fingerprint stamps that let unchanged dependency installs be skipped.
+
+After a successful install, a stamp is written inside the venv. It holds
+a hash of everything the install depended on: the lockfiles, the
+dependency tables of ``pyproject.toml``, the venv's interpreter version,
+the tool and whether dev dependencies were included. It also records the
+mtime of ``site-packages``, so packages added or removed by hand make the
+stamp stale. While the stamp matches, installing again would change
+nothing. Checking it reads a few small files and never runs a process.
+"""
+
+import hashlib
+import json
+import os
+import tomllib
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+STAMP_NAME = ".install-arch-stamp.json"
+
+# Bump when the fingerprint inputs change so old stamps stop matching
+STAMP_FORMAT = 2
+
+LOCKFILES = (
+    "uv.lock",
+    "poetry.lock",
+    "Pipfile",
+    "Pipfile.lock",
+    "requirements.txt",
+    "requirements-dev.txt",
+)
+
+# pyproject.toml entries that change what an install produces
+PYPROJECT_KEYS = (
+    ("build-system",),
+    ("project", "name"),
+    ("project", "version"),
+    ("project", "requires-python"),
+    ("project", "dependencies"),
+    ("project", "optional-dependencies"),
+    ("project", "scripts"),
+    ("project", "gui-scripts"),
+    ("project", "entry-points"),
+    ("dependency-groups",),
+    ("tool", "uv"),
+    ("tool", "poetry"),
+)
+
+
+def _pyproject_tables(project_dir: Path) -> Dict[str, Any]:
+    try:
+        with open(project_dir / "pyproject.toml", "rb") as f:
+            data = tomllib.load(f)
+    except FileNotFoundError:
+        return {}
+    tables: Dict[str, Any] = {}
+    for keys in PYPROJECT_KEYS:
+        value: Any = data
+        for key in keys:
+            value = value.get(key) if isinstance(value, dict) else None
+        if value is not None:
+            tables[".".join(keys)] = value
+    return tables
+
+
+def _interpreter(venv_path: Path) -> Optional[str]:
+    """Interpreter recorded in pyvenv.cfg, or None if it is not a venv."""
+    if not (venv_path / "bin" / "python").exists():
+        return None
+    try:
+        lines = (venv_path / "pyvenv.cfg").read_text().splitlines()
+    except OSError:
+        return None
+    cfg = {}
+    for line in lines:
+        key, sep, value = line.partition("=")
+        if sep:
+            cfg[key.strip()] = value.strip()
+    # python -m venv writes "version", uv writes "version_info"
+    version = cfg.get("version_info") or cfg.get("version") or ""
+    return f"{cfg.get('implementation', 'CPython')} {version} {cfg.get('home', '')}"
+
+
+def _site_packages_mtime(venv_path: Path) -> Optional[int]:
+    for site in (venv_path / "lib").glob("python*/site-packages"):
+        try:
+            return site.stat().st_mtime_ns
+        except OSError:
+            return None
+    return None
+
+
+def fingerprint(
+    project_dir: Path, venv_path: Path, tool: str, dev: bool
+) -> Optional[str]:
+    """Hash of an install's inputs, or None if there is no venv to stamp."""
+    interpreter = _interpreter(venv_path)
+    if interpreter is None:
+        return None
+    return inputs_digest(project_dir, tool, dev, interpreter)
+
+
+def inputs_digest(project_dir: Path, tool: str, dev: bool, interpreter: str) -> str:
+    """Hash of the project's install inputs for a given interpreter."""
+    h = hashlib.blake2b(digest_size=32)
+    header = {
+        "format": STAMP_FORMAT,
+        "tool": tool,
+        "dev": dev,
+        "interpreter": interpreter,
+        "pyproject": _pyproject_tables(project_dir),
+    }
+    h.update(json.dumps(header, sort_keys=True, default=str).encode())
+    for name in LOCKFILES:
+        try:
+            content = (project_dir / name).read_bytes()
+        except FileNotFoundError:
+            continue
+        h.update(f"\0{name}\0{len(content)}\0".encode())
+        h.update(content)
+    return h.hexdigest()
+
+
+def stamp_matches(venv_path: Path, expected: str) -> bool:
+    """Whether the venv carries a current stamp for ``expected``."""
+    try:
+        with open(venv_path / STAMP_NAME, encoding="utf-8") as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return (
+        isinstance(stamp, dict)
+        and stamp.get("fingerprint") == expected
+        and stamp.get("site_packages_mtime_ns") == _site_packages_mtime(venv_path)
+    )
+
+
+def write_stamp(venv_path: Path, value: str) -> None:
+    """Record a completed install, replacing any previous stamp."""
+    payload = json.dumps(
+        {
+            "fingerprint": value,
+            "site_packages_mtime_ns": _site_packages_mtime(venv_path),
+        }
+    )
+    tmp_file = venv_path / f"{STAMP_NAME}.{os.getpid()}.tmp"
+    tmp_file.write_text(payload, encoding="utf-8")
+    os.replace(tmp_file, venv_path / STAMP_NAME)
+
+
+def clear_stamp(venv_path: Path) -> None:
+    """Drop the stamp, e.g. before an install that might not finish."""
+    try:
+        os.unlink(venv_path / STAMP_NAME)
+    except FileNotFoundError:
+        pass
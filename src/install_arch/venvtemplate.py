@@ -0,0 +1,223 @@
+"""Template venvs cloned into isolated per-job environments.
+
+One fully installed "golden" venv is kept per project and install
+fingerprint. New venvs are cloned from it with ``fastcopy.copy_tree``,
+which reflinks on btrfs and XFS or, optionally, hardlinks. The template's
+absolute path is then rewritten to the clone's in ``pyvenv.cfg`` and in
+the scripts under ``bin/`` (shebangs and activate scripts). Clones keep
+the template's install stamp, so installing into them is a no-op.
+
+Template files are made read-only, so a clone that shares them through
+hardlinks cannot modify them in place. Installers replace files rather
+than rewriting them, so upgrades inside a clone still work.
+
+Every change to the dependencies gives a new template, so each clone
+marks its template as used and publishing a new one evicts the least
+recently used beyond ``keep``. A template being built or cloned holds
+its lock and is never evicted.
+"""
+
+import fcntl
+import os
+import shutil
+import stat
+from pathlib import Path
+from typing import IO, TYPE_CHECKING, Iterator, List, Optional
+
+from . import fastcopy
+from .config import cache_dir
+from .venvstamp import fingerprint, inputs_digest, stamp_matches, write_stamp
+
+if TYPE_CHECKING:
+    from .package_manager import PackageManager
+
+
+def _freeze(root: Path) -> None:
+    """Drop the write bits of every regular file below ``root``."""
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            st = os.lstat(path)
+            if stat.S_ISREG(st.st_mode):
+                os.chmod(path, stat.S_IMODE(st.st_mode) & ~0o222)
+
+
+def _relocatable_files(venv: Path) -> Iterator[Path]:
+    yield venv / "pyvenv.cfg"
+    bin_dir = venv / "bin"
+    if bin_dir.is_dir():
+        for path in bin_dir.iterdir():
+            if path.is_file() and not path.is_symlink():
+                yield path
+
+
+def relocate(venv: Path, old: Path) -> int:
+    """Rewrite ``old`` to ``venv`` in a cloned venv's paths; returns files changed.
+
+    Files are replaced rather than edited, so hardlinked template files
+    are left alone. Binary files are skipped.
+    """
+    old_bytes = os.fsencode(str(old))
+    new_bytes = os.fsencode(str(venv))
+    changed = 0
+    for path in _relocatable_files(venv):
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            continue
+        if old_bytes not in data or b"\0" in data:
+            continue
+        mode = stat.S_IMODE(path.stat().st_mode) | stat.S_IWUSR
+        tmp_file = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp_file.write_bytes(data.replace(old_bytes, new_bytes))
+        os.chmod(tmp_file, mode)
+        os.replace(tmp_file, path)
+        changed += 1
+    return changed
+
+
+def _still_linked(lock_file: IO[str], lock_path: Path) -> bool:
+    """Whether ``lock_path`` still names the open, locked file."""
+    return os.fstat(lock_file.fileno()).st_ino == os.stat(lock_path).st_ino
+
+
+class VenvTemplates:
+    """Installed template venvs, and clones made from them."""
+
+    def __init__(
+        self,
+        pkg_mgr: "PackageManager",
+        root: Optional[Path] = None,
+        hardlink: bool = False,
+        keep: int = 4,
+    ):
+        self.pkg_mgr = pkg_mgr
+        self.root = root or cache_dir() / "venv-templates"
+        self.hardlink = hardlink
+        self.keep = keep
+
+    def template_path(
+        self, dev: bool = True, project_dir: Optional[Path] = None
+    ) -> Path:
+        """Where the template for the project's current inputs lives."""
+        project_dir = (project_dir or Path.cwd()).absolute()
+        # Editable installs point at the checkout, so it is part of the key
+        interpreter = f"{project_dir} {self.pkg_mgr.config.python_version}"
+        key = inputs_digest(project_dir, self.pkg_mgr.tool, dev, interpreter)
+        return self.root / key[:32]
+
+    def _current(self, template: Path, project_dir: Path, dev: bool) -> bool:
+        value = fingerprint(project_dir, template, self.pkg_mgr.tool, dev)
+        return value is not None and stamp_matches(template, value)
+
+    def _build(self, template: Path, project_dir: Path, dev: bool) -> None:
+        pkg_mgr = self.pkg_mgr
+        venv_cmd = pkg_mgr._venv_command(template)
+        if venv_cmd is None:
+            raise ValueError(f"Template venvs need uv or pip, not {pkg_mgr.tool}")
+        pkg_mgr._run_command(venv_cmd, cwd=project_dir)
+        install_cmd = pkg_mgr._install_command(
+            dev, pkg_mgr.wheelhouse(project_dir, dev), template, project_dir
+        )
+        pkg_mgr._run_command(install_cmd, cwd=project_dir)
+        _freeze(template)
+        value = fingerprint(project_dir, template, pkg_mgr.tool, dev)
+        if value is None:
+            raise RuntimeError(f"Template {template} is not a virtual environment")
+        write_stamp(template, value)
+
+    def _lock(self, template: Path, operation: int) -> IO[str]:
+        """Open and lock a template's lock file.
+
+        Eviction unlinks the lock file of the template it removes, so
+        a lock taken on a file that is no longer linked is retried.
+        """
+        lock_path = self.root / f"{template.name}.lock"
+        while True:
+            lock_file = open(lock_path, "a")
+            try:
+                fcntl.flock(lock_file, operation)
+                if _still_linked(lock_file, lock_path):
+                    return lock_file
+            except FileNotFoundError:
+                pass
+            except BaseException:
+                lock_file.close()
+                raise
+            lock_file.close()
+
+    def prune(self, current: Optional[Path] = None) -> List[Path]:
+        """Remove the least recently used templates beyond ``keep``.
+
+        ``current`` is never removed, nor is a template that another
+        process holds locked. Returns the templates removed.
+        """
+        used = []
+        for lock_path in self.root.glob("*.lock"):
+            try:
+                used.append((lock_path.stat().st_mtime_ns, lock_path))
+            except FileNotFoundError:
+                continue
+        removed = []
+        kept = 1 if current is not None else 0
+        for _, lock_path in sorted(used, reverse=True):
+            template = lock_path.with_suffix("")
+            if template == current:
+                continue
+            if kept < self.keep:
+                kept += 1
+                continue
+            try:
+                lock_file = open(lock_path)
+            except FileNotFoundError:
+                continue
+            with lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    if not _still_linked(lock_file, lock_path):
+                        continue
+                except (BlockingIOError, FileNotFoundError):
+                    continue
+                shutil.rmtree(template, ignore_errors=True)
+                lock_path.unlink()
+            removed.append(template)
+        return removed
+
+    def clone(
+        self, dst: Path, dev: bool = True, project_dir: Optional[Path] = None
+    ) -> Path:
+        """Clone an up-to-date template into ``dst``, building it if needed.
+
+        The template is built under an exclusive lock, so concurrent jobs
+        build it once; copies are taken under a shared lock, so a rebuild
+        never removes a template that is being cloned.
+        """
+        project_dir = (project_dir or Path.cwd()).absolute()
+        dst = dst.absolute()
+        if dst.exists():
+            raise FileExistsError(f"{dst} already exists")
+        template = self.template_path(dev, project_dir)
+        self.root.mkdir(parents=True, exist_ok=True)
+        published = False
+        with self._lock(template, fcntl.LOCK_EX) as lock_file:
+            # The lock file's mtime records when the template was last used
+            os.utime(lock_file.fileno())
+            if not self._current(template, project_dir, dev):
+                shutil.rmtree(template, ignore_errors=True)
+                try:
+                    self._build(template, project_dir, dev)
+                except BaseException:
+                    shutil.rmtree(template, ignore_errors=True)
+                    raise
+                published = True
+            fcntl.flock(lock_file, fcntl.LOCK_SH)
+            if published:
+                self.prune(current=template)
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            result = fastcopy.copy_tree(template, dst, hardlink=self.hardlink)
+        if result.errors:
+            shutil.rmtree(dst, ignore_errors=True)
+            path, error = result.errors[0]
+            raise OSError(f"Could not clone {path}: {error}")
+        relocate(dst, template)
+        return dst
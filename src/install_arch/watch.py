@@ -0,0 +1,275 @@
+"""Incremental guardrails evaluation driven by filesystem events."""
+
+import ctypes
+import ctypes.util
+import errno
+import os
+import select
+import struct
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from .guardrails import GuardrailsEvaluation, GuardrailsValidator, stale_probes
+
+# inotify event masks, from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Longest coalescing window, in multiples of the settle time
+COALESCE_LIMIT = 10
+
+
+class _Inotify:
+    """Minimal ctypes binding to the Linux inotify API."""
+
+    def __init__(self) -> None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._add_watch.restype = ctypes.c_int
+
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        self.fd = fd
+
+    def add_watch(self, path: Path, mask: int) -> Optional[int]:
+        """Watch a path, returning None if it cannot be watched."""
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        return wd if wd >= 0 else None
+
+    def read(self, timeout: Optional[float]) -> List[Tuple[int, int, str]]:
+        """Wait for events and return them as (wd, mask, name) tuples."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+
+class PathWatcher:
+    """Reports which watched inputs changed, via inotify or stat polling.
+
+    Each input maps to one or more paths. Paths are watched through their
+    parent directory, so files replaced by editors (write + rename) and
+    directories created after the watch started are still noticed.
+    Directories are additionally watched themselves to catch changes to
+    their contents and permissions.
+    """
+
+    def __init__(
+        self, inputs: Dict[str, List[Path]], use_inotify: Optional[bool] = None
+    ):
+        self._inputs = {key: [Path(p) for p in paths] for key, paths in inputs.items()}
+        self._inotify: Optional[_Inotify] = None
+        if use_inotify is not False:
+            try:
+                self._inotify = _Inotify()
+            except (OSError, AttributeError, TypeError):
+                if use_inotify:
+                    raise
+        # wd -> list of (name filter or None for any event, input key)
+        self._watches: Dict[int, List[Tuple[Optional[str], str]]] = {}
+        self._signatures: Dict[Path, Optional[Tuple[int, ...]]] = {}
+        self._arm()
+
+    @property
+    def backend(self) -> str:
+        """Name of the active change-notification backend."""
+        return "inotify" if self._inotify else "poll"
+
+    @staticmethod
+    def _signature(path: Path) -> Optional[Tuple[int, ...]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_mode, st.st_size, st.st_mtime_ns, st.st_ctime_ns)
+
+    def _arm(self) -> None:
+        """(Re)register watches; cheap for paths that are already watched."""
+        if self._inotify is None:
+            self._signatures = {
+                path: self._signature(path)
+                for paths in self._inputs.values()
+                for path in paths
+            }
+            return
+
+        self._watches.clear()
+        for key, paths in self._inputs.items():
+            for path in paths:
+                targets: List[Tuple[Path, Optional[str]]] = [(path.parent, path.name)]
+                if path.is_dir():
+                    targets.append((path, None))
+                for target, name in targets:
+                    wd = self._inotify.add_watch(target, WATCH_MASK | IN_ONLYDIR)
+                    if wd is not None:
+                        self._watches.setdefault(wd, []).append((name, key))
+
+    def update_inputs(self, inputs: Dict[str, List[Path]]) -> None:
+        """Replace the watched inputs, e.g. after the config moved paths."""
+        self._inputs = {key: [Path(p) for p in paths] for key, paths in inputs.items()}
+        self._arm()
+
+    def wait(self, timeout: Optional[float] = None, settle: float = 0.05) -> Set[str]:
+        """Block until inputs change and return the changed input keys.
+
+        Events arriving within ``settle`` seconds of each other are
+        coalesced, so an editor save produces a single update. Coalescing
+        stops ``COALESCE_LIMIT`` settle periods after the first event, so
+        a steady stream of events cannot hold back the update.
+        """
+        if self._inotify is None:
+            return self._poll(timeout)
+
+        changed: Set[str] = set()
+        events = self._inotify.read(timeout)
+        deadline = time.monotonic() + COALESCE_LIMIT * settle
+        while events:
+            for wd, mask, name in events:
+                if mask & IN_Q_OVERFLOW:
+                    changed.update(self._inputs)
+                    continue
+                for name_filter, key in self._watches.get(wd, []):
+                    if name_filter is None or name_filter == name:
+                        changed.add(key)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            events = self._inotify.read(min(settle, remaining))
+
+        if changed:
+            self._arm()
+        return changed
+
+    def _poll(self, timeout: Optional[float], interval: float = 0.5) -> Set[str]:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = set()
+            for key, paths in self._inputs.items():
+                for path in paths:
+                    signature = self._signature(path)
+                    if signature != self._signatures.get(path):
+                        self._signatures[path] = signature
+                        changed.add(key)
+            if changed:
+                return changed
+
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return set()
+            time.sleep(interval if remaining is None else min(interval, remaining))
+
+    def close(self) -> None:
+        if self._inotify is not None:
+            try:
+                self._inotify.close()
+            except OSError as e:
+                if e.errno != errno.EBADF:
+                    raise
+            self._inotify = None
+
+
+class GuardrailsWatcher:
+    """Keeps a guardrails evaluation current as its inputs change.
+
+    Only probes whose inputs changed (and the probes depending on them) are
+    re-evaluated; everything else is carried over from the last pass.
+    """
+
+    def __init__(
+        self,
+        validator: GuardrailsValidator,
+        use_inotify: Optional[bool] = None,
+        **evaluate_kwargs,
+    ):
+        self.validator = validator
+        self._evaluate_kwargs = evaluate_kwargs
+        self.evaluation = validator.evaluate(**evaluate_kwargs)
+        self._watcher = PathWatcher(validator.input_paths(), use_inotify=use_inotify)
+
+    @property
+    def backend(self) -> str:
+        return self._watcher.backend
+
+    def step(
+        self, timeout: Optional[float] = None
+    ) -> Optional[Tuple[GuardrailsEvaluation, Set[str]]]:
+        """Wait for changes and re-evaluate the affected probes.
+
+        Returns the new evaluation and the set of re-run probes, or None if
+        nothing changed before the timeout.
+        """
+        changed = self._watcher.wait(timeout)
+        if not changed:
+            return None
+
+        if "config" in changed:
+            self.validator.refresh_config()
+            self._watcher.update_inputs(self.validator.input_paths())
+        if "baseline" in changed:
+            self.validator.reload_baseline()
+
+        stale = stale_probes(changed)
+        self.evaluation = self.validator.evaluate(
+            previous=self.evaluation, stale=stale, **self._evaluate_kwargs
+        )
+        return self.evaluation, stale
+
+    def run(
+        self,
+        on_update: Callable[[GuardrailsEvaluation, Set[str]], None],
+        should_stop: Callable[[], bool] = lambda: False,
+        poll_timeout: float = 1.0,
+    ) -> None:
+        """Call ``on_update`` after every change until ``should_stop()``."""
+        while not should_stop():
+            update = self.step(poll_timeout)
+            if update is not None:
+                on_update(*update)
+
+    def close(self) -> None:
+        self._watcher.close()
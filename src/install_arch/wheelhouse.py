@@ -0,0 +1,142 @@
+"""Local wheelhouses for offline, deterministic dependency installs.
+
+A wheelhouse is a directory holding every pinned dependency of the
+project as a wheel, the pinned ``requirements.txt`` they were collected
+from, and an ``index.json`` recording each wheel's sha256 and size. The
+wheels of the project's build requirements are included too, so the
+project itself can be built with no package index. Once built, the
+directory can be copied to hosts without network access.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tomllib
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Union
+
+INDEX_NAME = "index.json"
+REQUIREMENTS_NAME = "requirements.txt"
+
+# Bump when the index layout changes
+INDEX_FORMAT = 2
+
+DEFAULT_WHEELHOUSE = ".wheelhouse"
+
+
+@dataclass(frozen=True)
+class WheelInfo:
+    """A wheel recorded in a wheelhouse index."""
+
+    filename: str
+    sha256: str
+    size: int
+
+
+def _sha256(path: Path) -> str:
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+
+def build_requirements(project_dir: Path) -> List[str]:
+    """The project's ``build-system.requires`` from pyproject.toml."""
+    try:
+        with open(project_dir / "pyproject.toml", "rb") as f:
+            data = tomllib.load(f)
+    except FileNotFoundError:
+        return []
+    return list(data.get("build-system", {}).get("requires", []))
+
+
+def wheel_command(wheel_dir: Path, requirements: List[str], deps: bool) -> List[str]:
+    """pip command building or downloading wheels into ``wheel_dir``."""
+    cmd = [sys.executable, "-m", "pip", "wheel", "--wheel-dir", str(wheel_dir)]
+    if not deps:
+        cmd.append("--no-deps")
+    return cmd + requirements
+
+
+class Wheelhouse:
+    """A directory of wheels with a content index."""
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root).absolute()
+
+    @property
+    def requirements_file(self) -> Path:
+        return self.root / REQUIREMENTS_NAME
+
+    @property
+    def index_file(self) -> Path:
+        return self.root / INDEX_NAME
+
+    def exists(self) -> bool:
+        """Whether the wheelhouse has been built."""
+        return self.index_file.is_file() and self.requirements_file.is_file()
+
+    def write_index(self, dev: bool = True) -> Dict[str, WheelInfo]:
+        """Hash every wheel and record the results in the index.
+
+        ``dev`` records whether the pins include dev dependencies.
+        """
+        wheels = {}
+        for path in sorted(self.root.glob("*.whl")):
+            wheels[path.name] = WheelInfo(path.name, _sha256(path), path.stat().st_size)
+        payload = json.dumps(
+            {
+                "format": INDEX_FORMAT,
+                "dev": dev,
+                "wheels": {name: asdict(info) for name, info in wheels.items()},
+            },
+            indent=2,
+            sort_keys=True,
+        )
+        tmp_file = self.root / f"{INDEX_NAME}.{os.getpid()}.tmp"
+        tmp_file.write_text(payload, encoding="utf-8")
+        os.replace(tmp_file, self.index_file)
+        return wheels
+
+    def _index(self) -> Dict[str, Any]:
+        with open(self.index_file, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("format") != INDEX_FORMAT:
+            raise ValueError(
+                f"Unsupported wheelhouse index format in {self.root}; rebuild it"
+            )
+        return data
+
+    @property
+    def dev(self) -> bool:
+        """Whether the wheelhouse was built with dev dependencies."""
+        return bool(self._index()["dev"])
+
+    def wheels(self) -> Dict[str, WheelInfo]:
+        """Wheels recorded in the index, by filename."""
+        data = self._index()
+        return {name: WheelInfo(**info) for name, info in data["wheels"].items()}
+
+    def verify(self) -> List[str]:
+        """Filenames of indexed wheels that are missing or were modified."""
+        problems = []
+        for name, info in self.wheels().items():
+            path = self.root / name
+            try:
+                size = path.stat().st_size
+            except FileNotFoundError:
+                problems.append(name)
+                continue
+            if size != info.size or _sha256(path) != info.sha256:
+                problems.append(name)
+        return problems
+
+    def find_links_args(self) -> List[str]:
+        """Installer arguments installing the pinned wheels and nothing else."""
+        return [
+            "--no-index",
+            "--find-links",
+            str(self.root),
+            "-r",
+            str(self.requirements_file),
+        ]
@@ -0,0 +1,9 @@
+"""Shared test fixtures."""
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def _cache_dir(tmp_path_factory, monkeypatch):
+    """Keep install plans and other caches out of the user's cache dir."""
+    monkeypatch.setenv("INSTALL_ARCH_CACHE_DIR", str(tmp_path_factory.mktemp("cache")))
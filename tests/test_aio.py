@@ -0,0 +1,229 @@
+"""Tests for the asyncio filesystem and package manager operations."""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from install_arch.aio import AsyncFileSystemOps, AsyncPackageManager, run_process
+from install_arch.config import DevConfig
+
+
+def _git(*args, cwd):
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout
+
+
+def _make_repo(path):
+    path.mkdir()
+    _git("init", "-q", cwd=path)
+    _git("config", "user.name", "Test", cwd=path)
+    _git("config", "user.email", "test@example.com", cwd=path)
+    (path / "a.txt").write_text("a")
+    return path
+
+
+def _config(tmp_path, body=""):
+    config_file = tmp_path / "dev-config.toml"
+    config_file.write_text(body)
+    return DevConfig(config_file)
+
+
+class TestRunProcess:
+    """Test cases for run_process."""
+
+    def test_captures_output(self):
+        """Test that output is returned as text like subprocess.run."""
+        result = asyncio.run(
+            run_process(
+                [sys.executable, "-c", "import sys; print(sys.stdin.read())"],
+                input="hello",
+            )
+        )
+        assert result.returncode == 0
+        assert result.stdout == "hello\n"
+
+    def test_check_raises(self):
+        """Test that a failing command raises CalledProcessError."""
+        cmd = [sys.executable, "-c", "import sys; sys.stderr.write('bad'); sys.exit(3)"]
+        with pytest.raises(subprocess.CalledProcessError) as exc_info:
+            asyncio.run(run_process(cmd))
+        assert exc_info.value.returncode == 3
+        assert exc_info.value.stderr == "bad"
+
+        result = asyncio.run(run_process(cmd, check=False))
+        assert result.returncode == 3
+
+    def test_missing_executable(self):
+        """Test that a missing program raises FileNotFoundError."""
+        with pytest.raises(FileNotFoundError):
+            asyncio.run(run_process(["definitely-not-a-real-command"]))
+
+    def test_cancellation_kills_child(self, tmp_path):
+        """Test that cancelling the call kills the child process."""
+        pid_file = tmp_path / "pid"
+        script = (
+            "import os, pathlib, time; "
+            f"pathlib.Path({str(pid_file)!r}).write_text(str(os.getpid())); "
+            "time.sleep(60)"
+        )
+
+        async def main():
+            task = asyncio.create_task(run_process([sys.executable, "-c", script]))
+            while not pid_file.exists() or not pid_file.read_text():
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        start = time.monotonic()
+        asyncio.run(main())
+        assert time.monotonic() - start < 30
+        with pytest.raises(ProcessLookupError):
+            os.kill(int(pid_file.read_text()), 0)
+
+    def test_concurrency_limit(self):
+        """Test that the semaphore bounds the number of running children."""
+        running = 0
+        peak = 0
+
+        async def main():
+            nonlocal running, peak
+            limit = asyncio.Semaphore(2)
+            original = asyncio.create_subprocess_exec
+
+            async def tracked(*args, **kwargs):
+                nonlocal running, peak
+                running += 1
+                peak = max(peak, running)
+                proc = await original(*args, **kwargs)
+                await proc.wait()
+                running -= 1
+                return proc
+
+            with patch("install_arch.aio.asyncio.create_subprocess_exec", tracked):
+                await asyncio.gather(
+                    *(
+                        run_process(
+                            [sys.executable, "-c", "import time; time.sleep(0.1)"],
+                            limit=limit,
+                        )
+                        for _ in range(6)
+                    )
+                )
+
+        asyncio.run(main())
+        assert peak == 2
+
+
+class TestAsyncFileSystemOps:
+    """Test cases for AsyncFileSystemOps."""
+
+    def test_drives_several_repos(self, tmp_path):
+        """Test staging, committing and listing in two repos at once."""
+        repos = [_make_repo(tmp_path / name) for name in ["one", "two"]]
+        config = _config(tmp_path)
+
+        async def work(path):
+            fs_ops = AsyncFileSystemOps(config, cwd=path)
+            results = await fs_ops.stage_files(["a.txt"])
+            await fs_ops.commit_changes("init")
+            await fs_ops.move_file("a.txt", "b.txt")
+            return results, await fs_ops.get_repo_files()
+
+        async def main():
+            return await asyncio.gather(*(work(p) for p in repos))
+
+        for (results, files), path in zip(asyncio.run(main()), repos):
+            assert [r.ok for r in results] == [True]
+            assert files == [Path("b.txt")]
+            assert (path / "b.txt").exists()
+
+    def test_stage_files_attributes_errors(self, tmp_path):
+        """Test that a failed batch is retried per file."""
+        repo = _make_repo(tmp_path / "repo")
+        fs_ops = AsyncFileSystemOps(_config(tmp_path), cwd=repo)
+
+        results = asyncio.run(fs_ops.stage_files(["a.txt", "missing.txt"]))
+
+        assert results[0].ok
+        assert not results[1].ok
+        assert "missing.txt" in results[1].error
+
+    def test_git_disabled(self, tmp_path):
+        """Test that git commands are refused when git ops are disabled."""
+        config = _config(tmp_path, "[filesystem]\nuse_git_ops = false\n")
+        fs_ops = AsyncFileSystemOps(config, cwd=tmp_path)
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(fs_ops._run_git_command(["status"]))
+        assert asyncio.run(fs_ops.stage_files(["a.txt"])) == []
+
+        (tmp_path / "file").write_text("x")
+        asyncio.run(fs_ops.remove_file("file"))
+        assert not (tmp_path / "file").exists()
+
+
+class TestAsyncPackageManager:
+    """Test cases for AsyncPackageManager."""
+
+    @patch("install_arch.aio.run_process")
+    def test_commands_match_package_manager(self, mock_run, tmp_path):
+        """Test that the async methods run the synchronous commands."""
+        pkg_mgr = AsyncPackageManager(_config(tmp_path), cwd=tmp_path)
+
+        asyncio.run(pkg_mgr.create_venv(Path(".venv")))
+        asyncio.run(pkg_mgr.install_dependencies(dev=True))
+
+        commands = [c.args[0] for c in mock_run.call_args_list]
+        assert commands[0] == ["uv", "venv", ".venv"]
+        assert commands[1][:4] == ["uv", "pip", "install", "-r"]
+        assert commands[1][5:] == ["-e", "."]
+        assert all(c.kwargs["cwd"] == tmp_path for c in mock_run.call_args_list)
+
+    @patch("install_arch.aio.run_process")
+    @patch("install_arch.venvtemplate.VenvTemplates.clone")
+    def test_template_mode_create_venv(self, mock_clone, mock_run, tmp_path):
+        """Test that create_venv clones from the template in template mode."""
+        pkg_mgr = AsyncPackageManager(
+            _config(tmp_path, '[package_manager]\nvenv_template = "hardlink"\n'),
+            cwd=tmp_path,
+        )
+
+        assert asyncio.run(pkg_mgr.create_venv(Path(".venv"))) == Path(".venv")
+
+        mock_clone.assert_called_once_with(tmp_path / ".venv", True, tmp_path)
+        mock_run.assert_not_called()
+
+    @patch("install_arch.aio.run_process")
+    @patch("install_arch.package_manager.PackageManager._is_installed")
+    def test_install_tool_when_missing(self, mock_installed, mock_run, tmp_path):
+        """Test that the installer runs only when the tool is missing."""
+        pkg_mgr = AsyncPackageManager(
+            _config(tmp_path, '[package_manager]\ntool = "poetry"\n')
+        )
+        mock_installed.return_value = False
+
+        asyncio.run(pkg_mgr.install_tool())
+
+        mock_installed.assert_called_once_with("poetry")
+        assert mock_run.call_count == 1
+        assert mock_run.call_args.args[0][:2] == ["bash", "-c"]
+
+        mock_installed.return_value = True
+        asyncio.run(pkg_mgr.install_tool())
+        assert mock_run.call_count == 1
+
+    def test_failure_is_reported(self, tmp_path, capsys):
+        """Test that failed commands print their output and raise."""
+        pkg_mgr = AsyncPackageManager(_config(tmp_path))
+
+        with pytest.raises(subprocess.CalledProcessError):
+            asyncio.run(pkg_mgr._run_command([sys.executable, "-c", "exit(1)"]))
+        assert "Command failed" in capsys.readouterr().out
@@ -0,0 +1,178 @@
+"""Tests for the content-addressed artifact store."""
+
+import os
+import threading
+
+import pytest
+
+from install_arch.artifacts import ArtifactStore, file_digest
+from install_arch.config import DevConfig, parse_size
+from install_arch.filesystem import FileSystemOps
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ArtifactStore(tmp_path / "store")
+
+
+class TestArtifactStore:
+    """Test cases for ArtifactStore."""
+
+    def test_identical_artifacts_share_one_object(self, store, tmp_path):
+        """Test that repeated outputs are deduplicated with hardlinks."""
+        first = tmp_path / "run1.bin"
+        second = tmp_path / "run2.bin"
+        data = os.urandom(64 * 1024)
+        first.write_bytes(data)
+        second.write_bytes(data)
+
+        a = store.put("run1", first, link=True)
+        b = store.put("run2", second, link=True)
+
+        assert a.digest == b.digest == file_digest(first)
+        assert first.stat().st_ino == second.stat().st_ino == a.path.stat().st_ino
+        assert first.read_bytes() == data
+        stats = store.stats()
+        assert (stats.names, stats.objects, stats.bytes) == (2, 1, len(data))
+        assert stats.deduplicated_bytes == len(data)
+
+    def test_put_without_link_keeps_source(self, store, tmp_path):
+        """Test that the source is left alone when linking is disabled."""
+        source = tmp_path / "out.txt"
+        source.write_text("data")
+
+        artifact = store.put("out", source, link=False)
+
+        assert source.stat().st_ino != artifact.path.stat().st_ino
+        source.write_text("changed")
+        assert artifact.path.read_text() == "data"
+
+    def test_get_and_checkout(self, store, tmp_path):
+        """Test lookup by name and checkout to a new location."""
+        (tmp_path / "out.txt").write_text("data")
+        store.put("out", tmp_path / "out.txt")
+
+        assert store.get("missing") is None
+        assert store.checkout("missing", tmp_path / "x") is None
+        path = store.checkout("out", tmp_path / "deep" / "copy.txt")
+
+        assert path.read_text() == "data"
+        assert path.stat().st_ino != store.get("out").path.stat().st_ino
+        path.write_text("changed")
+        linked = store.checkout("out", tmp_path / "linked.txt", link=True)
+        assert linked.stat().st_ino == store.get("out").path.stat().st_ino
+        assert linked.read_text() == "data"
+        stats = store.stats()
+        assert (stats.hits, stats.misses) == (4, 2)
+
+    def test_corrupted_object_is_dropped_and_restored(self, store, tmp_path):
+        """Test that writing through a hardlink does not serve bad content."""
+        source = tmp_path / "out.txt"
+        source.write_text("data")
+        store.put("out", source, link=True)
+        store.put("alias", tmp_path / "out.txt")
+        # What root, which ignores the read-only mode, could do
+        os.chmod(source, 0o644)
+        with open(source, "w") as f:
+            f.write("oops")
+
+        assert store.get("out") is None
+        assert store.get("alias") is None
+        assert store.stats().objects == 0
+
+        clean = tmp_path / "clean.txt"
+        clean.write_text("data")
+        artifact = store.put("out", clean)
+        assert artifact.path.read_text() == "data"
+        assert store.get("out") == artifact
+
+    def test_name_is_rebound_to_new_content(self, store, tmp_path):
+        """Test that storing a name again points it at the new object."""
+        (tmp_path / "out.txt").write_text("v1")
+        store.put("out", tmp_path / "out.txt")
+        (tmp_path / "new.txt").write_text("v2")
+        store.put("out", tmp_path / "new.txt")
+
+        assert store.get("out").path.read_text() == "v2"
+
+    def test_lru_eviction(self, tmp_path):
+        """Test that the least recently used objects go first."""
+        store = ArtifactStore(tmp_path / "store", quota=250)
+        for name in ["a", "b", "c"]:
+            (tmp_path / name).write_bytes(name.encode() * 100)
+            store.put(name, tmp_path / name)
+            if name == "b":
+                # Touch "a" so "b" becomes the least recently used
+                store.get("a")
+
+        assert store.get("b") is None
+        assert store.get("a") is not None
+        assert store.get("c") is not None
+        assert store.stats().bytes == 200
+        assert store.stats().evicted_bytes == 100
+        # Checked-out files keep their data after eviction
+        assert (tmp_path / "b").read_bytes() == b"b" * 100
+
+    def test_explicit_evict_and_remove(self, store, tmp_path):
+        """Test evicting to a smaller quota and removing names."""
+        for name in ["a", "b"]:
+            (tmp_path / name).write_bytes(name.encode() * 100)
+            store.put(name, tmp_path / name)
+        obj = store.object_path(file_digest(tmp_path / "a"))
+
+        assert store.evict(quota=100) == 100
+        assert store.stats().objects == 1
+        assert not obj.exists()
+        assert store.remove("b")
+        assert not store.remove("b")
+        assert store.stats().bytes == 0
+
+    def test_concurrent_puts(self, tmp_path):
+        """Test that concurrent writers do not lose index entries."""
+        store = ArtifactStore(tmp_path / "store")
+        paths = []
+        for i in range(16):
+            path = tmp_path / f"f{i}"
+            path.write_text(str(i % 4))
+            paths.append(path)
+
+        threads = [
+            threading.Thread(target=store.put, args=(f"f{i}", p))
+            for i, p in enumerate(paths)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = ArtifactStore(tmp_path / "store").stats()
+        assert (stats.names, stats.objects) == (16, 4)
+
+
+class TestArtifactConfig:
+    """Test cases for artifact store configuration."""
+
+    def test_parse_size(self):
+        """Test byte counts with binary suffixes."""
+        assert parse_size(100) == 100
+        assert parse_size("512M") == 512 * 1024**2
+        assert parse_size("1.5KiB") == 1536
+        with pytest.raises(ValueError):
+            parse_size("lots")
+
+    def test_filesystem_ops_store_uses_temp_structure(self, tmp_path):
+        """Test that stores live in the baseline temp areas."""
+        config_file = tmp_path / "dev-config.toml"
+        config_file.write_text(
+            f'[filesystem]\ntmp_base_dir = "{tmp_path / "tmp"}"\n'
+            'artifact_quota = "1M"\n'
+        )
+        fs_ops = FileSystemOps(DevConfig(config_file))
+
+        build = fs_ops.artifact_store()
+        assert build.root == tmp_path / "tmp" / "tmp" / "build" / ".artifacts"
+        assert build.quota == 1024**2
+        assert fs_ops.artifact_store("build_artifacts") is build
+        assert fs_ops.artifact_store("test_data").root.parent.name == "tests"
+        with pytest.raises(ValueError):
+            fs_ops.artifact_store("nope")
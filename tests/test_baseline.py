@@ -0,0 +1,147 @@
+"""Tests for compiled baseline loading."""
+
+from unittest.mock import patch
+
+from install_arch.baseline import (
+    BASELINE_PATH,
+    PACKAGED_BASELINE_PATH,
+    BaselineLoader,
+    CompiledBaseline,
+)
+
+BASELINE_TOML = """
+[baseline_requirements]
+venv_management = "tool_managed"
+
+[tool_configuration.uv]
+install_command = "uv pip install"
+
+[tool_configuration.pip]
+install_command = "pip install"
+
+[filesystem_rules.temp_structure]
+build_artifacts = "tmp/build/"
+
+[compliance_checks]
+check_git_operations = false
+"""
+
+
+class TestCompiledBaseline:
+    """Test cases for CompiledBaseline."""
+
+    def test_from_dict_derives_lookups(self):
+        """Test that derived lookups are computed at compile time."""
+        compiled = CompiledBaseline.from_dict(
+            {
+                "tool_configuration": {"uv": {}, "pip": {}},
+                "compliance_checks": {"check_git_operations": False},
+                "filesystem_rules": {"temp_structure": {"logs": "tmp/logs/"}},
+            }
+        )
+        assert compiled.supported_tools == frozenset({"uv", "pip"})
+        assert compiled.compliance_checks == {"check_git_operations": False}
+        assert compiled.temp_structure == {"logs": "tmp/logs/"}
+
+    def test_json_round_trip(self):
+        """Test serialization for the on-disk cache."""
+        compiled = CompiledBaseline.from_dict(
+            {"tool_configuration": {"uv": {}}}, drift=("note",)
+        )
+        assert CompiledBaseline.from_json(compiled.to_json()) == compiled
+
+
+class TestBaselineLoader:
+    """Test cases for BaselineLoader."""
+
+    def test_load_explicit_path(self, tmp_path):
+        """Test compiling an explicit baseline file."""
+        baseline_file = tmp_path / "baseline.toml"
+        baseline_file.write_text(BASELINE_TOML)
+        loader = BaselineLoader(cache_path=tmp_path / "cache")
+
+        compiled = loader.load(baseline_file)
+        assert compiled.supported_tools == frozenset({"uv", "pip"})
+        assert compiled.baseline_requirements == {"venv_management": "tool_managed"}
+        assert compiled.compliance_checks == {"check_git_operations": False}
+        assert list((tmp_path / "cache").glob("baseline-*.json"))
+
+    def test_missing_path_yields_empty_baseline(self, tmp_path):
+        """Test that a missing baseline compiles to an empty one."""
+        loader = BaselineLoader(cache_path=tmp_path / "cache")
+        assert loader.load(tmp_path / "missing.toml") == CompiledBaseline()
+
+    def test_disk_cache_skips_parsing(self, tmp_path):
+        """Test that a fresh loader reuses the on-disk compiled form."""
+        baseline_file = tmp_path / "baseline.toml"
+        baseline_file.write_text(BASELINE_TOML)
+        first = BaselineLoader(cache_path=tmp_path / "cache").load(baseline_file)
+
+        with patch("install_arch.baseline.tomllib.loads") as mock_loads:
+            second = BaselineLoader(cache_path=tmp_path / "cache").load(baseline_file)
+        mock_loads.assert_not_called()
+        assert second == first
+
+    def test_memory_cache_returns_same_instance(self, tmp_path):
+        """Test that repeated loads are served from memory."""
+        baseline_file = tmp_path / "baseline.toml"
+        baseline_file.write_text(BASELINE_TOML)
+        loader = BaselineLoader(cache_path=tmp_path / "cache")
+        assert loader.load(baseline_file) is loader.load(baseline_file)
+
+    def test_content_change_recompiles(self, tmp_path):
+        """Test that the cache is keyed by content, not by path."""
+        baseline_file = tmp_path / "baseline.toml"
+        baseline_file.write_text(BASELINE_TOML)
+        loader = BaselineLoader(cache_path=tmp_path / "cache")
+        loader.load(baseline_file)
+
+        baseline_file.write_text('[tool_configuration.poetry]\ndev_flag = "x"\n')
+        assert loader.load(baseline_file).supported_tools == frozenset({"poetry"})
+
+    def test_unwritable_cache_still_loads(self, tmp_path):
+        """Test that cache write failures do not break loading."""
+        baseline_file = tmp_path / "baseline.toml"
+        baseline_file.write_text(BASELINE_TOML)
+        blocker = tmp_path / "blocker"
+        blocker.write_text("")
+
+        loader = BaselineLoader(cache_path=blocker / "cache")
+        assert "uv" in loader.load(baseline_file).supported_tools
+
+    def test_default_reconciles_both_copies(self, tmp_path):
+        """Test that the packaged copy is layered under the .github spec."""
+        loader = BaselineLoader(cache_path=tmp_path / "cache")
+        compiled = loader.load()
+
+        # Section only present in the packaged copy
+        assert compiled.raw["security_requirements"]["git_required"] is True
+        # Sections from the comprehensive specification
+        assert compiled.baseline_requirements["filesystem_operations"] == (
+            "git_preferred"
+        )
+        assert compiled.supported_tools == frozenset({"uv", "pip", "poetry", "pipenv"})
+        assert compiled.drift == ()
+
+    def test_reconcile_reports_tool_drift(self, tmp_path):
+        """Test that tool-set disagreements between copies are recorded."""
+        packaged = tmp_path / "packaged.toml"
+        packaged.write_text("[tool_configuration]\nuv = {}\npip = {}\n")
+        primary = tmp_path / "primary.toml"
+        primary.write_text("[tool_configuration]\nuv = {}\n")
+
+        loader = BaselineLoader(cache_path=tmp_path / "cache")
+        with (
+            patch("install_arch.baseline.PACKAGED_BASELINE_PATH", packaged),
+            patch("install_arch.baseline.BASELINE_PATH", primary),
+        ):
+            compiled = loader.load()
+
+        assert compiled.supported_tools == frozenset({"uv", "pip"})
+        assert len(compiled.drift) == 1
+        assert "'pip'" in compiled.drift[0]
+
+    def test_shipped_paths_exist(self):
+        """Test that both baseline copies ship with the repository."""
+        assert BASELINE_PATH.exists()
+        assert PACKAGED_BASELINE_PATH.exists()
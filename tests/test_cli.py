@@ -1,13 +1,15 @@
 """Tests for CLI interface."""
 
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 from click.testing import CliRunner
 
-from install_arch.cli import cli
+from install_arch.cli import COMMANDS, LazyContext, cli
 from install_arch.config import DevConfig
-from install_arch.filesystem import FileSystemOps
+from install_arch.filesystem import FileOpResult, FileSystemOps
+from install_arch.guardrails import GuardrailsEvaluation
 from install_arch.package_manager import PackageManager
 
 
@@ -39,9 +41,34 @@ class TestCLI:
         assert "setup" in result.output
         assert "check-guardrails" in result.output
 
-    @patch("install_arch.cli.PackageManager")
-    @patch("install_arch.cli.FileSystemOps")
-    @patch("install_arch.cli.DevConfig")
+    def test_lazy_commands_resolve(self):
+        """Test that every lazily registered command can be loaded and listed."""
+        ctx = cli.make_context("install-arch-dev", [], resilient_parsing=True)
+
+        assert cli.list_commands(ctx) == sorted(COMMANDS)
+        for name in COMMANDS:
+            assert cli.get_command(ctx, name).name == name
+        assert cli.get_command(ctx, "no-such-command") is None
+
+    def test_lazy_context_builds_on_demand(self):
+        """Test that components are built only when first requested."""
+        obj = LazyContext()
+        with patch("install_arch.filesystem.FileSystemOps") as mock_fs_class:
+            assert "fs_ops" not in obj
+            fs_ops = obj["fs_ops"]
+            assert obj["fs_ops"] is fs_ops
+            mock_fs_class.assert_called_once_with(obj["config"])
+        assert "pkg_mgr" not in obj
+        assert "validator" not in obj
+
+    def test_lazy_context_unknown_key(self):
+        """Test that unknown keys still raise KeyError."""
+        with pytest.raises(KeyError):
+            LazyContext()["missing"]
+
+    @patch("install_arch.package_manager.PackageManager")
+    @patch("install_arch.filesystem.FileSystemOps")
+    @patch("install_arch.config.get_config")
     def test_setup_command(
         self, mock_config, mock_fs_ops, mock_pkg_mgr, runner, tmp_path
     ):
@@ -68,29 +95,133 @@ class TestCLI:
 
         mock_pkg_mgr_instance.install_tool.assert_called_once()
         mock_pkg_mgr_instance.create_venv.assert_called_once()
-        mock_pkg_mgr_instance.install_dependencies.assert_called_once_with(dev=True)
+        mock_pkg_mgr_instance.install_dependencies.assert_called_once_with(
+            dev=True, force=False
+        )
+
+        mock_pkg_mgr_instance.install_dependencies.return_value = False
+        result = runner.invoke(cli, ["setup", "--force"])
+        assert result.exit_code == 0
+        assert "Dependencies already up to date" in result.output
+        mock_pkg_mgr_instance.install_dependencies.assert_called_with(
+            dev=True, force=True
+        )
+
+    @patch("install_arch.package_manager.PackageManager")
+    @patch("install_arch.filesystem.FileSystemOps")
+    @patch("install_arch.config.get_config")
+    def test_setup_command_timeline_and_failure(
+        self, mock_config, mock_fs_ops, mock_pkg_mgr, runner, tmp_path
+    ):
+        """Test the setup timeline and that a failed phase fails setup."""
+        mock_config.return_value.package_manager = "uv"
+        mock_config.return_value.use_secure_tmp = False
+        mock_pkg_mgr_instance = mock_pkg_mgr.return_value
+        mock_pkg_mgr_instance.create_venv.return_value = tmp_path / "venv"
+
+        result = runner.invoke(cli, ["setup", "--timings"])
+        assert result.exit_code == 0
+        assert "Setup timeline:" in result.output
+        assert "install_dependencies" in result.output
+        assert "secure temp directory" not in result.output
+
+        mock_pkg_mgr_instance.create_venv.side_effect = RuntimeError("no space")
+        result = runner.invoke(cli, ["setup"])
+        assert result.exit_code == 1
+        assert "Setup failed in create_venv: no space" in result.output
+        assert "Installed dependencies" not in result.output
+
+    @patch("install_arch.package_manager.PackageManager")
+    @patch("install_arch.filesystem.FileSystemOps")
+    @patch("install_arch.config.get_config")
+    def test_setup_trace(
+        self, mock_config, mock_fs_ops, mock_pkg_mgr, runner, tmp_path
+    ):
+        """Test that --trace writes the command and its phases as spans."""
+        import json
+
+        mock_config.return_value.use_secure_tmp = False
+        mock_pkg_mgr.return_value.create_venv.return_value = tmp_path / "venv"
+        trace_file = tmp_path / "trace.json"
+
+        result = runner.invoke(cli, ["--trace", str(trace_file), "setup"])
+
+        assert result.exit_code == 0
+        events = json.loads(trace_file.read_text())["traceEvents"]
+        spans = {e["name"]: e for e in events if e["ph"] == "X"}
+        assert {"install-arch-dev setup", "create_venv", "install_dependencies"} <= set(
+            spans
+        )
+        assert spans["install-arch-dev setup"]["cat"] == "cli"
+        assert spans["create_venv"]["cat"] == "phase"
+
+    @patch("install_arch.package_manager.PackageManager")
+    def test_wheelhouse_build_and_verify(self, mock_pkg_mgr, runner, tmp_path):
+        """Test building a wheelhouse and checking its index."""
+        from install_arch.wheelhouse import Wheelhouse
+
+        wheelhouse = Wheelhouse(tmp_path / "wheels")
+        wheelhouse.root.mkdir()
+        (wheelhouse.root / "a-1-py3-none-any.whl").write_bytes(b"a" * 10)
+        wheelhouse.requirements_file.write_text("a==1\n")
+        wheelhouse.write_index()
+        mock_pkg_mgr.return_value.build_wheelhouse.return_value = wheelhouse
+
+        result = runner.invoke(
+            cli, ["wheelhouse", "build", "--path", str(wheelhouse.root), "--no-dev"]
+        )
+        assert result.exit_code == 0
+        assert "1 wheels, 10 B" in result.output
+        mock_pkg_mgr.return_value.build_wheelhouse.assert_called_once_with(
+            wheelhouse.root, dev=False
+        )
+
+        result = runner.invoke(
+            cli, ["wheelhouse", "verify", "--path", str(wheelhouse.root)]
+        )
+        assert result.exit_code == 0
+        assert "intact" in result.output
+
+        (wheelhouse.root / "a-1-py3-none-any.whl").unlink()
+        result = runner.invoke(
+            cli, ["wheelhouse", "verify", "--path", str(wheelhouse.root)]
+        )
+        assert result.exit_code == 1
+        assert "Missing or modified: a-1-py3-none-any.whl" in result.output
 
     def test_stage_command(self, runner, tmp_path):
         """Test stage command."""
         test_file = tmp_path / "test.txt"
         test_file.write_text("content")
 
-        with patch("install_arch.cli.FileSystemOps") as mock_fs_class:
+        with patch("install_arch.filesystem.FileSystemOps") as mock_fs_class:
             mock_fs_instance = MagicMock()
             mock_fs_class.return_value = mock_fs_instance
 
-            with patch("install_arch.cli.PackageManager") as mock_pkg_class:
+            with patch("install_arch.package_manager.PackageManager") as mock_pkg_class:
                 mock_pkg_instance = MagicMock()
                 mock_pkg_class.return_value = mock_pkg_instance
 
-                with patch("install_arch.cli.DevConfig") as mock_config_class:
+                with patch("install_arch.config.get_config") as mock_config_class:
                     mock_config_instance = MagicMock()
                     mock_config_class.return_value = mock_config_instance
 
+                    mock_fs_instance.stage_files.return_value = [
+                        FileOpResult(test_file, True)
+                    ]
                     result = runner.invoke(cli, ["stage", str(test_file)])
                     assert result.exit_code == 0
+                    assert "Staged 1 files" in result.output
                     mock_fs_instance.stage_files.assert_called_once()
 
+                    mock_fs_instance.stage_files.return_value = [
+                        FileOpResult(test_file, False, "pathspec did not match")
+                    ]
+                    result = runner.invoke(cli, ["stage", str(test_file)])
+                    assert result.exit_code == 1
+                    assert f"Could not stage {test_file}: pathspec" in result.output
+                    assert "Staged 0 files" in result.output
+
     def test_stage_command_no_files(self, runner):
         """Test stage command with no files."""
         result = runner.invoke(cli, ["stage"])
@@ -99,15 +230,15 @@ class TestCLI:
 
     def test_commit_command(self, runner):
         """Test commit command."""
-        with patch("install_arch.cli.FileSystemOps") as mock_fs_class:
+        with patch("install_arch.filesystem.FileSystemOps") as mock_fs_class:
             mock_fs_instance = MagicMock()
             mock_fs_class.return_value = mock_fs_instance
 
-            with patch("install_arch.cli.PackageManager") as mock_pkg_class:
+            with patch("install_arch.package_manager.PackageManager") as mock_pkg_class:
                 mock_pkg_instance = MagicMock()
                 mock_pkg_class.return_value = mock_pkg_instance
 
-                with patch("install_arch.cli.DevConfig") as mock_config_class:
+                with patch("install_arch.config.get_config") as mock_config_class:
                     mock_config_instance = MagicMock()
                     mock_config_class.return_value = mock_config_instance
 
@@ -119,16 +250,16 @@ class TestCLI:
 
     def test_temp_dir_command(self, runner, tmp_path):
         """Test temp-dir command."""
-        with patch("install_arch.cli.FileSystemOps") as mock_fs_class:
+        with patch("install_arch.filesystem.FileSystemOps") as mock_fs_class:
             mock_fs_instance = MagicMock()
             mock_fs_instance.create_secure_temp_dir.return_value = tmp_path / "temp"
             mock_fs_class.return_value = mock_fs_instance
 
-            with patch("install_arch.cli.PackageManager") as mock_pkg_class:
+            with patch("install_arch.package_manager.PackageManager") as mock_pkg_class:
                 mock_pkg_instance = MagicMock()
                 mock_pkg_class.return_value = mock_pkg_instance
 
-                with patch("install_arch.cli.DevConfig") as mock_config_class:
+                with patch("install_arch.config.get_config") as mock_config_class:
                     mock_config_instance = MagicMock()
                     mock_config_class.return_value = mock_config_instance
 
@@ -140,16 +271,16 @@ class TestCLI:
 
     def test_temp_file_command(self, runner, tmp_path):
         """Test temp-file command."""
-        with patch("install_arch.cli.FileSystemOps") as mock_fs_class:
+        with patch("install_arch.filesystem.FileSystemOps") as mock_fs_class:
             mock_fs_instance = MagicMock()
             mock_fs_instance.create_temp_file.return_value = tmp_path / "temp.txt"
             mock_fs_class.return_value = mock_fs_instance
 
-            with patch("install_arch.cli.PackageManager") as mock_pkg_class:
+            with patch("install_arch.package_manager.PackageManager") as mock_pkg_class:
                 mock_pkg_instance = MagicMock()
                 mock_pkg_class.return_value = mock_pkg_instance
 
-                with patch("install_arch.cli.DevConfig") as mock_config_class:
+                with patch("install_arch.config.get_config") as mock_config_class:
                     mock_config_instance = MagicMock()
                     mock_config_class.return_value = mock_config_instance
 
@@ -161,32 +292,51 @@ class TestCLI:
                         ".txt", "test-"
                     )
 
-    @patch("install_arch.cli.shutil")
-    @patch("install_arch.cli.FileSystemOps")
-    @patch("install_arch.cli.DevConfig")
-    def test_clean_temp_command(self, mock_config, mock_fs_ops, mock_shutil, runner):
-        """Test clean-temp command."""
-        # Setup mocks
-        mock_config_instance = MagicMock()
-        mock_config.return_value = mock_config_instance
-        mock_config_instance.tmp_base_dir = "/tmp/test-clean-temp"
+    def test_clean_temp_command(self, runner, tmp_path):
+        """Test clean-temp removes only entries created by install-arch."""
+        config_file = tmp_path / "dev-config.toml"
+        config_file.write_text(f'[filesystem]\ntmp_base_dir = "{tmp_path / "tmp"}"\n')
 
-        mock_fs_ops_instance = MagicMock()
-        mock_fs_ops.return_value = mock_fs_ops_instance
-        mock_fs_ops_instance.config = mock_config_instance
-
-        # Mock Path to return a mock with exists=True
-        with patch("install_arch.cli.Path") as mock_path_class:
-            mock_temp_base = MagicMock()
-            mock_path_class.return_value = mock_temp_base
-            mock_temp_base.exists.return_value = True
-
-            result = runner.invoke(cli, ["clean-temp"])
-            assert result.exit_code == 0
-            assert "Cleaned temporary files" in result.output
-
-    @patch("install_arch.cli.FileSystemOps")
-    @patch("install_arch.cli.DevConfig")
+        result = runner.invoke(cli, ["--config", str(config_file), "temp-dir"])
+        assert result.exit_code == 0
+        owned = Path(result.output.split(": ", 1)[1].strip())
+        (owned / "data.bin").write_bytes(b"x" * 2048)
+        foreign = tmp_path / "tmp" / "other-session"
+        foreign.mkdir()
+
+        # CliRunner runs in-process, so the creating process is still alive
+        result = runner.invoke(
+            cli, ["--config", str(config_file), "clean-temp", "--include-active"]
+        )
+        assert result.exit_code == 0
+        assert "Cleaned temporary files: 1 entries" in result.output
+        assert "KiB freed" in result.output
+        assert not owned.exists()
+        assert foreign.exists()
+
+    def test_clean_temp_command_filters(self, runner, tmp_path):
+        """Test clean-temp --prefix and --older-than filters."""
+        config_file = tmp_path / "dev-config.toml"
+        config_file.write_text(f'[filesystem]\ntmp_base_dir = "{tmp_path / "tmp"}"\n')
+        base = ["--config", str(config_file)]
+        runner.invoke(cli, [*base, "temp-dir", "--prefix", "keep-"])
+        runner.invoke(cli, [*base, "temp-file", "--prefix", "drop-"])
+
+        result = runner.invoke(cli, [*base, "clean-temp"])
+        assert "Skipped 2 entries still in use" in result.output
+
+        clean = [*base, "clean-temp", "--include-active"]
+        result = runner.invoke(cli, [*clean, "--older-than", "1h"])
+        assert "Cleaned temporary files: 0 entries" in result.output
+
+        result = runner.invoke(cli, [*clean, "--prefix", "drop-"])
+        assert "Cleaned temporary files: 1 entries" in result.output
+        remaining = [p.name for p in (tmp_path / "tmp").iterdir()]
+        assert any(name.startswith("keep-") for name in remaining)
+        assert not any(name.startswith("drop-") for name in remaining)
+
+    @patch("install_arch.filesystem.FileSystemOps")
+    @patch("install_arch.config.get_config")
     def test_clean_temp_command_no_dir(self, mock_config, mock_fs_ops, runner):
         """Test clean-temp command when no temp directory exists."""
         # Setup mocks
@@ -199,7 +349,7 @@ class TestCLI:
         mock_fs_ops_instance.config = mock_config_instance
 
         # Mock the Path operations
-        with patch("install_arch.cli.Path") as mock_path:
+        with patch("install_arch.commands.temp.Path") as mock_path:
             mock_temp_base = MagicMock()
             mock_path.return_value = mock_temp_base
             mock_temp_base.exists.return_value = False
@@ -207,10 +357,13 @@ class TestCLI:
             result = runner.invoke(cli, ["clean-temp"])
             assert result.exit_code == 0
             assert "No temporary directory to clean" in result.output
+            mock_fs_ops_instance.clean_temp.assert_not_called()
 
     def test_check_guardrails_command_compliant(self, runner):
         """Test check-guardrails command when compliant."""
-        with patch("install_arch.cli.GuardrailsValidator") as mock_validator_class:
+        with patch(
+            "install_arch.guardrails.GuardrailsValidator"
+        ) as mock_validator_class:
             mock_validator_instance = MagicMock()
             mock_validator_instance.check_compliance.return_value = {
                 "package_manager_supported": True,
@@ -226,6 +379,46 @@ class TestCLI:
             assert result.exit_code == 0
             assert "All guardrails compliant" in result.output
 
+    @patch.dict("os.environ", {"CI": "true"})
+    def test_check_guardrails_command_timings(self, runner):
+        """Test check-guardrails reports per-probe timings."""
+        result = runner.invoke(cli, ["check-guardrails", "--timings"])
+        assert "Probe timings:" in result.output
+        assert "git_repo_present:" in result.output
+        assert "total:" in result.output
+
+    def test_check_guardrails_command_budget(self, runner):
+        """Test check-guardrails passes the budget to a concurrent evaluation."""
+        with patch(
+            "install_arch.guardrails.GuardrailsValidator"
+        ) as mock_validator_class:
+            mock_validator_instance = MagicMock()
+            mock_validator_instance.evaluate.return_value = GuardrailsEvaluation(
+                compliance_status={
+                    "package_manager_supported": True,
+                    "git_operations_available": None,
+                }
+            )
+            mock_validator_instance.check_compliance.side_effect = lambda evaluation: (
+                evaluation.compliance
+            )
+            mock_validator_instance.get_violations.return_value = []
+            mock_validator_class.return_value = mock_validator_instance
+
+            result = runner.invoke(cli, ["check-guardrails", "--budget", "500ms"])
+            assert result.exit_code == 0
+            mock_validator_instance.evaluate.assert_called_once_with(
+                parallel=False, budget=0.5, probe_timeout=None
+            )
+            assert "✓ Package Manager Supported" in result.output
+            assert "? Git Operations Available (deadline exceeded)" in result.output
+
+    def test_check_guardrails_command_invalid_budget(self, runner):
+        """Test check-guardrails rejects malformed durations."""
+        result = runner.invoke(cli, ["check-guardrails", "--budget", "soon"])
+        assert result.exit_code == 2
+        assert "not a valid duration" in result.output
+
     @patch.dict("os.environ", {}, clear=True)
     def test_check_guardrails_command_violations(self, runner):
         """Test check-guardrails command with violations."""
@@ -236,20 +429,24 @@ class TestCLI:
 
     def test_enforce_guardrails_command_compliant(self, runner):
         """Test enforce-guardrails command when compliant."""
-        with patch("install_arch.cli.GuardrailsValidator") as mock_validator_class:
+        with patch(
+            "install_arch.guardrails.GuardrailsValidator"
+        ) as mock_validator_class:
             mock_validator_instance = MagicMock()
             mock_validator_instance.get_violations.return_value = []
             mock_validator_class.return_value = mock_validator_instance
 
-            with patch("install_arch.cli.FileSystemOps") as mock_fs_class:
+            with patch("install_arch.filesystem.FileSystemOps") as mock_fs_class:
                 mock_fs_instance = MagicMock()
                 mock_fs_class.return_value = mock_fs_instance
 
-                with patch("install_arch.cli.PackageManager") as mock_pkg_class:
+                with patch(
+                    "install_arch.package_manager.PackageManager"
+                ) as mock_pkg_class:
                     mock_pkg_instance = MagicMock()
                     mock_pkg_class.return_value = mock_pkg_instance
 
-                    with patch("install_arch.cli.DevConfig") as mock_config_class:
+                    with patch("install_arch.config.get_config") as mock_config_class:
                         mock_config_instance = MagicMock()
                         mock_config_class.return_value = mock_config_instance
 
@@ -271,7 +468,7 @@ class TestCLI:
         assert result.exit_code == 0
         assert "Run local CI-equivalent checks" in result.output
 
-    @patch("install_arch.cli.subprocess.run")
+    @patch("subprocess.run")
     def test_local_ci_command_success(self, mock_subprocess_run, runner):
         """Test local-ci command when all checks pass."""
         # Mock subprocess.run to return success for all checks
@@ -1,8 +1,15 @@
 """Tests for configuration management."""
 
+import os
 from pathlib import Path
 
-from install_arch.config import DevConfig
+from install_arch.config import (
+    ConfigRegistry,
+    DevConfig,
+    get_config,
+    invalidate_config,
+    reload_config,
+)
 
 
 class TestDevConfig:
@@ -72,3 +79,70 @@ use_secure_tmp = false
         assert config.use_git_ops is True
         assert config.tmp_base_dir == "/tmp/install-arch-dev"
         assert config.use_secure_tmp is True
+
+
+class TestConfigRegistry:
+    """Test cases for the shared DevConfig registry."""
+
+    def _write_config(self, path, tool):
+        path.write_text(f'[package_manager]\ntool = "{tool}"\n')
+
+    def test_get_returns_cached_instance(self, tmp_path):
+        """Test that unchanged files are served from the cache."""
+        config_file = tmp_path / "dev-config.toml"
+        self._write_config(config_file, "pip")
+        registry = ConfigRegistry()
+
+        first = registry.get(config_file)
+        second = registry.get(config_file)
+        assert first is second
+        assert first.package_manager == "pip"
+
+    def test_get_reloads_when_file_changes(self, tmp_path):
+        """Test that a changed (mtime, size) signature triggers a reparse."""
+        config_file = tmp_path / "dev-config.toml"
+        self._write_config(config_file, "pip")
+        registry = ConfigRegistry()
+        first = registry.get(config_file)
+
+        self._write_config(config_file, "poetry")
+        st = config_file.stat()
+        os.utime(config_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+        second = registry.get(config_file)
+        assert second is not first
+        assert second.package_manager == "poetry"
+
+    def test_missing_file_uses_defaults(self, tmp_path):
+        """Test that a missing file is cached with default values."""
+        registry = ConfigRegistry()
+        config = registry.get(tmp_path / "missing.toml")
+        assert config.package_manager == "uv"
+        assert registry.get(tmp_path / "missing.toml") is config
+
+    def test_invalidate_and_reload(self, tmp_path):
+        """Test explicit invalidation and reload."""
+        config_file = tmp_path / "dev-config.toml"
+        self._write_config(config_file, "pip")
+        registry = ConfigRegistry()
+        first = registry.get(config_file)
+
+        registry.invalidate(config_file)
+        second = registry.get(config_file)
+        assert second is not first
+
+        third = registry.reload(config_file)
+        assert third is not second
+        assert registry.get(config_file) is third
+
+    def test_module_level_helpers(self, tmp_path):
+        """Test the process-wide registry helpers."""
+        config_file = tmp_path / "dev-config.toml"
+        self._write_config(config_file, "pipenv")
+
+        config = get_config(config_file)
+        assert get_config(config_file) is config
+        assert reload_config(config_file) is not config
+
+        invalidate_config()
+        assert get_config(config_file).package_manager == "pipenv"
@@ -0,0 +1,196 @@
+"""Tests for zero-copy file and tree copying."""
+
+import errno
+import os
+import shutil
+from unittest.mock import patch
+
+import pytest
+
+from install_arch import fastcopy
+from install_arch.fastcopy import STRATEGIES, copy_file, copy_tree
+
+
+@pytest.fixture(autouse=True)
+def fresh_strategy_cache():
+    fastcopy._strategies.clear()
+    yield
+    fastcopy._strategies.clear()
+
+
+def _unsupported(*args, **kwargs):
+    raise OSError(errno.EOPNOTSUPP, "not supported")
+
+
+class TestCopyFile:
+    """Test cases for copy_file."""
+
+    @pytest.mark.parametrize("strategy", STRATEGIES)
+    def test_each_strategy_copies_data(self, tmp_path, strategy):
+        """Test that every strategy that works here produces a faithful copy."""
+        src = tmp_path / "src.bin"
+        data = os.urandom(3 * 1024 * 1024 + 17)
+        src.write_bytes(data)
+        os.utime(src, (1_000_000_000, 1_000_000_000))
+
+        result = copy_file(src, tmp_path / "dst.bin", strategies=(strategy,))
+
+        assert (tmp_path / "dst.bin").read_bytes() == data
+        assert (tmp_path / "dst.bin").stat().st_mtime == 1_000_000_000
+        assert result.bytes == len(data)
+        assert result.strategy in (strategy, "userspace")
+
+    def test_falls_back_when_reflink_unsupported(self, tmp_path):
+        """Test that an unsupported reflink falls through to the next strategy."""
+        src = tmp_path / "src"
+        src.write_bytes(b"data" * 1000)
+
+        with patch.dict(fastcopy._IMPLEMENTATIONS, {"reflink": _unsupported}):
+            result = copy_file(src, tmp_path / "dst")
+
+        assert result.strategy != "reflink"
+        assert (tmp_path / "dst").read_bytes() == b"data" * 1000
+
+    def test_rejected_strategy_is_remembered(self, tmp_path):
+        """Test that a rejected strategy is skipped for the same filesystems."""
+        src = tmp_path / "src"
+        src.write_bytes(b"x")
+        calls = []
+
+        def reflink(*args):
+            calls.append(args)
+            _unsupported()
+
+        with patch.dict(fastcopy._IMPLEMENTATIONS, {"reflink": reflink}):
+            copy_file(src, tmp_path / "a")
+            copy_file(src, tmp_path / "b")
+
+        assert len(calls) == 1
+
+    def test_partial_failure_restarts_copy(self, tmp_path):
+        """Test that data written by a failed strategy is discarded."""
+        src = tmp_path / "src"
+        src.write_bytes(b"abcdef")
+
+        def broken(src_fd, dst_fd, size):
+            os.write(dst_fd, b"garbage-garbage")
+            raise OSError(errno.EXDEV, "cross-device")
+
+        with patch.dict(fastcopy._IMPLEMENTATIONS, {"reflink": broken}):
+            copy_file(src, tmp_path / "dst")
+
+        assert (tmp_path / "dst").read_bytes() == b"abcdef"
+
+    def test_real_errors_propagate(self, tmp_path):
+        """Test that I/O errors are not mistaken for missing support."""
+        src = tmp_path / "src"
+        src.write_bytes(b"x")
+
+        def failing(*args):
+            raise OSError(errno.EIO, "I/O error")
+
+        with patch.dict(fastcopy._IMPLEMENTATIONS, {"reflink": failing}):
+            with pytest.raises(OSError):
+                copy_file(src, tmp_path / "dst")
+
+    def test_copy_into_directory(self, tmp_path):
+        """Test that a directory destination keeps the file name."""
+        (tmp_path / "src.txt").write_text("hello")
+        (tmp_path / "out").mkdir()
+
+        copy_file(tmp_path / "src.txt", tmp_path / "out")
+        assert (tmp_path / "out" / "src.txt").read_text() == "hello"
+
+    def test_same_file(self, tmp_path):
+        """Test that copying a file onto itself fails and keeps its data."""
+        src = tmp_path / "a"
+        src.write_text("hello")
+        os.link(src, tmp_path / "b")
+
+        for dst in (src, tmp_path, tmp_path / "b"):
+            with pytest.raises(shutil.SameFileError):
+                copy_file(src, dst)
+
+        assert src.read_text() == "hello"
+
+    @pytest.mark.skipif(not os.path.exists("/proc/self/status"), reason="needs procfs")
+    @pytest.mark.parametrize("strategy", STRATEGIES)
+    def test_zero_size_files_are_read_to_eof(self, tmp_path, strategy):
+        """Test that files reporting size 0, like procfs ones, keep content."""
+        assert os.stat("/proc/self/status").st_size == 0
+
+        result = copy_file(
+            "/proc/self/status", tmp_path / "status", strategies=(strategy,)
+        )
+
+        assert result.strategy == "userspace"
+        assert (tmp_path / "status").read_text().startswith("Name:")
+        assert result.bytes == (tmp_path / "status").stat().st_size > 0
+
+
+class TestCopyTree:
+    """Test cases for copy_tree."""
+
+    def test_copies_tree_with_symlinks(self, tmp_path):
+        """Test files, nested directories and symlinks are reproduced."""
+        src = tmp_path / "src"
+        (src / "a" / "b").mkdir(parents=True)
+        for i in range(20):
+            (src / "a" / f"f{i}").write_bytes(os.urandom(1000))
+        (src / "a" / "b" / "deep.txt").write_text("deep")
+        (src / "link").symlink_to("a/b/deep.txt")
+        (src / "dirlink").symlink_to("a")
+        os.utime(src / "a", (1_000_000_000, 1_000_000_000))
+
+        result = copy_tree(src, tmp_path / "dst", workers=4)
+
+        dst = tmp_path / "dst"
+        assert result.files == 21
+        assert result.bytes == 20 * 1000 + 4
+        assert sum(result.strategies.values()) == 21
+        assert result.errors == []
+        assert (dst / "a" / "b" / "deep.txt").read_text() == "deep"
+        assert os.readlink(dst / "link") == "a/b/deep.txt"
+        assert os.readlink(dst / "dirlink") == "a"
+        assert (dst / "a").stat().st_mtime == 1_000_000_000
+        for i in range(20):
+            assert (dst / "a" / f"f{i}").read_bytes() == (
+                src / "a" / f"f{i}"
+            ).read_bytes()
+
+    def test_existing_destination(self, tmp_path):
+        """Test that an existing destination needs dirs_exist_ok."""
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "f").write_text("x")
+        (tmp_path / "dst").mkdir()
+
+        with pytest.raises(FileExistsError):
+            copy_tree(tmp_path / "src", tmp_path / "dst")
+        assert copy_tree(tmp_path / "src", tmp_path / "dst", dirs_exist_ok=True).files
+
+    def test_same_file_is_reported(self, tmp_path):
+        """Test that a file already linked into the destination is an error."""
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "a").write_text("a")
+        (tmp_path / "src" / "b").write_text("b")
+        (tmp_path / "dst").mkdir()
+        os.link(tmp_path / "src" / "a", tmp_path / "dst" / "a")
+
+        result = copy_tree(tmp_path / "src", tmp_path / "dst", dirs_exist_ok=True)
+
+        assert [path for path, _ in result.errors] == [tmp_path / "src" / "a"]
+        assert result.files == 1
+        assert (tmp_path / "src" / "a").read_text() == "a"
+        assert (tmp_path / "dst" / "b").read_text() == "b"
+
+    def test_hardlink_tree(self, tmp_path):
+        """Test that hardlinked copies share the source files' inodes."""
+        (tmp_path / "src" / "sub").mkdir(parents=True)
+        (tmp_path / "src" / "sub" / "f").write_text("x")
+
+        result = copy_tree(tmp_path / "src", tmp_path / "dst", hardlink=True)
+
+        assert result.strategies == {"hardlink": 1}
+        assert (tmp_path / "dst" / "sub" / "f").stat().st_ino == (
+            tmp_path / "src" / "sub" / "f"
+        ).stat().st_ino
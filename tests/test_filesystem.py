@@ -5,7 +5,8 @@ from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 from install_arch.config import DevConfig
-from install_arch.filesystem import FileSystemOps
+from install_arch.filesystem import FileSystemOps, chunk_args
+from install_arch.gitindex import UnsupportedIndexError
 
 
 class TestFileSystemOps:
@@ -25,6 +26,16 @@ class TestFileSystemOps:
         fs_ops = FileSystemOps(config)
         assert fs_ops.config == config
 
+    def test_init_defers_tmp_base_creation(self, tmp_path):
+        """Test that the tmp base is only created when first needed."""
+        config = DevConfig()
+        config._config["filesystem"]["tmp_base_dir"] = str(tmp_path / "base")
+        fs_ops = FileSystemOps(config)
+        assert not (tmp_path / "base").exists()
+
+        fs_ops.create_temp_file()
+        assert (tmp_path / "base").is_dir()
+
     def test_create_directory(self, tmp_path):
         """Test directory creation."""
         fs_ops = FileSystemOps()
@@ -68,7 +79,7 @@ class TestFileSystemOps:
         fs_ops.remove_file(test_file)
         assert not test_file.exists()
 
-    @patch("install_arch.filesystem.subprocess.run")
+    @patch("install_arch.filesystem.run_command")
     def test_remove_file_with_git(self, mock_run, tmp_path):
         """Test file removal with git."""
         config = DevConfig()
@@ -84,9 +95,9 @@ class TestFileSystemOps:
             mock_run.assert_called_once_with(
                 ["git", "rm", str(test_file)],
                 cwd=Path.cwd(),
-                capture_output=True,
-                text=True,
                 check=True,
+                timeout=None,
+                on_line=None,
             )
 
     def test_create_secure_temp_dir(self, tmp_path):
@@ -141,26 +152,29 @@ class TestFileSystemOps:
         fs_ops.cleanup_temp(test_dir)
         assert not test_dir.exists()
 
-    @patch("install_arch.filesystem.subprocess.run")
+    @patch("install_arch.filesystem.run_command")
     def test_get_repo_files(self, mock_run):
-        """Test getting repository files."""
+        """Test the git ls-files fallback for unsupported indexes."""
         fs_ops = FileSystemOps()
 
-        mock_run.return_value = MagicMock(stdout="file1.py\nfile2.py\n", returncode=0)
+        mock_run.return_value = MagicMock(stdout="file1.py\0file2.py\0", returncode=0)
 
-        with patch.object(fs_ops, "_is_git_repo", return_value=True):
+        with patch(
+            "install_arch.filesystem.iter_index_files",
+            side_effect=UnsupportedIndexError("split index"),
+        ):
             files = fs_ops.get_repo_files("*.py")
             assert files == [Path("file1.py"), Path("file2.py")]
 
             mock_run.assert_called_once_with(
-                ["git", "ls-files", "*.py"],
+                ["git", "ls-files", "-z", "--", "*.py"],
                 cwd=Path.cwd(),
-                capture_output=True,
-                text=True,
                 check=True,
+                timeout=None,
+                on_line=None,
             )
 
-    @patch("install_arch.filesystem.subprocess.run")
+    @patch("install_arch.filesystem.run_command")
     def test_stage_files(self, mock_run, tmp_path):
         """Test staging files."""
         fs_ops = FileSystemOps()
@@ -171,14 +185,21 @@ class TestFileSystemOps:
             fs_ops.stage_files(files)
 
             mock_run.assert_called_once_with(
-                ["git", "add", str(files[0]), str(files[1])],
+                [
+                    "git",
+                    "--literal-pathspecs",
+                    "add",
+                    "--pathspec-from-file=-",
+                    "--pathspec-file-nul",
+                ],
                 cwd=Path.cwd(),
-                capture_output=True,
-                text=True,
                 check=True,
+                timeout=None,
+                on_line=None,
+                input=f"{files[0]}\0{files[1]}\0",
             )
 
-    @patch("install_arch.filesystem.subprocess.run")
+    @patch("install_arch.filesystem.run_command")
     def test_commit_changes(self, mock_run):
         """Test committing changes."""
         fs_ops = FileSystemOps()
@@ -189,18 +210,177 @@ class TestFileSystemOps:
             mock_run.assert_called_once_with(
                 ["git", "commit", "-m", "Test commit"],
                 cwd=Path.cwd(),
-                capture_output=True,
-                text=True,
                 check=True,
+                timeout=None,
+                on_line=None,
             )
 
-    def test_is_git_repo_false(self):
+    def test_is_git_repo_false(self, tmp_path, monkeypatch):
         """Test git repo detection when not in repo."""
         fs_ops = FileSystemOps()
+        monkeypatch.chdir(tmp_path)
 
-        with patch.object(
-            fs_ops,
-            "_run_git_command",
-            side_effect=subprocess.CalledProcessError(1, "git"),
-        ):
+        with patch.object(fs_ops, "_run_git_command") as mock_git:
             assert fs_ops._is_git_repo() is False
+            mock_git.assert_not_called()
+
+    def test_is_git_repo_true(self, tmp_path, monkeypatch):
+        """Test git repo detection inside a repository without spawning git."""
+        subprocess.run(["git", "init", "-q", str(tmp_path)], check=True)
+        (tmp_path / "sub").mkdir()
+        monkeypatch.chdir(tmp_path / "sub")
+        fs_ops = FileSystemOps()
+
+        with patch.object(fs_ops, "_run_git_command") as mock_git:
+            assert fs_ops._is_git_repo() is True
+            mock_git.assert_not_called()
+
+
+def _git(repo, *args):
+    return subprocess.run(
+        ["git", *args], cwd=repo, capture_output=True, text=True, check=True
+    ).stdout
+
+
+def _fs_ops(tmp_path, use_git=True):
+    config_file = tmp_path / "dev-config.toml"
+    config_file.write_text(
+        f'[filesystem]\ntmp_base_dir = "{tmp_path / "tmp"}"\n'
+        f"use_git_ops = {str(use_git).lower()}\n"
+    )
+    return FileSystemOps(DevConfig(config_file))
+
+
+def _init_repo(path, files):
+    _git(path, "init", "-q")
+    for name in files:
+        target = path / name
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(name)
+    _git(path, "add", "-A")
+    _git(
+        path,
+        "-c",
+        "user.name=test",
+        "-c",
+        "user.email=test@example.com",
+        "commit",
+        "-q",
+        "--allow-empty",
+        "-m",
+        "initial",
+    )
+
+
+class TestBatchOperations:
+    """Test cases for the bulk git-aware file operations."""
+
+    def test_chunk_args_respects_limit(self):
+        """Test that arguments are split to fit the byte budget."""
+        args = [f"file{i:03d}" for i in range(100)]
+        chunks = list(chunk_args(args, reserved=20, limit=200))
+
+        assert len(chunks) > 1
+        assert [a for chunk in chunks for a in chunk] == args
+        for chunk in chunks:
+            assert sum(len(a) + 9 for a in chunk) <= 180
+
+    def test_chunk_args_keeps_oversized_argument(self):
+        """Test that an argument larger than the budget still gets a chunk."""
+        assert list(chunk_args(["x" * 50], limit=10)) == [["x" * 50]]
+
+    def test_move_files_tracked(self, tmp_path, monkeypatch):
+        """Test moving tracked files, including into a directory."""
+        _init_repo(tmp_path, ["a.txt", "b.txt", "pkg/c.txt", "pkg/d.txt"])
+        (tmp_path / "dest").mkdir()
+        monkeypatch.chdir(tmp_path)
+        fs_ops = _fs_ops(tmp_path)
+
+        results = fs_ops.move_files(
+            [("a.txt", "renamed.txt"), ("b.txt", "dest"), ("pkg", "lib")]
+        )
+
+        assert all(r.ok for r in results)
+        assert results[1].destination == Path("dest") / "b.txt"
+        assert _git(tmp_path, "ls-files").split() == [
+            "dest/b.txt",
+            "lib/c.txt",
+            "lib/d.txt",
+            "renamed.txt",
+        ]
+        assert (tmp_path / "lib" / "c.txt").read_text() == "pkg/c.txt"
+        assert _git(tmp_path, "diff", "--name-only") == ""
+
+    def test_move_files_reports_per_file_errors(self, tmp_path, monkeypatch):
+        """Test that failures are reported without aborting the batch."""
+        _init_repo(tmp_path, ["a.txt", "b.txt"])
+        (tmp_path / "untracked.txt").write_text("u")
+        monkeypatch.chdir(tmp_path)
+        fs_ops = _fs_ops(tmp_path)
+
+        results = fs_ops.move_files(
+            [
+                ("missing.txt", "x.txt"),
+                ("a.txt", "b.txt"),
+                ("untracked.txt", "moved.txt"),
+            ]
+        )
+
+        assert [r.ok for r in results] == [False, False, True]
+        assert results[0].error == "source does not exist"
+        assert results[1].error == "destination exists"
+        assert (tmp_path / "moved.txt").exists()
+        assert _git(tmp_path, "ls-files").split() == ["a.txt", "b.txt"]
+
+    def test_move_files_without_git(self, tmp_path):
+        """Test plain moves when git integration is disabled."""
+        fs_ops = _fs_ops(tmp_path, use_git=False)
+        src = tmp_path / "src.txt"
+        src.write_text("data")
+
+        with patch.object(fs_ops, "_run_git_command") as mock_git:
+            results = fs_ops.move_files([(src, tmp_path / "dst.txt")])
+            mock_git.assert_not_called()
+
+        assert results[0].ok
+        assert (tmp_path / "dst.txt").read_text() == "data"
+
+    def test_remove_files_mixed(self, tmp_path, monkeypatch):
+        """Test removing tracked and untracked files in one call."""
+        _init_repo(tmp_path, ["a.txt", "b.txt", "keep.txt"])
+        (tmp_path / "untracked.txt").write_text("u")
+        monkeypatch.chdir(tmp_path)
+        fs_ops = _fs_ops(tmp_path)
+
+        results = fs_ops.remove_files(["a.txt", "b.txt", "untracked.txt"])
+
+        assert all(r.ok for r in results)
+        assert _git(tmp_path, "ls-files").split() == ["keep.txt"]
+        assert not (tmp_path / "untracked.txt").exists()
+
+    def test_stage_files_many(self, tmp_path, monkeypatch):
+        """Test staging more files than fit on one command line."""
+        _init_repo(tmp_path, [])
+        names = [f"{'n' * 200}-{i}.txt" for i in range(2000)]
+        for name in names:
+            (tmp_path / name).write_text(name)
+        monkeypatch.chdir(tmp_path)
+        fs_ops = _fs_ops(tmp_path)
+
+        results = fs_ops.stage_files(names)
+
+        assert all(r.ok for r in results)
+        assert len(_git(tmp_path, "ls-files").split()) == len(names)
+
+    def test_stage_files_attributes_failures(self, tmp_path, monkeypatch):
+        """Test that a failing batch is retried per file."""
+        _init_repo(tmp_path, [])
+        (tmp_path / "good.txt").write_text("g")
+        monkeypatch.chdir(tmp_path)
+        fs_ops = _fs_ops(tmp_path)
+
+        results = fs_ops.stage_files(["good.txt", "missing.txt"])
+
+        assert [r.ok for r in results] == [True, False]
+        assert results[1].error
+        assert _git(tmp_path, "ls-files").split() == ["good.txt"]
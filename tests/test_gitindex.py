@@ -0,0 +1,186 @@
+"""Tests for the direct git index reader."""
+
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from install_arch.filesystem import FileSystemOps
+from install_arch.gitindex import (
+    IndexCache,
+    UnsupportedIndexError,
+    compile_pathspec,
+    iter_index_files,
+    parse_index,
+)
+from install_arch.gitrepo import discover_repository
+
+FILES = [
+    "README.md",
+    "setup.py",
+    "src/pkg/__init__.py",
+    "src/pkg/core.py",
+    "src/pkg/data/table.csv",
+    "docs/guide.md",
+    "docs/a b.md",
+    "tests/test_core.py",
+]
+
+
+def _git(*args, cwd):
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = tmp_path / "repo"
+    path.mkdir()
+    _git("init", "-q", cwd=path)
+    for name in FILES:
+        (path / name).parent.mkdir(parents=True, exist_ok=True)
+        (path / name).write_text(name)
+    _git("add", "-A", cwd=path)
+    return path
+
+
+def _ls_files(repo, *args, cwd=None):
+    out = _git("ls-files", "-z", "--", *args, cwd=cwd or repo)
+    return [p for p in out.split("\0") if p]
+
+
+class TestParseIndex:
+    """Test cases for parse_index."""
+
+    @pytest.mark.parametrize("version", ["2", "3", "4"])
+    def test_matches_git(self, repo, version):
+        """Test that every index version lists the same paths as git."""
+        _git("update-index", "--index-version", version, cwd=repo)
+        assert parse_index(repo / ".git" / "index") == _ls_files(repo)
+
+    def test_extended_flags(self, repo):
+        """Test entries with extended flags (intent-to-add)."""
+        (repo / "later.txt").write_text("x")
+        _git("add", "-N", "later.txt", cwd=repo)
+        assert "later.txt" in parse_index(repo / ".git" / "index")
+
+    def test_long_path(self, repo):
+        """Test paths longer than the 12-bit length field."""
+        oid = subprocess.run(
+            ["git", "hash-object", "-w", "--stdin"],
+            cwd=repo,
+            input="x",
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+        # Index-only entry: the path is too long to exist on disk
+        long_path = "/".join(["d" * 200] * 25) + "/f.txt"
+        _git(
+            "update-index",
+            "--add",
+            "--cacheinfo",
+            f"100644,{oid},{long_path}",
+            cwd=repo,
+        )
+        assert parse_index(repo / ".git" / "index") == _ls_files(repo)
+
+    def test_split_index_unsupported(self, repo):
+        """Test that split indexes are refused so callers fall back."""
+        _git("update-index", "--split-index", cwd=repo)
+        with pytest.raises(UnsupportedIndexError):
+            parse_index(repo / ".git" / "index")
+
+    def test_garbage_unsupported(self, tmp_path):
+        """Test that a corrupt file is reported, not misparsed."""
+        bogus = tmp_path / "index"
+        bogus.write_bytes(b"DIRC\0\0\0\x02\0\0\0\x05" + b"\0" * 30)
+        with pytest.raises(UnsupportedIndexError):
+            parse_index(bogus)
+
+
+class TestPathspec:
+    """Test cases for git-style pathspec matching."""
+
+    @pytest.mark.parametrize(
+        "pattern",
+        [
+            "*",
+            "*.py",
+            "src",
+            "src/",
+            "src/pkg/*.py",
+            "src/*/core.py",
+            "docs/?uide.md",
+            "[rs]*",
+            "[!s]*.md",
+            "[[:upper:]]*",
+            "docs/a b.md",
+            "nomatch",
+        ],
+    )
+    def test_matches_git(self, repo, pattern):
+        """Test that matching agrees with git ls-files."""
+        repository, _ = discover_repository(repo)
+        assert repository is not None
+        listed = [str(p) for p in iter_index_files(repository, pattern, repo)]
+        assert listed == _ls_files(repo, pattern)
+
+    def test_subdirectory_cwd(self, repo):
+        """Test that results are relative to, and limited to, the cwd."""
+        repository, _ = discover_repository(repo)
+        assert repository is not None
+        listed = [str(p) for p in iter_index_files(repository, "*.py", repo / "src")]
+        assert listed == _ls_files(repo, "*.py", cwd=repo / "src")
+        assert listed == ["pkg/__init__.py", "pkg/core.py"]
+
+    def test_literal_prefix_is_directory_bound(self):
+        """Test that a literal pathspec does not match sibling prefixes."""
+        match = compile_pathspec("src")
+        assert match("src/a.py")
+        assert not match("srcx/a.py")
+
+    def test_magic_pathspec_unsupported(self, repo):
+        """Test that magic pathspecs are left to git."""
+        repository, _ = discover_repository(repo)
+        assert repository is not None
+        with pytest.raises(UnsupportedIndexError):
+            iter_index_files(repository, ":(glob)**/*.py", repo)
+
+
+class TestIndexCache:
+    """Test cases for IndexCache."""
+
+    def test_reuses_parse_until_index_changes(self, repo):
+        """Test that the index is parsed once per change."""
+        repository, _ = discover_repository(repo)
+        assert repository is not None
+        cache = IndexCache()
+
+        with patch("install_arch.gitindex.parse_index", wraps=parse_index) as parse:
+            first = cache.paths(repository)
+            assert cache.paths(repository) is first
+            assert parse.call_count == 1
+
+            (repo / "new.txt").write_text("new")
+            _git("add", "new.txt", cwd=repo)
+            assert "new.txt" in cache.paths(repository)
+            assert parse.call_count == 2
+
+    def test_missing_index(self, tmp_path):
+        """Test that a repository without an index has no files."""
+        _git("init", "-q", cwd=tmp_path)
+        repository, _ = discover_repository(tmp_path)
+        assert repository is not None
+        assert IndexCache().paths(repository) == ()
+
+    def test_get_repo_files_reads_index(self, repo, monkeypatch):
+        """Test that FileSystemOps lists files without spawning git."""
+        monkeypatch.chdir(repo)
+        fs_ops = FileSystemOps()
+        with patch("install_arch.filesystem.run_command") as mock_run:
+            files = fs_ops.get_repo_files("*.md")
+            mock_run.assert_not_called()
+        assert files == [Path("README.md"), Path("docs/a b.md"), Path("docs/guide.md")]
@@ -0,0 +1,144 @@
+"""Tests for in-process git repository discovery."""
+
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from install_arch.gitrepo import RepositoryLocator, discover_repository
+
+
+def _git(*args, cwd):
+    subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True)
+
+
+@pytest.fixture
+def repo(tmp_path):
+    """A repository with one commit, so worktrees can be added."""
+    path = tmp_path / "repo"
+    path.mkdir()
+    _git("init", "-q", cwd=path)
+    (path / "README").write_text("readme")
+    _git("add", "README", cwd=path)
+    _git(
+        "-c",
+        "user.name=Test",
+        "-c",
+        "user.email=test@example.com",
+        "commit",
+        "-q",
+        "-m",
+        "init",
+        cwd=path,
+    )
+    return path
+
+
+class TestDiscoverRepository:
+    """Test cases for discover_repository."""
+
+    def test_finds_repo_from_subdirectory(self, repo):
+        """Test walking up from a nested directory."""
+        nested = repo / "a" / "b"
+        nested.mkdir(parents=True)
+
+        found, _ = discover_repository(nested)
+        assert found is not None
+        assert found.git_dir == repo / ".git"
+        assert found.common_dir == repo / ".git"
+        assert found.worktree == repo
+        assert found.index_path == repo / ".git" / "index"
+
+    def test_no_repo(self, tmp_path):
+        """Test that directories outside a repository return None."""
+        found, depends = discover_repository(tmp_path)
+        assert found is None
+        assert tmp_path in depends
+
+    def test_worktree_gitdir_file(self, repo, tmp_path):
+        """Test that linked worktrees resolve their git and common dirs."""
+        worktree = tmp_path / "wt"
+        _git("worktree", "add", "-q", str(worktree), cwd=repo)
+
+        found, _ = discover_repository(worktree)
+        assert found is not None
+        assert found.worktree == worktree
+        assert found.git_dir.parent == repo / ".git" / "worktrees"
+        assert found.common_dir == repo / ".git"
+
+    def test_git_dir_environment(self, repo, tmp_path):
+        """Test that GIT_DIR overrides discovery."""
+        with patch.dict("os.environ", {"GIT_DIR": str(repo / ".git")}):
+            found, _ = discover_repository(tmp_path)
+        assert found is not None
+        assert found.git_dir == repo / ".git"
+        assert found.worktree == tmp_path
+
+    def test_ceiling_directories(self, repo):
+        """Test that GIT_CEILING_DIRECTORIES stops the walk."""
+        nested = repo / "a"
+        nested.mkdir()
+        with patch.dict("os.environ", {"GIT_CEILING_DIRECTORIES": str(repo)}):
+            found, _ = discover_repository(nested)
+        assert found is None
+
+    def test_matches_git_rev_parse(self, repo):
+        """Test that the result agrees with git itself."""
+        nested = repo / "x"
+        nested.mkdir()
+        result = subprocess.run(
+            ["git", "rev-parse", "--absolute-git-dir"],
+            cwd=nested,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        found, _ = discover_repository(nested)
+        assert found is not None
+        assert str(found.git_dir) == result.stdout.strip()
+
+
+class TestRepositoryLocator:
+    """Test cases for RepositoryLocator caching."""
+
+    def test_cached_lookup_skips_discovery(self, repo):
+        """Test that unchanged directories are served from the cache."""
+        locator = RepositoryLocator()
+        first = locator.locate(repo)
+
+        with patch("install_arch.gitrepo.discover_repository") as mock_discover:
+            assert locator.locate(repo) == first
+        mock_discover.assert_not_called()
+
+    def test_cache_notices_new_repository(self, tmp_path):
+        """Test that creating .git invalidates a negative answer."""
+        locator = RepositoryLocator()
+        assert locator.locate(tmp_path) is None
+
+        _git("init", "-q", cwd=tmp_path)
+        found = locator.locate(tmp_path)
+        assert found is not None
+        assert found.worktree == tmp_path
+
+    def test_cache_is_per_directory(self, repo, tmp_path, monkeypatch):
+        """Test that changing the cwd changes the answer."""
+        locator = RepositoryLocator()
+        monkeypatch.chdir(repo)
+        assert locator.locate() is not None
+
+        outside = tmp_path / "outside"
+        outside.mkdir()
+        monkeypatch.chdir(outside)
+        assert locator.locate() is None
+
+    def test_invalidate(self, repo):
+        """Test explicit invalidation."""
+        locator = RepositoryLocator()
+        locator.locate(repo)
+        locator.invalidate()
+
+        with patch(
+            "install_arch.gitrepo.discover_repository", return_value=(None, [])
+        ) as mock_discover:
+            assert locator.locate(repo) is None
+        mock_discover.assert_called_once()
@@ -0,0 +1,173 @@
+"""Tests for streaming git index sessions."""
+
+import subprocess
+from unittest.mock import patch
+
+import pytest
+
+from install_arch.config import DevConfig
+from install_arch.filesystem import FileSystemOps
+
+
+def _git(*args, cwd):
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout
+
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    """A committed repository used as the working directory."""
+    path = tmp_path / "repo"
+    (path / "pkg").mkdir(parents=True)
+    _git("init", "-q", cwd=path)
+    for name in ["a.txt", "b.txt", "pkg/c.txt", "pkg/d.txt"]:
+        (path / name).write_text(name)
+    _git("add", "-A", cwd=path)
+    _git(
+        "-c",
+        "user.name=Test",
+        "-c",
+        "user.email=test@example.com",
+        "commit",
+        "-q",
+        "-m",
+        "init",
+        cwd=path,
+    )
+    monkeypatch.chdir(path)
+    return path
+
+
+@pytest.fixture
+def fs_ops(tmp_path):
+    config_file = tmp_path / "dev-config.toml"
+    config_file.write_text(f'[filesystem]\ntmp_base_dir = "{tmp_path / "tmp"}"\n')
+    return FileSystemOps(DevConfig(config_file))
+
+
+def _ls_files(repo):
+    return _git("ls-files", cwd=repo).split()
+
+
+class TestIndexSession:
+    """Test cases for IndexSession."""
+
+    def test_session_applies_index_once(self, repo, fs_ops):
+        """Test that queued operations land in a single index update."""
+        (repo / "new.txt").write_text("new")
+        calls = []
+        run_git = fs_ops._run_git_command
+
+        def record(cmd, *args, **kwargs):
+            calls.append(cmd)
+            return run_git(cmd, *args, **kwargs)
+
+        with patch.object(fs_ops, "_run_git_command", side_effect=record):
+            with fs_ops.index_session() as session:
+                session.move("a.txt", "renamed.txt")
+                session.move("pkg", "lib")
+                session.remove("b.txt")
+                session.add("new.txt")
+                # Nothing reaches the index before the session ends
+                assert _ls_files(repo) == ["a.txt", "b.txt", "pkg/c.txt", "pkg/d.txt"]
+
+        assert all(r.ok for r in session.results)
+        assert _ls_files(repo) == ["lib/c.txt", "lib/d.txt", "new.txt", "renamed.txt"]
+        assert [c for c in calls if "--index-info" in c] == [
+            ["update-index", "-z", "--index-info"]
+        ]
+        assert "A  new.txt" in _git("status", "--porcelain", cwd=repo).splitlines()
+
+    def test_commit_after_session(self, repo, fs_ops):
+        """Test that commit_changes commits the session's result."""
+        with fs_ops.index_session() as session:
+            session.move("a.txt", "z.txt")
+
+        fs_ops._run_git_command(
+            ["-c", "user.name=Test", "-c", "user.email=t@example.com", "commit"]
+            + ["-q", "-m", "move"]
+        )
+        assert _git("show", "--stat", "--format=", "HEAD", cwd=repo).count("=>") == 1
+        assert _git("status", "--porcelain", cwd=repo) == ""
+
+    def test_exception_rolls_back(self, repo, fs_ops):
+        """Test that a failing block restores the worktree and index."""
+        with pytest.raises(ValueError):
+            with fs_ops.index_session() as session:
+                session.move("pkg", "lib")
+                session.remove("a.txt")
+                raise ValueError("abort")
+
+        assert (repo / "pkg" / "c.txt").read_text() == "pkg/c.txt"
+        assert (repo / "a.txt").read_text() == "a.txt"
+        assert not (repo / "lib").exists()
+        assert _git("status", "--porcelain", cwd=repo) == ""
+        assert not list((repo / ".git").glob("install-arch-trash-*"))
+
+    def test_remove_refuses_local_modifications(self, repo, fs_ops):
+        """Test that modified tracked files are kept unless forced."""
+        (repo / "a.txt").write_text("edited")
+
+        with fs_ops.index_session() as session:
+            refused = session.remove("a.txt")
+            forced = session.remove("b.txt", force=True)
+
+        assert not refused.ok
+        assert "local modifications" in refused.error
+        assert forced.ok
+        assert (repo / "a.txt").exists()
+        assert "b.txt" not in _ls_files(repo)
+        # Comparing content must not store it
+        oid = _git("hash-object", "a.txt", cwd=repo).strip()
+        missing = subprocess.run(
+            ["git", "cat-file", "-e", oid], cwd=repo, capture_output=True
+        )
+        assert missing.returncode != 0
+
+    def test_remove_directory_keeps_untracked(self, repo, fs_ops):
+        """Test that removing a directory only removes tracked files."""
+        (repo / "pkg" / "scratch.txt").write_text("mine")
+
+        with fs_ops.index_session() as session:
+            assert session.remove("pkg").ok
+
+        assert _ls_files(repo) == ["a.txt", "b.txt"]
+        assert (repo / "pkg" / "scratch.txt").exists()
+        assert not (repo / "pkg" / "c.txt").exists()
+
+    def test_moves_chain_within_session(self, repo, fs_ops):
+        """Test that later operations see earlier ones."""
+        with fs_ops.index_session() as session:
+            session.move("a.txt", "tmp.txt")
+            session.move("tmp.txt", "final.txt")
+            missing = session.move("a.txt", "other.txt")
+
+        assert missing.error == "source does not exist"
+        assert _ls_files(repo) == ["b.txt", "final.txt", "pkg/c.txt", "pkg/d.txt"]
+
+    def test_closed_session_rejects_operations(self, repo, fs_ops):
+        """Test that a session cannot be reused after it ends."""
+        with fs_ops.index_session() as session:
+            pass
+
+        with pytest.raises(RuntimeError):
+            session.move("a.txt", "x.txt")
+
+    def test_session_without_git(self, tmp_path, monkeypatch):
+        """Test that sessions still journal plain moves without git."""
+        config_file = tmp_path / "dev-config.toml"
+        config_file.write_text(
+            f'[filesystem]\ntmp_base_dir = "{tmp_path / "tmp"}"\nuse_git_ops = false\n'
+        )
+        fs_ops = FileSystemOps(DevConfig(config_file))
+        (tmp_path / "src.txt").write_text("data")
+        monkeypatch.chdir(tmp_path)
+
+        with pytest.raises(ValueError):
+            with fs_ops.index_session() as session:
+                assert session.move("src.txt", "dst.txt").ok
+                raise ValueError("abort")
+
+        assert (tmp_path / "src.txt").exists()
+        assert not (tmp_path / "dst.txt").exists()
@@ -1,12 +1,16 @@
 """Tests for guardrails validation."""
 
 import subprocess
+import threading
+import time
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
-from install_arch.guardrails import GuardrailsValidator
+from install_arch.config import DevConfig
+from install_arch.gitrepo import invalidate_repository_cache
+from install_arch.guardrails import PROBES, GuardrailsValidator, stale_probes
 
 
 class TestGuardrailsValidator:
@@ -29,6 +33,12 @@ class TestGuardrailsValidator:
         validator = GuardrailsValidator(custom_path)
         assert validator.guardrails_path == custom_path
 
+    def test_uses_explicit_dev_config(self):
+        """Test that an explicit DevConfig is used instead of the registry."""
+        config = DevConfig()
+        validator = GuardrailsValidator(config=config)
+        assert validator.dev_config is config
+
     def test_validate_package_manager_supported(self):
         """Test package manager validation when supported."""
         validator = GuardrailsValidator()
@@ -37,6 +47,29 @@ class TestGuardrailsValidator:
         assert validator.validate_package_manager("pip") is True
         assert validator.validate_package_manager("unknown") is False
 
+    @patch("install_arch.guardrails.get_tool_resolver")
+    def test_package_manager_probe_resolves_tool(self, mock_resolver):
+        """Test that the probe records the shared resolver's lookup."""
+        validator = GuardrailsValidator(config=DevConfig())
+        mock_resolver.return_value.resolve.return_value = MagicMock(
+            path="/home/dev/.cargo/bin/uv", version="uv 0.5.0"
+        )
+
+        result = validator.evaluate().probes["package_manager_supported"]
+
+        assert result.passed is True
+        assert result.data == {
+            "tool": "uv",
+            "path": "/home/dev/.cargo/bin/uv",
+            "version": "uv 0.5.0",
+        }
+        mock_resolver.return_value.resolve.assert_called_once_with("uv")
+
+        mock_resolver.return_value.resolve.return_value = None
+        result = validator.evaluate(parallel=True).probes["package_manager_supported"]
+        assert result.passed is True
+        assert result.data["path"] is None
+
     def test_validate_venv_creation_uv(self):
         """Test venv validation for uv."""
         validator = GuardrailsValidator()
@@ -65,20 +98,58 @@ class TestGuardrailsValidator:
         (venv_path / "bin").rmdir()
         venv_path.rmdir()
 
-    @patch("subprocess.run")
-    def test_validate_git_operations_success(self, mock_run):
+    @patch("install_arch.guardrails.find_repository")
+    @patch("install_arch.guardrails.shutil.which", return_value="/usr/bin/git")
+    def test_validate_git_operations_success(self, mock_which, mock_find):
         """Test git operations validation when successful."""
-        mock_run.return_value = MagicMock(returncode=0)
+        mock_find.return_value = MagicMock()
         validator = GuardrailsValidator()
         assert validator.validate_git_operations() is True
 
-    @patch("subprocess.run")
-    def test_validate_git_operations_failure(self, mock_run):
+    @patch("install_arch.guardrails.find_repository", return_value=None)
+    @patch("install_arch.guardrails.shutil.which", return_value="/usr/bin/git")
+    def test_validate_git_operations_failure(self, mock_which, mock_find):
         """Test git operations validation when failed."""
-        mock_run.side_effect = subprocess.CalledProcessError(1, "git")
         validator = GuardrailsValidator()
         assert validator.validate_git_operations() is False
 
+    @patch("install_arch.guardrails.shutil.which", return_value=None)
+    def test_validate_git_operations_no_git_binary(self, mock_which):
+        """Test git operations validation when git is not installed."""
+        validator = GuardrailsValidator()
+        assert validator.validate_git_operations() is False
+
+    def test_git_input_paths_follow_repository(self, tmp_path, monkeypatch):
+        """Test that the git input tracks linked worktrees and subdirectories."""
+        repo = tmp_path / "repo"
+        repo.mkdir()
+        git = ["git", "-c", "user.name=T", "-c", "user.email=t@example.com"]
+        subprocess.run(git + ["init", "-q"], cwd=repo, check=True)
+        subprocess.run(
+            git + ["commit", "-q", "--allow-empty", "-m", "init"], cwd=repo, check=True
+        )
+        worktree = tmp_path / "wt"
+        subprocess.run(
+            git + ["worktree", "add", "-q", str(worktree)], cwd=repo, check=True
+        )
+        (worktree / "sub").mkdir()
+        monkeypatch.chdir(worktree / "sub")
+        invalidate_repository_cache()
+
+        paths = GuardrailsValidator().input_paths()["git"]
+
+        git_dir = repo / ".git" / "worktrees" / "wt"
+        assert paths == [
+            git_dir,
+            repo / ".git",
+            git_dir / "index",
+            worktree / ".git",
+        ]
+
+        monkeypatch.chdir(tmp_path)
+        invalidate_repository_cache()
+        assert GuardrailsValidator().input_paths()["git"] == [tmp_path / ".git"]
+
     def test_validate_temp_security_good(self):
         """Test temp directory security validation when good."""
         validator = GuardrailsValidator()
@@ -213,3 +284,188 @@ class TestGuardrailsValidator:
         with patch.object(validator, "get_violations", return_value=violations):
             with pytest.raises(RuntimeError, match="Guardrails violations detected"):
                 validator.enforce_guardrails()
+
+
+class TestGuardrailsEvaluation:
+    """Test cases for the single-pass probe evaluation."""
+
+    def test_shared_probes_run_once(self):
+        """Test that probes shared by both views run only once."""
+        validator = GuardrailsValidator()
+        with (
+            patch.object(
+                validator, "validate_git_operations", return_value=True
+            ) as mock_git,
+            patch.object(
+                validator, "validate_devcontainer_usage", return_value=True
+            ) as mock_devcontainer,
+        ):
+            evaluation = validator.evaluate()
+
+        mock_git.assert_called_once()
+        mock_devcontainer.assert_called_once()
+        assert evaluation.compliance["git_operations_available"] is True
+        assert evaluation.baseline["filesystem_operations"] is True
+        assert evaluation.baseline["development_environment"] is True
+
+    def test_views_match_legacy_keys(self):
+        """Test that both views expose the historical result keys."""
+        validator = GuardrailsValidator()
+        evaluation = validator.evaluate()
+
+        assert set(evaluation.compliance) == {
+            "package_manager_supported",
+            "venv_properly_created",
+            "git_operations_available",
+            "temp_security_compliant",
+            "devcontainer_usage",
+        }
+        assert set(evaluation.baseline) == {
+            "python_package_management",
+            "venv_management",
+            "filesystem_operations",
+            "temporary_files",
+            "development_environment",
+        }
+
+    def test_disabled_checks_skip_probes(self):
+        """Test that probes only needed by disabled checks are not run."""
+        validator = GuardrailsValidator()
+        validator._config = {"compliance_checks": {"check_git_operations": False}}
+        with patch.object(validator, "validate_git_operations") as mock_git:
+            evaluation = validator.evaluate()
+
+        mock_git.assert_not_called()
+        assert "git_repo_present" not in evaluation.probes
+        assert "git_operations_available" not in evaluation.compliance
+
+    def test_timings_cover_every_probe(self):
+        """Test that per-probe timings are reported."""
+        validator = GuardrailsValidator()
+        evaluation = validator.evaluate()
+
+        assert set(evaluation.timings) == set(evaluation.probes)
+        assert all(duration >= 0 for duration in evaluation.timings.values())
+        assert evaluation.duration >= 0
+
+    def test_get_violations_uses_single_evaluation(self):
+        """Test that get_violations evaluates the probes only once."""
+        validator = GuardrailsValidator()
+        with patch.object(
+            validator, "evaluate", wraps=validator.evaluate
+        ) as mock_evaluate:
+            validator.get_violations()
+
+        mock_evaluate.assert_called_once()
+
+    def test_parallel_matches_serial(self):
+        """Test that concurrent evaluation produces the same views."""
+        validator = GuardrailsValidator()
+        serial = validator.evaluate()
+        parallel = validator.evaluate(parallel=True)
+
+        assert parallel.compliance == serial.compliance
+        assert parallel.baseline == serial.baseline
+        assert parallel.unknown_checks == []
+
+    def test_budget_marks_slow_probes_unknown(self):
+        """Test that probes missing the deadline are reported as unknown."""
+        validator = GuardrailsValidator()
+        release = threading.Event()
+
+        def slow_git():
+            release.wait(5)
+            return True
+
+        try:
+            with patch.object(
+                validator, "validate_git_operations", side_effect=slow_git
+            ):
+                evaluation = validator.evaluate(budget=0.05)
+        finally:
+            release.set()
+
+        assert evaluation.probes["git_repo_present"].status == "unknown"
+        assert evaluation.probes["filesystem_git_preferred"].passed is None
+        assert "git_operations_available" in evaluation.unknown_checks
+        assert "git_operations_available" not in evaluation.compliance
+        assert "filesystem_operations" not in evaluation.baseline
+        assert evaluation.duration < 1.0
+        # Completed probes are still reported
+        assert "package_manager_supported" in evaluation.compliance
+        # Unknown checks are not taken as compliant
+        violations = validator.get_violations(evaluation)
+        assert "Compliance check did not finish: git_operations_available" in (
+            violations
+        )
+        assert "Baseline check did not finish: filesystem_operations" in violations
+
+    def test_timeout_starts_when_dependencies_finish(self):
+        """Test that a slow dependency does not use up its dependent's timeout."""
+        validator = GuardrailsValidator()
+
+        def slow_git():
+            time.sleep(0.2)
+            return True
+
+        def slow_preferred(config, deps):
+            time.sleep(0.2)
+            return deps["git_repo_present"]
+
+        with (
+            patch.object(validator, "validate_git_operations", side_effect=slow_git),
+            patch.object(
+                validator, "_probe_filesystem_git_preferred", side_effect=slow_preferred
+            ),
+        ):
+            evaluation = validator.evaluate(parallel=True, probe_timeout=0.3)
+
+        assert evaluation.probes["git_repo_present"].passed is True
+        assert evaluation.probes["filesystem_git_preferred"].passed is True
+
+    def test_probe_timeout_overrides_defaults(self):
+        """Test the per-probe timeout in concurrent mode."""
+        validator = GuardrailsValidator()
+        release = threading.Event()
+        try:
+            with patch.object(
+                validator,
+                "validate_devcontainer_usage",
+                side_effect=lambda: release.wait(5),
+            ):
+                evaluation = validator.evaluate(parallel=True, probe_timeout=0.05)
+        finally:
+            release.set()
+
+        assert evaluation.probes["devcontainer_active"].passed is None
+        assert "devcontainer_usage" in evaluation.unknown_checks
+
+    def test_stale_probes_include_dependents(self):
+        """Test that invalidating an input also invalidates dependents."""
+        assert stale_probes({"git"}) == {
+            "git_repo_present",
+            "filesystem_git_preferred",
+        }
+        assert stale_probes({"venv"}) == {"venv_exists"}
+        assert stale_probes({"baseline"}) == set(PROBES)
+
+    def test_incremental_evaluation_reuses_fresh_probes(self):
+        """Test that only stale probes rerun when a previous pass is given."""
+        validator = GuardrailsValidator()
+        first = validator.evaluate()
+
+        with (
+            patch.object(validator, "validate_git_operations") as mock_git,
+            patch.object(
+                validator, "validate_venv_creation", return_value=True
+            ) as mock_venv,
+        ):
+            second = validator.evaluate(previous=first, stale={"venv_exists"})
+
+        mock_git.assert_not_called()
+        mock_venv.assert_called_once()
+        assert second.compliance["venv_properly_created"] is True
+        assert (
+            second.compliance["git_operations_available"]
+            == first.compliance["git_operations_available"]
+        )
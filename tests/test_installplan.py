@@ -0,0 +1,200 @@
+"""Tests for install planning."""
+
+import pytest
+
+from install_arch.installplan import normalize_name, plan_install
+
+PYPROJECT = """\
+[project]
+name = "Demo_App"
+dependencies = ["click>=8"]
+
+[project.optional-dependencies]
+dev = ["pytest>=8", "ruff"]
+docs = ["sphinx"]
+
+[dependency-groups]
+lint = ["ruff"]
+dev = ["pytest>=8", {include-group = "lint"}, "mypy"]
+"""
+
+LOCK = """\
+version = 1
+
+[[package]]
+name = "demo-app"
+version = "0.1.0"
+source = { editable = "." }
+dependencies = [{ name = "click" }]
+
+[package.optional-dependencies]
+dev = [{ name = "pytest" }, { name = "ruff" }]
+docs = [{ name = "sphinx" }]
+
+[package.dev-dependencies]
+dev = [{ name = "mypy" }, { name = "pytest" }, { name = "ruff" }]
+lint = [{ name = "ruff" }]
+
+[package.metadata]
+requires-dist = [
+    { name = "click", specifier = ">=8" },
+    { name = "pytest", marker = "extra == 'dev'", specifier = ">=8" },
+    { name = "ruff", marker = "extra == 'dev'" },
+    { name = "sphinx", marker = "extra == 'docs'" },
+]
+
+[package.metadata.requires-dev]
+dev = [{ name = "mypy" }, { name = "pytest", specifier = ">=8" }, { name = "ruff" }]
+lint = [{ name = "ruff" }]
+
+[[package]]
+name = "click"
+version = "8.1.7"
+source = { registry = "https://pypi.org/simple" }
+
+[[package]]
+name = "pytest"
+version = "8.3.0"
+source = { registry = "https://pypi.org/simple" }
+dependencies = [
+    { name = "pluggy" },
+    { name = "tomli", marker = "python_version < '3.11'" },
+]
+
+[[package]]
+name = "pluggy"
+version = "1.5.0"
+source = { registry = "https://pypi.org/simple" }
+
+[[package]]
+name = "tomli"
+version = "2.0.1"
+source = { registry = "https://pypi.org/simple" }
+
+[[package]]
+name = "ruff"
+version = "0.6.0"
+source = { registry = "https://pypi.org/simple" }
+
+[[package]]
+name = "mypy"
+version = "1.11.0"
+source = { registry = "https://pypi.org/simple" }
+dependencies = [{ name = "typing-extensions" }]
+
+[[package]]
+name = "typing-extensions"
+version = "4.12.0"
+source = { registry = "https://pypi.org/simple" }
+resolution-markers = ["python_version >= '3.12'"]
+
+[[package]]
+name = "typing-extensions"
+version = "4.11.0"
+source = { registry = "https://pypi.org/simple" }
+resolution-markers = ["python_version < '3.12'"]
+
+[[package]]
+name = "sphinx"
+version = "8.0.0"
+source = { registry = "https://pypi.org/simple" }
+"""
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "pyproject.toml").write_text(PYPROJECT)
+    (tmp_path / "uv.lock").write_text(LOCK)
+    return tmp_path
+
+
+class TestPlanInstall:
+    """Test cases for plan_install."""
+
+    def test_dev_plan_is_pinned(self, project):
+        """Test that extras and groups are merged and pinned to the lock."""
+        plan = plan_install(project, dev=True)
+
+        assert plan.extras == ("dev",)
+        assert plan.groups == ("dev",)
+        assert plan.requirements == ("pytest>=8", "ruff", "mypy")
+        assert plan.locked and not plan.stale
+        assert plan.constraints == (
+            "click==8.1.7",
+            "mypy==1.11.0",
+            "pluggy==1.5.0",
+            "pytest==8.3.0",
+            "ruff==0.6.0",
+            "tomli==2.0.1",
+            "typing-extensions==4.11.0 ; (python_version < '3.12')",
+            "typing-extensions==4.12.0 ; (python_version >= '3.12')",
+        )
+
+    def test_plain_plan_pins_project_dependencies(self, project):
+        """Test that a non-dev install only pins what the project needs."""
+        plan = plan_install(project)
+
+        assert plan.requirements == ()
+        assert plan.constraints == ("click==8.1.7",)
+
+    def test_stale_lock_is_not_used(self, project):
+        """Test that a lock from other requirements pins nothing."""
+        (project / "pyproject.toml").write_text(
+            PYPROJECT.replace('["click>=8"]', '["click>=8", "rich"]')
+        )
+
+        plan = plan_install(project, dev=True)
+
+        assert plan.requirements == ("pytest>=8", "ruff", "mypy")
+        assert not plan.locked
+        assert plan.stale
+
+    def test_without_lock_or_dev_tables(self, tmp_path):
+        """Test plans for projects with no lock and no dev dependencies."""
+        (tmp_path / "pyproject.toml").write_text('[project]\nname = "x"\n')
+
+        plan = plan_install(tmp_path, dev=True)
+
+        assert plan.requirements == ()
+        assert plan.extras == plan.groups == ()
+        assert not plan.locked and not plan.stale
+
+    def test_without_lock(self, project):
+        """Test that a project without uv.lock gets the same unpinned plan."""
+        (project / "uv.lock").unlink()
+
+        plan = plan_install(project, dev=True)
+
+        assert plan.requirements == ("pytest>=8", "ruff", "mypy")
+        assert plan.constraints == ()
+        assert not plan.stale
+
+    def test_group_cycle(self, tmp_path):
+        """Test that a group including itself is an error."""
+        (tmp_path / "pyproject.toml").write_text(
+            '[dependency-groups]\ndev = [{include-group = "dev"}]\n'
+        )
+
+        with pytest.raises(ValueError, match="includes itself"):
+            plan_install(tmp_path, dev=True)
+
+    def test_write(self, project, tmp_path):
+        """Test that the plan file lists requirements and its constraints."""
+        plan = plan_install(project, dev=True)
+
+        path = plan.write(tmp_path / "plans")
+
+        lines = path.read_text().splitlines()
+        assert lines[:3] == ["pytest>=8", "ruff", "mypy"]
+        constraints = lines[3].removeprefix("-c ")
+        assert "click==8.1.7\n" in open(constraints).read()
+        assert plan.write(tmp_path / "plans") == path
+
+
+class TestNormalizeName:
+    """Test cases for normalize_name."""
+
+    def test_pep503(self):
+        """Test PEP 503 name normalization."""
+        assert normalize_name("Typing_Extensions") == "typing-extensions"
+        assert normalize_name("zope.interface") == "zope-interface"
@@ -1,11 +1,35 @@
 """Tests for package manager utilities."""
 
+import os
+import threading
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 import pytest
 
 from install_arch.config import DevConfig
-from install_arch.package_manager import PackageManager
+from install_arch.package_manager import PackageManager, setup_phases
+from install_arch.pipeline import run_phases
+from install_arch.wheelhouse import Wheelhouse
+
+LOCK = (
+    "[[package]]\n"
+    'name = "demo"\nversion = "0"\nsource = { editable = "." }\n'
+    'dependencies = [{ name = "a" }]\n'
+    '[package.metadata]\nrequires-dist = [{ name = "a" }]\n'
+    '[package.metadata.requires-dev]\ndev = [{ name = "b" }]\n'
+    "[[package]]\n"
+    'name = "a"\nversion = "1"\nsource = { registry = "x" }\n'
+)
+
+
+def _fake_venv(path):
+    """Lay out the parts of a venv the install stamp looks at."""
+    (path / "bin").mkdir(parents=True)
+    (path / "bin" / "python").touch()
+    (path / "lib" / "python3.11" / "site-packages").mkdir(parents=True)
+    (path / "pyvenv.cfg").write_text("home = /usr/bin\nversion_info = 3.11.9\n")
+    return path
 
 
 class TestPackageManager:
@@ -24,7 +48,7 @@ class TestPackageManager:
         assert pkg_mgr.config == config
         assert pkg_mgr.tool == "uv"
 
-    @patch("install_arch.package_manager.subprocess.run")
+    @patch("install_arch.package_manager.run_command")
     def test_run_command_success(self, mock_run, tmp_path):
         """Test successful command execution."""
         pkg_mgr = PackageManager()
@@ -35,7 +59,7 @@ class TestPackageManager:
         assert result.returncode == 0
         mock_run.assert_called_once()
 
-    @patch("install_arch.package_manager.subprocess.run")
+    @patch("install_arch.package_manager.run_command")
     def test_run_command_failure(self, mock_run, tmp_path):
         """Test failed command execution."""
         pkg_mgr = PackageManager()
@@ -45,22 +69,45 @@ class TestPackageManager:
         with pytest.raises(Exception):
             pkg_mgr._run_command(["failing", "command"], cwd=tmp_path)
 
-    @patch("install_arch.package_manager.PackageManager._run_command")
-    def test_is_uv_installed_true(self, mock_run):
-        """Test uv installation check when installed."""
+    def test_run_command_timeout_and_cancel(self, tmp_path):
+        """Test that commands honour the timeout and can be cancelled."""
+        import subprocess
+        import sys
+
+        from install_arch.runner import CommandCancelled
+
+        config = DevConfig()
+        config._config["package_manager"]["command_timeout"] = "200ms"
+        pkg_mgr = PackageManager(config)
+        sleep = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+        with pytest.raises(subprocess.TimeoutExpired):
+            pkg_mgr._run_command(sleep, cwd=tmp_path)
+
+        pkg_mgr.cancel()
+        with pytest.raises(CommandCancelled):
+            pkg_mgr._run_command(sleep, cwd=tmp_path)
+
+    @patch("install_arch.package_manager.get_tool_resolver")
+    def test_is_uv_installed_true(self, mock_resolver, monkeypatch):
+        """Test uv installation check when installed off PATH."""
+        monkeypatch.setenv("PATH", "/usr/bin")
         pkg_mgr = PackageManager()
 
-        mock_run.return_value = MagicMock(returncode=0)
+        mock_resolver.return_value.resolve.return_value = MagicMock(
+            path="/home/dev/.cargo/bin/uv"
+        )
 
         assert pkg_mgr._is_uv_installed() is True
-        mock_run.assert_called_once_with(["uv", "--version"])
+        mock_resolver.return_value.resolve.assert_called_once_with("uv")
+        assert os.environ["PATH"].split(os.pathsep)[0] == "/home/dev/.cargo/bin"
 
-    @patch("install_arch.package_manager.PackageManager._run_command")
-    def test_is_uv_installed_false(self, mock_run):
+    @patch("install_arch.package_manager.get_tool_resolver")
+    def test_is_uv_installed_false(self, mock_resolver):
         """Test uv installation check when not installed."""
         pkg_mgr = PackageManager()
 
-        mock_run.side_effect = FileNotFoundError
+        mock_resolver.return_value.resolve.return_value = None
 
         assert pkg_mgr._is_uv_installed() is False
 
@@ -119,21 +166,58 @@ class TestPackageManager:
         assert "venv" in args
 
     @patch("install_arch.package_manager.PackageManager._run_command")
-    def test_install_dependencies_uv(self, mock_run):
+    def test_install_dependencies_uv(self, mock_run, tmp_path, monkeypatch):
         """Test dependency installation with uv."""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "pyproject.toml").write_text(
+            '[project]\nname = "demo"\n'
+            '[project.optional-dependencies]\ndev = ["pytest"]\n'
+            '[dependency-groups]\ndev = ["ruff"]\n'
+        )
         config = DevConfig()
+        config._config["package_manager"]["venv_path"] = str(tmp_path / "venv")
         pkg_mgr = PackageManager(config)
 
         pkg_mgr.install_dependencies(dev=True)
 
-        expected_calls = [
-            mock_run.call_args_list[0][0][0],  # First call
-        ]
-        assert "uv" in expected_calls[0]
-        assert "pip" in expected_calls[0]
-        assert "install" in expected_calls[0]
-        assert "-e" in expected_calls[0]
-        assert "--dev" in expected_calls[0]
+        mock_run.assert_called_once()
+        args = mock_run.call_args[0][0]
+        assert args[:4] == ["uv", "pip", "install", "-r"]
+        assert args[5:] == ["-e", "."]
+        assert Path(args[4]).read_text() == "pytest\nruff\n"
+
+    @patch("install_arch.package_manager.PackageManager._run_command")
+    def test_install_plan_follows_lock(self, mock_run, tmp_path, monkeypatch, capsys):
+        """Test pinned, unpinned and stale-lock installs."""
+        monkeypatch.chdir(tmp_path)
+        pyproject = tmp_path / "pyproject.toml"
+        pyproject.write_text(
+            '[project]\nname = "demo"\ndependencies = ["a"]\n'
+            '[dependency-groups]\ndev = ["b"]\n'
+        )
+        pkg_mgr = PackageManager(DevConfig())
+
+        def plan_lines():
+            cmd = pkg_mgr._install_command(dev=True)
+            return Path(cmd[cmd.index("-r") + 1]).read_text().splitlines()
+
+        # No lockfile: one unpinned install
+        assert plan_lines() == ["b"]
+
+        (tmp_path / "uv.lock").write_text(LOCK)
+        lines = plan_lines()
+        assert lines[0] == "b" and lines[1].startswith("-c ")
+        assert "a==1" in Path(lines[1].removeprefix("-c ")).read_text()
+        assert "Warning" not in capsys.readouterr().out
+
+        # A dependency the lock does not know about makes it stale
+        pyproject.write_text(pyproject.read_text().replace('["a"]', '["a", "c"]'))
+        assert plan_lines() == ["b"]
+        assert "uv.lock is out of date" in capsys.readouterr().out
+
+        with pytest.raises(RuntimeError, match="run 'uv lock'"):
+            pkg_mgr.build_wheelhouse(tmp_path / "wh")
+        mock_run.assert_not_called()
 
     @patch("install_arch.package_manager.PackageManager._run_command")
     def test_install_dependencies_pip(self, mock_run, tmp_path):
@@ -178,3 +262,195 @@ class TestPackageManager:
 
         cmd = pkg_mgr.activate_venv()
         assert cmd == "pipenv shell"
+
+    @patch("install_arch.package_manager.PackageManager._run_command")
+    def test_resolve_dependencies(self, mock_run, tmp_path, monkeypatch):
+        """Test that only uv runs a separate resolution step."""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "pyproject.toml").write_text(
+            '[project]\nname = "demo"\ndependencies = ["a"]\n'
+            '[dependency-groups]\ndev = ["b"]\n'
+        )
+        config = DevConfig()
+        PackageManager(config).resolve_dependencies(dev=True)
+
+        args = mock_run.call_args[0][0]
+        assert args[:4] == ["uv", "pip", "compile", "pyproject.toml"]
+        assert Path(args[4]).read_text() == "b\n"
+
+        # Nothing is left to resolve once uv.lock pins the plan
+        mock_run.reset_mock()
+        (tmp_path / "uv.lock").write_text(LOCK)
+        PackageManager(config).resolve_dependencies(dev=True)
+        mock_run.assert_not_called()
+
+        mock_run.reset_mock()
+        config._config["package_manager"]["tool"] = "poetry"
+        PackageManager(config).resolve_dependencies(dev=True)
+        mock_run.assert_not_called()
+
+    @patch("install_arch.package_manager.PackageManager._run_command")
+    def test_install_skipped_while_stamp_matches(self, mock_run, tmp_path, monkeypatch):
+        """Test that an unchanged project is not installed twice."""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "pyproject.toml").write_text('[project]\ndependencies = ["a"]\n')
+        (tmp_path / "uv.lock").write_text("a==1\n")
+        _fake_venv(tmp_path / ".venv")
+        config = DevConfig()
+        config._config["package_manager"]["venv_path"] = ".venv"
+        pkg_mgr = PackageManager(config)
+
+        assert pkg_mgr.install_dependencies(dev=True) is True
+        assert pkg_mgr.dependencies_current(dev=True)
+        assert not pkg_mgr.dependencies_current(dev=False)
+        assert pkg_mgr.install_dependencies(dev=True) is False
+        assert mock_run.call_count == 1
+
+        (tmp_path / "uv.lock").write_text("a==2\n")
+        assert pkg_mgr.install_dependencies(dev=True) is True
+        assert pkg_mgr.install_dependencies(dev=True, force=True) is True
+        assert mock_run.call_count == 3
+
+    @patch("install_arch.package_manager.PackageManager._run_command")
+    def test_create_venv_keeps_existing(self, mock_run, tmp_path):
+        """Test that an existing venv is not recreated."""
+        venv_path = _fake_venv(tmp_path / "venv")
+
+        assert PackageManager(DevConfig()).create_venv(venv_path) == venv_path
+        mock_run.assert_not_called()
+
+
+class TestWheelhouseInstalls:
+    """Test cases for installing from and building a wheelhouse."""
+
+    @pytest.fixture
+    def built(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        wheelhouse = Wheelhouse(tmp_path / "wheels")
+        wheelhouse.root.mkdir()
+        wheelhouse.requirements_file.write_text("a==1\n")
+        wheelhouse.write_index(dev=False)
+        return wheelhouse
+
+    @pytest.mark.parametrize("tool", ["uv", "pip", "poetry", "pipenv"])
+    def test_install_command_is_offline(self, tool, built):
+        """Test that every tool installs with no index from the wheelhouse."""
+        config = DevConfig()
+        config._config["package_manager"]["tool"] = tool
+        cmd = PackageManager(config)._install_command(dev=True, wheelhouse=built)
+
+        assert "--no-index" in cmd
+        assert cmd[cmd.index("--find-links") + 1] == str(built.root)
+        assert str(built.requirements_file) in cmd
+        assert cmd[cmd.index("-e") + 1] == "."
+
+    @patch("install_arch.package_manager.PackageManager._run_command")
+    def test_configured_wheelhouse(self, mock_run, built, tmp_path):
+        """Test that a configured wheelhouse is used and must be built."""
+        config = DevConfig()
+        config._config["package_manager"]["wheelhouse"] = "wheels"
+        config._config["package_manager"]["venv_path"] = str(tmp_path / "venv")
+        pkg_mgr = PackageManager(config)
+
+        pkg_mgr.install_dependencies()
+        assert "--no-index" in mock_run.call_args[0][0]
+        assert pkg_mgr._resolve_command(dev=True) is None
+
+        config._config["package_manager"]["wheelhouse"] = "missing"
+        with pytest.raises(RuntimeError, match="has not been built"):
+            pkg_mgr.install_dependencies()
+
+    @patch("install_arch.package_manager.PackageManager._run_command")
+    def test_wheelhouse_dev_mismatch(self, mock_run, built, tmp_path):
+        """Test that a wheelhouse only serves installs matching its dev flag."""
+        config = DevConfig()
+        config._config["package_manager"]["wheelhouse"] = "wheels"
+        config._config["package_manager"]["venv_path"] = str(tmp_path / "venv")
+        pkg_mgr = PackageManager(config)
+
+        with pytest.raises(RuntimeError, match="built without dev dependencies"):
+            pkg_mgr.install_dependencies(dev=True)
+        mock_run.assert_not_called()
+
+        built.write_index(dev=True)
+        with pytest.raises(RuntimeError, match=r"build --no-dev"):
+            pkg_mgr.install_dependencies(dev=False)
+        pkg_mgr.install_dependencies(dev=True)
+        assert "--no-index" in mock_run.call_args[0][0]
+
+    @patch("install_arch.package_manager.PackageManager._run_command")
+    def test_build_wheelhouse(self, mock_run, tmp_path, monkeypatch):
+        """Test pinning from uv.lock and collecting pins and build deps."""
+        monkeypatch.chdir(tmp_path)
+        (tmp_path / "uv.lock").write_text("")
+        (tmp_path / "pyproject.toml").write_text(
+            '[build-system]\nrequires = ["setuptools"]\n'
+        )
+
+        def run(cmd, cwd=None):
+            if cmd[0] == "uv":
+                (tmp_path / "wh" / "requirements.txt").write_text("a==1\n")
+            elif "--no-deps" in cmd:
+                (tmp_path / "wh" / "a-1-py3-none-any.whl").write_bytes(b"a")
+
+        mock_run.side_effect = run
+
+        built = PackageManager(DevConfig()).build_wheelhouse(tmp_path / "wh")
+
+        commands = [c[0][0] for c in mock_run.call_args_list]
+        assert commands[0][:2] == ["uv", "export"]
+        assert "--frozen" in commands[0] and "--no-dev" not in commands[0]
+        assert commands[2][-1] == "setuptools"
+        assert list(built.wheels()) == ["a-1-py3-none-any.whl"]
+        assert built.dev
+
+        PackageManager(DevConfig()).build_wheelhouse(tmp_path / "wh", dev=False)
+        assert not built.dev
+
+
+class TestSetupPhases:
+    """Test cases for the concurrent setup pipeline."""
+
+    def test_setup_overlaps_venv_and_resolution(self):
+        """Test that resolution runs while the venv is created."""
+        pkg_mgr = MagicMock()
+        fs_ops = MagicMock()
+        both_started = threading.Barrier(2, timeout=5)
+        # Each side waits for the other, so this only passes if they overlap
+        pkg_mgr.create_venv.side_effect = lambda: both_started.wait()
+        pkg_mgr.resolve_dependencies.side_effect = lambda dev: both_started.wait()
+        pkg_mgr.dependencies_current.return_value = False
+
+        result = run_phases(setup_phases(pkg_mgr, fs_ops))
+
+        assert result.ok
+        pkg_mgr.install_dependencies.assert_called_once_with(dev=True, force=False)
+        fs_ops.create_secure_temp_dir.assert_called_once_with("dev-setup-")
+        install = result.phases["install_dependencies"]
+        assert install.start >= result.phases["create_venv"].end
+        assert install.start >= result.phases["resolve"].end
+
+    def test_setup_survives_failed_resolution(self):
+        """Test that a failed warm-up does not stop the install."""
+        pkg_mgr = MagicMock()
+        pkg_mgr.resolve_dependencies.side_effect = RuntimeError("offline")
+        pkg_mgr.dependencies_current.return_value = False
+
+        result = run_phases(setup_phases(pkg_mgr, create_temp=False))
+
+        assert result.ok
+        assert "temp_dir" not in result.phases
+        pkg_mgr.install_dependencies.assert_called_once_with(dev=True, force=False)
+
+    def test_current_stamp_skips_resolution(self):
+        """Test that nothing is resolved when the venv is up to date."""
+        pkg_mgr = MagicMock()
+        pkg_mgr.dependencies_current.return_value = True
+
+        result = run_phases(setup_phases(pkg_mgr, create_temp=False))
+        assert result.ok
+        pkg_mgr.resolve_dependencies.assert_not_called()
+
+        run_phases(setup_phases(pkg_mgr, create_temp=False, force=True))
+        pkg_mgr.resolve_dependencies.assert_called_once_with(dev=True)
+        pkg_mgr.install_dependencies.assert_called_with(dev=True, force=True)
@@ -0,0 +1,98 @@
+"""Tests for concurrent phase pipelines."""
+
+import threading
+
+import pytest
+
+from install_arch.pipeline import Phase, run_phases
+
+
+class TestRunPhases:
+    """Test cases for run_phases."""
+
+    def test_independent_phases_overlap(self):
+        """Test that phases without dependencies run at the same time."""
+        barrier = threading.Barrier(3, timeout=5)
+
+        def wait(_):
+            barrier.wait()
+
+        result = run_phases([Phase(name, wait) for name in ["a", "b", "c"]])
+
+        assert result.ok
+        assert all(r.status == "ok" for r in result.phases.values())
+
+    def test_dependencies_run_first_and_pass_values(self):
+        """Test that a phase sees the values of its dependencies."""
+        order = []
+
+        def make(name, value):
+            def run(deps):
+                order.append(name)
+                return value + sum(deps.values())
+
+            return run
+
+        result = run_phases(
+            [
+                Phase("sum", make("sum", 100), deps=("one", "two")),
+                Phase("one", make("one", 1)),
+                Phase("two", make("two", 2), deps=("one",)),
+            ]
+        )
+
+        assert order == ["one", "two", "sum"]
+        assert result.value("sum") == 100 + 1 + 3
+        timeline = [r.name for r in result.timeline()]
+        assert timeline == ["one", "two", "sum"]
+        assert result.phases["sum"].start >= result.phases["two"].end
+
+    def test_failure_skips_dependents(self):
+        """Test that a failed phase stops the phases that need it."""
+
+        def boom(_):
+            raise RuntimeError("boom")
+
+        result = run_phases(
+            [
+                Phase("bad", boom),
+                Phase("after", lambda _: "ran", deps=("bad",)),
+                Phase("other", lambda _: "ran"),
+            ]
+        )
+
+        assert not result.ok
+        assert result.phases["bad"].status == "failed"
+        assert str(result.phases["bad"].error) == "boom"
+        assert result.phases["after"].status == "skipped"
+        assert result.value("other") == "ran"
+        assert [r.name for r in result.failed] == ["bad", "after"]
+
+    def test_optional_failure_does_not_block(self):
+        """Test that dependents of an optional phase still run."""
+
+        def boom(_):
+            raise RuntimeError("boom")
+
+        result = run_phases(
+            [
+                Phase("warm", boom, optional=True),
+                Phase("main", lambda deps: deps, deps=("warm",)),
+            ]
+        )
+
+        assert result.ok
+        assert result.phases["warm"].status == "failed"
+        assert result.value("main") == {"warm": None}
+
+    def test_invalid_graphs(self):
+        """Test that unknown dependencies and cycles are rejected."""
+        with pytest.raises(ValueError):
+            run_phases([Phase("a", lambda _: None, deps=("missing",))])
+        with pytest.raises(ValueError):
+            run_phases(
+                [
+                    Phase("a", lambda _: None, deps=("b",)),
+                    Phase("b", lambda _: None, deps=("a",)),
+                ]
+            )
@@ -0,0 +1,147 @@
+"""Tests for the parallel removal engine."""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from install_arch.config import DevConfig
+from install_arch.filesystem import FileSystemOps
+from install_arch.removal import RemovalEngine
+
+
+def _make_tree(root, width=4, depth=3, files=5):
+    """Create a directory tree and return its number of files and dirs."""
+    root.mkdir()
+    counts = [0, 1]
+    if depth:
+        for i in range(width):
+            sub_files, sub_dirs = _make_tree(root / f"d{i}", width, depth - 1, files)
+            counts[0] += sub_files
+            counts[1] += sub_dirs
+    for i in range(files):
+        (root / f"f{i}.txt").write_text("x")
+    counts[0] += files
+    return counts[0], counts[1]
+
+
+@pytest.fixture
+def engine():
+    engine = RemovalEngine(workers=4)
+    yield engine
+    engine.shutdown()
+
+
+class TestRemovalEngine:
+    """Test cases for RemovalEngine."""
+
+    def test_remove_tree_synchronously(self, engine, tmp_path):
+        """Test that a waited removal deletes everything and counts it."""
+        files, dirs = _make_tree(tmp_path / "tree")
+
+        job = engine.remove(tmp_path / "tree", wait=True)
+
+        assert job.done
+        assert job.errors == []
+        assert (job.files, job.dirs) == (files, dirs)
+        assert not (tmp_path / "tree").exists()
+        assert os.listdir(tmp_path) == []
+
+    def test_background_removal_returns_immediately(self, engine, tmp_path):
+        """Test that the path is gone before the deletion finishes."""
+        _make_tree(tmp_path / "tree")
+
+        job = engine.remove(tmp_path / "tree")
+
+        assert not (tmp_path / "tree").exists()
+        assert job.target.parent.name.startswith(".install-arch-trash-")
+        assert job.wait(10)
+        assert not job.target.exists()
+
+    def test_read_only_directories(self, engine, tmp_path):
+        """Test that write-protected directories are still removed."""
+        _make_tree(tmp_path / "tree", width=2, depth=2)
+        for root, dirs, _ in os.walk(tmp_path / "tree", topdown=False):
+            for name in dirs:
+                os.chmod(os.path.join(root, name), 0o500)
+
+        job = engine.remove(tmp_path / "tree", wait=True)
+        assert job.errors == []
+        assert not job.target.exists()
+
+    def test_symlinks_are_not_followed(self, engine, tmp_path):
+        """Test that symlinked directories are unlinked, not emptied."""
+        outside = tmp_path / "outside"
+        outside.mkdir()
+        (outside / "keep.txt").write_text("keep")
+        (tmp_path / "tree").mkdir()
+        (tmp_path / "tree" / "link").symlink_to(outside)
+
+        engine.remove(tmp_path / "tree", wait=True)
+        assert (outside / "keep.txt").exists()
+
+    def test_remove_file_and_missing_path(self, engine, tmp_path):
+        """Test removing plain files and paths that do not exist."""
+        (tmp_path / "file").write_text("x")
+
+        assert engine.remove(tmp_path / "file").files == 1
+        assert not (tmp_path / "file").exists()
+        assert engine.remove(tmp_path / "missing").done
+
+    def test_stats(self, engine, tmp_path):
+        """Test throughput totals across jobs."""
+        for name in ["a", "b"]:
+            _make_tree(tmp_path / name, width=2, depth=1, files=3)
+            engine.remove(tmp_path / name)
+        assert engine.wait_all(10)
+
+        stats = engine.stats()
+        assert stats.jobs == 2
+        assert stats.files == 18
+        assert stats.dirs == 6
+        assert stats.pending == 0
+        assert stats.entries_per_second > 0
+
+    def test_reaps_leftovers_from_dead_processes(self, engine, tmp_path):
+        """Test that trees abandoned in the trash are finished off."""
+        proc = subprocess.Popen([sys.executable, "-c", "pass"])
+        proc.wait()
+        trash = tmp_path / f".install-arch-trash-{os.getuid()}"
+        trash.mkdir()
+        _make_tree(trash / f"{proc.pid}-1-old", width=1, depth=1, files=1)
+        (tmp_path / "new").mkdir()
+
+        engine.remove(tmp_path / "new")
+        assert engine.wait_all(10)
+        assert os.listdir(tmp_path) == []
+
+    def test_parent_left_as_it_was(self, engine, tmp_path):
+        """Test that removals leave no trash directory behind."""
+        (tmp_path / "keep.txt").write_text("keep")
+        (tmp_path / "keep").mkdir()
+        before = sorted(os.listdir(tmp_path))
+        for name in ["a", "b", "c"]:
+            _make_tree(tmp_path / name, width=2, depth=2)
+
+        jobs = [engine.remove(tmp_path / name) for name in ["a", "b", "c"]]
+        engine.remove(tmp_path / "missing")
+        assert all(job.wait(10) for job in jobs)
+
+        assert sorted(os.listdir(tmp_path)) == before
+
+    def test_filesystem_ops_sync_mode(self, tmp_path):
+        """Test that background removal can be disabled in the config."""
+        config_file = tmp_path / "dev-config.toml"
+        config_file.write_text(
+            "[filesystem]\n"
+            f'tmp_base_dir = "{tmp_path / "tmp"}"\n'
+            "background_removal = false\n"
+        )
+        fs_ops = FileSystemOps(DevConfig(config_file))
+        _make_tree(tmp_path / "tree", width=2, depth=1)
+
+        job = fs_ops.remove_directory(tmp_path / "tree")
+        assert job.done
+        assert not job.target.exists()
+        fs_ops.close()
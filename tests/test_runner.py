@@ -0,0 +1,133 @@
+"""Tests for the streaming subprocess runner."""
+
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+
+from install_arch.runner import METRICS, CommandCancelled, RunMetrics, run_command
+
+
+def _python(code):
+    return [sys.executable, "-c", code]
+
+
+class TestRunCommand:
+    """Test cases for run_command."""
+
+    def test_streams_lines(self):
+        """Test that each line reaches the callback with its stream."""
+        seen = []
+        result = run_command(
+            _python("import sys; print('a'); print('b', file=sys.stderr); print('c')"),
+            on_line=lambda stream, line: seen.append((stream, line)),
+        )
+
+        assert result.returncode == 0
+        assert result.stdout == "a\nc\n"
+        assert result.stderr == "b\n"
+        assert [x for x in seen if x[0] == "stdout"] == [
+            ("stdout", "a"),
+            ("stdout", "c"),
+        ]
+        assert ("stderr", "b") in seen
+
+    def test_tail_is_bounded(self):
+        """Test that only the last lines are kept when stdout is not captured."""
+        code = "import sys\nfor i in range(1000): print(i); print(i, file=sys.stderr)"
+        result = run_command(_python(code), capture_stdout=False, tail_lines=5)
+
+        assert result.stdout.splitlines() == ["995", "996", "997", "998", "999"]
+        assert result.stderr.splitlines() == ["995", "996", "997", "998", "999"]
+
+        full = run_command(_python(code), tail_lines=5)
+        assert len(full.stdout.splitlines()) == 1000
+
+    def test_failure_raises_with_tail(self):
+        """Test that a failing command raises with its output."""
+        with pytest.raises(subprocess.CalledProcessError) as exc_info:
+            run_command(_python("import sys; print('boom', file=sys.stderr); exit(3)"))
+
+        assert exc_info.value.returncode == 3
+        assert exc_info.value.stderr == "boom\n"
+
+        result = run_command(_python("exit(3)"), check=False)
+        assert result.returncode == 3
+
+    def test_input(self, tmp_path):
+        """Test that input is fed over stdin."""
+        result = run_command(
+            _python("import sys; print(sys.stdin.read().upper())"),
+            cwd=tmp_path,
+            input="hello",
+        )
+
+        assert result.stdout == "HELLO\n"
+
+    def test_timeout_kills_process_group(self):
+        """Test that a timeout kills the command and what it spawned."""
+        code = (
+            "import subprocess, sys, time\n"
+            "subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])\n"
+            "time.sleep(30)"
+        )
+        start = time.perf_counter()
+        with pytest.raises(subprocess.TimeoutExpired):
+            run_command(_python(code), timeout=0.5)
+
+        # The pipes only close once the grandchild is gone too
+        assert time.perf_counter() - start < 5
+
+    def test_cancel(self):
+        """Test that setting the cancel event kills the command."""
+        cancel = threading.Event()
+        timer = threading.Timer(0.2, cancel.set)
+        timer.start()
+        start = time.perf_counter()
+        with pytest.raises(CommandCancelled):
+            run_command(_python("import time; time.sleep(30)"), cancel=cancel)
+
+        assert time.perf_counter() - start < 5
+
+    def test_broken_callback(self):
+        """Test that a raising callback does not stop the output being read."""
+
+        def on_line(stream, line):
+            raise RuntimeError("display gone")
+
+        result = run_command(_python("for i in range(100): print(i)"), on_line=on_line)
+
+        assert len(result.stdout.splitlines()) == 100
+
+    def test_records_metrics(self):
+        """Test that runs are recorded with their status."""
+        since = time.time()
+        run_command(_python("print(1)"))
+        run_command(_python("exit(1)"), check=False)
+
+        records = METRICS.records(since=since)
+        assert [r.status for r in records[-2:]] == ["ok", "failed"]
+        assert records[-2].lines == 1
+        assert records[-2].max_rss_kb > 0
+        assert records[-1].returncode == 1
+
+
+class TestRunMetrics:
+    """Test cases for RunMetrics."""
+
+    def test_totals_and_history(self):
+        """Test per-program totals and the bounded history."""
+        from install_arch.runner import CommandRecord
+
+        metrics = RunMetrics(history=2)
+        for status in ("ok", "failed", "timeout"):
+            metrics.record(
+                CommandRecord(("/usr/bin/git", "status"), 0, status, 1.0, 0.5, 0)
+            )
+
+        assert len(metrics.records()) == 2
+        assert metrics.totals() == {"git": (3, 2, 1.5)}
+        metrics.clear()
+        assert metrics.records() == []
@@ -0,0 +1,107 @@
+"""Cold-start budget checks for the install-arch-dev CLI.
+
+These run the CLI in fresh interpreters, measuring imports with
+``-X importtime`` and the end-to-end wall-clock time. Budgets can be tuned
+for slow hosts with INSTALL_ARCH_IMPORT_BUDGET_MS and
+INSTALL_ARCH_STARTUP_BUDGET_MS.
+"""
+
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Set
+
+IMPORT_BUDGET_MS = float(os.environ.get("INSTALL_ARCH_IMPORT_BUDGET_MS", "250"))
+STARTUP_BUDGET_MS = float(os.environ.get("INSTALL_ARCH_STARTUP_BUDGET_MS", "1500"))
+
+HEAVY_MODULES = [
+    "install_arch.commands",
+    "install_arch.filesystem",
+    "install_arch.guardrails",
+    "install_arch.package_manager",
+    "subprocess",
+    "shutil",
+    "tomllib",
+]
+
+
+def _importtime(args: List[str]) -> Dict[str, int]:
+    """Run python -X importtime and return cumulative microseconds per module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = int(cumulative)
+    return modules
+
+
+def _loaded_modules(args: List[str]) -> Set[str]:
+    """Run the CLI in a fresh interpreter and return every module it loaded.
+
+    Unlike ``-X importtime``, this also sees modules loaded through importlib,
+    which is how subcommands are resolved.
+    """
+    script = (
+        "import sys\n"
+        "from install_arch.cli import cli\n"
+        f"cli({args!r}, standalone_mode=False)\n"
+        "print(*sys.modules, sep='\\n')\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    )
+    return set(result.stdout.splitlines())
+
+
+class TestStartupBudget:
+    """Test cases for CLI cold-start cost."""
+
+    def test_cli_import_defers_components(self):
+        """Test that importing the CLI does not load component modules."""
+        modules = _importtime(["-c", "import install_arch.cli"])
+
+        assert "install_arch.cli" in modules
+        for name in HEAVY_MODULES:
+            assert name not in modules, f"{name} imported at CLI import time"
+
+    def test_cli_import_within_budget(self):
+        """Test that the CLI module imports within the import budget."""
+        samples = [
+            _importtime(["-c", "import install_arch.cli"])["install_arch.cli"]
+            for _ in range(3)
+        ]
+        assert min(samples) / 1000 < IMPORT_BUDGET_MS
+
+    def test_help_within_wall_clock_budget(self):
+        """Test that --help completes within the startup budget."""
+        samples = []
+        for _ in range(3):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, "-m", "install_arch.cli", "--help"],
+                capture_output=True,
+                check=True,
+            )
+            samples.append((time.perf_counter() - start) * 1000)
+        assert min(samples) < STARTUP_BUDGET_MS
+
+    def test_temp_file_loads_only_filesystem(self, tmp_path):
+        """Test that temp-file builds only the objects it needs."""
+        config_file = tmp_path / "dev-config.toml"
+        config_file.write_text(f'[filesystem]\ntmp_base_dir = "{tmp_path / "tmp"}"\n')
+
+        modules = _loaded_modules(["--config", str(config_file), "temp-file"])
+
+        assert "install_arch.filesystem" in modules
+        assert "install_arch.commands.temp" in modules
+        assert "install_arch.commands.guardrails" not in modules
+        assert "install_arch.guardrails" not in modules
+        assert "install_arch.package_manager" not in modules
@@ -0,0 +1,168 @@
+"""Tests for the quota-enforced temp layout."""
+
+import os
+import time
+from unittest.mock import patch
+
+import pytest
+
+from install_arch.config import DevConfig
+from install_arch.filesystem import FileSystemOps
+from install_arch.templayout import USAGE_INDEX, TempLayout
+
+STRUCTURE = {"build_artifacts": "tmp/build/", "logs": "tmp/logs/"}
+
+
+def _age(path, seconds):
+    """Backdate a path's modification time."""
+    then = time.time() - seconds
+    os.utime(path, (then, then), follow_symlinks=False)
+
+
+def _entry(layout, category, name, size, age):
+    path = layout.category_dir(category) / name
+    path.write_bytes(b"x" * size)
+    _age(path, age)
+    return path
+
+
+@pytest.fixture
+def layout(tmp_path):
+    layout = TempLayout(
+        tmp_path, STRUCTURE, quotas={"build_artifacts": 2500}, min_age=60
+    )
+    yield layout
+    layout.stop()
+
+
+class TestTempLayout:
+    """Test cases for TempLayout."""
+
+    def test_categories_are_created_lazily(self, layout, tmp_path):
+        """Test that category directories appear only when used."""
+        assert not (tmp_path / "tmp").exists()
+
+        path = layout.create_dir("logs", "run-")
+
+        assert path.parent == tmp_path / "tmp" / "logs"
+        assert (tmp_path / "tmp" / "logs").stat().st_mode & 0o777 == 0o700
+        assert not (tmp_path / "tmp" / "build").exists()
+        with pytest.raises(ValueError):
+            layout.category_dir("nope")
+
+    def test_usage_is_accounted_incrementally(self, layout):
+        """Test that unchanged entries are not measured again."""
+        _entry(layout, "build_artifacts", "a", 1000, 10)
+        _entry(layout, "build_artifacts", "b", 500, 10)
+        assert layout.usage("build_artifacts").bytes == 1500
+
+        with patch("install_arch.templayout.disk_usage") as mock_du:
+            usage = layout.usage("build_artifacts")
+        mock_du.assert_not_called()
+        assert usage.entries == 2
+
+    def test_account_measures_deep_writes(self, layout):
+        """Test that explicit accounting picks up writes below an entry."""
+        path = layout.create_dir("build_artifacts")
+        before = layout.usage("build_artifacts").bytes
+        (path / "sub").mkdir()
+        (path / "sub" / "big").write_bytes(b"x" * 4000)
+
+        assert layout.account(path) >= 4000
+        assert layout.usage("build_artifacts").bytes >= before + 4000
+        assert layout.usage("build_artifacts").over_quota
+
+    def test_index_survives_restart(self, layout, tmp_path):
+        """Test that a new layout reuses the persisted measurements."""
+        _entry(layout, "build_artifacts", "a", 1000, 10)
+        layout.usage("build_artifacts")
+        assert (tmp_path / "tmp" / "build" / USAGE_INDEX).exists()
+
+        fresh = TempLayout(tmp_path, STRUCTURE)
+        with patch("install_arch.templayout.disk_usage") as mock_du:
+            assert fresh.usage("build_artifacts").entries == 1
+        mock_du.assert_not_called()
+
+    def test_evicts_oldest_until_under_quota(self, layout):
+        """Test that the oldest entries go first and young ones stay."""
+        oldest = _entry(layout, "build_artifacts", "oldest", 1000, 3000)
+        older = _entry(layout, "build_artifacts", "older", 1000, 2000)
+        old = _entry(layout, "build_artifacts", "old", 1000, 1000)
+        young = _entry(layout, "build_artifacts", "young", 1000, 0)
+
+        result = layout.enforce()
+
+        assert result.entries == 2
+        assert not oldest.exists() and not older.exists()
+        assert old.exists() and young.exists()
+        assert not layout.usage("build_artifacts").over_quota
+
+    def test_active_entries_are_kept(self, tmp_path):
+        """Test that entries of running processes are never evicted."""
+        layout = TempLayout(tmp_path, STRUCTURE, quotas={"build_artifacts": 0})
+        keep = _entry(layout, "build_artifacts", "keep", 100, 1000)
+        layout._active = lambda: {keep}
+
+        assert layout.enforce().entries == 0
+        assert keep.exists()
+
+    def test_max_age(self, tmp_path):
+        """Test that entries past the maximum age are evicted regardless."""
+        layout = TempLayout(tmp_path, STRUCTURE, max_age=3600)
+        stale = _entry(layout, "logs", "stale", 10, 7200)
+        fresh = _entry(layout, "logs", "fresh", 10, 600)
+        (layout.category_dir("logs") / ".hidden").mkdir()
+        _age(layout.category_dir("logs") / ".hidden", 7200)
+
+        assert layout.enforce("logs").entries == 1
+        assert not stale.exists()
+        assert fresh.exists()
+        assert (layout.category_dir("logs") / ".hidden").exists()
+
+    def test_background_evictor(self, tmp_path):
+        """Test that going over quota wakes the evictor."""
+        # Well above the size of the new, nearly empty directory
+        layout = TempLayout(tmp_path, STRUCTURE, quotas={"logs": 100_000}, min_age=0)
+        old = _entry(layout, "logs", "old", 200_000, 1000)
+        assert layout.usage("logs").bytes == 200_000
+        layout.start(interval=3600)
+        try:
+            new = layout.create_dir("logs")
+            (new / "data").write_bytes(b"x" * 10)
+            layout.account(new)
+            deadline = time.monotonic() + 5
+            while old.exists() and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert not old.exists()
+        finally:
+            layout.stop()
+
+
+class TestFileSystemOpsLayout:
+    """Test cases for temp categories through FileSystemOps."""
+
+    def test_category_temp_entries(self, tmp_path):
+        """Test creating temp entries in categories with configured quotas."""
+        config_file = tmp_path / "dev-config.toml"
+        config_file.write_text(
+            "[filesystem]\n"
+            f'tmp_base_dir = "{tmp_path / "tmp"}"\n'
+            'temp_max_age = "1d"\n'
+            "[filesystem.temp_quotas]\n"
+            'test_data = "1M"\n'
+        )
+        fs_ops = FileSystemOps(DevConfig(config_file))
+        try:
+            temp_dir = fs_ops.create_secure_temp_dir("run-", category="test_data")
+            temp_file = fs_ops.create_temp_file(".log", category="logs")
+
+            assert temp_dir.parent == tmp_path / "tmp" / "tmp" / "tests"
+            assert temp_file.parent.name == "logs"
+            layout = fs_ops.temp_layout
+            assert layout.usage("test_data").quota == 1024**2
+            assert layout.max_age == 86400
+            assert layout._thread is not None
+            # Recorded by this (running) process, so protected from eviction
+            assert temp_dir in fs_ops._active_temp_paths()
+        finally:
+            fs_ops.close()
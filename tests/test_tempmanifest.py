@@ -0,0 +1,195 @@
+"""Tests for the temporary entry manifest."""
+
+import os
+import subprocess
+import sys
+import time
+from unittest.mock import patch
+
+import pytest
+
+from install_arch.tempmanifest import TempManifest
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+class TestTempManifest:
+    """Test cases for TempManifest."""
+
+    def test_record_and_forget(self, tmp_path):
+        """Test that tombstones hide removed entries."""
+        manifest = TempManifest(tmp_path)
+        manifest.record(tmp_path / "a", "dir", "job-")
+        manifest.record(tmp_path / "b", "file", "job-")
+        manifest.forget(tmp_path / "a")
+
+        assert [e.path for e in manifest.entries()] == [tmp_path / "b"]
+        assert manifest.path.stat().st_mode & 0o777 == 0o600
+
+    def test_torn_lines_are_ignored(self, tmp_path):
+        """Test that a partial line from a crashed writer is skipped."""
+        manifest = TempManifest(tmp_path)
+        manifest.record(tmp_path / "a", "dir", "job-")
+        with open(manifest.path, "ab") as f:
+            f.write(b'{"op":"create","path":"/tm')
+
+        assert len(manifest.entries()) == 1
+
+    def test_concurrent_writers(self, tmp_path):
+        """Test that appends from several processes never interleave."""
+        script = (
+            "import sys\n"
+            "from pathlib import Path\n"
+            "from install_arch.tempmanifest import TempManifest\n"
+            "m = TempManifest(Path(sys.argv[1]))\n"
+            "for i in range(200):\n"
+            "    m.record(Path(sys.argv[1]) / f'{sys.argv[2]}-{i}', 'file', 'x-')\n"
+        )
+        procs = [
+            subprocess.Popen([sys.executable, "-c", script, str(tmp_path), str(n)])
+            for n in range(4)
+        ]
+        for proc in procs:
+            assert proc.wait() == 0
+
+        manifest = TempManifest(tmp_path)
+        assert len(manifest.path.read_bytes().splitlines()) == 800
+        assert len(manifest.entries()) == 800
+
+    def test_compact_keeps_concurrent_appends(self, tmp_path):
+        """Test that lines appended during compaction are not lost."""
+        script = (
+            "import sys\n"
+            "from pathlib import Path\n"
+            "from install_arch.tempmanifest import TempManifest\n"
+            "m = TempManifest(Path(sys.argv[1]))\n"
+            "for i in range(200):\n"
+            "    m.record(Path(sys.argv[1]) / f'{sys.argv[2]}-{i}', 'file', 'x-')\n"
+            "    m.forget(Path(sys.argv[1]) / f'{sys.argv[2]}-{i}')\n"
+            "    m.record(Path(sys.argv[1]) / f'{sys.argv[2]}-{i}', 'file', 'x-')\n"
+        )
+        manifest = TempManifest(tmp_path)
+        procs = [
+            subprocess.Popen([sys.executable, "-c", script, str(tmp_path), str(n)])
+            for n in range(4)
+        ]
+        while any(proc.poll() is None for proc in procs):
+            manifest.compact()
+        assert all(proc.returncode == 0 for proc in procs)
+
+        assert len(manifest.entries()) == 800
+        manifest.compact()
+        assert len(manifest.path.read_bytes().splitlines()) == 800
+
+    def test_forged_entries_are_skipped(self, tmp_path):
+        """Test that entries outside the base directory are never removed."""
+        base = tmp_path / "base"
+        base.mkdir()
+        outside = tmp_path / "precious"
+        outside.mkdir()
+        manifest = TempManifest(base)
+        with patch("install_arch.tempmanifest.os.getpid", return_value=_dead_pid()):
+            manifest.record(outside, "dir", "job-")
+            manifest.record(base / ".." / "precious", "dir", "job-")
+            manifest.record(base, "dir", "job-")
+            (base / "link").symlink_to(tmp_path)
+            manifest.record(base / "link" / "precious", "dir", "job-")
+            manifest.record(base / "mine", "file", "job-")
+
+        assert [e.path for e in manifest.entries()] == [base / "mine"]
+        assert manifest.clean().entries == 1
+        assert outside.is_dir() and base.is_dir()
+
+    def test_untrusted_manifest_is_refused(self, tmp_path):
+        """Test that a symlinked or foreign manifest is not read or written."""
+        manifest = TempManifest(tmp_path)
+        target = tmp_path / "elsewhere.jsonl"
+        target.write_text("")
+        manifest.path.symlink_to(target)
+
+        with pytest.raises(PermissionError, match="symlink"):
+            manifest.entries()
+        with pytest.raises(PermissionError, match="symlink"):
+            manifest.record(tmp_path / "a", "dir", "job-")
+        assert target.read_text() == ""
+
+        manifest.path.unlink()
+        manifest.record(tmp_path / "a", "dir", "job-")
+        if os.getuid() != 0:
+            return
+        os.chown(manifest.path, os.getuid() + 1, -1)
+        with pytest.raises(PermissionError, match="not owned"):
+            manifest.clean(include_active=True)
+
+    def test_compact_drops_tombstones(self, tmp_path):
+        """Test that compaction keeps only live entries."""
+        manifest = TempManifest(tmp_path)
+        for i in range(10):
+            manifest.record(tmp_path / str(i), "file", "job-")
+        for i in range(9):
+            manifest.forget(tmp_path / str(i))
+
+        manifest.compact()
+        assert len(manifest.path.read_bytes().splitlines()) == 1
+        assert [e.path for e in manifest.entries()] == [tmp_path / "9"]
+        assert os.listdir(tmp_path) == [manifest.path.name]
+
+    def test_clean_removes_only_owned_entries(self, tmp_path):
+        """Test that clean deletes recorded entries and reports sizes."""
+        manifest = TempManifest(tmp_path)
+        owned_dir = tmp_path / "owned"
+        owned_dir.mkdir()
+        (owned_dir / "f").write_bytes(b"x" * 1000)
+        owned_file = tmp_path / "owned.log"
+        owned_file.write_bytes(b"y" * 500)
+        foreign = tmp_path / "foreign"
+        foreign.mkdir()
+
+        with patch("install_arch.tempmanifest.os.getpid", return_value=_dead_pid()):
+            manifest.record(owned_dir, "dir", "job-")
+            manifest.record(owned_file, "file", "job-")
+            manifest.record(tmp_path / "gone", "file", "job-")
+
+        result = manifest.clean()
+        assert result.entries == 3
+        assert result.bytes_freed >= 1500
+        assert not owned_dir.exists()
+        assert not owned_file.exists()
+        assert foreign.exists()
+        assert manifest.entries() == []
+
+    def test_clean_skips_active_entries(self, tmp_path):
+        """Test that entries from running processes are kept by default."""
+        manifest = TempManifest(tmp_path)
+        path = tmp_path / "mine"
+        path.mkdir()
+        manifest.record(path, "dir", "job-")
+
+        result = manifest.clean()
+        assert result.skipped_active == 1
+        assert path.exists()
+
+        result = manifest.clean(include_active=True)
+        assert result.entries == 1
+        assert not path.exists()
+
+    def test_clean_filters(self, tmp_path):
+        """Test the age and prefix filters."""
+        manifest = TempManifest(tmp_path)
+        for name in ["job-a", "job-b", "ci-c"]:
+            (tmp_path / name).mkdir()
+            manifest.record(tmp_path / name, "dir", name[:-1])
+
+        assert manifest.clean(older_than=60, include_active=True).entries == 0
+        assert manifest.clean(prefix="ci-", include_active=True).entries == 1
+
+        with patch(
+            "install_arch.tempmanifest.time.time", return_value=time.time() + 120
+        ):
+            result = manifest.clean(older_than=60, include_active=True)
+        assert result.entries == 2
+        assert os.listdir(tmp_path) == []
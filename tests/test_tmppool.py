@@ -0,0 +1,142 @@
+"""Tests for the secure temp directory pool."""
+
+import time
+
+import pytest
+
+from install_arch.config import DevConfig
+from install_arch.filesystem import FileSystemOps
+from install_arch.tmppool import TempDirPool
+
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("condition not reached")
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = TempDirPool(tmp_path / "base", low=2, high=4)
+    yield pool
+    pool.close()
+
+
+class TestTempDirPool:
+    """Test cases for TempDirPool."""
+
+    def test_acquire_returns_private_directory(self, pool):
+        """Test that checked-out directories are empty and 0700."""
+        path = pool.acquire("job-")
+        assert path.is_dir()
+        assert path.name.startswith("job-")
+        assert path.stat().st_mode & 0o777 == 0o700
+        assert not any(path.iterdir())
+
+    def test_refills_to_high_watermark(self, pool):
+        """Test that the worker pre-creates directories after a checkout."""
+        pool.acquire("job-")
+        _wait_for(lambda: pool.stats().ready == pool.high)
+
+        second = pool.acquire("job-")
+        stats = pool.stats()
+        assert stats.hits == 1
+        assert stats.misses == 1
+        assert second.is_dir()
+
+    def test_released_directory_is_scrubbed_and_reused(self, tmp_path):
+        """Test that returned directories are emptied before reuse."""
+        # No prefill, so the returned directory is kept rather than discarded
+        pool = TempDirPool(tmp_path / "base", low=0, high=1)
+        path = pool.acquire("job-")
+        (path / "secret.txt").write_text("secret")
+        (path / "nested").mkdir()
+        (path / "nested" / "file").write_text("x")
+        (path / "nested").chmod(0o500)
+        path.chmod(0o755)
+
+        assert pool.release(path)
+        _wait_for(lambda: pool.stats().ready == 1)
+        assert path.stat().st_mode & 0o777 == 0o700
+        assert not any(path.iterdir())
+        assert pool.acquire("job-") == path
+        pool.close()
+
+    def test_release_of_foreign_directory(self, pool, tmp_path):
+        """Test that directories not from the pool are not accepted."""
+        other = tmp_path / "other"
+        other.mkdir()
+        assert not pool.release(other)
+        assert other.exists()
+
+    def test_surplus_returns_are_discarded(self, tmp_path):
+        """Test that returns beyond the high watermark are deleted."""
+        pool = TempDirPool(tmp_path / "base", low=0, high=1)
+        try:
+            paths = [pool.acquire("job-") for _ in range(3)]
+            for path in paths:
+                pool.release(path)
+            _wait_for(lambda: pool.stats().discarded == 2)
+            assert pool.stats().ready == 1
+        finally:
+            pool.close()
+
+    def test_latency_stats(self, pool):
+        """Test that checkout latency is recorded."""
+        for _ in range(5):
+            pool.acquire("job-")
+        stats = pool.stats()
+        assert stats.checkouts == 5
+        assert 0 < stats.latency_p50_ms <= stats.latency_max_ms
+        assert stats.latency_p99_ms <= stats.latency_max_ms
+
+    def test_close_removes_idle_directories(self, tmp_path):
+        """Test that closing deletes ready directories but not checkouts."""
+        pool = TempDirPool(tmp_path / "base", low=2, high=3)
+        held = pool.acquire("job-")
+        _wait_for(lambda: pool.stats().ready == 3)
+        pool.close()
+
+        assert list((tmp_path / "base").iterdir()) == [held]
+        with pytest.raises(RuntimeError):
+            pool.acquire("job-")
+
+    def test_invalid_watermarks(self, tmp_path):
+        """Test that inverted watermarks are rejected."""
+        with pytest.raises(ValueError):
+            TempDirPool(tmp_path, low=5, high=1)
+
+
+class TestFileSystemOpsPool:
+    """Test cases for FileSystemOps with the pool enabled."""
+
+    def test_pool_backs_secure_temp_dirs(self, tmp_path):
+        """Test that create_secure_temp_dir and cleanup_temp use the pool."""
+        config_file = tmp_path / "dev-config.toml"
+        config_file.write_text(
+            "[filesystem]\n"
+            f'tmp_base_dir = "{tmp_path / "tmp"}"\n'
+            "temp_pool = true\n"
+            "temp_pool_low = 1\n"
+            "temp_pool_high = 2\n"
+        )
+        fs_ops = FileSystemOps(DevConfig(config_file))
+        try:
+            path = fs_ops.create_secure_temp_dir("test-")
+            (path / "data").write_text("x")
+            fs_ops.cleanup_temp(path)
+
+            pool = fs_ops.temp_pool
+            assert pool is not None
+            assert (pool.low, pool.high) == (1, 2)
+            assert pool.stats().returns == 1
+            _wait_for(lambda: not (path / "data").exists())
+        finally:
+            fs_ops.close()
+
+    def test_pool_disabled_by_default(self, tmp_path):
+        """Test that the pool is opt-in."""
+        fs_ops = FileSystemOps()
+        assert fs_ops.temp_pool is None
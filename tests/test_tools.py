@@ -0,0 +1,86 @@
+"""Tests for cached tool discovery."""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from install_arch.tools import ToolResolver
+
+
+def _tool(directory, name, version="1.0", code=0):
+    """Write a fake executable that prints a version."""
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / name
+    path.write_text(f"#!/bin/sh\necho '{name} {version}'\nexit {code}\n")
+    path.chmod(0o755)
+    return path
+
+
+@pytest.fixture
+def resolver(tmp_path, monkeypatch):
+    monkeypatch.setenv("PATH", str(tmp_path / "bin"))
+    return ToolResolver(
+        cache_file=tmp_path / "cache" / "tools.json",
+        search_dirs=[tmp_path / "cargo"],
+    )
+
+
+class TestToolResolver:
+    """Test cases for ToolResolver."""
+
+    def test_resolves_path_and_version(self, resolver, tmp_path):
+        """Test that a tool on PATH resolves with its version."""
+        path = _tool(tmp_path / "bin", "uv", "0.4.0")
+
+        resolved = resolver.resolve("uv")
+
+        assert resolved is not None
+        assert resolved.path == str(path)
+        assert resolved.version == "uv 0.4.0"
+        assert resolver.resolve("poetry") is None
+
+    def test_finds_installer_directories(self, resolver, tmp_path):
+        """Test that binaries off PATH, e.g. in ~/.cargo/bin, are found."""
+        path = _tool(tmp_path / "cargo", "uv")
+
+        resolved = resolver.resolve("uv")
+
+        assert resolved is not None and resolved.path == str(path)
+
+    def test_unchanged_binary_is_not_probed_again(self, resolver, tmp_path):
+        """Test that the version only runs again when the binary changes."""
+        path = _tool(tmp_path / "bin", "uv", "0.4.0")
+        resolver.resolve("uv")
+
+        fresh = ToolResolver(resolver.cache_file, resolver.search_dirs)
+        with patch.object(ToolResolver, "_probe_version") as mock_probe:
+            assert fresh.resolve("uv").version == "uv 0.4.0"
+        mock_probe.assert_not_called()
+
+        _tool(tmp_path / "bin", "uv", "0.5.0")
+        os.utime(path, ns=(0, path.stat().st_mtime_ns + 10**9))
+        assert fresh.resolve("uv").version == "uv 0.5.0"
+
+    def test_broken_binary_is_cached_as_unusable(self, resolver, tmp_path):
+        """Test that a failing --version is remembered until it changes."""
+        _tool(tmp_path / "bin", "poetry", code=1)
+
+        assert resolver.resolve("poetry") is None
+        with patch.object(ToolResolver, "_probe_version") as mock_probe:
+            assert resolver.resolve("poetry") is None
+        mock_probe.assert_not_called()
+
+        resolver.invalidate("poetry")
+        assert "poetry" not in json.loads(resolver.cache_file.read_text())["tools"]
+
+    def test_corrupt_cache_is_ignored(self, resolver, tmp_path):
+        """Test that an unreadable cache file falls back to probing."""
+        _tool(tmp_path / "bin", "uv")
+        resolver.cache_file.parent.mkdir()
+        resolver.cache_file.write_text("{not json")
+
+        assert resolver.resolve("uv") is not None
+        data = json.loads(resolver.cache_file.read_text())
+        assert data["tools"]["uv"]["version"] == "uv 1.0"
@@ -0,0 +1,97 @@
+"""Tests for Chrome trace spans."""
+
+import json
+import sys
+
+import pytest
+
+from install_arch import tracing
+from install_arch.runner import run_command
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    tracer = tracing.start(tmp_path / "trace.json")
+    yield tracer
+    tracing.stop()
+
+
+def _spans(tracer):
+    return {e["name"]: e for e in tracer.events() if e["ph"] == "X"}
+
+
+class TestTracer:
+    """Test cases for tracing spans."""
+
+    def test_disabled_spans_record_nothing(self):
+        """Test that spans are no-ops while tracing is off."""
+        assert tracing.active() is None
+        with tracing.span("work", "test") as args:
+            args["x"] = 1
+        assert tracing.stop() is None
+
+    def test_nested_spans(self, tracer):
+        """Test that nested spans are recorded inside their parent."""
+        with tracing.span("outer", "test", step=1):
+            with tracing.span("inner", "test"):
+                pass
+
+        spans = _spans(tracer)
+        outer, inner = spans["outer"], spans["inner"]
+        assert outer["args"]["step"] == 1
+        assert outer["ts"] <= inner["ts"]
+        assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+        assert "cpu_ms" in inner["args"]
+
+    def test_error_is_recorded(self, tracer):
+        """Test that a span ended by an exception records it."""
+        with pytest.raises(ValueError):
+            with tracing.span("failing", "test"):
+                raise ValueError("bad")
+
+        assert _spans(tracer)["failing"]["args"]["error"] == "ValueError: bad"
+
+    def test_command_usage_reaches_parents(self, tracer):
+        """Test that a command's CPU time is charged to enclosing spans."""
+        with tracing.span("outer", "test"):
+            run_command([sys.executable, "-c", "sum(range(10**6))"])
+
+        spans = _spans(tracer)
+        command = spans[sys.executable.rsplit("/", 1)[-1]]
+        assert command["cat"] == "subprocess"
+        assert command["args"]["status"] == "ok"
+        assert command["args"]["max_rss_kb"] > 0
+        assert command["args"]["child_user_ms"] > 0
+        assert (
+            spans["outer"]["args"]["child_user_ms"] == command["args"]["child_user_ms"]
+        )
+
+    def test_write(self, tracer):
+        """Test that the trace file is Chrome trace JSON with thread names."""
+        with tracing.span("work", "test"):
+            pass
+
+        path = tracing.stop()
+
+        data = json.loads(path.read_text())
+        assert data["traceEvents"][0]["ph"] == "M"
+        assert data["traceEvents"][0]["args"]["name"] == "MainThread"
+        assert tracing.active() is None
+
+
+class TestInstrument:
+    """Test cases for the instrument class decorator."""
+
+    def test_public_methods_are_traced(self, tracer):
+        """Test that public methods record spans and private ones do not."""
+
+        @tracing.instrument("test")
+        class Component:
+            def run(self):
+                return self._helper()
+
+            def _helper(self):
+                return 42
+
+        assert Component().run() == 42
+        assert set(_spans(tracer)) == {"Component.run"}
@@ -0,0 +1,103 @@
+"""Tests for venv install stamps."""
+
+import os
+
+import pytest
+
+from install_arch.venvstamp import (
+    STAMP_NAME,
+    clear_stamp,
+    fingerprint,
+    stamp_matches,
+    write_stamp,
+)
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "pyproject.toml").write_text(
+        '[project]\nname = "demo"\ndescription = "one"\ndependencies = ["a"]\n'
+    )
+    (tmp_path / "uv.lock").write_text("a==1\n")
+    venv = tmp_path / ".venv"
+    (venv / "bin").mkdir(parents=True)
+    (venv / "bin" / "python").touch()
+    (venv / "lib" / "python3.11" / "site-packages").mkdir(parents=True)
+    (venv / "pyvenv.cfg").write_text("home = /usr/bin\nversion = 3.11.9\n")
+    return tmp_path
+
+
+def _fp(project, tool="uv", dev=True):
+    return fingerprint(project, project / ".venv", tool, dev)
+
+
+class TestFingerprint:
+    """Test cases for install fingerprints."""
+
+    def test_inputs_change_the_fingerprint(self, project):
+        """Test that each install input is part of the fingerprint."""
+        base = _fp(project)
+        assert base == _fp(project)
+        assert _fp(project, tool="pip") != base
+        assert _fp(project, dev=False) != base
+
+        (project / "uv.lock").write_text("a==2\n")
+        locked = _fp(project)
+        assert locked != base
+
+        (project / ".venv" / "pyvenv.cfg").write_text(
+            "home = /usr/bin\nversion = 3.12.1\n"
+        )
+        assert _fp(project) != locked
+
+    def test_only_dependency_tables_count(self, project):
+        """Test that unrelated pyproject.toml edits keep the fingerprint."""
+        base = _fp(project)
+        (project / "pyproject.toml").write_text(
+            '[project]\nname = "demo"\ndescription = "two"\ndependencies = ["a"]\n'
+            "[tool.ruff]\nline-length = 100\n"
+        )
+        assert _fp(project) == base
+
+        (project / "pyproject.toml").write_text(
+            '[project]\nname = "demo"\ndependencies = ["a", "b"]\n'
+        )
+        assert _fp(project) != base
+
+    def test_no_venv(self, project):
+        """Test that there is nothing to fingerprint without a venv."""
+        assert fingerprint(project, project / "missing", "uv", True) is None
+
+
+class TestStamp:
+    """Test cases for reading and writing stamps."""
+
+    def test_round_trip_and_clear(self, project):
+        """Test that a written stamp matches until it is cleared."""
+        venv = project / ".venv"
+        value = _fp(project)
+        assert not stamp_matches(venv, value)
+
+        write_stamp(venv, value)
+        assert stamp_matches(venv, value)
+        assert not stamp_matches(venv, "other")
+
+        clear_stamp(venv)
+        clear_stamp(venv)
+        assert not (venv / STAMP_NAME).exists()
+
+    def test_site_packages_changes_invalidate(self, project):
+        """Test that packages changed by hand make the stamp stale."""
+        venv = project / ".venv"
+        value = _fp(project)
+        write_stamp(venv, value)
+
+        site = venv / "lib" / "python3.11" / "site-packages"
+        os.utime(site, ns=(0, site.stat().st_mtime_ns + 10**9))
+        assert not stamp_matches(venv, value)
+
+    def test_corrupt_stamp(self, project):
+        """Test that an unreadable stamp never matches."""
+        venv = project / ".venv"
+        (venv / STAMP_NAME).write_text("[1, 2")
+        assert not stamp_matches(venv, _fp(project))
@@ -0,0 +1,165 @@
+"""Tests for template venv cloning."""
+
+import fcntl
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from install_arch.config import DevConfig
+from install_arch.package_manager import PackageManager
+from install_arch.venvstamp import STAMP_NAME
+from install_arch.venvtemplate import VenvTemplates, relocate
+
+
+def _fake_install(cmd, cwd=None):
+    """Stand in for venv creation and install by laying out a venv."""
+    if cmd[1:3] == ["-m", "venv"]:
+        venv = cmd[-1]
+        os.makedirs(os.path.join(venv, "bin"))
+        os.symlink(sys.executable, os.path.join(venv, "bin", "python"))
+        with open(os.path.join(venv, "pyvenv.cfg"), "w") as f:
+            f.write(f"home = /usr/bin\nversion = 3.11.9\ncommand = venv {venv}\n")
+        with open(os.path.join(venv, "bin", "activate"), "w") as f:
+            f.write(f"VIRTUAL_ENV='{venv}'\n")
+    else:
+        venv = os.path.dirname(os.path.dirname(cmd[0]))
+        site = os.path.join(venv, "lib", "python3.11", "site-packages")
+        os.makedirs(site)
+        with open(os.path.join(site, "pkg.py"), "w") as f:
+            f.write("VALUE = 1\n")
+        with open(os.path.join(venv, "bin", "tool"), "w") as f:
+            f.write(f"#!{venv}/bin/python\nimport pkg\n")
+        os.chmod(os.path.join(venv, "bin", "tool"), 0o755)
+
+
+@pytest.fixture
+def pkg_mgr(tmp_path, monkeypatch):
+    project = tmp_path / "project"
+    project.mkdir()
+    (project / "pyproject.toml").write_text('[project]\nname = "demo"\n')
+    (project / "uv.lock").write_text("a==1\n")
+    monkeypatch.chdir(project)
+    config = DevConfig()
+    config._config["package_manager"]["tool"] = "pip"
+    with patch.object(PackageManager, "_run_command", side_effect=_fake_install):
+        yield PackageManager(config)
+
+
+class TestVenvTemplates:
+    """Test cases for VenvTemplates."""
+
+    def test_clone_builds_template_once(self, pkg_mgr, tmp_path):
+        """Test that the template is installed once and cloned after."""
+        templates = VenvTemplates(pkg_mgr, root=tmp_path / "templates")
+
+        first = templates.clone(tmp_path / "job1" / ".venv")
+        second = templates.clone(tmp_path / "job2" / ".venv")
+
+        assert pkg_mgr._run_command.call_count == 2
+        template = templates.template_path()
+        assert (template / STAMP_NAME).exists()
+        for clone in (first, second):
+            assert (
+                (clone / "bin" / "tool")
+                .read_text()
+                .startswith(f"#!{clone}/bin/python\n")
+            )
+            assert f"VIRTUAL_ENV='{clone}'" in (clone / "bin" / "activate").read_text()
+            assert f"venv {clone}" in (clone / "pyvenv.cfg").read_text()
+            assert str(template) not in (clone / "pyvenv.cfg").read_text()
+        with pytest.raises(FileExistsError):
+            templates.clone(first)
+
+    def test_clones_need_no_install(self, pkg_mgr, tmp_path):
+        """Test that a clone's install stamp is current."""
+        templates = VenvTemplates(pkg_mgr, root=tmp_path / "templates")
+        templates.clone(tmp_path / "project" / ".venv")
+
+        assert pkg_mgr.dependencies_current(dev=True)
+        assert pkg_mgr.install_dependencies(dev=True) is False
+
+    def test_changed_inputs_rebuild(self, pkg_mgr, tmp_path):
+        """Test that new dependencies get a new template."""
+        templates = VenvTemplates(pkg_mgr, root=tmp_path / "templates")
+        templates.clone(tmp_path / "a")
+        old = templates.template_path()
+
+        (tmp_path / "project" / "uv.lock").write_text("a==2\n")
+        templates.clone(tmp_path / "b")
+
+        assert templates.template_path() != old
+        assert pkg_mgr._run_command.call_count == 4
+
+    def test_publishing_evicts_least_recently_used(self, pkg_mgr, tmp_path):
+        """Test that old templates are evicted unless in use or recently used."""
+        templates = VenvTemplates(pkg_mgr, root=tmp_path / "templates", keep=2)
+        lock = tmp_path / "project" / "uv.lock"
+        paths = []
+        for version in range(1, 4):
+            lock.write_text(f"a=={version}\n")
+            templates.clone(tmp_path / f"job{version}")
+            paths.append(templates.template_path())
+            # Lock file mtimes order the templates by last use
+            os.utime(f"{paths[-1]}.lock", ns=(version * 10**9, version * 10**9))
+
+        assert not paths[0].exists()
+        assert not (tmp_path / "templates" / f"{paths[0].name}.lock").exists()
+        assert paths[1].exists() and paths[2].exists()
+
+        # A template another job holds locked is kept
+        with open(f"{paths[1]}.lock") as held:
+            fcntl.flock(held, fcntl.LOCK_SH)
+            lock.write_text("a==4\n")
+            templates.clone(tmp_path / "job4")
+        assert paths[1].exists() and paths[2].exists()
+        assert len(list(templates.root.glob("*.lock"))) == 3
+
+        assert templates.prune() == [paths[1]]
+
+    def test_hardlinked_clone(self, pkg_mgr, tmp_path):
+        """Test that hardlinked clones share files but not rewritten ones."""
+        templates = VenvTemplates(pkg_mgr, root=tmp_path / "templates", hardlink=True)
+        clone = templates.clone(tmp_path / "job")
+        template = templates.template_path()
+
+        site = "lib/python3.11/site-packages/pkg.py"
+        assert (clone / site).stat().st_ino == (template / site).stat().st_ino
+        assert (template / site).stat().st_mode & 0o222 == 0
+        assert (clone / "bin" / "tool").stat().st_ino != (
+            template / "bin" / "tool"
+        ).stat().st_ino
+        assert (template / "bin" / "tool").read_text().startswith(f"#!{template}")
+
+    def test_template_mode_create_venv(self, pkg_mgr, tmp_path, monkeypatch):
+        """Test that create_venv clones in template mode."""
+        monkeypatch.setenv("INSTALL_ARCH_CACHE_DIR", str(tmp_path / "cache"))
+        pkg_mgr.config._config["package_manager"]["venv_template"] = "hardlink"
+
+        venv = pkg_mgr.create_venv(tmp_path / "venv")
+
+        assert (venv / STAMP_NAME).exists()
+        assert pkg_mgr.venv_templates().hardlink
+        assert (tmp_path / "cache" / "venv-templates").is_dir()
+
+
+class TestRelocate:
+    """Test cases for relocate."""
+
+    def test_skips_binaries_and_symlinks(self, tmp_path):
+        """Test that only text files are rewritten."""
+        venv = tmp_path / "new"
+        (venv / "bin").mkdir(parents=True)
+        (venv / "bin" / "blob").write_bytes(b"\0/old/bin")
+        (venv / "bin" / "script").write_text("#!/old/bin/python\n")
+        (venv / "bin" / "link").symlink_to("/old/bin/python")
+
+        assert relocate(venv, tmp_path / "old") == 0
+        assert relocate(venv, venv.parent.parent / "old") == 0
+        (venv / "bin" / "script").write_text(f"#!{tmp_path / 'old'}/bin/python\n")
+
+        assert relocate(venv, tmp_path / "old") == 1
+        assert (venv / "bin" / "script").read_text() == f"#!{venv}/bin/python\n"
+        assert (venv / "bin" / "blob").read_bytes() == b"\0/old/bin"
+        assert os.readlink(venv / "bin" / "link") == "/old/bin/python"
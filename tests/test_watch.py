@@ -0,0 +1,141 @@
+"""Tests for incremental guardrails watching."""
+
+import os
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from install_arch.config import DevConfig
+from install_arch.guardrails import GuardrailsValidator
+from install_arch.watch import GuardrailsWatcher, PathWatcher
+
+
+@pytest.fixture(params=["inotify", "poll"])
+def use_inotify(request):
+    """Run watcher tests against both backends."""
+    return request.param == "inotify"
+
+
+class TestPathWatcher:
+    """Test cases for PathWatcher."""
+
+    def test_backend_selection(self, tmp_path, use_inotify):
+        """Test that the requested backend is used."""
+        watcher = PathWatcher({"config": [tmp_path / "a"]}, use_inotify=use_inotify)
+        try:
+            assert watcher.backend == ("inotify" if use_inotify else "poll")
+        finally:
+            watcher.close()
+
+    def test_detects_file_creation(self, tmp_path, use_inotify):
+        """Test that creating a watched path reports its input."""
+        target = tmp_path / "dev-config.toml"
+        watcher = PathWatcher(
+            {"config": [target], "venv": [tmp_path / "venv"]},
+            use_inotify=use_inotify,
+        )
+        try:
+            target.write_text("x")
+            assert watcher.wait(timeout=2) == {"config"}
+        finally:
+            watcher.close()
+
+    def test_detects_atomic_replace(self, tmp_path, use_inotify):
+        """Test that editor-style rename-over saves are noticed."""
+        target = tmp_path / "dev-config.toml"
+        target.write_text("old")
+        watcher = PathWatcher({"config": [target]}, use_inotify=use_inotify)
+        try:
+            replacement = tmp_path / "dev-config.toml.swp"
+            replacement.write_text("new contents")
+            os.replace(replacement, target)
+            assert watcher.wait(timeout=2) == {"config"}
+        finally:
+            watcher.close()
+
+    def test_detects_directory_permission_change(self, tmp_path, use_inotify):
+        """Test that attribute changes on watched directories are noticed."""
+        tmp_base = tmp_path / "tmp-base"
+        tmp_base.mkdir(mode=0o700)
+        watcher = PathWatcher({"tmp_base": [tmp_base]}, use_inotify=use_inotify)
+        try:
+            tmp_base.chmod(0o755)
+            assert watcher.wait(timeout=2) == {"tmp_base"}
+        finally:
+            watcher.close()
+
+    def test_steady_events_do_not_block_wait(self, tmp_path):
+        """Test that a constant stream of events still ends coalescing."""
+        tmp_base = tmp_path / "tmp-base"
+        tmp_base.mkdir()
+        watcher = PathWatcher({"tmp_base": [tmp_base]}, use_inotify=True)
+        stop = threading.Event()
+        # Bounded, so a wait that never stops coalescing fails rather than hangs
+        end = time.monotonic() + 3
+
+        def churn():
+            while not stop.is_set() and time.monotonic() < end:
+                (tmp_base / "f").write_text("x")
+                time.sleep(0.005)
+
+        thread = threading.Thread(target=churn)
+        thread.start()
+        try:
+            start = time.monotonic()
+            assert watcher.wait(timeout=2, settle=0.05) == {"tmp_base"}
+            assert time.monotonic() - start < 2
+        finally:
+            stop.set()
+            thread.join()
+            watcher.close()
+
+    def test_ignores_unrelated_files(self, tmp_path, use_inotify):
+        """Test that unrelated siblings do not report changes."""
+        watcher = PathWatcher(
+            {"config": [tmp_path / "dev-config.toml"]}, use_inotify=use_inotify
+        )
+        try:
+            (tmp_path / "unrelated.txt").write_text("x")
+            assert watcher.wait(timeout=0.6) == set()
+        finally:
+            watcher.close()
+
+
+class TestGuardrailsWatcher:
+    """Test cases for GuardrailsWatcher."""
+
+    @pytest.fixture
+    def validator(self, tmp_path, monkeypatch):
+        """Validator whose inputs all live under tmp_path."""
+        monkeypatch.chdir(tmp_path)
+        config = DevConfig(tmp_path / "dev-config.toml")
+        config._config["filesystem"]["tmp_base_dir"] = str(tmp_path / "tmp-base")
+        config._config["package_manager"]["venv_path"] = str(tmp_path / "venv")
+        return GuardrailsValidator(config=config)
+
+    def test_only_affected_probes_rerun(self, validator, tmp_path, use_inotify):
+        """Test that a venv change re-runs only the venv probe."""
+        watcher = GuardrailsWatcher(validator, use_inotify=use_inotify)
+        try:
+            assert watcher.evaluation.compliance["venv_properly_created"] is False
+
+            with patch.object(validator, "validate_git_operations") as mock_git:
+                (tmp_path / "venv").mkdir()
+                (tmp_path / "venv" / "pyvenv.cfg").touch()
+                evaluation, rerun = watcher.step(timeout=2)
+
+            mock_git.assert_not_called()
+            assert rerun == {"venv_exists"}
+            assert evaluation.compliance["venv_properly_created"] is True
+        finally:
+            watcher.close()
+
+    def test_step_times_out_without_changes(self, validator, use_inotify):
+        """Test that step returns None when nothing changed."""
+        watcher = GuardrailsWatcher(validator, use_inotify=use_inotify)
+        try:
+            assert watcher.step(timeout=0.1) is None
+        finally:
+            watcher.close()
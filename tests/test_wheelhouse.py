@@ -0,0 +1,72 @@
+"""Tests for offline wheelhouses."""
+
+import json
+
+import pytest
+
+from install_arch.wheelhouse import (
+    INDEX_NAME,
+    Wheelhouse,
+    build_requirements,
+    wheel_command,
+)
+
+
+@pytest.fixture
+def wheelhouse(tmp_path):
+    root = tmp_path / "wheels"
+    root.mkdir()
+    (root / "a-1.0-py3-none-any.whl").write_bytes(b"a" * 100)
+    (root / "b-2.0-py3-none-any.whl").write_bytes(b"b" * 50)
+    (root / "requirements.txt").write_text("a==1.0\nb==2.0\n")
+    return Wheelhouse(root)
+
+
+class TestWheelhouse:
+    """Test cases for Wheelhouse."""
+
+    def test_index_records_content(self, wheelhouse):
+        """Test that every wheel is indexed with its hash and size."""
+        assert not wheelhouse.exists()
+
+        written = wheelhouse.write_index()
+
+        assert wheelhouse.exists()
+        assert wheelhouse.wheels() == written
+        info = written["a-1.0-py3-none-any.whl"]
+        assert info.size == 100 and len(info.sha256) == 64
+        data = json.loads((wheelhouse.root / INDEX_NAME).read_text())
+        assert sorted(data["wheels"]) == sorted(written)
+
+    def test_verify_detects_changes(self, wheelhouse):
+        """Test that missing and modified wheels are reported."""
+        wheelhouse.write_index()
+        assert wheelhouse.verify() == []
+
+        (wheelhouse.root / "a-1.0-py3-none-any.whl").write_bytes(b"x" * 100)
+        (wheelhouse.root / "b-2.0-py3-none-any.whl").unlink()
+
+        assert sorted(wheelhouse.verify()) == [
+            "a-1.0-py3-none-any.whl",
+            "b-2.0-py3-none-any.whl",
+        ]
+
+    def test_find_links_args(self, wheelhouse):
+        """Test that installs never reach for a package index."""
+        args = wheelhouse.find_links_args()
+
+        assert args[0] == "--no-index"
+        assert args[args.index("--find-links") + 1] == str(wheelhouse.root)
+        assert args[-1] == str(wheelhouse.requirements_file)
+
+    def test_build_requirements(self, tmp_path):
+        """Test reading the build requirements from pyproject.toml."""
+        assert build_requirements(tmp_path) == []
+        (tmp_path / "pyproject.toml").write_text(
+            '[build-system]\nrequires = ["setuptools>=61", "wheel"]\n'
+        )
+        assert build_requirements(tmp_path) == ["setuptools>=61", "wheel"]
+
+        cmd = wheel_command(tmp_path, ["-r", "req.txt"], deps=False)
+        assert cmd[1:4] == ["-m", "pip", "wheel"]
+        assert "--no-deps" in cmd